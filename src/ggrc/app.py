@@ -74,7 +74,10 @@ def setup_error_handlers(app_):
 
 def init_models(app_):
   import ggrc.models
+  import ggrc.builder.json
   ggrc.models.init_app(app_)
+  # Builders created while the models were extended are stale
+  ggrc.builder.json.clear_builders()
 
 
 def configure_flask_login(app_):
@@ -170,6 +173,13 @@ def _enable_debug_toolbar():
     DebugToolbarExtension(app)
 
 
+def _enable_profiler():
+  """Record profiles of requests for /admin/profiles if it's enabled."""
+  if getattr(settings, "PROFILER_ENABLED", False):
+    from ggrc.utils import profiler
+    profiler.init_app(app)
+
+
 def _enable_jasmine():
   """Set jasmine sources and specs if it's enabled.
 
@@ -252,3 +262,4 @@ notifications.register_notification_listeners()
 _enable_debug_toolbar()
 _enable_jasmine()
 _display_sql_queries()
+_enable_profiler()
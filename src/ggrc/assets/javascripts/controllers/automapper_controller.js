@@ -36,13 +36,17 @@
     }
   };
 
-  var flashWarning = function () {
+  var flashWarning = function (deferred) {
+    var warning = deferred ?
+      'Automatic mappings will be created in the background because ' +
+      'there are too many new mappings' :
+      'Automatic mappings were not created because that would ' +
+      'result in too many new mappings';
     // timeout is required because a 'mapping created' success flash will show up
     // and we do not currently support multiple simultaneous flashes
     setTimeout(function () {
       $(document.body).trigger('ajax:flash', {
-        warning: 'Automatic mappings were not created because that would ' +
-        'result in too many new mappings'
+        warning: warning
       });
     }, 2000); // 2000 is a magic number that feels nice in the UI
   };
@@ -55,7 +59,7 @@
         limitExceeded = instance.extras &&
           instance.extras.automapping_limit_exceeded;
         if (limitExceeded) {
-          flashWarning();
+          flashWarning(instance.extras.automapping_deferred);
         } else {
           refresher.refreshInstance(instance);
         }
@@ -11,11 +11,14 @@ import sqlalchemy as sa
 from sqlalchemy.sql.expression import tuple_
 
 from ggrc import db
+from ggrc import settings
 from ggrc.automapper import rules
 from ggrc import login
 from ggrc.models.automapping import Automapping
+from ggrc.models import similarity_index
 from ggrc.models.relationship import Relationship
 from ggrc.rbac.permissions import is_allowed_update
+from ggrc.services import signals
 from ggrc.services.common import get_cache
 from ggrc.utils import benchmark
 
@@ -41,30 +44,38 @@ class AutomapperGenerator(object):
 
   Consumes automapping rules and newly created Relationships, creates
   autogenerated Relationships registering them in Automappings table.
+
+  The closure of automappings is computed level by level. The neighborhoods
+  of all objects touched by the previous level are fetched at once, the
+  implied edges are derived from the rules with set operations, and the
+  permitted edges that don't exist yet form the next level.
   """
 
   COUNT_LIMIT = 10000
+  NEIGHBORHOOD_CHUNK_SIZE = 1000
 
-  def __init__(self):
+  def __init__(self, use_count_limit=True):
     self.processed = set()
-    self.queue = set()
     self.cache = collections.defaultdict(set)
     self.auto_mappings = set()
+    self.use_count_limit = use_count_limit
+    self._auto_neighbors = collections.defaultdict(set)
+    self._type_permissions = {}
 
   def related(self, obj):
-    if obj in self.cache:
-      return self.cache[obj]
-
-    # Pre-fetch neighborhood for enqueued objects since we're gonna need these
-    # results in a few steps. This drastically reduces number of queries.
-    stubs = {s for rel in self.queue for s in rel}
-    stubs.add(obj)
-    self._populate_cache(stubs)
-
+    if obj not in self.cache:
+      self._populate_cache({obj})
     return self.cache[obj]
 
   def _populate_cache(self, stubs):
     """Fetch all mappings for objects in stubs, cache them in self.cache."""
+    stubs = [s for s in stubs if s not in self.cache]
+    for i in range(0, len(stubs), self.NEIGHBORHOOD_CHUNK_SIZE):
+      self._populate_cache_chunk(
+          set(stubs[i:i + self.NEIGHBORHOOD_CHUNK_SIZE]))
+
+  def _populate_cache_chunk(self, stubs):
+    """Fetch mappings for a chunk of stubs with a single query."""
     # Union is here to convince mysql to use two separate indices and
     # merge te results. Just using `or` results in a full-table scan
     # Manual column list avoids loading the full object which would also try to
@@ -82,6 +93,9 @@ class AutomapperGenerator(object):
                    Relationship.destination_id).in_(
                        [(s.type, s.id) for s in stubs]))
     ).all()
+    for stub in stubs:
+      # automappings generated so far are not in the database yet
+      self.cache[stub] = set(self._auto_neighbors.get(stub, ()))
     for (src_type, src_id, dst_type, dst_id) in relationships:
       src = Stub(src_type, src_id)
       dst = Stub(dst_type, dst_id)
@@ -96,44 +110,76 @@ class AutomapperGenerator(object):
   def order(src, dst):
     return (src, dst) if src < dst else (dst, src)
 
+  def _limit_exceeded(self):
+    return self.use_count_limit and len(self.auto_mappings) > self.COUNT_LIMIT
+
   def generate_automappings(self, relationship):
+    """Generate and store automappings implied by a new relationship.
+
+    Returns:
+      True if the automappings were stored, False if there were too many of
+      them.
+    """
     self.auto_mappings = set()
     with benchmark("Automapping generate_automappings"):
-      # initial relationship is special since it is already created and
-      # processing it would abort the loop so we manually enqueue the
-      # neighborhood
-      src = Stub.from_source(relationship)
-      dst = Stub.from_destination(relationship)
-      self._step(src, dst)
-      self._step(dst, src)
-      while self.queue:
-        if len(self.auto_mappings) > self.COUNT_LIMIT:
-          break
-        src, dst = entry = self.queue.pop()
-
-        if not (self._can_map_to(src, relationship) and
-                self._can_map_to(dst, relationship)):
-          continue
-
-        created = self._ensure_relationship(src, dst)
-        self.processed.add(entry)
-        if not created:
-          # If the edge already exists it means that auto mappings for it have
-          # already been processed and it is safe to cut here.
-          continue
-        self._step(src, dst)
-        self._step(dst, src)
-
-      if len(self.auto_mappings) <= self.COUNT_LIMIT:
+      # initial relationship is special since it is already created, so its
+      # neighborhood is processed without any checks
+      level = {self.order(Stub.from_source(relationship),
+                          Stub.from_destination(relationship))}
+      while level and not self._limit_exceeded():
+        level = self._next_level(level, relationship)
+
+      if not self._limit_exceeded():
         self._flush(relationship)
-      else:
-        relationship._json_extras = {
-            'automapping_limit_exceeded': True
-        }
+        return True
+      relationship._json_extras = {
+          'automapping_limit_exceeded': True
+      }
+      if getattr(settings, "AUTOMAPPING_DEFER_LIMIT_EXCEEDED", False):
+        relationship._json_extras['automapping_deferred'] = True
+        relationship._automapping_deferred = True
+      return False
 
-  @staticmethod
-  def _can_map_to(obj, parent_relationship):
-    return is_allowed_update(obj.type, obj.id, parent_relationship.context)
+  def _next_level(self, level, parent_relationship):
+    """Create automappings implied by the edges of the current level.
+
+    Returns:
+      set of created edges.
+    """
+    self._populate_cache({stub for edge in level for stub in edge})
+    candidates = set()
+    for src, dst in level:
+      candidates |= self._implied(src, dst)
+      candidates |= self._implied(dst, src)
+    candidates -= self.processed
+    self.processed |= candidates
+
+    created = {
+        (src, dst) for src, dst in candidates
+        if self._can_map_to(src, parent_relationship) and
+        self._can_map_to(dst, parent_relationship) and
+        not self._exists(src, dst)
+    }
+    for src, dst in created:
+      self._add_automapping(src, dst)
+    return created
+
+  def _implied(self, src, dst):
+    """Get edges from src to neighbors of dst implied by the rules."""
+    mappings = rules.rules[src.type, dst.type]
+    if not mappings:
+      return set()
+    return {self.order(obj, src) for obj in self.cache[dst]
+            if obj.type in mappings and obj != src}
+
+  def _can_map_to(self, obj, parent_relationship):
+    """Check update permission once per type unless it is object specific."""
+    key = (obj.type, parent_relationship.context)
+    if key not in self._type_permissions:
+      self._type_permissions[key] = is_allowed_update(
+          obj.type, None, parent_relationship.context)
+    return self._type_permissions[key] or is_allowed_update(
+        obj.type, obj.id, parent_relationship.context)
 
   def _flush(self, parent_relationship):
     """Manually INSERT generated automappings."""
@@ -175,6 +221,8 @@ class AutomapperGenerator(object):
           "automapping_id": automapping_id}
           for src, dst in self.auto_mappings
           if (src, dst) != original]))  # (src, dst) is sorted
+      similarity_index.mark_changed(
+          stub for pair in self.auto_mappings for stub in pair)
       cache = get_cache(create=True)
       if cache:
         # Add inserted relationships into new objects collection of the cache,
@@ -187,38 +235,29 @@ class AutomapperGenerator(object):
             )
         )
 
-  def _step(self, src, dst):
-    mappings = rules.rules[src.type, dst.type]
-    if mappings:
-      dst_related = (o for o in self.related(dst)
-                     if o.type in mappings and o != src)
-      for r in dst_related:
-        entry = self.order(r, src)
-        if entry not in self.processed:
-          self.queue.add(entry)
-
-  def _ensure_relationship(self, src, dst):
-    """Create the relationship if not exists already.
-
-    Returns:
-      True if a relationship was created;
-      False otherwise.
-    """
+  def _exists(self, src, dst):
     # even though self.cache is defaultdict, self.cache[key] adds key
     # to self.cache if it is not present, and we should avoid it
-    if dst in self.cache.get(src, set()):
-      return False
-    if src in self.cache.get(dst, set()):
-      return False
+    return (dst in self.cache.get(src, set()) or
+            src in self.cache.get(dst, set()))
 
+  def _add_automapping(self, src, dst):
+    """Register a new automapping and add it to cached neighborhoods."""
     self.auto_mappings.add((src, dst))
-
+    self._auto_neighbors[src].add(dst)
+    self._auto_neighbors[dst].add(src)
     if src in self.cache:
       self.cache[src].add(dst)
     if dst in self.cache:
       self.cache[dst].add(src)
 
-    return True
+
+def start_deferred_automappings(sender, obj=None, **_):
+  """Start background task for automappings that exceeded the limit."""
+  # pylint: disable=unused-argument
+  if getattr(obj, "_automapping_deferred", False):
+    from ggrc import views
+    views.start_generate_automappings(obj.id)
 
 
 def register_automapping_listeners():
@@ -232,3 +271,5 @@ def register_automapping_listeners():
         automapper.generate_automappings(obj)
 
   sa.event.listen(sa.orm.session.Session, "after_flush", automap)
+  signals.Restful.model_posted_after_commit.connect(
+      start_deferred_automappings, Relationship)
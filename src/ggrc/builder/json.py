@@ -48,6 +48,18 @@ def get_json_builder(obj):
   return builder
 
 
+def clear_builders():
+  """Remove cached builders and their compiled publishers.
+
+  Builders gather the attributes of a model when they are created, so they
+  must be dropped after models are extended, e.g. by extension modules or
+  lazy mixins.
+  """
+  for name, value in vars(ggrc.builder).items():
+    if isinstance(value, Builder):
+      delattr(ggrc.builder, name)
+
+
 def publish_base_properties(obj):
   """Return a dict with selfLink and viewLink for obj."""
   ret = {}
@@ -512,7 +524,17 @@ def publish_representation(resource):
 
 
 class Builder(AttributeInfo):
-  """JSON Dictionary builder for ggrc.models.* objects and their mixins."""
+  """JSON Dictionary builder for ggrc.models.* objects and their mixins.
+
+  Publishing an object does not reflect on its attributes. For every set of
+  inclusions the builder compiles a publisher with one function per attribute
+  that already knows how to publish it, see compile_publisher.
+  """
+
+  def __init__(self, tgt_class):
+    super(Builder, self).__init__(tgt_class)
+    self._tgt_class = tgt_class
+    self._publishers = {}
 
   def generate_link_object_for(
           self, obj, inclusions, include, inclusion_filter):
@@ -667,6 +689,128 @@ class Builder(AttributeInfo):
 
     return result
 
+  def _compile_attr(self, attr_name, inclusions, include):
+    """Get a function publishing ``attr_name`` of an object.
+
+    The returned function takes the object and the inclusion filter and
+    returns the same value as publish_attr, but the type of the attribute is
+    resolved only once.
+    """
+    # pylint: disable=too-many-return-statements
+    tgt_class = self._tgt_class
+    class_attr = getattr(tgt_class, attr_name)
+    custom_publish = getattr(tgt_class, "_custom_publish", {})
+
+    if attr_name in custom_publish:
+      custom = custom_publish[attr_name]
+      return lambda obj, _: custom(obj)
+
+    if isinstance(class_attr, AssociationProxy):
+      if getattr(class_attr, 'publish_raw', False):
+        def publish_raw(obj, _):
+          published_attr = getattr(obj, attr_name)
+          if hasattr(published_attr, "copy"):
+            return published_attr.copy()
+          return published_attr
+        return publish_raw
+      remote_attr = class_attr.remote_attr
+      if (include or
+              isinstance(remote_attr, (property, PolymorphicRelationship)) or
+              len(list(remote_attr.property.mapper.self_and_descendants)) > 1):
+        return lambda obj, inclusion_filter: self.publish_association_proxy(
+            obj, attr_name, class_attr, inclusions, include, inclusion_filter)
+      local_name = class_attr.local_attr.key
+      target_name = list(remote_attr.property.local_columns)[0].key
+      target_type = remote_attr.property.mapper.class_.__name__
+
+      def publish_proxy_stubs(obj, inclusion_filter):
+        return [
+            LazyStubRepresentation(target_type, getattr(o, target_name))
+            for o in getattr(obj, local_name)
+            if (not inclusion_filter) or inclusion_filter(o)]
+      return publish_proxy_stubs
+
+    if isinstance(class_attr, InstrumentedAttribute) and \
+            isinstance(class_attr.property, RelationshipProperty):
+      rel_property = class_attr.property
+      if (rel_property.uselist or include or rel_property.backref or
+              rel_property.mapper.class_.__mapper__.polymorphic_on
+              is not None):
+        return lambda obj, inclusion_filter: self.publish_relationship(
+            obj, attr_name, class_attr, inclusions, include, inclusion_filter)
+      target_type = rel_property.mapper.class_.__name__
+      target_name = list(rel_property.local_columns)[0].key
+
+      def publish_stub(obj, _):
+        attr_value = getattr(obj, target_name)
+        if attr_value is not None:
+          return LazyStubRepresentation(target_type, attr_value)
+        return None
+      return publish_stub
+
+    if class_attr.__class__.__name__ == 'property':
+      if inclusions and not include:
+        return lambda obj, inclusion_filter: self.publish_link(
+            obj, attr_name, inclusions, include, inclusion_filter)
+      id_name = '{0}_id'.format(attr_name)
+      type_name = '{0}_type'.format(attr_name)
+
+      def publish_property_stub(obj, _):
+        if getattr(obj, id_name):
+          return LazyStubRepresentation(getattr(obj, type_name),
+                                        getattr(obj, id_name))
+        return None
+      return publish_property_stub
+
+    return None
+
+  def compile_publisher(self, inclusions):
+    """Compile a function publishing the attributes of an object.
+
+    Attributes that are read as they are, e.g. columns, are published with
+    getattr, all other attributes with the functions from _compile_attr.
+
+    Returns:
+      function with the arguments of _publish_attrs_for, without attrs and
+      inclusions.
+    """
+    plain_names = []
+    compiled = []
+    for attr in self._publish_attrs:
+      attr_name = attr.attr_name if hasattr(attr, '__call__') else attr
+      local_inclusion = ()
+      for inclusion in inclusions:
+        if inclusion[0] == attr_name:
+          local_inclusion = inclusion
+          break
+      publish_attr = self._compile_attr(
+          attr_name, local_inclusion[1:], len(local_inclusion) > 0)
+      if publish_attr is None:
+        plain_names.append(attr_name)
+      else:
+        compiled.append((attr_name, publish_attr))
+    plain_names = tuple(plain_names)
+    compiled = tuple(compiled)
+
+    def publish_attrs(obj, json_obj, inclusion_filter=None,
+                      attribute_whitelist=None):
+      for attr_name in plain_names:
+        if not attribute_whitelist or attr_name in attribute_whitelist:
+          json_obj[attr_name] = getattr(obj, attr_name)
+      for attr_name, publish_attr in compiled:
+        if not attribute_whitelist or attr_name in attribute_whitelist:
+          json_obj[attr_name] = publish_attr(obj, inclusion_filter)
+    return publish_attrs
+
+  def get_publisher(self, inclusions):
+    """Get the compiled publisher for a set of inclusions."""
+    key = frozenset(inclusions)
+    publisher = self._publishers.get(key)
+    if publisher is None:
+      publisher = self.compile_publisher(inclusions)
+      self._publishers[key] = publisher
+    return publisher
+
   def _publish_attrs_for(
           self, obj, attrs, json_obj, inclusions=None, inclusion_filter=None,
           attribute_whitelist=None):
@@ -707,9 +851,8 @@ class Builder(AttributeInfo):
     """
     inclusions = tuple((attr,) for attr in self._include_links)
     inclusions = tuple(set(inclusions).union(set(extra_inclusions)))
-    return self._publish_attrs_for(
-        obj, self._publish_attrs, json_obj, inclusions, inclusion_filter,
-        attribute_whitelist)
+    publisher = self.get_publisher(inclusions)
+    return publisher(obj, json_obj, inclusion_filter, attribute_whitelist)
 
   @classmethod
   def do_update_attrs(cls, obj, json_obj, attrs):
@@ -3,5 +3,7 @@
 
 
 from .localcache import LocalCache
+from .lrucache import LRUCache
 from .memcache import MemCache
+from .tieredcache import TieredCache
 from .cachemanager import CacheManager
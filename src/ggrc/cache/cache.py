@@ -174,9 +174,15 @@ class Cache:
   def get_multi(self, *_):
     return None
 
+  def get_local_multi(self, *_):
+    return {}
+
   def add_multi(self, *_):
     return None
 
+  def set_multi(self, *_):
+    return None
+
   def update_multi(self, *_):
     return None
 
@@ -151,6 +151,16 @@ class CacheManager:
     """
     return self.cache_object.get_multi(data)
 
+  def bulk_get_local(self, data):
+    """Perform Bulk Get operations only in the in-process cache tier.
+
+    Args:
+      data: keys for bulk get
+    Returns:
+     Result of cache get_local_multi, empty if there is no local tier
+    """
+    return self.cache_object.get_local_multi(data)
+
   def bulk_add(self, data, expiration_time=0):
     """Perform Bulk Add operations in cache for specified data.
 
@@ -161,6 +171,18 @@ class CacheManager:
     """
     return self.cache_object.add_multi(data, expiration_time)
 
+  def bulk_set(self, data, expiration_time=0):
+    """Perform Bulk Set operations in cache for specified data.
+
+    Unlike bulk_add, existing entries are overwritten.
+
+    Args:
+      data: dictionary of keys and values for bulk set
+    Returns:
+     Result of cache set_multi
+    """
+    return self.cache_object.set_multi(data, expiration_time)
+
   def bulk_update(self, data, expiration_time=0):
     """Perform Bulk update operations in cache for specified data.
 
@@ -179,7 +201,7 @@ class CacheManager:
           get_result[data_key][update_key] = update_value
     return self.cache_object.update_multi(get_result, expiration_time)
 
-  def bulk_delete(self, data, lockadd_seconds):
+  def bulk_delete(self, data, lockadd_seconds=0):
     """Perform Bulk Delete operations in cache for specified data.
 
     Args:
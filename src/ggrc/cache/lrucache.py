@@ -0,0 +1,82 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Size and TTL bounded least recently used cache."""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache(object):
+  """Thread safe in-process LRU cache with per entry time to live.
+
+  Attributes:
+    max_size: maximum number of entries, least recently used entries are
+              evicted when it is exceeded
+    ttl: number of seconds after which an entry expires, 0 for no expiry
+  """
+
+  def __init__(self, max_size=1000, ttl=60, clock=time.time):
+    self.max_size = max_size
+    self.ttl = ttl
+    self._clock = clock
+    self._lock = threading.Lock()
+    self._entries = OrderedDict()
+    self._counters = {"hits": 0, "misses": 0, "evictions": 0, "expired": 0}
+
+  def __len__(self):
+    return len(self._entries)
+
+  def get(self, key, default=None):
+    """Get a value and mark it as the most recently used."""
+    with self._lock:
+      entry = self._entries.pop(key, None)
+      if entry is None:
+        self._counters["misses"] += 1
+        return default
+      expires, value = entry
+      if expires and expires < self._clock():
+        self._counters["expired"] += 1
+        self._counters["misses"] += 1
+        return default
+      self._entries[key] = entry
+      self._counters["hits"] += 1
+      return value
+
+  def set(self, key, value):
+    """Store a value, evicting least recently used entries if needed."""
+    if self.max_size <= 0:
+      return
+    expires = self._clock() + self.ttl if self.ttl else None
+    with self._lock:
+      self._entries.pop(key, None)
+      self._entries[key] = (expires, value)
+      while len(self._entries) > self.max_size:
+        self._entries.popitem(last=False)
+        self._counters["evictions"] += 1
+
+  def delete(self, key):
+    with self._lock:
+      self._entries.pop(key, None)
+
+  def clear(self):
+    with self._lock:
+      self._entries.clear()
+
+  def get_stats(self):
+    """Get entry count, hit rate and eviction counters."""
+    with self._lock:
+      stats = dict(self._counters)
+      stats["size"] = len(self._entries)
+    stats["max_size"] = self.max_size
+    stats["ttl"] = self.ttl
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = round(float(stats["hits"]) / lookups, 4) \
+        if lookups else None
+    return stats
+
+  def reset_stats(self):
+    with self._lock:
+      for name in self._counters:
+        self._counters[name] = 0
@@ -2,17 +2,23 @@
 # Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
 
 
+import time
+
 from google.appengine.api import memcache
 from cache import Cache
 from cache import all_cache_entries
 from collections import OrderedDict
 from copy import deepcopy
+from stats import CacheStats
 
 """
     Memcache implements the remote AppEngine Memcache mechanism
 
 """
 class MemCache(Cache):
+  # shared by all instances, a new MemCache is created for every request
+  stats = CacheStats()
+
   def __init__(self):
     self.name = 'memcache'
     self.client = None
@@ -41,8 +47,6 @@ class MemCache(Cache):
 
     if not self.is_caching_supported(category, resource):
       return None
-    # TODO(dan): use memcache.Client.get_multi() instead of gets()
-    #
     data = OrderedDict()
     cache_key = self.get_key(category, resource)
     if cache_key is None:
@@ -53,8 +57,9 @@ class MemCache(Cache):
     else:
       if ids is None:
         return None
+    cached = self.get_multi(cache_key + ":" + str(id) for id in ids)
     for id in ids:
-      attrvalues= self.memcache_client.gets(cache_key + ":" + str(id))
+      attrvalues = cached.get(cache_key + ":" + str(id))
       if attrvalues is not None:
         if attrs is None:
           data[id] = attrvalues
@@ -180,61 +185,84 @@ class MemCache(Cache):
     return entries
 
   def add_multi(self, data, expiration_time=0):
-    """ Add multiple entries to memcache
+    """ Add multiple entries to memcache in a single call
     There are limits to size of data in memcache
 
     Args:
-      category: collection or stub
-      resource: regulation, controls, etc.
-      data: dictionary containing ids and dictionary of attrs
+      data: dictionary of cache keys and values
+      expiration_time: expiration time of the entries
 
     Returns:
-      memcache client API add_multi
+      memcache client API add_multi, list of keys that were not added
     """
     # TODO(dan): import scenarios, add will return non-empty list, we should invoke update_multi for those items
     #
-    return self.memcache_client.add_multi(data, expiration_time)
+    start = time.time()
+    result = self.memcache_client.add_multi(data, expiration_time)
+    self.stats.record_set(list(data), time.time() - start)
+    return result
+
+  def set_multi(self, data, expiration_time=0):
+    """ Set multiple entries in memcache in a single call, overwriting
+    existing values
+
+    Args:
+      data: dictionary of cache keys and values
+      expiration_time: expiration time of the entries
+
+    Returns:
+      memcache client API set_multi, list of keys that were not set
+    """
+    start = time.time()
+    result = self.memcache_client.set_multi(data, expiration_time)
+    self.stats.record_set(list(data), time.time() - start)
+    return result
 
   def get_multi(self, data):
-    """ Get multiple entries from memcache
+    """ Get multiple entries from memcache in a single call
     There are limits to size of data in memcache
 
     Args:
-      category: collection or stub
-      resource: regulation, controls, etc.
-      data: dictionary containing ids
+      data: list of cache keys
 
     Returns:
-      memcache client API get_multi
+      memcache client API get_multi, dictionary of found keys and values
     """
-    return self.memcache_client.get_multi(data, '', None, True)
+    keys = list(data)
+    start = time.time()
+    result = self.memcache_client.get_multi(keys, '', None, True)
+    self.stats.record_get(keys, result, time.time() - start)
+    return result
 
   def update_multi(self, data, expiration_time=0):
     """ update multiple entries to memcache
     There are limits to size of data in memcache
 
     Args:
-      category: collection or stub
-      resource: regulation, controls, etc.
-      data: dictionary containing ids and dictionary of attrs
+      data: dictionary of cache keys and values
 
     Returns:
       memcache client API cas_multi (compare and set)
     """
-    return self.memcache_client.cas_multi(data, expiration_time)
+    start = time.time()
+    result = self.memcache_client.cas_multi(data, expiration_time)
+    self.stats.record_set(list(data), time.time() - start)
+    return result
 
-  def remove_multi(self, data, lockadd_seconds):
-    """ delete multiple entries to memcache
+  def remove_multi(self, data, lockadd_seconds=0):
+    """ delete multiple entries from memcache in a single call
 
     Args:
-      category: collection or stub
-      resource: regulation, controls, etc.
-      data:  list of keys
+      data: list of cache keys
 
     Returns:
-      memcache client API delete_multi
+      memcache client API delete_multi, True if all deletes succeeded
     """
-    return self.memcache_client.delete_multi(data, lockadd_seconds)
+    keys = list(data)
+    start = time.time()
+    result = self.memcache_client.delete_multi(keys, lockadd_seconds)
+    self.stats.record_delete(keys, time.time() - start)
+    return result
 
   def clean(self):
     """ flush everything from memcache """
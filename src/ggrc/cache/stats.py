@@ -0,0 +1,77 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Hit, miss and latency counters for cache operations."""
+
+import threading
+from collections import defaultdict
+
+
+OTHER_RESOURCE = "_other"
+
+
+def resource_from_key(key):
+  """Get resource type from a 'collection:<resource>:<id>' cache key."""
+  parts = str(key).split(":")
+  if len(parts) == 3 and parts[0] == "collection":
+    return parts[1]
+  return OTHER_RESOURCE
+
+
+def _new_counter():
+  return {"hits": 0, "misses": 0, "sets": 0, "deletes": 0,
+          "calls": 0, "seconds": 0.0}
+
+
+class CacheStats(object):
+  """Per resource type counters of cache operations.
+
+  A single instance is shared by all cache objects of a process, so that the
+  counters outlive the cache objects created for each request.
+  """
+
+  def __init__(self):
+    self._lock = threading.Lock()
+    self._counters = defaultdict(_new_counter)
+
+  def _record(self, keys, seconds, counter_name, found=None):
+    """Add a batched operation on keys to the counters of their resources."""
+    if not keys:
+      return
+    by_resource = defaultdict(list)
+    for key in keys:
+      by_resource[resource_from_key(key)].append(key)
+    with self._lock:
+      for resource, resource_keys in by_resource.iteritems():
+        counter = self._counters[resource]
+        counter["calls"] += 1
+        # the latency of a batch is split among the resources it touched
+        counter["seconds"] += seconds * len(resource_keys) / len(keys)
+        if found is None:
+          counter[counter_name] += len(resource_keys)
+          continue
+        hits = sum(1 for key in resource_keys if key in found)
+        counter["hits"] += hits
+        counter["misses"] += len(resource_keys) - hits
+
+  def record_get(self, keys, found, seconds):
+    """Record a get of keys where found contains keys that were hits."""
+    self._record(keys, seconds, None, found)
+
+  def record_set(self, keys, seconds):
+    self._record(keys, seconds, "sets")
+
+  def record_delete(self, keys, seconds):
+    self._record(keys, seconds, "deletes")
+
+  def get(self, resource=None):
+    """Get a copy of counters for one resource or a dict of all of them."""
+    with self._lock:
+      if resource is not None:
+        return dict(self._counters.get(resource) or _new_counter())
+      return {name: dict(counter)
+              for name, counter in self._counters.iteritems()}
+
+  def reset(self):
+    with self._lock:
+      self._counters.clear()
@@ -0,0 +1,169 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""
+    TieredCache keeps hot memcache entries in an in-process LRU cache
+
+Local entries are stored under the cache generation that was current when
+they were read. The generation is a counter in memcache that is incremented
+whenever entries are updated or removed, e.g. in
+update_memcache_after_commit, so after a commit on any instance the entries
+of all other instances stop matching and are read from memcache again.
+The generation is read from memcache once per request.
+"""
+
+import cPickle
+import logging
+import time
+
+from flask import g
+from flask import has_request_context
+
+from ggrc import settings
+from lrucache import LRUCache
+from memcache import MemCache
+
+
+logger = logging.getLogger(__name__)
+
+GENERATION_KEY = "cache:generation"
+
+
+def _new_generation():
+  # a generation that was evicted from memcache must not be restarted from a
+  # value that old local entries could still be stored under
+  return int(time.time() * 1000)
+
+
+class TieredCache(MemCache):
+  """MemCache with an in-process LRU tier for multi key operations.
+
+  Attributes:
+    local: LRUCache shared by all instances of a process
+    local_excluded_prefixes: keys that are always read from memcache, because
+                             they are updated without invalidating the cache
+  """
+  local = None
+  local_excluded_prefixes = ("permissions:list", "DeleteOp:", GENERATION_KEY,
+                             "query_totals:generation")
+
+  def __init__(self):
+    MemCache.__init__(self)
+    if TieredCache.local is None:
+      TieredCache.local = LRUCache(
+          max_size=getattr(settings, "LOCAL_CACHE_SIZE", 1000),
+          ttl=getattr(settings, "LOCAL_CACHE_TTL", 60),
+      )
+
+  def is_local(self, key):
+    return not str(key).startswith(self.local_excluded_prefixes)
+
+  def get_generation(self):
+    """Get current cache generation, at most once per request."""
+    if has_request_context():
+      generation = getattr(g, "cache_generation", None)
+      if generation is not None:
+        return generation
+    generation = self.memcache_client.get(GENERATION_KEY)
+    if generation is None:
+      self.memcache_client.add(GENERATION_KEY, _new_generation())
+      generation = self.memcache_client.get(GENERATION_KEY)
+    self._remember_generation(generation)
+    return generation
+
+  @staticmethod
+  def _remember_generation(generation):
+    if has_request_context():
+      g.cache_generation = generation
+
+  def invalidate(self):
+    """Start a new cache generation, making all local entries stale."""
+    self.local.clear()
+    generation = self.memcache_client.incr(
+        GENERATION_KEY, initial_value=_new_generation())
+    if generation is None:
+      logger.error("CACHE: Failed to increment cache generation")
+    self._remember_generation(generation)
+
+  def _store_local(self, data, generation):
+    if generation is None:
+      return
+    for key, value in data.iteritems():
+      if self.is_local(key):
+        self.local.set((generation, key),
+                       cPickle.dumps(value, cPickle.HIGHEST_PROTOCOL))
+
+  def get_local_multi(self, data):
+    """ Get entries that are in the local tier, without calling memcache
+
+    Args:
+      data: list of cache keys
+
+    Returns:
+      dictionary of found keys and values
+    """
+    generation = self.get_generation()
+    result = {}
+    for key in data:
+      if not self.is_local(key):
+        continue
+      value = self.local.get((generation, key))
+      if value is not None:
+        result[key] = cPickle.loads(value)
+    return result
+
+  def get_multi(self, data):
+    """ Get multiple entries from the local tier or memcache
+
+    Args:
+      data: list of cache keys
+
+    Returns:
+      dictionary of found keys and values
+    """
+    keys = list(data)
+    generation = self.get_generation()
+    result = self.get_local_multi(keys)
+    missing = [key for key in keys if key not in result]
+    if missing:
+      found = MemCache.get_multi(self, missing) or {}
+      self._store_local(found, generation)
+      result.update(found)
+    return result
+
+  def add_multi(self, data, expiration_time=0):
+    generation = self.get_generation()
+    failed = MemCache.add_multi(self, data, expiration_time)
+    self._store_local(
+        {k: v for k, v in data.iteritems() if k not in (failed or [])},
+        generation)
+    return failed
+
+  def set_multi(self, data, expiration_time=0):
+    generation = self.get_generation()
+    failed = MemCache.set_multi(self, data, expiration_time)
+    self._store_local(
+        {k: v for k, v in data.iteritems() if k not in (failed or [])},
+        generation)
+    return failed
+
+  def update_multi(self, data, expiration_time=0):
+    result = MemCache.update_multi(self, data, expiration_time)
+    self.invalidate()
+    return result
+
+  def remove_multi(self, data, lockadd_seconds=0):
+    result = MemCache.remove_multi(self, data, lockadd_seconds)
+    self.invalidate()
+    return result
+
+  def clean(self):
+    self.local.clear()
+    return MemCache.clean(self)
+
+  def get_stats(self):
+    """Get local tier and memcache statistics."""
+    return {
+        "local": self.local.get_stats(),
+        "memcache": self.stats.get(),
+    }
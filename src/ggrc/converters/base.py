@@ -3,6 +3,7 @@
 
 """Base objects for csv file converters."""
 
+import itertools
 from collections import defaultdict
 
 from ggrc import settings
@@ -46,6 +47,8 @@ class Converter(object):
       "Task Group Task",
   ]
 
+  EXPORT_CHUNK_SIZE = 500
+
   priority_columns = [
       "email",
       "slug",
@@ -91,6 +94,37 @@ class Converter(object):
       csv_data.extend(block_data)
     return csv_data
 
+  def to_stream(self, chunk_size=None):
+    """Get a generator of csv rows for all exported blocks.
+
+    The rows are the same as the ones returned by to_array, but block bodies
+    are generated while the rows are consumed, with objects loaded in id
+    chunks, so memory use does not grow with the size of the export. Block
+    converters are created before this returns.
+    """
+    with benchmark("Create block converters"):
+      self.block_converters_from_ids(load_rows=False)
+    return self._generate_block_rows(chunk_size or self.EXPORT_CHUNK_SIZE)
+
+  def _generate_block_rows(self, chunk_size):
+    """Generate rows of all blocks, padded to the widest block."""
+    if not self.block_converters:
+      return
+    # multi block csv must have first column empty
+    width = max(c.csv_width for c in self.block_converters) + 1
+    for block_converter in self.block_converters:
+      csv_header, csv_body = block_converter.to_stream(chunk_size)
+      two_empty_lines = [[], []]
+      block_data = itertools.chain(csv_header, csv_body, two_empty_lines)
+      for index, line in enumerate(block_data):
+        line = [""] + line
+        if index == 0:
+          line[0] = "Object type"
+        elif index == 1:
+          line[0] = block_converter.name
+        line.extend([""] * (width - len(line)))
+        yield line
+
   def _start_compute_attributes_job(self):
     from ggrc import views
     revision_ids = []
@@ -121,10 +155,14 @@ class Converter(object):
     for converter in self.block_converters:
       converter.row_converters_from_csv()
 
-  def block_converters_from_ids(self):
+  def block_converters_from_ids(self, load_rows=True):
     """ fill the block_converters class variable
 
     Generate block converters from a list of tuples with an object name and ids
+
+    Args:
+      load_rows: create row converters for all objects right away. Streamed
+        exports create them in chunks instead.
     """
     object_map = {o.__name__: o for o in self.exportable.values()}
     for object_data in self.ids_by_type:
@@ -140,7 +178,8 @@ class Converter(object):
                                          fields=fields, object_ids=object_ids,
                                          class_name=class_name)
         block_converter.check_block_restrictions()
-        block_converter.row_converters_from_ids()
+        if load_rows:
+          block_converter.row_converters_from_ids()
         self.block_converters.append(block_converter)
 
   def block_converters_from_csv(self):
@@ -11,24 +11,33 @@ from logging import getLogger
 from collections import defaultdict
 from collections import OrderedDict
 from collections import Counter
+from contextlib import contextmanager
 
 from cached_property import cached_property
+from sqlalchemy import event
 from sqlalchemy import exc
 from sqlalchemy import or_
 from sqlalchemy import and_
+from sqlalchemy.orm import object_session
 from sqlalchemy.orm.exc import UnmappedInstanceError
 
 from ggrc import db
 from ggrc import models
+from ggrc import settings
+from ggrc.models.reflection import AttributeInfo
 from ggrc.rbac import permissions
 from ggrc.utils import benchmark
+from ggrc.utils import html_cleaner
 from ggrc.utils import structures
 from ggrc.converters import errors
+from ggrc.converters import get_exportables
 from ggrc.converters import get_shared_unique_rules
 from ggrc.converters import pre_commit_checks
 from ggrc.converters.base_row import RowConverter
+from ggrc.converters.handlers import handlers
 from ggrc.converters.import_helper import get_column_order
 from ggrc.converters.import_helper import get_object_column_definitions
+from ggrc.services.common import get_cache
 from ggrc.services.common import get_modified_objects
 from ggrc.services.common import update_snapshot_index
 from ggrc.services.common import update_memcache_after_commit
@@ -44,6 +53,9 @@ logger = getLogger(__name__)
 
 CACHE_EXPIRY_IMPORT = 600
 
+# Number of values in a single prefetch query
+PREFETCH_CHUNK_SIZE = 1000
+
 
 class BlockConverter(object):
   # pylint: disable=too-many-public-methods
@@ -102,6 +114,9 @@ class BlockConverter(object):
     self._roles_cache = None
     self._user_roles_cache = None
     self._ca_definitions_cache = None
+    self._prefetched = {}
+    self._relationships_cache = None
+    self._cache_relationships = False
     self.converter = converter
     self.offset = options.get("offset", 0)
     self.object_class = options.get("object_class")
@@ -246,6 +261,169 @@ class BlockConverter(object):
       self._mapping_cache = self._create_mapping_cache()
     return self._mapping_cache
 
+  def _get_prefetch_values(self, model, key):
+    """Get all values in columns that refer to model objects by key.
+
+    These are the block key column (slug or email) for objects of the block,
+    user columns for people and mapping columns for mapped objects.
+    """
+    exportables = get_exportables()
+    indexes = []
+    for index, (attr_name, header) in enumerate(self.headers.items()):
+      handler = header.get("handler")
+      if model is self.object_class and attr_name == key:
+        indexes.append(index)
+      elif (key == "email" and model is models.Person and
+            issubclass(handler, handlers.UserColumnHandler)):
+        indexes.append(index)
+      elif (key == "slug" and
+            issubclass(handler, handlers.MappingColumnHandler) and
+            exportables.get(header.get("attr_name")) is model):
+        indexes.append(index)
+    values = set()
+    for row in self.rows:
+      for index in indexes:
+        if index < len(row):
+          values.update(line.strip().lower()
+                        for line in row[index].splitlines() if line.strip())
+    return values
+
+  def _prefetch(self, model, key):
+    """Fetch all model objects referred to by key in the block.
+
+    Returns:
+      dict with all lower case values found in the block columns as keys and
+      the matching objects or None as values.
+    """
+    values = sorted(self._get_prefetch_values(model, key))
+    prefetched = dict.fromkeys(values)
+    column = getattr(model, key)
+    with benchmark("Prefetch {} by {}".format(model.__name__, key)):
+      for start in range(0, len(values), PREFETCH_CHUNK_SIZE):
+        chunk = values[start:start + PREFETCH_CHUNK_SIZE]
+        for obj in model.query.filter(column.in_(chunk)):
+          prefetched[getattr(obj, key).lower()] = obj
+    return prefetched
+
+  def find_object(self, model, key, value):
+    """Find an object by a unique key such as slug or email.
+
+    Objects for all values of the block columns that refer to the model are
+    loaded with a few queries when the first one is needed. Values that were
+    not prefetched and objects created during this import, which are not in
+    the prefetched results, are queried one by one.
+    """
+    if (model, key) not in self._prefetched:
+      self._prefetched[model, key] = self._prefetch(model, key)
+    prefetched = self._prefetched[model, key]
+    lower_value = value.lower() if isinstance(value, basestring) else value
+    obj = prefetched.get(lower_value)
+    if obj is None and (lower_value not in prefetched or
+                        value in self.converter.new_objects[model]):
+      obj = model.query.filter_by(**{key: value}).first()
+    return obj
+
+  def _create_relationships_cache(self):
+    """Get relationships between block objects and mapped objects."""
+    exportables = get_exportables()
+    mapped_types = set()
+    for header in self.headers.values():
+      model = exportables.get(header.get("attr_name"))
+      if model and issubclass(header.get("handler"),
+                              handlers.MappingColumnHandler):
+        mapped_types.add(model.__name__)
+    ids = sorted({row_converter.obj.id for row_converter in self.row_converters
+                  if row_converter.obj is not None and row_converter.obj.id})
+    cache = {}
+    if not mapped_types or not ids:
+      return cache
+    relationship = models.Relationship
+    object_type = self.object_class.__name__
+    with benchmark("Prefetch block relationships"):
+      for start in range(0, len(ids), PREFETCH_CHUNK_SIZE):
+        chunk = ids[start:start + PREFETCH_CHUNK_SIZE]
+        query = relationship.query.filter(or_(
+            and_(
+                relationship.source_type == object_type,
+                relationship.source_id.in_(chunk),
+                relationship.destination_type.in_(mapped_types),
+            ),
+            and_(
+                relationship.destination_type == object_type,
+                relationship.destination_id.in_(chunk),
+                relationship.source_type.in_(mapped_types),
+            ),
+        ))
+        for rel in query:
+          cache[self._relationship_key(
+              rel.source_type, rel.source_id,
+              rel.destination_type, rel.destination_id)] = rel
+    return cache
+
+  @staticmethod
+  def _relationship_key(type1, id1, type2, id2):
+    return tuple(sorted([(type1, id1), (type2, id2)]))
+
+  @contextmanager
+  def relationships_cache(self):
+    """Keep relationships of block objects for find_relationship.
+
+    Relationships inserted, deleted or loaded in the meantime by the current
+    session, e.g. by automappings, update the cache. A rollback of the
+    session drops the cache and it is loaded again on the next lookup.
+    """
+    session = db.session()
+
+    def update(rel, rel_session, remove=False):
+      if self._relationships_cache is None or rel_session is not session:
+        return
+      key = self._relationship_key(rel.source_type, rel.source_id,
+                                   rel.destination_type, rel.destination_id)
+      if remove:
+        self._relationships_cache.pop(key, None)
+      else:
+        self._relationships_cache[key] = rel
+
+    def add(_, __, rel):
+      update(rel, object_session(rel))
+
+    def load(rel, context):
+      update(rel, context.session)
+
+    def delete(_, __, rel):
+      update(rel, object_session(rel), remove=True)
+
+    def rollback(_):
+      self._relationships_cache = None
+
+    listeners = [("after_insert", add), ("load", load),
+                 ("after_delete", delete)]
+    for name, listener in listeners:
+      event.listen(models.Relationship, name, listener)
+    event.listen(session, "after_rollback", rollback)
+    self._relationships_cache = self._create_relationships_cache()
+    self._cache_relationships = True
+    try:
+      yield
+    finally:
+      self._cache_relationships = False
+      self._relationships_cache = None
+      for name, listener in listeners:
+        event.remove(models.Relationship, name, listener)
+      event.remove(session, "after_rollback", rollback)
+
+  def find_relationship(self, obj1, obj2):
+    """Find a relationship between two objects.
+
+    Inside relationships_cache the relationship is read from the cache.
+    """
+    if not self._cache_relationships or obj1.id is None or obj2.id is None:
+      return models.Relationship.find_related(obj1, obj2)
+    if self._relationships_cache is None:
+      self._relationships_cache = self._create_relationships_cache()
+    return self._relationships_cache.get(self._relationship_key(
+        obj1.type, obj1.id, obj2.type, obj2.id))
+
   def get_role(self, name):
     """Get role from local cache for a given name."""
     if not self._roles_cache:
@@ -372,6 +550,45 @@ class BlockConverter(object):
     csv_body = self.generate_csv_body()
     return csv_header, csv_body
 
+  @property
+  def csv_width(self):
+    """Number of csv columns used by this block."""
+    return len(self.fields)
+
+  def _reset_export_caches(self):
+    """Drop caches that were built for the objects of an export chunk."""
+    self._mapping_cache = None
+    self._owners_cache = None
+    self._user_roles_cache = None
+    self.__dict__.pop("mapped_snapshots", None)
+
+  def generate_csv_body_chunks(self, chunk_size):
+    """Generate rows populated with object values, one id chunk at a time.
+
+    Objects of a chunk are eager loaded together with the block caches for
+    them, and released before the next chunk is loaded.
+    """
+    if self.ignore:
+      return
+    object_ids = sorted(self.object_ids)
+    try:
+      for start in range(0, len(object_ids), chunk_size):
+        self.object_ids = object_ids[start:start + chunk_size]
+        self._reset_export_caches()
+        self.row_converters_from_ids()
+        for row_converter in self.row_converters:
+          row_converter.handle_row_data()
+          yield row_converter.to_array(self.fields)
+        self.row_converters = []
+    finally:
+      self.object_ids = object_ids
+      self._reset_export_caches()
+
+  def to_stream(self, chunk_size):
+    """Return tuple of csv_header and a generator of csv_body rows."""
+    return self.generate_csv_header(), self.generate_csv_body_chunks(
+        chunk_size)
+
   def get_header_names(self):
     """ Get all posible user column names for current object """
     header_names = {
@@ -510,17 +727,31 @@ class BlockConverter(object):
       row_converter.setup_secondary_objects(slugs_dict)
 
     if not self.converter.dry_run:
-      for row_converter in self.row_converters:
-        try:
-          row_converter.insert_secondary_objects()
-        except exc.SQLAlchemyError as err:
-          db.session.rollback()
-          logger.exception("Import failed with: %s", err.message)
-          row_converter.add_error(errors.UNKNOWN_ERROR)
+      with self.relationships_cache():
+        for row_converter in self.row_converters:
+          try:
+            row_converter.insert_secondary_objects()
+          except exc.SQLAlchemyError as err:
+            db.session.rollback()
+            logger.exception("Import failed with: %s", err.message)
+            row_converter.add_error(errors.UNKNOWN_ERROR)
       self.save_import()
 
+  def _sanitize_values(self):
+    """Sanitize html of values of all rows in worker processes."""
+    attr_names = set(AttributeInfo.gather_attrs(self.object_class,
+                                                "_sanitize_html"))
+    values = [handler.value
+              for row_converter in self.row_converters
+              if not row_converter.ignore
+              for attr_name, handler in row_converter.attrs.iteritems()
+              if attr_name in attr_names]
+    with benchmark("Sanitize html of {} values".format(len(values))):
+      html_cleaner.clean_all(values)
+
   def _import_objects_prepare(self):
     """Setup all objects and do pre-commit checks for them."""
+    self._sanitize_values()
     for row_converter in self.row_converters:
       row_converter.setup_object()
 
@@ -541,25 +772,59 @@ class BlockConverter(object):
     self._import_objects_prepare()
 
     if not self.converter.dry_run:
-      new_objects = []
-      for row_converter in self.row_converters:
-        row_converter.send_pre_commit_signals()
-      for row_converter in self.row_converters:
-        try:
-          row_converter.insert_object()
-          db.session.flush()
-        except exc.SQLAlchemyError as err:
-          db.session.rollback()
-          logger.exception("Import failed with: %s", err.message)
-          row_converter.add_error(errors.UNKNOWN_ERROR)
-        else:
-          if row_converter.is_new and not row_converter.ignore:
-            new_objects.append(row_converter.obj)
+      batch_size = max(getattr(settings, "IMPORT_FLUSH_BATCH_SIZE", 1), 1)
+      with benchmark("Insert and flush {} rows".format(self.name)):
+        for start in range(0, len(self.row_converters), batch_size):
+          self._insert_batch(
+              self.row_converters[start:start + batch_size])
+      new_objects = [row_converter.obj
+                     for row_converter in self.row_converters
+                     if row_converter.is_new and not row_converter.ignore]
       self.send_collection_post_signals(new_objects)
       import_event = self.save_import()
       for row_converter in self.row_converters:
         row_converter.send_post_commit_signals(event=import_event)
 
+  def _insert_batch(self, row_converters, retry=False):
+    """Insert objects of rows and flush them in a savepoint.
+
+    Pre-commit signals of the rows are sent in the savepoint, so objects
+    created by their hooks are flushed with the rows. If the flush fails,
+    only the savepoint is rolled back and the batch is split in halves that
+    are inserted again, until the failing rows are found and marked with an
+    error. Objects modified in a rolled back savepoint are removed from the
+    modified objects cache, which is otherwise cleared by the rollback.
+
+    Args:
+      row_converters: rows to insert.
+      retry: set the attributes of the objects again, as a rolled back
+        savepoint expires the changes of its objects.
+    """
+    row_converters = [row_converter for row_converter in row_converters
+                      if not row_converter.ignore]
+    if not row_converters:
+      return
+    cache = get_cache(create=True)
+    saved_cache = cache.copy() if cache else None
+    try:
+      with db.session.begin_nested():
+        for row_converter in row_converters:
+          if retry:
+            row_converter.setup_object()
+          row_converter.send_pre_commit_signals()
+          row_converter.insert_object()
+        db.session.flush()
+    except exc.SQLAlchemyError as err:
+      if cache:
+        cache.restore(saved_cache)
+      if len(row_converters) == 1:
+        logger.exception("Import failed with: %s", err.message)
+        row_converters[0].add_error(errors.UNKNOWN_ERROR)
+        return
+      middle = len(row_converters) // 2
+      self._insert_batch(row_converters[:middle], retry=True)
+      self._insert_batch(row_converters[middle:], retry=True)
+
   def clean_session_from_ignored_objs(self):
     """Clean DB session from ignored objects.
 
@@ -592,7 +857,7 @@ class BlockConverter(object):
   def _store_revision_ids(self, event):
     """Store revision ids from the current event."""
     if event:
-      self.revision_ids.extend(revision.id for revision in event.revisions)
+      self.revision_ids.extend(event.revision_ids)
 
   def save_import(self):
     """Commit all changes in the session and update memcache."""
@@ -224,7 +224,9 @@ class UserColumnHandler(ColumnHandler):
   def get_person(self, email):
     new_objects = self.row_converter.block_converter.converter.new_objects
     if email not in new_objects[Person]:
-      new_objects[Person][email] = Person.query.filter_by(email=email).first()
+      new_objects[Person][email] = \
+          self.row_converter.block_converter.find_object(
+              Person, "email", email)
     return new_objects[Person].get(email)
 
   def parse_item(self):
@@ -414,8 +416,9 @@ class MappingColumnHandler(ColumnHandler):
     lines = set(self.raw_value.splitlines())
     slugs = set([slug.lower() for slug in lines if slug.strip()])
     objects = []
+    block_converter = self.row_converter.block_converter
     for slug in slugs:
-      obj = class_.query.filter_by(slug=slug).first()
+      obj = block_converter.find_object(class_, "slug", slug)
       if obj:
         if permissions.is_allowed_update_for(obj):
           objects.append(obj)
@@ -449,7 +452,8 @@ class MappingColumnHandler(ColumnHandler):
     mapping = None
     for obj in self.value:
       if current_obj.id:
-        mapping = Relationship.find_related(current_obj, obj)
+        mapping = self.row_converter.block_converter.find_relationship(
+            current_obj, obj)
       if not self.unmap and not mapping:
         mapping = Relationship(source=current_obj, destination=obj)
         relationships.append(mapping)
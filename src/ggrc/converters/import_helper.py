@@ -51,20 +51,28 @@ def get_column_order(columns):
   return AttributeInfo.get_column_order(columns)
 
 
-def generate_csv_string(csv_data):
-  """ Turn 2d string array into a string representing a csv file """
-  output_buffer = StringIO()
-  writer = csv.writer(output_buffer)
-
-  csv_data = equalize_array(csv_data)
-  csv_data = utf_8_encode_array(csv_data)
+def generate_csv_lines(csv_rows, buffer_size=64 * 1024):
+  """Turn rows of equal length into chunks of a csv file.
 
-  for row in csv_data:
-    writer.writerow(row)
+  Args:
+    csv_rows: iterable of lists of unicode values.
+    buffer_size: minimum size of yielded chunks, except for the last one.
 
+  Yields:
+    utf-8 encoded strings that joined together form the csv file.
+  """
+  output_buffer = StringIO()
+  writer = csv.writer(output_buffer)
+  for row in csv_rows:
+    writer.writerow([val.encode("utf-8") for val in row])
+    if output_buffer.tell() >= buffer_size:
+      yield output_buffer.getvalue()
+      output_buffer.seek(0)
+      output_buffer.truncate()
   body = output_buffer.getvalue()
   output_buffer.close()
-  return body
+  if body:
+    yield body
 
 
 def extract_relevant_data(csv_data):
@@ -125,11 +133,6 @@ def read_csv_file(csv_file):
   return [row for row in csv_reader(csv_file)]
 
 
-def utf_8_encode_array(array):
-  """ encode 2D array to utf8 """
-  return [[val.encode("utf-8") for val in line] for line in array]
-
-
 def utf_8_encoder(csv_data):
   """This function is a generator that attempts to encode the string as utf-8.
   It is assumed that the data is likely to be encoded in ascii. If encoding
@@ -341,3 +341,16 @@ class SnapshotBlockConverter(object):
   def to_array(self):
     """Get 2D list representing the CSV file."""
     return self._header_list, self._body_list
+
+  @property
+  def csv_width(self):
+    """Number of csv columns used by this block."""
+    return len(self._header_list[1])
+
+  def to_stream(self, _):
+    """Get CSV header and an iterator of CSV body rows.
+
+    Snapshot columns depend on the custom attributes of all snapshots in the
+    block, so all of them are loaded at once.
+    """
+    return self._header_list, iter(self._body_list)
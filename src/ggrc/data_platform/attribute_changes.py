@@ -0,0 +1,27 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Attribute changes module."""
+
+from sqlalchemy.ext.declarative import declared_attr
+
+from ggrc import db
+
+
+class AttributeChanges(db.Model):
+  """Queue of changed objects whose computed attributes need new values.
+
+  Every object is in the queue at most once, with its latest revision.
+  """
+  # pylint: disable=too-few-public-methods
+  __tablename__ = 'attribute_changes'
+
+  resource_type = db.Column(db.String(250), primary_key=True)
+  resource_id = db.Column(db.Integer, primary_key=True)
+  revision_id = db.Column(db.Integer, nullable=False)
+
+  @declared_attr
+  def __table_args__(cls):  # pylint: disable=no-self-argument
+    return (
+        db.Index("ix_attribute_changes_revision_id", "revision_id"),
+    )
@@ -14,19 +14,37 @@ Relationships are tuples with:
 Glossary:
 aggregate object = object from which the computed value is read
 computed object = object which will get the new computed value
+
+Computed objects depend on the aggregate objects mapped to them or to their
+snapshots, and on the aggregate objects their current values were taken from.
+Revisions of these objects are resolved to the computed objects that depend
+on them and only those are computed again.
+
+Changes are processed in chunks of CHUNK_SIZE revisions. Background tasks
+first add their revisions to the attribute_changes queue, which keeps only
+the latest revision of every object, and then process the whole queue, so a
+burst of changes to the same objects is computed once.
 """
 
 import datetime
 import collections
+from logging import getLogger
 
 import sqlalchemy as sa
 
 from ggrc import db
 from ggrc import login
+from ggrc.data_platform.attribute_changes import AttributeChanges
 from ggrc.utils import revisions as revision_utils
 from ggrc.utils import benchmark
+from ggrc.utils import generate_id_chunks
 from ggrc.models import all_models as models
 
+
+logger = getLogger(__name__)  # pylint: disable=invalid-name
+
+CHUNK_SIZE = 1000
+
 # Statement for inserting attribute values without explicit call of delete.
 ATTRIBUTE_REPLACE_STATEMENT = """
   REPLACE INTO attributes (
@@ -63,6 +81,23 @@ ATTRIBUTE_REPLACE_STATEMENT = """
   )
 """
 
+# Statement for adding changed objects to the queue, keeping only the latest
+# revision of every object.
+CHANGE_QUEUE_STATEMENT = """
+  INSERT INTO attribute_changes (
+      resource_type,
+      resource_id,
+      revision_id
+  )
+  VALUES (
+      :resource_type,
+      :resource_id,
+      :revision_id
+  )
+  ON DUPLICATE KEY UPDATE revision_id = GREATEST(revision_id,
+                                                 VALUES(revision_id))
+"""
+
 INDEX_REPLACE_STATEMENT = """
   REPLACE INTO fulltext_record_properties (
       `key`,
@@ -130,14 +165,6 @@ def get_aggregate_function(attribute):
   raise AttributeError("Attribute aggregate_function contains invalid data.")
 
 
-def snapshot_from_rel(rel_revision):
-  """Get snapshot objects from relationship revisions."""
-  if rel_revision.source_type == "Snapshot":
-    return models.Snapshot.query.get(rel_revision.source_id)
-  elif rel_revision.destination_type == "Snapshot":
-    return models.Snapshot.query.get(rel_revision.destination_id)
-
-
 def _get_group_key(revision, aggregate_type, computed_object):
   """Get key for aggregate objects group.
 
@@ -146,6 +173,7 @@ def _get_group_key(revision, aggregate_type, computed_object):
   """
   related_types = {computed_object, aggregate_type}
   related_snapshots = {"Snapshot", aggregate_type}
+  mapped_types = {revision.source_type, revision.destination_type}
   key = None
   if revision.resource_type == aggregate_type:
     if revision.action == "deleted":
@@ -157,20 +185,30 @@ def _get_group_key(revision, aggregate_type, computed_object):
   elif (revision.resource_type == "Snapshot" and
         revision.content["child_type"] == computed_object):
     key = "destination_snapshots"
-  elif (revision.resource_type == "Relationship" and
-        revision.source_type in related_types and
-        revision.destination_type in related_types):
-    key = "related_objects"
-  elif (revision.resource_type == "Relationship" and
-        revision.source_type in related_snapshots and
-        revision.destination_type in related_snapshots):
-    # computed source related to a snapshot of an object
-    snap = snapshot_from_rel(revision)
-    if snap.child_type == computed_object:
+  elif revision.resource_type == "Relationship":
+    if mapped_types == related_types:
+      key = "related_objects"
+    elif mapped_types == related_snapshots:
+      # computed source related to a snapshot of an object, the snapshot
+      # child type is checked when the snapshots are resolved
       key = "related_snapshots"
   return key
 
 
+def _get_group_stub(revision, key, aggregate_type):
+  """Get the stub of the object that a revision adds to a group.
+
+  Relationship revisions add the end of the relationship that is not the
+  aggregate object, so that mapping and unmapping an aggregate object
+  updates the object it was mapped to.
+  """
+  if key in ("related_objects", "related_snapshots"):
+    if revision.source_type == aggregate_type:
+      return (revision.destination_type, revision.destination_id)
+    return (revision.source_type, revision.source_id)
+  return (revision.resource_type, revision.resource_id)
+
+
 def group_revisions(attributes, revisions):
   """Group revisions under attributes with correct group keys."""
   groups = collections.defaultdict(lambda: collections.defaultdict(set))
@@ -180,20 +218,24 @@ def group_revisions(attributes, revisions):
     for revision in revisions:
       key = _get_group_key(revision, aggregate_type, computed_object)
       if key:
-        groups[attr][key].add((revision.resource_type, revision.resource_id))
+        groups[attr][key].add(
+            _get_group_stub(revision, key, aggregate_type))
   return groups
 
 
-def _objects_from_snapshots(snapshots):
+def _objects_from_snapshots(snapshots, child_type=None):
   """Get snapshot child objects set."""
   if not snapshots:
     return set()
-  return set(db.session.query(
+  query = db.session.query(
       models.Snapshot.child_type,
       models.Snapshot.child_id,
   ).filter(
       models.Snapshot.id.in_(snap[1] for snap in snapshots)
-  ).distinct())
+  )
+  if child_type:
+    query = query.filter(models.Snapshot.child_type == child_type)
+  return set(query.distinct())
 
 
 def _get_objects_from_aggregates(aggregate_objects, computed_object_type):
@@ -295,7 +337,10 @@ def get_affected_objects(attribute_groups):
   for attr, groups in attribute_groups.iteritems():
     objects = set()
     objects.update(groups["computed_objects"])
+    objects.update(groups["related_objects"])
     objects.update(_objects_from_snapshots(groups["destination_snapshots"]))
+    objects.update(_objects_from_snapshots(groups["related_snapshots"],
+                                           attr.object_template.name))
     objects.update(_get_objects_from_aggregates(
         groups["aggregate_objects"],
         attr.object_template.name
@@ -566,12 +611,12 @@ def store_data(attributes_data, index_data):
 def get_all_latest_revisions_ids():
   """Get latest revisions for aggregate objects."""
   with benchmark("Get all latest revision ids"):
-    attributes = get_computed_attributes()
+    aggregate_types = {get_aggregate_type(attribute)
+                       for attribute in get_computed_attributes()}
     revision_ids = []
-    for attribute in attributes:
-      aggregate_type = get_aggregate_type(attribute)
-      revisions = revision_utils._get_revisions_by_type(aggregate_type)
-      revision_ids.extend(revisions.values())
+    for aggregate_type in sorted(aggregate_types):
+      for chunk in revision_utils.get_latest_revision_ids(aggregate_type):
+        revision_ids.extend(chunk)
     return revision_ids
 
 
@@ -584,44 +629,176 @@ def delete_all_computed_values():
     ).delete()
 
 
-def compute_attributes(revision_ids):
+def _compute_chunk(revision_ids, attributes):
+  """Compute new values of objects affected by a chunk of revisions.
+
+  Returns:
+    number of objects that got new values, including snapshots.
+  """
+  with benchmark("Get revisions."):
+    revisions = models.Revision.query.filter(
+        models.Revision.id.in_(revision_ids)).all()
+  with benchmark("Group revisions by computed attributes"):
+    attribute_groups = group_revisions(attributes, revisions)
+  with benchmark("get all objects affected by computed attributes"):
+    affected_objects = get_affected_objects(attribute_groups)
+  with benchmark("Get all relationships for these computed objects"):
+    relationships = get_relationships(affected_objects)
+  with benchmark("Get snapshot data"):
+    snapshot_map, snapshot_tag_map = get_snapshot_data(affected_objects)
+
+  with benchmark("Compute values"):
+    computed_values = compute_values(affected_objects, relationships,
+                                     snapshot_map)
+
+  with benchmark("Get computed attributes data"):
+    attributes_data = get_attributes_data(computed_values)
+  with benchmark("Get computed attribute full-text index data"):
+    index_data = get_index_data(computed_values, snapshot_tag_map)
+  with benchmark("Store attribute data and full-text index data"):
+    store_data(attributes_data, index_data)
+  return len({obj for objects in computed_values.itervalues()
+              for obj in objects})
+
+
+def compute_attributes(revision_ids, chunk_size=CHUNK_SIZE):
   """Compute new values based an changed objects.
 
   Args:
-    objects: array of object stubs of modified objects.
-  """
+    revision_ids: ids of revisions of changed objects or "all_latest" for
+      computing values of all objects.
+    chunk_size: number of revisions processed at once.
 
+  Returns:
+    dict with the numbers of processed revisions and of objects that got new
+    values.
+  """
+  stats = {"revisions": 0, "objects": 0}
   with benchmark("Compute attributes"):
 
     if not revision_ids:
-      return
+      return stats
 
-    with benchmark("Get revisions."):
-      if revision_ids == "all_latest":
-        revision_ids = get_all_latest_revisions_ids()
-
-      revisions = models.Revision.query.filter(
-          models.Revision.id.in_(revision_ids))
+    if revision_ids == "all_latest":
+      revision_ids = get_all_latest_revisions_ids()
 
     with benchmark("Get all computed attributes"):
       attributes = get_computed_attributes()
 
-    with benchmark("Group revisions by computed attributes"):
-      attribute_groups = group_revisions(attributes, revisions)
-    with benchmark("get all objects affected by computed attributes"):
-      affected_objects = get_affected_objects(attribute_groups)
-    with benchmark("Get all relationships for these computed objects"):
-      relationships = get_relationships(affected_objects)
-    with benchmark("Get snapshot data"):
-      snapshot_map, snapshot_tag_map = get_snapshot_data(affected_objects)
-
-    with benchmark("Compute values"):
-      computed_values = compute_values(affected_objects, relationships,
-                                       snapshot_map)
-
-    with benchmark("Get computed attributes data"):
-      attributes_data = get_attributes_data(computed_values)
-    with benchmark("Get computed attribute full-text index data"):
-      index_data = get_index_data(computed_values, snapshot_tag_map)
-    with benchmark("Store attribute data and full-text index data"):
-      store_data(attributes_data, index_data)
+    for start in range(0, len(revision_ids), chunk_size):
+      chunk = revision_ids[start:start + chunk_size]
+      stats["objects"] += _compute_chunk(chunk, attributes)
+      stats["revisions"] += len(chunk)
+  logger.info("Computed attributes for %(revisions)s revisions, "
+              "%(objects)s objects touched", stats)
+  return stats
+
+
+def queue_revisions(revision_ids):
+  """Add changed objects to the attribute_changes queue.
+
+  Only the latest revision of an object is kept in the queue.
+  """
+  for start in range(0, len(revision_ids), CHUNK_SIZE):
+    rows = db.session.query(
+        models.Revision.resource_type,
+        models.Revision.resource_id,
+        models.Revision.id,
+    ).filter(
+        models.Revision.id.in_(revision_ids[start:start + CHUNK_SIZE])
+    )
+    changes = [
+        {"resource_type": resource_type, "resource_id": resource_id,
+         "revision_id": revision_id}
+        for resource_type, resource_id, revision_id in rows
+    ]
+    if changes:
+      db.session.execute(CHANGE_QUEUE_STATEMENT, changes)
+  db.session.commit()
+
+
+def compute_queued_attributes(chunk_size=CHUNK_SIZE):
+  """Compute new values for all objects in the attribute_changes queue.
+
+  Changes are taken from the queue in chunks and removed from it once their
+  values are stored. A change that got a newer revision in the meantime
+  stays in the queue.
+
+  Returns:
+    dict with the numbers of processed revisions and of objects that got new
+    values.
+  """
+  stats = {"revisions": 0, "objects": 0}
+  with benchmark("Compute queued attributes"):
+    attributes = get_computed_attributes()
+    while True:
+      changes = db.session.query(
+          AttributeChanges.resource_type,
+          AttributeChanges.resource_id,
+          AttributeChanges.revision_id,
+      ).order_by(
+          AttributeChanges.revision_id
+      ).limit(chunk_size).all()
+      if not changes:
+        break
+      stats["objects"] += _compute_chunk(
+          [change.revision_id for change in changes], attributes)
+      stats["revisions"] += len(changes)
+      AttributeChanges.query.filter(sa.tuple_(
+          AttributeChanges.resource_type,
+          AttributeChanges.resource_id,
+          AttributeChanges.revision_id,
+      ).in_(changes)).delete(synchronize_session=False)
+      db.session.commit()
+  logger.info("Computed attributes for %(revisions)s queued revisions, "
+              "%(objects)s objects touched", stats)
+  return stats
+
+
+def index_stored_values(chunk_size=CHUNK_SIZE):
+  """Write stored computed values to the full text index.
+
+  A full reindex drops index records of computed values of snapshots, which
+  are not part of the snapshot revisions. The stored values are still valid,
+  so they are indexed again without computing them.
+
+  Returns:
+    number of indexed values.
+  """
+  attributes = {attr.attribute_template_id: attr
+                for attr in get_computed_attributes()}
+  if not attributes:
+    return 0
+  query = db.session.query(models.Attributes.attribute_id).filter(
+      models.Attributes.attribute_template_id.in_(attributes),
+      models.Attributes.object_type == u"Snapshot",
+  )
+  count = 0
+  with benchmark("Index stored computed values"):
+    for ids in generate_id_chunks(query, models.Attributes.attribute_id,
+                                  chunk_size=chunk_size):
+      computed_values = collections.defaultdict(dict)
+      for row in models.Attributes.query.filter(
+          models.Attributes.attribute_id.in_(ids)):
+        computed_values[attributes[row.attribute_template_id]][
+            (row.object_type, row.object_id)] = {
+                "value_datetime": row.value_datetime,
+                "value_string": row.value_string,
+                "value_integer": row.value_integer,
+        }
+      snapshot_tag_map = dict(db.session.query(
+          models.Snapshot.id,
+          sa.func.concat_ws(
+              "-",
+              models.Snapshot.parent_type,
+              models.Snapshot.parent_id,
+              models.Snapshot.child_type,
+          )
+      ).filter(
+          models.Snapshot.id.in_(
+              obj[1] for objects in computed_values.itervalues()
+              for obj in objects)
+      ))
+      store_data([], get_index_data(computed_values, snapshot_tag_map))
+      count += len(ids)
+  return count
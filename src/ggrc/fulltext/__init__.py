@@ -13,6 +13,8 @@ class Indexer(object):
     self.indexer_rules = defaultdict(list)
     self.cache = defaultdict(dict)
     self.builders = {}
+    # number of commits and record rows written by the commit hook
+    self.update_stats = defaultdict(int)
 
   def get_builder(self, obj_class):
     """return recordbuilder for sent class
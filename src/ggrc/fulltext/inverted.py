@@ -0,0 +1,188 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Inverted index full text engine for Mysql DB backend.
+
+Next to the regular record table this indexer keeps a posting table that maps
+every term produced by the configured tokenizer to the (type, key, property)
+of the records containing it. Search terms are resolved through primary key
+lookups in the posting table and only the matching records are checked with
+the ``LIKE`` filter, instead of scanning the whole record table.
+
+To enable the engine set in ``settings``:
+
+..  code-block:: python
+
+    FULLTEXT_INDEXER = "ggrc.fulltext.inverted.Indexer"
+    # optional, the default NgramTokenizer also matches words inside other
+    # words, PrefixTokenizer keeps a smaller posting table for word prefixes
+    FULLTEXT_TOKENIZER = "ggrc.fulltext.tokenizer.PrefixTokenizer"
+
+and run a global reindex to fill the posting table.
+"""
+
+from sqlalchemy import and_
+from sqlalchemy import tuple_
+from sqlalchemy.ext.declarative import declared_attr
+from sqlalchemy.sql import true
+from sqlalchemy.sql.expression import select
+
+from ggrc import db
+from ggrc.extensions import get_extension_instance
+from ggrc.fulltext.mysql import MysqlIndexer
+
+
+# pylint: disable=too-few-public-methods
+class MysqlRecordTerm(db.Model):
+  """Db model for the inverted index posting table."""
+  __tablename__ = 'fulltext_record_terms'
+
+  term = db.Column(db.String(64), primary_key=True)
+  type = db.Column(db.String(64), primary_key=True)
+  key = db.Column(db.Integer, primary_key=True, autoincrement=False)
+  property = db.Column(db.String(250), primary_key=True)
+
+  @declared_attr
+  def __table_args__(cls):  # pylint: disable=no-self-argument
+    return (
+        db.Index('ix_{}_type_key'.format(cls.__tablename__), 'type', 'key'),
+    )
+
+
+class InvertedIndexer(MysqlIndexer):
+  """Mysql indexer that resolves search terms through a posting table."""
+
+  term_type = MysqlRecordTerm
+
+  def __init__(self, settings):
+    super(InvertedIndexer, self).__init__(settings)
+    self.tokenizer = get_extension_instance(
+        "FULLTEXT_TOKENIZER", "ggrc.fulltext.tokenizer.NgramTokenizer")
+
+  def get_term_rows(self, rows):
+    """Get posting table rows for the given record table rows."""
+    term_rows = set()
+    for row in rows:
+      for term in self.tokenizer.index_terms(row["content"]):
+        term_rows.add((term, row["type"], row["key"], row["property"]))
+    return [
+        {"term": term, "type": type_, "key": key, "property": prop}
+        for term, type_, key, prop in term_rows
+    ]
+
+  def get_term_filter(self, terms):
+    """Get a filter for records that contain all terms from the index.
+
+    Every term is a separate semi join so that the database can drive the
+    search from the posting table primary key. If the terms can not be
+    resolved through the index, all records are candidates.
+    """
+    query_terms = self.tokenizer.query_terms(terms)
+    if not query_terms:
+      return true()
+    record_columns = tuple_(
+        self.record_type.type,
+        self.record_type.key,
+        self.record_type.property,
+    )
+    return and_(*[
+        record_columns.in_(
+            select([
+                self.term_type.type,
+                self.term_type.key,
+                self.term_type.property,
+            ]).where(self.term_type.term == term)
+        )
+        for term in sorted(query_terms)
+    ])
+
+  def get_term_insert(self):
+    """Get insert statement for the posting table.
+
+    Duplicates are ignored, since postings could have been left behind by
+    code that deletes records directly from the record table.
+    """
+    return self.term_type.__table__.insert().prefix_with("IGNORE")
+
+  def get_delete_queries(self, type, keys):
+    queries = super(InvertedIndexer, self).get_delete_queries(type, keys)
+    queries.append(
+        self.term_type.__table__.delete().where(
+            self.term_type.type == type
+        ).where(
+            self.term_type.key.in_(keys)
+        )
+    )
+    return queries
+
+  def get_insert_payloads(self, rows):
+    payloads = super(InvertedIndexer, self).get_insert_payloads(rows)
+    term_rows = self.get_term_rows(rows)
+    if term_rows:
+      payloads.append((self.get_term_insert(), term_rows))
+    return payloads
+
+  def get_property_update_payloads(self, type, rows, properties):
+    """Rebuild postings of changed properties only."""
+    payloads = [(
+        self.term_type.__table__.delete().where(
+            self.term_type.type == type
+        ).where(
+            tuple_(self.term_type.key, self.term_type.property).in_(
+                list(properties))
+        ),
+        None,
+    )]
+    term_rows = self.get_term_rows(
+        row for row in rows if (row["key"], row["property"]) in properties
+    )
+    if term_rows:
+      payloads.append((self.get_term_insert(), term_rows))
+    return payloads
+
+  def create_record(self, record, commit=True):
+    rows = [
+        {"type": r.type, "key": r.key, "property": r.property,
+         "content": r.content}
+        for r in self.records_generator(record)
+    ]
+    term_rows = self.get_term_rows(rows)
+    if term_rows:
+      db.session.execute(self.get_term_insert(), term_rows)
+    super(InvertedIndexer, self).create_record(record, commit=commit)
+
+  def update_record(self, record, commit=True):
+    if record.properties:
+      db.session.query(self.term_type).filter(
+          self.term_type.key == record.key,
+          self.term_type.type == record.type,
+          self.term_type.property.in_(list(record.properties.keys())),
+      ).delete(synchronize_session=False)
+    super(InvertedIndexer, self).update_record(record, commit=commit)
+
+  def delete_record(self, key, type, commit=True):
+    db.session.query(self.term_type).filter(
+        self.term_type.key == key,
+        self.term_type.type == type).delete()
+    super(InvertedIndexer, self).delete_record(key, type, commit=commit)
+
+  def delete_records_by_ids(self, type, keys, commit=True):
+    if keys:
+      db.session.query(self.term_type).filter(
+          self.term_type.key.in_(keys),
+          self.term_type.type == type,
+      ).delete(synchronize_session=False)
+    super(InvertedIndexer, self).delete_records_by_ids(
+        type, keys, commit=commit)
+
+  def delete_all_records(self, commit=True):
+    db.session.query(self.term_type).delete()
+    super(InvertedIndexer, self).delete_all_records(commit=commit)
+
+  def delete_records_by_type(self, type, commit=True):
+    db.session.query(self.term_type).filter(
+        self.term_type.type == type).delete()
+    super(InvertedIndexer, self).delete_records_by_type(type, commit=commit)
+
+
+Indexer = InvertedIndexer
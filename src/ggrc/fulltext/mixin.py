@@ -46,17 +46,23 @@ class Indexed(object):
     return (self.__class__.__name__, self.id)
 
   @classmethod
-  def get_insert_query_for(cls, ids):
-    """Return insert class record query. It will return None, if it's empty."""
+  def get_insert_values_for(cls, ids):
+    """Return list of record table rows for the given object ids."""
     if not ids:
-      return
+      return []
     instances = cls.indexed_query().filter(cls.id.in_(ids))
     indexer = fulltext.get_indexer()
     keys = inspect(indexer.record_type).c
     records = (indexer.fts_record_for(i) for i in instances)
     rows = itertools.chain(*[indexer.records_generator(i) for i in records])
-    values = [{c.name: getattr(r, a) for a, c in keys.items()} for r in rows]
+    return [{c.name: getattr(r, a) for a, c in keys.items()} for r in rows]
+
+  @classmethod
+  def get_insert_query_for(cls, ids):
+    """Return insert class record query. It will return None, if it's empty."""
+    values = cls.get_insert_values_for(ids)
     if values:
+      indexer = fulltext.get_indexer()
       return indexer.record_type.__table__.insert().values(values)
 
   @classmethod
@@ -72,13 +78,34 @@ class Indexed(object):
     )
 
   @classmethod
-  def bulk_record_update_for(cls, ids):
-    """Bulky update index records for current class"""
-    delete_query = cls.get_delete_query_for(ids)
-    insert_query = cls.get_insert_query_for(ids)
-    for query in [delete_query, insert_query]:
-      if query is not None:
-        db.session.execute(query)
+  def bulk_record_update_for(cls, ids, diff=False):
+    """Bulky update index records for current class
+
+    The indexer decides which tables have to be updated, so that index
+    structures other than the record table are kept in sync.
+
+    Args:
+      ids: ids of objects that should be reindexed.
+      diff: if True, the stored records are compared with the new ones and
+        only the rows that differ are inserted, updated or deleted. Otherwise
+        all records of the objects are deleted and inserted again.
+    Returns:
+      dict with the number of written record rows by operation.
+    """
+    if not ids:
+      return {}
+    indexer = fulltext.get_indexer()
+    values = cls.get_insert_values_for(ids)
+    if diff:
+      payloads, stats = indexer.get_diff_payloads(cls.__name__, ids, values)
+      for statement, params in payloads:
+        db.session.execute(statement, params)
+      return stats
+    for query in indexer.get_delete_queries(cls.__name__, ids):
+      db.session.execute(query)
+    for statement, rows in indexer.get_insert_payloads(values):
+      db.session.execute(statement.values(rows))
+    return {"inserted": len(values)}
 
   @classmethod
   def indexed_query(cls):
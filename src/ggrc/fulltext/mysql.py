@@ -1,6 +1,7 @@
 # Copyright (C) 2017 Google Inc.
 # Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
 """Full text index engine for Mysql DB backend"""
+import logging
 from collections import defaultdict
 
 from sqlalchemy import and_
@@ -11,6 +12,7 @@ from sqlalchemy import literal
 from sqlalchemy import or_
 from sqlalchemy import union
 from sqlalchemy.sql import false
+from sqlalchemy.sql import true
 from sqlalchemy.ext.declarative import declared_attr
 from sqlalchemy.orm import aliased
 from sqlalchemy.sql.expression import select
@@ -23,9 +25,13 @@ from ggrc.models.inflector import get_model
 from ggrc.query import my_objects
 from ggrc.rbac import context_query_filter
 from ggrc.rbac import permissions
+from ggrc.fulltext import get_indexer
 from ggrc.fulltext.sql import SqlIndexer
 
 
+logger = logging.getLogger(__name__)
+
+
 # pylint: disable=too-few-public-methods
 class MysqlRecordProperty(db.Model):
   """ Db model for collect fulltext index records"""
@@ -52,16 +58,25 @@ class MysqlRecordProperty(db.Model):
 class MysqlIndexer(SqlIndexer):
   record_type = MysqlRecordProperty
 
-  @staticmethod
-  def _get_filter_query(terms):
+  def get_term_filter(self, terms):  # pylint: disable=unused-argument
+    """Get a filter that narrows down records that could contain terms.
+
+    The default indexer has no term index, so every record is a candidate and
+    the content filter has to scan the whole table.
+    """
+    return true()
+
+  def _get_filter_query(self, terms):
     """Get the whitelist of fields to filter in full text table."""
-    whitelist = MysqlRecordProperty.property.in_(
+    whitelist = self.record_type.property.in_(
         ['title', 'name', 'email', 'notes', 'description', 'slug'])
 
     if not terms:
       return whitelist
     elif terms:
-      return and_(whitelist, MysqlRecordProperty.content.contains(terms))
+      return and_(whitelist,
+                  self.get_term_filter(terms),
+                  self.record_type.content.contains(terms))
 
   @staticmethod
   def get_permissions_query(model_names, permission_type='read',
@@ -245,8 +260,20 @@ def update_indexer(session):  # pylint:disable=unused-argument
       models_ids_to_reindex[type_name].add(id_value)
   db.session.expire_all()  # expire required to fix declared_attr cached value
   db.session.reindex_set = set()
+  if not models_ids_to_reindex:
+    return
+  stats = defaultdict(int)
   for model_name, ids in models_ids_to_reindex.iteritems():
-    get_model(model_name).bulk_record_update_for(ids)
+    model_stats = get_model(model_name).bulk_record_update_for(ids, diff=True)
+    for name, count in model_stats.iteritems():
+      stats[name] += count
+  indexer = get_indexer()
+  indexer.update_stats["commits"] += 1
+  for name, count in stats.iteritems():
+    indexer.update_stats[name] += count
+  logger.debug("Full text rows written on commit: %(inserted)s inserted, "
+               "%(updated)s updated, %(deleted)s deleted, "
+               "%(unchanged)s unchanged", stats)
 
 
 # pylint:disable=unused-argument
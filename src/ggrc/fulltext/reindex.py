@@ -0,0 +1,233 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Resumable global full text reindex.
+
+The reindex walks every indexed model in keyset paginated id chunks. After
+each chunk the last indexed id of the model is stored in the parameters of
+the background task running the reindex. A failed task is not retried, but a
+new reindex task started with ``resume_task_id`` of the failed one continues
+where it stopped instead of starting from zero.
+
+Task parameters used by the job:
+
+  since: optional date; only objects updated since then are reindexed.
+  checkpoints: dict of model name to the last reindexed id.
+  finished: list of model names that have been fully reindexed.
+
+Chunks are reindexed in the task process, or in ``settings.REINDEX_WORKERS``
+worker processes with their own database connections. Progress with rows per
+second for each model is written to the task result as JSON.
+"""
+
+import collections
+import json
+import logging
+import multiprocessing
+import time
+
+from dateutil import parser as date_parser
+
+from ggrc import db
+from ggrc import settings
+from ggrc.fulltext import get_indexer
+from ggrc.fulltext import mixin
+from ggrc.models import all_models
+from ggrc.models.inflector import get_model
+from ggrc.snapshotter.indexer import reindex_snapshots
+from ggrc.utils import benchmark
+from ggrc.utils import generate_id_chunks
+
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1000
+SNAPSHOT = "Snapshot"
+
+
+def get_indexed_model_names():
+  """Get names of models that are reindexed, in reindex order."""
+  names = sorted(
+      model.__name__ for model in all_models.all_models
+      if issubclass(model, mixin.Indexed) and model.REQUIRED_GLOBAL_REINDEX
+  )
+  names.append(SNAPSHOT)
+  return names
+
+
+def reindex_chunk(model_name, ids):
+  """Reindex objects of a single model and commit the changes."""
+  if model_name == SNAPSHOT:
+    reindex_snapshots(ids)
+  else:
+    get_model(model_name).bulk_record_update_for(ids)
+  db.session.commit()
+
+
+def _reindex_chunk_worker(args):
+  """Reindex a chunk in a worker process."""
+  from ggrc.app import app
+  model_name, ids = args
+  with app.app_context():
+    reindex_chunk(model_name, ids)
+  return model_name, ids[-1], len(ids)
+
+
+class ReindexJob(object):
+  """Resumable reindex of all indexed models."""
+
+  def __init__(self, task=None, workers=None, chunk_size=CHUNK_SIZE):
+    """Initialize the job from the state saved in the task parameters.
+
+    Args:
+      task: BackgroundTask used for checkpoints and progress reports. Without
+        a task the reindex can not be resumed.
+      workers: number of worker processes, settings.REINDEX_WORKERS if None.
+      chunk_size: number of objects reindexed and committed at once.
+    """
+    self.task = task
+    parameters = (task.parameters if task else None) or {}
+    since = parameters.get("since")
+    if since and not hasattr(since, "isoformat"):
+      since = date_parser.parse(since)
+    self.since = since
+    self.checkpoints = dict(parameters.get("checkpoints", {}))
+    self.finished = set(parameters.get("finished", []))
+    if workers is None:
+      workers = settings.REINDEX_WORKERS
+    self.workers = workers
+    self.chunk_size = chunk_size
+    self.stats = {}
+
+  def _id_query(self, model_name):
+    """Get query for ids of objects that should be reindexed."""
+    model = get_model(model_name)
+    query = db.session.query(model.id)
+    if self.since and hasattr(model, "updated_at"):
+      query = query.filter(model.updated_at >= self.since)
+    return query, model.id
+
+  def _id_chunks(self, model_name):
+    query, id_column = self._id_query(model_name)
+    return generate_id_chunks(
+        query,
+        id_column,
+        chunk_size=self.chunk_size,
+        after_id=self.checkpoints.get(model_name, 0),
+    )
+
+  def progress(self):
+    """Get progress report of the job."""
+    return {
+        "since": self.since.isoformat() if self.since else None,
+        "finished": sorted(self.finished),
+        "models": self.stats,
+    }
+
+  def _update_stats(self, model_name, start, last_id, count):
+    stats = self.stats.setdefault(model_name, {"rows": 0})
+    stats["rows"] += count
+    stats["last_id"] = last_id
+    stats["seconds"] = round(time.time() - start, 3)
+    stats["rows_per_second"] = round(
+        stats["rows"] / stats["seconds"], 1) if stats["seconds"] else None
+
+  def _save(self):
+    """Store checkpoints and progress in the task."""
+    if self.task is None:
+      return
+    parameters = dict(self.task.parameters or {})
+    parameters.update({
+        "since": self.since,
+        "checkpoints": dict(self.checkpoints),
+        "finished": sorted(self.finished),
+    })
+    self.task.parameters = parameters
+    self.task.result = {
+        "content": json.dumps(self.progress()),
+        "status_code": 200,
+        "headers": [("Content-Type", "application/json")],
+    }
+    db.session.add(self.task)
+
+  def _checkpoint(self, model_name, start, last_id, count):
+    self.checkpoints[model_name] = last_id
+    self._update_stats(model_name, start, last_id, count)
+    self._save()
+    db.session.commit()
+
+  def _finish_model(self, model_name):
+    self.finished.add(model_name)
+    self.stats.setdefault(model_name, {"rows": 0})
+    self._save()
+    db.session.commit()
+
+  def _reindex_serial(self, model_name):
+    start = time.time()
+    for ids in self._id_chunks(model_name):
+      reindex_chunk(model_name, ids)
+      self._checkpoint(model_name, start, ids[-1], len(ids))
+
+  def _reindex_parallel(self, model_name, pool):
+    """Reindex chunks in worker processes.
+
+    Id chunks are read while the workers reindex the previous ones, with at
+    most two chunks per worker waiting. Chunk results are taken in order, so
+    the checkpoint is always the last id of a contiguous run of reindexed
+    chunks.
+    """
+    start = time.time()
+    pending = collections.deque()
+    for ids in self._id_chunks(model_name):
+      pending.append(pool.apply_async(_reindex_chunk_worker,
+                                      ((model_name, ids),)))
+      if len(pending) >= 2 * self.workers:
+        _, last_id, count = pending.popleft().get()
+        self._checkpoint(model_name, start, last_id, count)
+    while pending:
+      _, last_id, count = pending.popleft().get()
+      self._checkpoint(model_name, start, last_id, count)
+
+  def _make_pool(self):
+    """Create worker pool with clean database connections."""
+    if self.workers < 1:
+      return None
+    db.session.commit()
+    db.engine.dispose()
+    return multiprocessing.Pool(self.workers, initializer=db.engine.dispose)
+
+  def run(self):
+    """Reindex all models that have not been finished yet.
+
+    Returns:
+      dict with the progress report of the job.
+    """
+    indexer = get_indexer()
+    people_query = db.session.query(all_models.Person.id,
+                                    all_models.Person.name,
+                                    all_models.Person.email)
+    indexer.cache["people_map"] = {
+        p.id: (p.name, p.email) for p in people_query
+    }
+    indexer.cache["ac_role_map"] = dict(db.session.query(
+        all_models.AccessControlRole.id,
+        all_models.AccessControlRole.name,
+    ))
+    pool = self._make_pool()
+    try:
+      for model_name in get_indexed_model_names():
+        if model_name in self.finished:
+          continue
+        logger.info("Updating index for: %s", model_name)
+        with benchmark("Create records for %s" % model_name):
+          if pool:
+            self._reindex_parallel(model_name, pool)
+          else:
+            self._reindex_serial(model_name)
+        self._finish_model(model_name)
+    finally:
+      if pool:
+        pool.close()
+        pool.join()
+      indexer.invalidate_cache()
+    return self.progress()
@@ -3,6 +3,11 @@
 
 """SQL routines for full-text indexing."""
 
+from sqlalchemy import and_
+from sqlalchemy import bindparam
+from sqlalchemy import tuple_
+from sqlalchemy.sql.expression import select
+
 from ggrc import db
 from ggrc.fulltext import Indexer
 
@@ -25,6 +30,132 @@ class SqlIndexer(Indexer):
               content=unicode(content),
           )
 
+  def get_delete_queries(self, type, keys):
+    """Get queries that remove all index entries for the given objects."""
+    return [
+        self.record_type.__table__.delete().where(
+            self.record_type.type == type
+        ).where(
+            self.record_type.key.in_(keys)
+        )
+    ]
+
+  def get_insert_payloads(self, rows):
+    """Get (statement, rows) pairs that add index entries for record rows.
+
+    Args:
+      rows: list of dicts with values for all record table columns.
+    Returns:
+      list of tuples with an insert statement and a list of rows that should
+      be inserted with that statement.
+    """
+    if not rows:
+      return []
+    return [(self.record_type.__table__.insert(), rows)]
+
+  # Columns that identify a record row of an object and columns with values.
+  ROW_KEY = ("key", "property", "subproperty")
+  ROW_VALUES = ("context_id", "tags", "content")
+
+  def get_existing_rows(self, type, keys):
+    """Get current record rows for the given objects keyed by ROW_KEY."""
+    table = self.record_type.__table__
+    query = select(
+        [table.c[name] for name in self.ROW_KEY + self.ROW_VALUES]
+    ).where(
+        table.c.type == type
+    ).where(
+        table.c.key.in_(keys)
+    )
+    size = len(self.ROW_KEY)
+    return {tuple(row[:size]): tuple(row[size:])
+            for row in db.session.execute(query)}
+
+  def diff_rows(self, type, keys, rows):
+    """Compare new record rows of objects with the stored ones.
+
+    Args:
+      type: type name of the objects.
+      keys: ids of the objects.
+      rows: list of dicts with all new record rows of the objects.
+    Returns:
+      tuple of rows to insert, rows to update, keys of rows to delete and
+      number of unchanged rows.
+    """
+    existing = self.get_existing_rows(type, keys)
+    inserted, updated = [], []
+    unchanged = 0
+    for row in rows:
+      row_key = tuple(row[name] for name in self.ROW_KEY)
+      if row_key not in existing:
+        inserted.append(row)
+      elif existing.pop(row_key) != tuple(row[n] for n in self.ROW_VALUES):
+        updated.append(row)
+      else:
+        unchanged += 1
+    return inserted, updated, list(existing), unchanged
+
+  def get_property_update_payloads(self, type, rows, properties):
+    """Get payloads for additional index structures of changed properties.
+
+    Args:
+      type: type name of the objects.
+      rows: list of dicts with all new record rows of the objects.
+      properties: set of (key, property) tuples that have changed.
+    """
+    # pylint: disable=no-self-use,unused-argument
+    return []
+
+  def get_diff_payloads(self, type, keys, rows):
+    """Get payloads that change only the stored rows that differ.
+
+    Args:
+      type: type name of the objects.
+      keys: ids of the objects.
+      rows: list of dicts with all new record rows of the objects.
+    Returns:
+      tuple of a list of (statement, parameters) pairs and a dict with
+      number of inserted, updated, deleted and unchanged rows.
+    """
+    inserted, updated, deleted, unchanged = self.diff_rows(type, keys, rows)
+    table = self.record_type.__table__
+    payloads = []
+    if deleted:
+      payloads.append((table.delete().where(
+          table.c.type == type
+      ).where(
+          tuple_(*[table.c[name] for name in self.ROW_KEY]).in_(deleted)
+      ), None))
+    if updated:
+      statement = table.update().where(and_(*[
+          table.c[name] == bindparam("_" + name)
+          for name in self.ROW_KEY
+      ])).where(
+          table.c.type == type
+      ).values({
+          name: bindparam(name) for name in self.ROW_VALUES
+      })
+      payloads.append((statement, [
+          dict([("_" + name, row[name]) for name in self.ROW_KEY] +
+               [(name, row[name]) for name in self.ROW_VALUES])
+          for row in updated
+      ]))
+    if inserted:
+      payloads.append((table.insert(), inserted))
+    properties = {(row["key"], row["property"])
+                  for row in inserted + updated}
+    properties.update((key, prop) for key, prop, _ in deleted)
+    if properties:
+      payloads.extend(
+          self.get_property_update_payloads(type, rows, properties))
+    stats = {
+        "inserted": len(inserted),
+        "updated": len(updated),
+        "deleted": len(deleted),
+        "unchanged": unchanged,
+    }
+    return payloads, stats
+
   def create_record(self, record, commit=True):
     """Create records in db."""
     for db_record in self.records_generator(record):
@@ -0,0 +1,95 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tokenizers used to build inverted full text index terms.
+
+A tokenizer splits record content into words and produces two sets of terms:
+the terms stored in the posting table for a piece of content, and the terms
+that must all be present in the posting table for a record to match a search
+string.
+"""
+
+import re
+
+
+WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+class PrefixTokenizer(object):
+  """Tokenizer that indexes every word prefix.
+
+  A search word matches any indexed word that starts with it, so searching for
+  "contr" finds records that contain "Control" or "contract". Words inside
+  other words, such as "trol" in "Control", are not found, so this tokenizer
+  does not match the substring semantics of the ``LIKE`` search.
+  """
+
+  # Length of the term column in the posting table.
+  MAX_TERM_LENGTH = 64
+
+  def __init__(self, settings=None):
+    self.min_length = getattr(settings, "FULLTEXT_MIN_TERM_LENGTH", 2)
+
+  @staticmethod
+  def words(text):
+    """Split text into lower case words."""
+    if not text:
+      return []
+    return WORD_RE.findall(unicode(text).lower())
+
+  def word_terms(self, word):
+    """Get all terms that should be indexed for a single word."""
+    word = word[:self.MAX_TERM_LENGTH]
+    return {word[:i] for i in range(self.min_length, len(word) + 1)}
+
+  def index_terms(self, text):
+    """Get the set of terms that should be stored for the given content."""
+    terms = set()
+    for word in self.words(text):
+      terms.update(self.word_terms(word))
+    return terms
+
+  def query_terms(self, text):
+    """Get the set of terms that a record must contain to match text.
+
+    Returns:
+      set of terms or None if the text can not be resolved through the index,
+      for instance if it contains a word shorter than the minimal term length.
+    """
+    words = self.words(text)
+    if not words or any(len(word) < self.min_length for word in words):
+      return None
+    return {word[:self.MAX_TERM_LENGTH] for word in words}
+
+
+class NgramTokenizer(PrefixTokenizer):
+  """Tokenizer that indexes character n-grams of every word.
+
+  Words are matched anywhere inside the indexed words, the same way as with
+  ``LIKE '%term%'``, at the cost of a larger posting table. Words shorter
+  than n-gram size can't be resolved through the index and are left to the
+  ``LIKE`` filter.
+  """
+
+  def __init__(self, settings=None):
+    super(NgramTokenizer, self).__init__(settings)
+    self.ngram_size = max(getattr(settings, "FULLTEXT_NGRAM_SIZE", 3),
+                          self.min_length)
+
+  def word_terms(self, word):
+    """Get all ngrams of a word."""
+    word = word[:self.MAX_TERM_LENGTH]
+    return {word[i:i + self.ngram_size]
+            for i in range(len(word) - self.ngram_size + 1)}
+
+  def query_terms(self, text):
+    """Get ngrams of all search words that are at least ngram size long.
+
+    Returns:
+      set of terms or None if no word is long enough to be resolved through
+      the index.
+    """
+    terms = set()
+    for word in self.words(text):
+      terms.update(self.word_terms(word))
+    return terms or None
@@ -0,0 +1,40 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""
+Add fulltext_record_terms posting table for the inverted index indexer.
+
+The table is filled by the next global reindex once
+``ggrc.fulltext.inverted.Indexer`` is configured as the full text indexer.
+
+Create Date: 2017-10-17 10:00:00.000000
+"""
+# disable Invalid constant name pylint warning for mandatory Alembic variables.
+# pylint: disable=invalid-name
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = 'fa7ef7613c46'
+down_revision = '434683ceff87'
+
+
+def upgrade():
+  """Upgrade database schema and/or data, creating a new revision."""
+  op.create_table(
+      'fulltext_record_terms',
+      sa.Column('term', sa.String(length=64), nullable=False),
+      sa.Column('type', sa.String(length=64), nullable=False),
+      sa.Column('key', sa.Integer(), autoincrement=False, nullable=False),
+      sa.Column('property', sa.String(length=250), nullable=False),
+      sa.PrimaryKeyConstraint('term', 'type', 'key', 'property'),
+  )
+  op.create_index('ix_fulltext_record_terms_type_key',
+                  'fulltext_record_terms', ['type', 'key'], unique=False)
+
+
+def downgrade():
+  """Downgrade database schema and/or data back to the previous revision."""
+  op.drop_table('fulltext_record_terms')
@@ -0,0 +1,36 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""
+Add notification_digests table for resuming interrupted daily digest runs.
+
+Create Date: 2017-10-18 10:00:00.000000
+"""
+# disable Invalid constant name pylint warning for mandatory Alembic variables.
+# pylint: disable=invalid-name
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '5eee912a0d24'
+down_revision = 'fa7ef7613c46'
+
+
+def upgrade():
+  """Upgrade database schema and/or data, creating a new revision."""
+  op.create_table(
+      'notification_digests',
+      sa.Column('id', sa.Integer(), nullable=False),
+      sa.Column('email', sa.String(length=250), nullable=False),
+      sa.Column('content_hash', sa.String(length=40), nullable=False),
+      sa.Column('sent_at', sa.DateTime(), nullable=False),
+      sa.PrimaryKeyConstraint('id'),
+      sa.UniqueConstraint('email', name='uq_notification_digests_email'),
+  )
+
+
+def downgrade():
+  """Downgrade database schema and/or data back to the previous revision."""
+  op.drop_table('notification_digests')
@@ -0,0 +1,37 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""
+Add similarity_index table.
+
+Create Date: 2017-10-19 10:00:00.000000
+"""
+# disable Invalid constant name pylint warning for mandatory Alembic variables.
+# pylint: disable=invalid-name
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '3a1c5e2b9f47'
+down_revision = '5eee912a0d24'
+
+
+def upgrade():
+  """Upgrade database schema and/or data, creating a new revision."""
+  op.create_table(
+      'similarity_index',
+      sa.Column('object_type', sa.String(length=250), nullable=False),
+      sa.Column('object_id', sa.Integer(), nullable=False),
+      sa.Column('similar_id', sa.Integer(), nullable=False),
+      sa.Column('weight', sa.Integer(), nullable=False),
+      sa.PrimaryKeyConstraint('object_type', 'object_id', 'similar_id'),
+  )
+  op.create_index('ix_similarity_index_similar', 'similarity_index',
+                  ['object_type', 'similar_id'])
+
+
+def downgrade():
+  """Downgrade database schema and/or data back to the previous revision."""
+  op.drop_table('similarity_index')
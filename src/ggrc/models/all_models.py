@@ -47,6 +47,7 @@ from ggrc.models.market import Market
 from ggrc.models.meeting import Meeting
 from ggrc.models.notification import Notification
 from ggrc.models.notification import NotificationConfig
+from ggrc.models.notification import NotificationDigest
 from ggrc.models.notification import NotificationType
 from ggrc.models.object_person import ObjectPerson
 from ggrc.models.objective import Objective
@@ -125,6 +126,7 @@ all_models = [  # pylint: disable=invalid-name
     Event,
     BackgroundTask,
     NotificationConfig,
+    NotificationDigest,
     NotificationType,
     Notification,
     Issue,
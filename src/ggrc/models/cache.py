@@ -44,6 +44,12 @@ class Cache:
     self.dirty = {}
     self.deleted = {}
 
+  def restore(self, other):
+    """Replace tracked objects with the ones tracked by other."""
+    self.new = dict(other.new)
+    self.dirty = dict(other.dirty)
+    self.deleted = dict(other.deleted)
+
   def copy(self):
     copied_cache = Cache()
     copied_cache.new = dict(self.new)
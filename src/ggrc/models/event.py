@@ -33,6 +33,20 @@ class Event(Base, db.Model):
       'revisions',
   ]
 
+  # ids of revisions written in bulk by log_event
+  _revision_ids = None
+
+  @property
+  def revision_ids(self):
+    """Ids of revisions of the event, without loading the revisions."""
+    if self._revision_ids is None:
+      return [revision.id for revision in self.revisions]
+    return self._revision_ids
+
+  @revision_ids.setter
+  def revision_ids(self, value):
+    self._revision_ids = value
+
   @staticmethod
   def _extra_table_args(class_):
     return (
@@ -8,6 +8,7 @@ from ggrc.models.hooks import audit
 from ggrc.models.hooks import comment
 from ggrc.models.hooks import issue
 from ggrc.models.hooks import relationship
+from ggrc.models.hooks import similarity_index
 
 
 ALL_HOOKS = [
@@ -16,6 +17,7 @@ ALL_HOOKS = [
     comment,
     issue,
     relationship,
+    similarity_index,
 ]
 
 
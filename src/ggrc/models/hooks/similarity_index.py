@@ -0,0 +1,85 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Similarity index maintenance hooks."""
+
+import sqlalchemy as sa
+
+from ggrc.models import all_models
+from ggrc.models import similarity_index
+
+
+def _relationship_changed(mapper, connection, target):
+  """Mark both ends of an inserted or deleted relationship."""
+  # pylint: disable=unused-argument
+  similarity_index.mark_changed([
+      (target.source_type, target.source_id),
+      (target.destination_type, target.destination_id),
+  ])
+
+
+def _object_updated(mapper, connection, target):
+  """Mark objects with a changed assessment type."""
+  # pylint: disable=unused-argument
+  if sa.inspect(target).attrs.assessment_type.history.has_changes():
+    similarity_index.mark_changed([(target.type, target.id)])
+
+
+def _object_deleted(mapper, connection, target):
+  # pylint: disable=unused-argument
+  similarity_index.mark_changed([(target.type, target.id)])
+
+
+def _snapshots_deleted(session, flush_context, instances):
+  """Mark objects mapped to snapshots that are going to be deleted.
+
+  Objects are looked up before the flush, when the relationships of the
+  snapshots still exist.
+  """
+  # pylint: disable=unused-argument
+  snapshot_ids = [obj.id for obj in session.deleted
+                  if isinstance(obj, all_models.Snapshot)]
+  if not snapshot_ids or not similarity_index.is_enabled():
+    return
+  rel = all_models.Relationship
+  with session.no_autoflush:
+    rows = session.query(
+        rel.source_type, rel.source_id,
+        rel.destination_type, rel.destination_id,
+    ).filter(sa.or_(
+        sa.and_(rel.source_type == "Snapshot",
+                rel.source_id.in_(snapshot_ids)),
+        sa.and_(rel.destination_type == "Snapshot",
+                rel.destination_id.in_(snapshot_ids)),
+    )).all()
+  similarity_index.mark_changed(
+      stub for row in rows for stub in ((row[0], row[1]), (row[2], row[3])))
+
+
+def _update_index(session):
+  # pylint: disable=unused-argument
+  similarity_index.update_index()
+
+
+def _clear_changed(session):
+  """Forget marked objects when the whole transaction is rolled back.
+
+  Objects marked in a rolled back savepoint are kept, refreshing their
+  weights again is harmless.
+  """
+  if session.transaction is None or not session.transaction.nested:
+    similarity_index.clear_changed(session)
+
+
+def init_hook():
+  """Initialize hooks that keep the similarity index up to date."""
+  sa.event.listen(all_models.Relationship, "after_insert",
+                  _relationship_changed)
+  sa.event.listen(all_models.Relationship, "after_delete",
+                  _relationship_changed)
+  for model in similarity_index.get_indexed_models():
+    sa.event.listen(model, "after_update", _object_updated)
+    sa.event.listen(model, "after_delete", _object_deleted)
+  sa.event.listen(sa.orm.session.Session, "before_flush", _snapshots_deleted)
+  sa.event.listen(sa.orm.session.Session, "before_commit", _update_index)
+  sa.event.listen(sa.orm.session.Session, "after_rollback", _clear_changed)
@@ -778,7 +778,12 @@ class Slugged(Base):
 
   @classmethod
   def generate_slug_prefix_for(cls, obj):
-    return obj.__class__.__name__.upper()
+    return obj.get_slug_prefix()
+
+  @classmethod
+  def get_slug_prefix(cls):
+    """Get the slug prefix of objects of this class."""
+    return cls.__name__.upper()
 
   @classmethod
   def ensure_slug_before_flush(cls, session, flush_context, instances):
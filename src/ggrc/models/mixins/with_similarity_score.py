@@ -15,6 +15,7 @@ from sqlalchemy.orm import aliased
 from sqlalchemy.sql import func
 
 from ggrc import db
+from ggrc.models import similarity_index
 from ggrc.models.relationship import Relationship
 from ggrc.models.snapshot import Snapshot
 
@@ -34,7 +35,7 @@ class WithSimilarityScore(object):
 
   @classmethod
   def get_similar_objects_query(cls, id_, types="all", relevant_types=None,
-                                threshold=1):
+                                threshold=1, use_index=True):
     """Get objects of types similar to cls instance by their mappings.
 
     Args:
@@ -43,6 +44,8 @@ class WithSimilarityScore(object):
              objects of any type);
       relevant_types: use this parameter to override assessment_type;
       threshold: use this parameter to set similarity threshold.
+      use_index: read objects of the same type from the similarity index if
+                 it is enabled.
 
     Returns:
       SQLAlchemy query that yields results with columns [(id, type, weight)] -
@@ -54,6 +57,9 @@ class WithSimilarityScore(object):
     if not hasattr(cls, "assessment_type"):
       raise AttributeError("Expected 'assessment_type' field defined for "
                            "'{c.__name__}' model.".format(c=cls))
+    if (use_index and similarity_index.is_enabled() and
+            relevant_types is None and types == [cls.__name__]):
+      return similarity_index.get_similar_objects_query(cls, id_, threshold)
     if relevant_types is None:
       relevant_types = db.session.query(cls.assessment_type)\
                                  .filter(cls.id == id_)
@@ -7,6 +7,7 @@ from sqlalchemy.orm import backref
 
 from ggrc import db
 from ggrc.models.mixins import Base
+from ggrc.models.mixins import Identifiable
 from ggrc.models import utils
 from ggrc.models import reflection
 
@@ -61,3 +62,17 @@ class Notification(Base, db.Model):
 
   object = utils.PolymorphicRelationship("object_id", "object_type",
                                          "{}_notifiable")
+
+
+class NotificationDigest(Identifiable, db.Model):
+  """Daily digest sent in an unfinished digest run.
+
+  Every sent digest is recorded with a hash of its content, so a run that
+  failed half-way can be resumed without sending anyone the same digest
+  twice. Records are removed when a run finishes.
+  """
+  __tablename__ = 'notification_digests'
+
+  email = db.Column(db.String, nullable=False, unique=True)
+  content_hash = db.Column(db.String, nullable=False)
+  sent_at = db.Column(db.DateTime, nullable=False)
@@ -68,6 +68,17 @@ class Revision(Base, db.Model):
     self.resource_slug = getattr(obj, "slug", None)
     self.modified_by_id = modified_by_id
     self.action = action
+    self._content = self.populate_content(content)
+
+    for attr in ["source_type",
+                 "source_id",
+                 "destination_type",
+                 "destination_id"]:
+      setattr(self, attr, getattr(obj, attr, None))
+
+  @staticmethod
+  def populate_content(content):
+    """Add person stubs to ACL entries of log_json content."""
     if "access_control_list" in content and content["access_control_list"]:
       for acl in content["access_control_list"]:
         acl["person"] = {
@@ -75,14 +86,7 @@ class Revision(Base, db.Model):
             "type": "Person",
             "href": "/api/people/{}".format(acl["person_id"]),
         }
-
-    self._content = content
-
-    for attr in ["source_type",
-                 "source_id",
-                 "destination_type",
-                 "destination_id"]:
-      setattr(self, attr, getattr(obj, attr, None))
+    return content
 
   @builder.simple_property
   def description(self):
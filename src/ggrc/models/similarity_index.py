@@ -0,0 +1,239 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Materialized similarity index.
+
+The index stores the similarity weight of every pair of objects of a
+WithSimilarityScore model, such as two Assessments, that have a weight of at
+least 1. With SIMILARITY_INDEX_ENABLED the "similar" query operator and the
+"__similarity__" sort read the weights from the index instead of joining the
+relationships and snapshots on every request.
+
+The weight of a pair only depends on the mappings of the two objects and on
+their assessment types, and it is the same in both directions. So when a
+mapping of an object changes, only the pairs containing that object change:
+its weights are computed again with the live query and stored in both
+directions. Objects with changed mappings are collected during the
+transaction with mark_changed and refreshed before commit.
+"""
+
+from collections import defaultdict
+
+import sqlalchemy as sa
+from sqlalchemy.ext.declarative import declared_attr
+
+from ggrc import db
+from ggrc import settings
+from ggrc.utils import benchmark
+from ggrc.utils import generate_id_chunks
+
+CHUNK_SIZE = 100
+
+# Key of objects with changed mappings in the info dict of the session
+CHANGED_KEY = "similarity_changed"
+
+
+# pylint: disable=too-few-public-methods
+class SimilarityIndex(db.Model):
+  """Similarity weight of a pair of objects of the same type."""
+  __tablename__ = "similarity_index"
+
+  object_type = db.Column(db.String(250), primary_key=True)
+  object_id = db.Column(db.Integer, primary_key=True)
+  similar_id = db.Column(db.Integer, primary_key=True)
+  weight = db.Column(db.Integer, nullable=False)
+
+  @declared_attr
+  def __table_args__(cls):  # pylint: disable=no-self-argument
+    return (
+        db.Index("ix_{}_similar".format(cls.__tablename__),
+                 "object_type", "similar_id"),
+    )
+
+
+def is_enabled():
+  return getattr(settings, "SIMILARITY_INDEX_ENABLED", False)
+
+
+def get_indexed_models():
+  """Get models whose similar objects are kept in the index."""
+  from ggrc.models import all_models
+  from ggrc.models.mixins.with_similarity_score import WithSimilarityScore
+  return [model for model in all_models.all_models
+          if issubclass(model, WithSimilarityScore)]
+
+
+def get_similar_objects_query(model, id_, threshold=1):
+  """Get similar objects of the same type from the index.
+
+  Returns:
+    query with the same (id, type, weight) columns as
+    WithSimilarityScore.get_similar_objects_query.
+  """
+  return db.session.query(
+      SimilarityIndex.similar_id.label("id"),
+      sa.literal(model.__name__).label("type"),
+      SimilarityIndex.weight.label("weight"),
+  ).filter(
+      SimilarityIndex.object_type == model.__name__,
+      SimilarityIndex.object_id == id_,
+      SimilarityIndex.weight >= threshold,
+  )
+
+
+def mark_changed(stubs):
+  """Refresh the index for objects before the current transaction commits.
+
+  Args:
+    stubs: (type, id) pairs of objects whose mappings have changed. Objects
+      of types that are not indexed are ignored.
+  """
+  if not is_enabled():
+    return
+  indexed = {model.__name__ for model in get_indexed_models()}
+  changed = db.session().info.setdefault(CHANGED_KEY, set())
+  changed.update((type_, id_) for type_, id_ in stubs if type_ in indexed)
+
+
+def clear_changed(session):
+  """Forget objects marked as changed in a session."""
+  session.info.pop(CHANGED_KEY, None)
+
+
+def compute_weights(model, ids):
+  """Get similarity weights of objects with the live query.
+
+  Returns:
+    dict of {object_id: {similar_id: weight}}.
+  """
+  weights = {}
+  for id_ in ids:
+    weights[id_] = {
+        row.id: int(row.weight)
+        for row in model.get_similar_objects_query(
+            id_, types=[model.__name__], use_index=False)
+    }
+  return weights
+
+
+def get_stored_weights(model, ids):
+  """Get similarity weights of objects from the index.
+
+  Returns:
+    dict of {object_id: {similar_id: weight}}.
+  """
+  weights = {id_: {} for id_ in ids}
+  if not ids:
+    return weights
+  rows = db.session.query(
+      SimilarityIndex.object_id,
+      SimilarityIndex.similar_id,
+      SimilarityIndex.weight,
+  ).filter(
+      SimilarityIndex.object_type == model.__name__,
+      SimilarityIndex.object_id.in_(ids),
+  )
+  for object_id, similar_id, weight in rows:
+    weights[object_id][similar_id] = weight
+  return weights
+
+
+def get_index_rows(model, weights, mirror=True):
+  """Get index rows for computed weights.
+
+  Args:
+    model: model of the objects.
+    weights: dict of {object_id: {similar_id: weight}}.
+    mirror: also add rows for similar objects, which have the same weight in
+      the other direction.
+  Returns:
+    list of row dicts for the similarity_index table.
+  """
+  pairs = {}
+  for object_id, similar in weights.iteritems():
+    for similar_id, weight in similar.iteritems():
+      pairs[object_id, similar_id] = weight
+      if mirror:
+        pairs[similar_id, object_id] = weight
+  return [{
+      "object_type": model.__name__,
+      "object_id": object_id,
+      "similar_id": similar_id,
+      "weight": weight,
+  } for (object_id, similar_id), weight in sorted(pairs.iteritems())]
+
+
+def refresh(model, ids):
+  """Compute index rows of objects again, in both directions."""
+  ids = sorted(ids)
+  table = SimilarityIndex.__table__
+  for start in range(0, len(ids), CHUNK_SIZE):
+    chunk = ids[start:start + CHUNK_SIZE]
+    db.session.execute(table.delete().where(sa.and_(
+        table.c.object_type == model.__name__,
+        sa.or_(table.c.object_id.in_(chunk),
+               table.c.similar_id.in_(chunk)),
+    )))
+    rows = get_index_rows(model, compute_weights(model, chunk))
+    if rows:
+      db.session.execute(table.insert(), rows)
+
+
+def update_index():
+  """Refresh index rows of objects marked as changed in the session."""
+  if not is_enabled():
+    return
+  db.session.flush()
+  changed = db.session().info.pop(CHANGED_KEY, None)
+  if not changed:
+    return
+  ids_by_type = defaultdict(set)
+  for type_, id_ in changed:
+    ids_by_type[type_].add(id_)
+  with benchmark("Refresh similarity index"):
+    for model in get_indexed_models():
+      if model.__name__ in ids_by_type:
+        refresh(model, ids_by_type[model.__name__])
+
+
+def rebuild(chunk_size=CHUNK_SIZE):
+  """Compute the whole index again.
+
+  Every chunk of objects is committed separately.
+
+  Returns:
+    dict with the number of indexed objects by type.
+  """
+  stats = {}
+  table = SimilarityIndex.__table__
+  for model in get_indexed_models():
+    with benchmark("Rebuild similarity index for {}".format(model.__name__)):
+      db.session.execute(
+          table.delete().where(table.c.object_type == model.__name__))
+      db.session.commit()
+      stats[model.__name__] = 0
+      for ids in generate_id_chunks(db.session.query(model.id), model.id,
+                                    chunk_size=chunk_size):
+        rows = get_index_rows(model, compute_weights(model, ids),
+                              mirror=False)
+        if rows:
+          db.session.execute(table.insert(), rows)
+        db.session.commit()
+        stats[model.__name__] += len(ids)
+  return stats
+
+
+def check(model, ids):
+  """Compare stored weights of objects with the live query.
+
+  Returns:
+    dict of {object_id: {"stored": weights, "expected": weights}} for the
+    objects whose stored weights differ.
+  """
+  stored = get_stored_weights(model, ids)
+  expected = compute_weights(model, ids)
+  return {
+      id_: {"stored": stored[id_], "expected": expected[id_]}
+      for id_ in ids
+      if stored[id_] != expected[id_]
+  }
@@ -4,15 +4,118 @@
 """Declaration of custom ORM data types.
 
 Add Json and Compressed type declaration for use in ORM models.
+
+Values are converted by codecs. JsonCodec serializes Json types to text.
+Values of CompressedType start with the version byte of the codec that
+wrote them, so the codec can be changed without migrating existing rows.
+Rows without a version byte are plain pickles written before codecs were
+introduced.
 """
 
+import cPickle
 import json
-import pickle
+import zlib
+
 import sqlalchemy.types as types
+from ggrc import settings
 from ggrc import utils
 from ggrc.models import exceptions
 
 
+class JsonCodec(object):
+  """Codec of Json data types."""
+
+  _decode = json.JSONDecoder().decode
+
+  def __init__(self, max_length):
+    self.max_length = max_length
+
+  def encode(self, value):
+    """Serialize value to json, strings are stored as they are."""
+    if value is None or isinstance(value, basestring):
+      return value
+    value = utils.as_json(value)
+    # a character takes at most 4 bytes in utf-8, so only long values need to
+    # be encoded to check their size
+    if (len(value) * 4 > self.max_length and
+            len(value.encode('utf-8')) > self.max_length):
+      raise exceptions.ValidationError("Log record content too long")
+    return value
+
+  def decode(self, value):
+    if value is None:
+      return value
+    return self._decode(value)
+
+
+class LegacyPickleCodec(object):
+  """Codec of rows written as plain pickles, without a version byte."""
+
+  version = None
+
+  @staticmethod
+  def decode(data):
+    return cPickle.loads(data)
+
+
+class PickleCodec(object):
+  """Binary pickle without compression."""
+
+  version = "\x01"
+
+  def encode(self, value):
+    return self.version + cPickle.dumps(value, cPickle.HIGHEST_PROTOCOL)
+
+  @staticmethod
+  def decode(data):
+    return cPickle.loads(data[1:])
+
+
+class ZlibPickleCodec(object):
+  """Binary pickle compressed with zlib."""
+
+  version = "\x02"
+
+  def __init__(self, level=6):
+    self.level = level
+
+  def encode(self, value):
+    return self.version + zlib.compress(
+        cPickle.dumps(value, cPickle.HIGHEST_PROTOCOL), self.level)
+
+  @staticmethod
+  def decode(data):
+    return cPickle.loads(zlib.decompress(data[1:]))
+
+
+# Codecs that can be read, by their version byte. The version bytes are not
+# valid first bytes of protocol 0 pickles, which were stored before.
+PICKLE_CODECS = {codec.version: codec for codec in (
+    PickleCodec(),
+    ZlibPickleCodec(),
+)}
+
+
+def get_pickle_codec(level=None):
+  """Get the codec for writing CompressedType values.
+
+  Args:
+    level: zlib compression level, COMPRESSED_TYPE_LEVEL by default. Level 0
+      stores pickles without compression.
+  """
+  if level is None:
+    level = getattr(settings, "COMPRESSED_TYPE_LEVEL", 6)
+  if not level:
+    return PICKLE_CODECS[PickleCodec.version]
+  return ZlibPickleCodec(level)
+
+
+def decode_pickle(data):
+  """Decode a CompressedType value written by any codec."""
+  codec = PICKLE_CODECS.get(data[:1], LegacyPickleCodec)
+  return codec.decode(data)
+
+
 class LongJsonType(types.TypeDecorator):
   # pylint: disable=W0223
   """Custom Long Json data type.
@@ -24,19 +127,15 @@ class LongJsonType(types.TypeDecorator):
   MAX_TEXT_LENGTH = 4294967295
   impl = types.Text
 
+  def __init__(self, *args, **kwargs):
+    super(LongJsonType, self).__init__(*args, **kwargs)
+    self.codec = JsonCodec(self.MAX_TEXT_LENGTH)
+
   def process_result_value(self, value, dialect):
-    if value is not None:
-      value = json.loads(value)
-    return value
+    return self.codec.decode(value)
 
   def process_bind_param(self, value, dialect):
-    if value is None or isinstance(value, basestring):
-      pass
-    else:
-      value = utils.as_json(value)
-      if len(value.encode('utf-8')) > self.MAX_TEXT_LENGTH:
-        raise exceptions.ValidationError("Log record content too long")
-    return value
+    return self.codec.encode(value)
 
 
 class JsonType(types.TypeDecorator):
@@ -50,37 +149,34 @@ class JsonType(types.TypeDecorator):
   MAX_TEXT_LENGTH = 65534
   impl = types.Text
 
+  def __init__(self, *args, **kwargs):
+    super(JsonType, self).__init__(*args, **kwargs)
+    self.codec = JsonCodec(self.MAX_TEXT_LENGTH)
+
   def process_result_value(self, value, dialect):
-    if value is not None:
-      value = json.loads(value)
-    return value
+    return self.codec.decode(value)
 
   def process_bind_param(self, value, dialect):
-    if value is None or isinstance(value, basestring):
-      pass
-    else:
-      value = utils.as_json(value)
-      if len(value.encode('utf-8')) > self.MAX_TEXT_LENGTH:
-        raise exceptions.ValidationError("Log record content too long")
-    return value
+    return self.codec.encode(value)
 
 
 class CompressedType(types.TypeDecorator):
   # pylint: disable=W0223
   """ Custom Compresed data type
 
-  Custom type for storing any python object in our database as serialized text.
+  Custom type for storing any python object in our database as serialized
+  and compressed binary data.
   """
   MAX_BINARY_LENGTH = 16777215
   impl = types.LargeBinary(length=MAX_BINARY_LENGTH)
 
   def process_result_value(self, value, dialect):
     if value is not None:
-      value = pickle.loads(value)
+      value = decode_pickle(value)
     return value
 
   def process_bind_param(self, value, dialect):
-    value = pickle.dumps(value)
+    value = get_pickle_codec().encode(value)
     if len(value) > self.MAX_BINARY_LENGTH:
       raise exceptions.ValidationError("Log record content too long")
     return value
@@ -91,38 +91,86 @@ class Services(object):
     return service(notif)
 
 
-def get_filter_data(
-    notification, people_cache, tasks_cache=None, del_rels_cache=None
-):
-  """Get filtered notification data.
-
-  This function gets notification data for all users who should receive it. A
-  single notification can be for multiple users (such as all assignees) but
-  only some should receive it depending on if it's an instant notification or
-  a daily digest and the specific users notification settings.
+def filter_data(notification, data, people_cache):
+  """Filter notification data of a single notification by its recipients.
 
   Args:
-    notification (Notification): Notification object for which we want to get
-      data.
-    tasks_cache (dict): prefetched CycleTaskGroupObjectTask instances
-      accessible by their ID as a key
-    del_rels_cache (dict): prefetched Revision instances representing the
-      relationships to Tasks that were deleted grouped by task ID as a key
+    notification (Notification): Notification the data is for.
+    data (dict): notification data for all users, as returned by the
+      notification service.
+    people_cache (dict): Person instances by id.
 
   Returns:
-    dict: dictionary containing notification data for all users who should
-      receive it, according to their notification settings.
+    dict: the part of data for users who should receive the notification.
   """
   result = {}
-  data = Services.call_service(
-      notification, tasks_cache=tasks_cache, del_rels_cache=del_rels_cache)
-
   for user, user_data in data.iteritems():
     if should_receive(notification, user_data, people_cache):
       result[user] = user_data
   return result
 
 
+def _get_person_ids(notification_data):
+  return {user_data["user"]["id"]
+          for data in notification_data
+          for user_data in data.itervalues()}
+
+
+def prefetch_people(person_ids, people_cache):
+  """Load people needed by should_receive into the cache in bulk.
+
+  People are loaded with their roles and notification configs in chunks of
+  1000, so that should_receive does not need to query them one by one.
+
+  Args:
+    person_ids: ids of people, -1 for people that do not exist.
+    people_cache (dict): Person instances by id, updated in place.
+  """
+  missing = sorted(person_id for person_id in person_ids
+                   if person_id != -1 and person_id not in people_cache)
+  for start in range(0, len(missing), 1000):
+    people_cache.update((person.id, person) for person in db.session.query(
+        Person
+    ).options(
+        joinedload('user_roles').joinedload('role'),
+        joinedload('notification_configs')
+    ).filter(
+        Person.id.in_(missing[start:start + 1000])
+    ))
+
+
+def aggregate_notification_data(notifications, people_cache):
+  """Get merged and filtered data of notifications.
+
+  Notification data of all notifications is built first, so that all of
+  their recipients can be prefetched at once.
+
+  Args:
+    notifications (list of Notification): notifications to aggregate.
+    people_cache (dict): Person instances by id, shared between calls.
+
+  Returns:
+    dict: merged data for users that should receive the notifications.
+  """
+  tasks_cache = cycle_tasks_cache(notifications)
+  deleted_rels_cache = deleted_task_rels_cache(tasks_cache.keys())
+
+  notification_data = [
+      (notification, Services.call_service(
+          notification, tasks_cache=tasks_cache,
+          del_rels_cache=deleted_rels_cache))
+      for notification in notifications
+  ]
+  prefetch_people(_get_person_ids(data for _, data in notification_data),
+                  people_cache)
+
+  aggregate_data = {}
+  for notification, data in notification_data:
+    filtered_data = filter_data(notification, data, people_cache)
+    aggregate_data = merge_dict(aggregate_data, filtered_data)
+  return aggregate_data
+
+
 def get_notification_data(notifications):
   """Get notification data for all notifications.
 
@@ -139,25 +187,18 @@ def get_notification_data(notifications):
   """
   if not notifications:
     return {}
-  aggregate_data = {}
-  people_cache = {}
+  aggregate_data = aggregate_notification_data(notifications, {})
+  finalize_notification_data(aggregate_data)
+  return aggregate_data
 
-  tasks_cache = cycle_tasks_cache(notifications)
-  deleted_rels_cache = deleted_task_rels_cache(tasks_cache.keys())
-
-  for notification in notifications:
-    filtered_data = get_filter_data(
-        notification, people_cache, tasks_cache=tasks_cache,
-        del_rels_cache=deleted_rels_cache)
-    aggregate_data = merge_dict(aggregate_data, filtered_data)
 
+def finalize_notification_data(aggregate_data):
+  """Clean up aggregated notification data before rendering."""
   # Remove notifications for objects without a contact (such as task groups)
   aggregate_data.pop("", None)
 
   sort_comments(aggregate_data)
 
-  return aggregate_data
-
 
 def sort_comments(notif_data):
   """Inline sort comment notifications by comment creation times.
@@ -284,30 +325,11 @@ def send_daily_digest_notifications():
     str: String containing a simple list of who received the notification.
   """
   # pylint: disable=invalid-name
-  notif_list, notif_data = get_daily_notifications()
-  sent_emails = []
-  subject = "GGRC daily digest for {}".format(date.today().strftime("%b %d"))
-  for user_email, data in notif_data.iteritems():
-    data = modify_data(data)
-    email_body = settings.EMAIL_DIGEST.render(digest=data)
-    send_email(user_email, subject, email_body)
-    sent_emails.append(user_email)
-  set_notification_sent_time(notif_list)
+  from ggrc.notifications.digest import DigestPipeline
+  sent_emails = DigestPipeline().run()
   return "emails sent to: <br> {}".format("<br>".join(sent_emails))
 
 
-def set_notification_sent_time(notif_list):
-  """Set sent time to now for all notifications in the list.
-
-  Args:
-    notif_list (list of Notification): List of notification for which we want
-      to modify sent_at field.
-  """
-  for notif in notif_list:
-    notif.sent_at = datetime.now()
-  db.session.commit()
-
-
 def show_pending_notifications():
   """Get notification html for all future notifications.
 
@@ -0,0 +1,224 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Daily digest pipeline.
+
+The digest is built and sent in stages:
+
+  collect: due notifications are loaded in keyset paginated id chunks and
+    their data is aggregated per recipient. Recipients are prefetched with
+    their roles and notification configs in bulk.
+  render: digests are rendered in the task process, or in
+    ``settings.DIGEST_RENDER_WORKERS`` worker processes.
+  send: digests are sent in batches through the configured mail backend and
+    every sent digest is recorded in NotificationDigest.
+  finish: notifications are marked as sent and the records are removed.
+
+If a run fails, the next run skips digests that were already sent with the
+same content, so nobody gets the same digest twice. Time spent in every stage
+is kept in the timings of the pipeline.
+"""
+
+import collections
+import contextlib
+import hashlib
+import multiprocessing
+import time
+from datetime import datetime
+from logging import getLogger
+
+from sqlalchemy.sql.expression import true
+
+from ggrc import db
+from ggrc import settings
+from ggrc.models.notification import Notification
+from ggrc.models.notification import NotificationDigest
+from ggrc.notifications import common
+from ggrc.notifications.mail import get_mail_backend
+from ggrc.notifications.mail import MailBatchError
+from ggrc.notifications.mail import MailMessage
+from ggrc.utils import generate_id_chunks
+from ggrc.utils import merge_dict
+
+
+logger = getLogger(__name__)  # pylint: disable=invalid-name
+
+CHUNK_SIZE = 1000
+
+
+def _render_digest(data):
+  return settings.EMAIL_DIGEST.render(digest=data)
+
+
+def content_hash(message):
+  """Get hash of the recipient independent content of a message."""
+  return hashlib.sha1(
+      u"{}\n{}".format(message.subject, message.body).encode("utf-8")
+  ).hexdigest()
+
+
+class DigestPipeline(object):
+  """Build and send daily digests of due notifications.
+
+  Attributes:
+    timings: seconds spent in each stage.
+    sent: emails of recipients that got their digest in this run.
+    skipped: emails of recipients whose digest was sent by a previous run.
+  """
+
+  def __init__(self, today=None, backend=None, workers=None,
+               chunk_size=CHUNK_SIZE, batch_size=None):
+    if today is None:
+      self.until = datetime.today()
+      self.today = self.until.date()
+    else:
+      self.until = datetime.combine(today, datetime.max.time())
+      self.today = today
+    self.backend = backend or get_mail_backend()
+    if workers is None:
+      workers = getattr(settings, "DIGEST_RENDER_WORKERS", 0)
+    self.workers = workers
+    self.chunk_size = chunk_size
+    self.batch_size = batch_size or getattr(
+        settings, "DIGEST_MAIL_BATCH_SIZE", 100)
+    self.timings = collections.OrderedDict()
+    self.sent = []
+    self.skipped = []
+
+  @contextlib.contextmanager
+  def stage(self, name):
+    """Add time spent in the block to the timing of a stage."""
+    start = time.time()
+    try:
+      yield
+    finally:
+      self.timings[name] = round(
+          self.timings.get(name, 0) + time.time() - start, 3)
+
+  def _notification_query(self):
+    return db.session.query(Notification.id).filter(
+        (Notification.send_on <= self.until) &
+        ((Notification.sent_at.is_(None)) | (Notification.repeating == true()))
+    )
+
+  def collect(self):
+    """Get ids of due notifications and their data by recipient email."""
+    ids = []
+    data = {}
+    people_cache = {}
+    for chunk in generate_id_chunks(self._notification_query(),
+                                    Notification.id,
+                                    chunk_size=self.chunk_size):
+      notifications = Notification.query.filter(
+          Notification.id.in_(chunk)).all()
+      merge_dict(data, common.aggregate_notification_data(notifications,
+                                                          people_cache))
+      ids.extend(chunk)
+    common.finalize_notification_data(data)
+    return ids, data
+
+  def _make_pool(self, count):
+    """Create render worker pool if there is enough work for it."""
+    if self.workers < 1 or count < 2:
+      return None
+    # workers must not share database connections with this process
+    db.session.commit()
+    db.engine.dispose()
+    return multiprocessing.Pool(min(self.workers, count),
+                                initializer=db.engine.dispose)
+
+  def render(self, data):
+    """Render digests of all recipients.
+
+    Returns:
+      list of MailMessage sorted by recipient.
+    """
+    subject = "GGRC daily digest for {}".format(self.today.strftime("%b %d"))
+    emails = sorted(data)
+    digests = [common.modify_data(data[email]) for email in emails]
+    pool = self._make_pool(len(digests))
+    if pool:
+      try:
+        bodies = pool.map(_render_digest, digests)
+      finally:
+        pool.close()
+        pool.join()
+    else:
+      bodies = [_render_digest(digest) for digest in digests]
+    return [MailMessage(email, subject, body)
+            for email, body in zip(emails, bodies)]
+
+  def _get_sent_hashes(self, emails):
+    hashes = {}
+    for start in range(0, len(emails), self.chunk_size):
+      hashes.update(db.session.query(
+          NotificationDigest.email, NotificationDigest.content_hash
+      ).filter(
+          NotificationDigest.email.in_(emails[start:start + self.chunk_size])
+      ))
+    return hashes
+
+  def _record(self, messages):
+    """Store sent messages, replacing records of previous runs."""
+    if not messages:
+      return
+    emails = [message.to for message in messages]
+    NotificationDigest.query.filter(
+        NotificationDigest.email.in_(emails)
+    ).delete(synchronize_session=False)
+    now = datetime.now()
+    db.session.execute(NotificationDigest.__table__.insert(), [
+        {"email": message.to, "content_hash": content_hash(message),
+         "sent_at": now}
+        for message in messages
+    ])
+    db.session.commit()
+    self.sent.extend(emails)
+
+  def send(self, messages):
+    """Send messages that were not sent by a previous run, in batches."""
+    sent_hashes = self._get_sent_hashes([message.to for message in messages])
+    pending = []
+    for message in messages:
+      if sent_hashes.get(message.to) == content_hash(message):
+        self.skipped.append(message.to)
+      else:
+        pending.append(message)
+    for start in range(0, len(pending), self.batch_size):
+      try:
+        sent = self.backend.send_batch(
+            pending[start:start + self.batch_size])
+      except MailBatchError as error:
+        self._record(error.sent)
+        raise
+      self._record(sent)
+
+  def finish(self, notification_ids):
+    """Mark notifications as sent and forget the sent digests."""
+    now = datetime.now()
+    for start in range(0, len(notification_ids), self.chunk_size):
+      Notification.query.filter(
+          Notification.id.in_(notification_ids[start:start + self.chunk_size])
+      ).update({Notification.sent_at: now}, synchronize_session=False)
+    NotificationDigest.query.delete(synchronize_session=False)
+    db.session.commit()
+
+  def run(self):
+    """Send daily digests.
+
+    Returns:
+      list of emails of recipients that got their digest in this run.
+    """
+    try:
+      with self.stage("collect"):
+        notification_ids, data = self.collect()
+      with self.stage("render"):
+        messages = self.render(data)
+      with self.stage("send"):
+        self.send(messages)
+      with self.stage("finish"):
+        self.finish(notification_ids)
+    finally:
+      logger.info("Daily digest: %s sent, %s skipped, timings %s",
+                  len(self.sent), len(self.skipped), dict(self.timings))
+    return self.sent
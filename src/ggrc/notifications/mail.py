@@ -0,0 +1,87 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Mail backends used for sending notification emails in batches.
+
+The backend is configured with the MAIL_BACKEND setting, which is the import
+path of a backend class. Backends get a batch of messages and return the
+messages that were sent, so callers can record them and never send the same
+message twice.
+"""
+
+import collections
+
+from ggrc.extensions import get_extension_instance
+
+
+MailMessage = collections.namedtuple("MailMessage", ["to", "subject", "body"])
+
+
+class MailBackend(object):
+  """Base class for mail backends."""
+
+  def __init__(self, settings):
+    self.settings = settings
+
+  def send_batch(self, messages):
+    """Send messages.
+
+    Args:
+      messages (list of MailMessage): messages to send.
+
+    Returns:
+      list of MailMessage: messages that were sent.
+
+    Raises:
+      MailBatchError: sending stopped at a failure. Messages sent before it
+        are in the sent attribute of the error.
+    """
+    raise NotImplementedError()
+
+
+class MailBatchError(Exception):
+  """Sending of a batch failed after some of its messages were sent."""
+
+  def __init__(self, sent, error):
+    super(MailBatchError, self).__init__(
+        "Failed to send a mail batch after {} messages: {}".format(
+            len(sent), error))
+    self.sent = sent
+    self.error = error
+
+
+class AppEngineMailBackend(MailBackend):
+  """Send messages one by one with the AppEngine mail API."""
+
+  def send_batch(self, messages):
+    # send_email is looked up on every call so it can be patched in tests
+    from ggrc.notifications import common
+    sent = []
+    for message in messages:
+      try:
+        common.send_email(message.to, message.subject, message.body)
+      except Exception as error:  # pylint: disable=broad-except
+        raise MailBatchError(sent, error)
+      sent.append(message)
+    return sent
+
+
+class LocalMailBackend(MailBackend):
+  """Keep messages in memory instead of sending them.
+
+  Attributes:
+    outbox (list of MailMessage): all messages sent through the backend.
+  """
+
+  def __init__(self, settings):
+    super(LocalMailBackend, self).__init__(settings)
+    self.outbox = []
+
+  def send_batch(self, messages):
+    self.outbox.extend(messages)
+    return list(messages)
+
+
+def get_mail_backend():
+  return get_extension_instance(
+      "MAIL_BACKEND", "ggrc.notifications.mail.AppEngineMailBackend")
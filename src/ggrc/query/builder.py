@@ -7,15 +7,20 @@ This class is used to build SqlAlchemy queries and fetch the result ids.
 """
 
 # flake8: noqa
+import base64
 import collections
 import datetime
+import hashlib
+import json
 
 import flask
 import sqlalchemy as sa
 
 from ggrc import db
 from ggrc import models
+from ggrc import settings
 from ggrc.fulltext.mysql import MysqlRecordProperty as Record
+from ggrc.login import get_current_user_id
 from ggrc.models import inflector
 from ggrc.rbac import context_query_filter
 from ggrc.utils import benchmark
@@ -24,6 +29,66 @@ from ggrc.query import custom_operators
 from ggrc.query.exceptions import BadQueryException
 
 
+QUERY_TOTAL_CACHE_TIMEOUT = 600  # 10 minutes
+
+
+def encode_cursor(values):
+  """Encode sort values of the last row of a page into a cursor string."""
+  return base64.urlsafe_b64encode(json.dumps(values, default=unicode))
+
+
+def decode_cursor(cursor):
+  """Decode sort values from a cursor string."""
+  try:
+    values = json.loads(base64.urlsafe_b64decode(str(cursor)))
+  except (TypeError, ValueError):
+    raise BadQueryException(u"Invalid cursor.")
+  if not isinstance(values, list):
+    raise BadQueryException(u"Invalid cursor.")
+  return values
+
+
+def _keyset_equal(order, value):
+  return order.is_(None) if value is None else order == value
+
+
+def _keyset_after(order, value, desc):
+  """Get condition for rows sorted after value, NULL being the least value.
+
+  Returns None if no value is sorted after value.
+  """
+  if value is None:
+    return None if desc else order.isnot(None)
+  if desc:
+    return sa.or_(order < value, order.is_(None))
+  return order > value
+
+
+def keyset_condition(orders, values):
+  """Get condition for rows after the row with values in orders.
+
+  Args:
+    orders: list of (column, desc) tuples the rows are sorted by.
+    values: values of the columns in orders of the last seen row.
+
+  Returns:
+    condition that is true for rows after the last seen row.
+  """
+  if len(orders) != len(values):
+    raise BadQueryException(u"Cursor does not match the sort order.")
+  clauses = []
+  for index, ((order, desc), value) in enumerate(zip(orders, values)):
+    after = _keyset_after(order, value, desc)
+    if after is None:
+      continue
+    clause = [_keyset_equal(prev_order, prev_value)
+              for (prev_order, _), prev_value in zip(orders[:index],
+                                                     values[:index])]
+    clause.append(after)
+    clauses.append(sa.and_(*clause))
+  return sa.or_(*clauses)
+
+
 # pylint: disable=too-few-public-methods
 
 class QueryHelper(object):
@@ -77,6 +142,20 @@ class QueryHelper(object):
     }
   ]
 
+  Instead of "limit", large lists should be paged with a cursor:
+
+      cursor: {
+        "size": number of objects on the page
+        "after": "next_cursor" of the previous page, missing on the first page
+      }
+      total_mode: "exact" (default), "cached" to reuse the total of the same
+                  filter for the user until the next commit, or "none" to skip
+                  counting the objects
+
+  Pages are then selected by the values of the "order_by" fields and id of the
+  last object of the previous page, and "next_cursor" is added to the results,
+  None on the last page.
+
   The result fields may or may not be present in the resulting query depending
   on the attributes of `get` method.
 
@@ -283,7 +362,7 @@ class QueryHelper(object):
       )
       if filter_expression is not None:
         query = query.filter(filter_expression)
-    if object_query.get("order_by"):
+    if object_query.get("order_by") and object_query.get("cursor") is None:
       with benchmark("Sorting: _get_ids > order_by"):
         query = self._apply_order_by(
             object_class,
@@ -293,8 +372,11 @@ class QueryHelper(object):
         )
     with benchmark("Apply limit"):
       limit = object_query.get("limit")
-      if limit:
-        ids, total = self._apply_limit(query, limit)
+      if object_query.get("cursor") is not None:
+        ids, total = self._apply_cursor(object_class, query, object_query,
+                                        tgt_class)
+      elif limit:
+        ids, total = self._apply_limit(query, limit, object_query)
       else:
         ids = [obj.id for obj in query]
         total = len(ids)
@@ -323,13 +405,15 @@ class QueryHelper(object):
       page_size = last - first
     return page_size, first
 
-  def _apply_limit(self, query, limit):
+  def _apply_limit(self, query, limit, object_query=None):
     """Apply limits for pagination.
 
     Args:
       query: filter query;
       limit: a tuple of indexes in format (from, to); objects is sliced to
             objects[from, to].
+      object_query: the object query, used to get the total of the query
+                    according to its "total_mode".
 
     Returns:
       matched objects ids and total count.
@@ -344,16 +428,142 @@ class QueryHelper(object):
       if len(ids) < page_size:
         total = len(ids) + first
       else:
-        # Note: using func.count() as query.count() is generating additional
-        # subquery
-        count_q = query.statement.with_only_columns([sa.func.count()])
-        total = db.session.execute(count_q).scalar()
+        total = self._get_total(query, object_query or {})
 
     return ids, total
 
+  def _apply_cursor(self, model, query, object_query, tgt_class):
+    """Get a page of ids after the cursor.
+
+    Args:
+      model: the model instances of which are requested in query;
+      query: filter query;
+      object_query: the object query with "cursor" and "order_by";
+      tgt_class: the snapshotted model if `model` is Snapshot else `model`.
+
+    Returns:
+      matched objects ids and total count. "next_cursor" is set in the
+      object_query.
+    """
+    cursor = object_query["cursor"]
+    try:
+      page_size = int(cursor.get("size"))
+    except (AttributeError, TypeError, ValueError):
+      raise BadQueryException("Invalid cursor size. Integer expected.")
+    if page_size <= 0:
+      raise BadQueryException("Cursor size should be a positive number.")
+
+    with benchmark("Apply cursor: _apply_cursor > query_count"):
+      total = self._get_total(query, object_query)
+
+    joins, orders = [], []
+    if object_query.get("order_by"):
+      joins, orders = self._get_order_by(
+          model, object_query["order_by"], tgt_class)
+    orders.append((model.id, False))
+    for join in joins:
+      query = query.outerjoin(*join)
+    query = query.add_columns(*[order for order, _ in orders])
+    if cursor.get("after"):
+      query = query.filter(
+          keyset_condition(orders, decode_cursor(cursor["after"])))
+    query = query.order_by(*[order.desc() if desc else order
+                             for order, desc in orders])
+
+    with benchmark("Apply cursor: _apply_cursor > query_page"):
+      rows = query.limit(page_size + 1).all()
+    next_cursor = None
+    if len(rows) > page_size:
+      rows = rows[:page_size]
+      next_cursor = encode_cursor(list(rows[-1][1:]))
+    object_query["next_cursor"] = next_cursor
+    return [row[0] for row in rows], total
+
+  def _get_total(self, query, object_query):
+    """Count objects of the filter query.
+
+    The total is not counted if "total_mode" of the object query is "none". If
+    it is "cached", the total is stored in memcache under the normalized
+    filter of the object query and the current user, until the next commit.
+    """
+    # pylint: disable=too-many-locals
+    from ggrc.services.common import _get_cache_manager
+    from ggrc.services.common import QUERY_TOTALS_GENERATION_KEY
+
+    total_mode = object_query.get("total_mode", "exact")
+    if total_mode == "none":
+      return None
+    if total_mode not in ("exact", "cached"):
+      raise BadQueryException(u"Unknown total_mode: {}".format(total_mode))
+
+    cache = None
+    if (total_mode == "cached" and
+            getattr(settings, "MEMCACHE_MECHANISM", False)):
+      cache = _get_cache_manager()
+      generation = (cache.bulk_get([QUERY_TOTALS_GENERATION_KEY]) or {}).get(
+          QUERY_TOTALS_GENERATION_KEY)
+      key = "query_total:{}:{}:{}".format(
+          get_current_user_id(), generation,
+          self._normalized_query_hash(object_query))
+      total = (cache.bulk_get([key]) or {}).get(key)
+      if total is not None:
+        return total
+
+    # Note: using func.count() as query.count() is generating additional
+    # subquery
+    count_q = query.statement.with_only_columns([sa.func.count()])
+    total = db.session.execute(count_q).scalar()
+    if cache is not None:
+      cache.bulk_set({key: total}, QUERY_TOTAL_CACHE_TIMEOUT)
+    return total
+
+  def _normalized_query_hash(self, object_query):
+    """Get hash of the filters of an object query.
+
+    Filters on results of previous queries are replaced with the filters of
+    those queries.
+    """
+    def normalize(expression):
+      if isinstance(expression, dict):
+        if expression.get("object_name") == "__previous__":
+          previous = self.query[expression["ids"][0]]
+          return {
+              "object_name": previous["object_name"],
+              "permissions": previous.get("permissions", "read"),
+              "expression": normalize(
+                  previous.get("filters", {}).get("expression")),
+          }
+        return {key: normalize(value) for key, value in expression.items()}
+      if isinstance(expression, list):
+        return [normalize(value) for value in expression]
+      return expression
+
+    normalized = {
+        "object_name": object_query["object_name"],
+        "permissions": object_query.get("permissions", "read"),
+        "expression": normalize(
+            object_query.get("filters", {}).get("expression")),
+    }
+    return hashlib.sha1(
+        json.dumps(normalized, sort_keys=True, default=unicode)).hexdigest()
+
   def _apply_order_by(self, model, query, order_by, tgt_class):
     """Add ordering parameters to a query for objects.
 
+    See _get_order_by for the supported orderings.
+
+    Returns:
+      the query with sorting parameters.
+    """
+    joins, orders = self._get_order_by(model, order_by, tgt_class)
+    for join in joins:
+      query = query.outerjoin(*join)
+    return query.order_by(*[order.desc() if desc else order
+                            for order, desc in orders])
+
+  def _get_order_by(self, model, order_by, tgt_class):
+    """Get joins and columns for ordering a query for objects.
+
     This works only on direct model properties and related objects defined with
     foreign keys and fails if any CAs are specified in order_by.
 
@@ -376,7 +586,8 @@ class QueryHelper(object):
     3. Otherwise, raise a NotImplementedError.
 
     Returns:
-      the query with sorting parameters.
+      ([joins], [(column, desc)]) - joins required for the ordering and the
+                                    columns to order by with their direction.
     """
     def joins_and_order(clause):
       """Get join operations and ordering field from item of order_by list.
@@ -386,10 +597,11 @@ class QueryHelper(object):
                  "desc": reverse sort on this field if True}
 
       Returns:
-        ([joins], order) - a tuple of joins required for this ordering to work
-                           and ordering clause itself; join is None if no join
-                           required or [(aliased entity, relationship field)]
-                           if joins required.
+        ([joins], order, desc) - a tuple of joins required for this ordering
+                                 to work, ordering column itself and the
+                                 direction; join is None if no join required
+                                 or [(aliased entity, relationship field)] if
+                                 joins required.
       """
       def by_similarity():
         """Join similar_objects subquery, order by weight from it."""
@@ -449,18 +661,14 @@ class QueryHelper(object):
           self._count += 1
           joins, order = by_fulltext()
 
-      if clause.get("desc", False):
-        order = order.desc()
-
-      return joins, order
-
-    join_lists, orders = zip(*[joins_and_order(clause) for clause in order_by])
-    for join_list in join_lists:
-      if join_list is not None:
-        for join in join_list:
-          query = query.outerjoin(*join)
+      return joins, order, bool(clause.get("desc", False))
 
-    return query.order_by(*orders)
+    joins, orders = [], []
+    for join_list, order, desc in [joins_and_order(clause)
+                                   for clause in order_by]:
+      joins.extend(join_list or [])
+      orders.append((order, desc))
+    return joins, orders
 
   @staticmethod
   def _slugs_to_ids(object_name, slugs):
@@ -15,6 +15,7 @@ from ggrc import db
 from ggrc import models
 from ggrc.query import autocast
 from ggrc.query.exceptions import BadQueryException
+from ggrc.fulltext import get_indexer
 from ggrc.fulltext.mysql import MysqlRecordProperty as Record
 from ggrc.login import is_creator
 from ggrc.models import inflector
@@ -230,6 +231,7 @@ def text_search(exp, object_class, target_class, query):
   return object_class.id.in_(
       db.session.query(Record.key).filter(
           Record.type == object_class.__name__,
+          get_indexer().get_term_filter(exp['text']),
           Record.content.ilike(u"%{}%".format(exp['text'])),
       ),
   )
@@ -3,10 +3,19 @@
 
 """This module contains special query helper class for query API."""
 
+import collections
+
+from sqlalchemy.orm.attributes import InstrumentedAttribute
+from sqlalchemy.orm.properties import ColumnProperty
+
+from ggrc import db
 from ggrc.builder import json
 from ggrc.query.builder import QueryHelper
+from ggrc.models import all_models
 from ggrc.models import inflector
 from ggrc.utils import benchmark
+from ggrc.utils import url_for
+from ggrc.utils import view_url_for
 
 
 # pylint: disable=too-few-public-methods
@@ -32,8 +41,25 @@ class DefaultHandler(QueryHelper):
       ids: [ ids of filtered objects ] (present if type is "ids")
       count: the number of objects filtered, after "limit" is applied
       total: the number of objects filtered, before "limit" is applied
+
+  If all requested fields of a "values" query are columns, links, access
+  control list or custom attribute values, only those are selected from the
+  database, instead of loading and publishing complete objects.
   """
 
+  # Related objects that are published in full for each object, with the
+  # columns that link them to the object.
+  PROJECTED_RELATIONSHIPS = {
+      "access_control_list": (
+          "AccessControlList", "object_id", "object_type"),
+      "custom_attribute_values": (
+          "CustomAttributeValue", "attributable_id", "attributable_type"),
+  }
+  LINK_FIELDS = {
+      "selfLink": url_for,
+      "viewLink": view_url_for,
+  }
+
   def get_results(self):
     """Filter the objects and get their information.
 
@@ -50,7 +76,17 @@ class DefaultHandler(QueryHelper):
         raise NotImplementedError("Only 'values', 'ids' and 'count' queries "
                                   "are supported now")
       model = inflector.get_model(object_query["object_name"])
+      projection = None
       if query_type == "values":
+        projection = self._get_projection(model, object_query.get("fields"))
+      if projection is not None:
+        with benchmark("Get result set: get_results > _get_projected_values"):
+          values, last_modified = self._get_projected_values(
+              object_query, model, projection)
+        object_query["count"] = len(values)
+        object_query["last_modified"] = last_modified
+        object_query["values"] = values
+      elif query_type == "values":
         with benchmark("Get result set: get_results > _get_objects"):
           objects = self._get_objects(object_query)
         object_query["count"] = len(objects)
@@ -71,10 +107,124 @@ class DefaultHandler(QueryHelper):
           object_query["ids"] = ids
     return self.query
 
+  @classmethod
+  def _get_projection(cls, model, fields):
+    """Get the way each of the requested fields can be selected.
+
+    Args:
+      model: model of the queried objects.
+      fields: list of requested fields.
+
+    Returns:
+      dict with a column, a projected relationship, a link function or a
+      constant value for each field, or None if any field needs the full
+      objects.
+    """
+    if not fields or model is None:
+      return None
+    mapper = model._sa_class_manager.mapper
+    if len(list(mapper.self_and_descendants)) > 1:
+      # the published type of polymorphic objects is their subclass
+      return None
+    publish_attrs = set(json.get_json_builder(model)._publish_attrs)
+    custom_publish = getattr(model, "_custom_publish", {})
+    projection = {}
+    for field in fields:
+      if field in cls.LINK_FIELDS:
+        projection[field] = cls.LINK_FIELDS[field]
+      elif field not in publish_attrs:
+        # the field is not in the published object
+        projection[field] = None
+      elif field in custom_publish:
+        return None
+      elif field in cls.PROJECTED_RELATIONSHIPS:
+        projection[field] = cls.PROJECTED_RELATIONSHIPS[field]
+      elif field == "type":
+        projection[field] = model.__name__
+      else:
+        class_attr = getattr(model, field, None)
+        if not (isinstance(class_attr, InstrumentedAttribute) and
+                isinstance(class_attr.property, ColumnProperty)):
+          return None
+        projection[field] = class_attr
+    return projection
+
+  def _get_projected_values(self, object_query, model, projection):
+    """Get JSON of the requested fields without loading full objects.
+
+    Returns:
+      list of dicts with the requested fields of the filtered objects and the
+      time of the last update of the objects.
+    """
+    with benchmark("Get ids: _get_projected_values -> _get_ids"):
+      ids = self._get_ids(object_query)
+    if not ids:
+      return [], None
+
+    columns = collections.OrderedDict(
+        (field, value) for field, value in projection.iteritems()
+        if isinstance(value, InstrumentedAttribute)
+    )
+    has_updated_at = hasattr(model, "updated_at")
+    select = [model.id] + columns.values()
+    if has_updated_at:
+      select.append(model.updated_at)
+    with benchmark("Get columns: _get_projected_values"):
+      rows = {row[0]: row for row in
+              db.session.query(*select).filter(model.id.in_(ids))}
+    ids = [id_ for id_ in ids if id_ in rows]
+
+    related = {
+        field: self._get_related_json(model, field, ids)
+        for field in projection
+        if field in self.PROJECTED_RELATIONSHIPS and
+        projection[field] is not None
+    }
+
+    values = []
+    for id_ in ids:
+      row = rows[id_]
+      column_values = dict(zip(columns, row[1:]))
+      value = {}
+      for field, source in projection.iteritems():
+        if field in column_values:
+          value[field] = column_values[field]
+        elif field in related:
+          value[field] = related[field].get(id_, [])
+        elif callable(source):
+          value[field] = source(model.__name__, id=id_)
+        else:
+          value[field] = source
+      values.append(value)
+
+    with benchmark("serialization: _get_projected_values"):
+      values = json.publish_representation(values)
+
+    last_modified = None
+    if has_updated_at:
+      last_modified = max(rows[id_][-1] for id_ in ids)
+    return values, last_modified
+
+  @classmethod
+  def _get_related_json(cls, model, field, ids):
+    """Get published related objects of a field grouped by object ids."""
+    related_name, id_attr, type_attr = cls.PROJECTED_RELATIONSHIPS[field]
+    related_model = getattr(all_models, related_name)
+    query = related_model.eager_query().filter(
+        getattr(related_model, type_attr) == model.__name__,
+        getattr(related_model, id_attr).in_(ids),
+    ).order_by(related_model.id)
+    result = collections.defaultdict(list)
+    with benchmark("Get related objects: _get_related_json"):
+      for obj in query:
+        result[getattr(obj, id_attr)].append(json.publish(obj))
+    return result
+
   @staticmethod
   def _transform_to_json(objects, fields=None):
     """Make a JSON representation of objects from the list."""
-    objects_json = [json.publish(obj) for obj in objects]
+    objects_json = [json.publish(obj, attribute_whitelist=fields)
+                    for obj in objects]
     objects_json = json.publish_representation(objects_json)
     if fields:
       objects_json = [{f: o.get(f) for f in fields}
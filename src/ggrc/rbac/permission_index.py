@@ -0,0 +1,280 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Compact representation of user permissions.
+
+The permissions dict
+
+  permissions[action][resource_type]["contexts"|"resources"|"conditions"]
+
+is turned into sorted arrays of context and resource ids for every (action,
+resource type) pair. Membership checks are binary searches over these arrays
+and the whole index serializes to a small binary string, in which action and
+resource type names are interned to ids:
+
+  header:   version, number of names, number of entries
+  names:    length prefixed utf-8 strings
+  entries:  action id, resource type id, flags, number of contexts and
+            resources, followed by the context and resource id arrays
+  trailer:  length prefixed JSON of conditions
+
+All numbers are big endian.
+"""
+
+import array
+import bisect
+import json
+import struct
+import sys
+
+FORMAT_VERSION = 1
+
+_HEADER = struct.Struct("!BHH")
+_NAME = struct.Struct("!H")
+_ENTRY = struct.Struct("!HHBII")
+_CONDITIONS = struct.Struct("!I")
+
+# entry flags
+_ALL_CONTEXTS = 1  # None is in contexts, the action is allowed everywhere
+_HAS_CONTEXTS = 2
+_HAS_RESOURCES = 4
+
+# resource type id of entries for actions without any resource types
+_NO_TYPE = 0xffff
+
+_SWAP_BYTES = sys.byteorder == "little"
+
+
+def _id_array(ids):
+  """Sorted array of unique ids."""
+  return array.array("i", sorted(set(ids)))
+
+
+def _array_to_bytes(ids):
+  if _SWAP_BYTES:
+    ids = array.array("i", ids)
+    ids.byteswap()
+  return ids.tostring()
+
+
+def _array_from_bytes(data, offset, count):
+  ids = array.array("i")
+  end = offset + count * ids.itemsize
+  ids.fromstring(data[offset:end])
+  if _SWAP_BYTES:
+    ids.byteswap()
+  return ids, end
+
+
+def _contains(ids, value):
+  """Check if value is in the sorted ids with a binary search."""
+  position = bisect.bisect_left(ids, value)
+  return position < len(ids) and ids[position] == value
+
+
+class _Entry(object):
+  """Contexts and resources of a single action and resource type."""
+  # pylint: disable=too-few-public-methods
+  __slots__ = ("flags", "contexts", "resources")
+
+  def __init__(self, flags=0, contexts=None, resources=None):
+    self.flags = flags
+    self.contexts = contexts if contexts is not None else array.array("i")
+    self.resources = resources if resources is not None else array.array("i")
+
+
+class PermissionIndex(object):
+  """Permissions of a user with O(log n) membership checks.
+
+  Attributes:
+    source: permissions dict the index was built from or converted to, used
+      to tell if the index is still valid for the permissions of a request.
+  """
+
+  def __init__(self):
+    self._entries = {}
+    self._actions = set()
+    self._conditions = {}
+    self.source = None
+
+  def __len__(self):
+    return len(self._entries)
+
+  def _get_entry(self, action, resource_type):
+    return self._entries.get((action, resource_type))
+
+  def _add_entry(self, action, resource_type, entry):
+    action = intern(str(action))
+    self._actions.add(action)
+    if resource_type is not None:
+      self._entries[(action, intern(str(resource_type)))] = entry
+
+  @classmethod
+  def from_permissions(cls, permissions):
+    """Build an index from a permissions dict."""
+    index = cls()
+    for action, resource_permissions in (permissions or {}).iteritems():
+      if not isinstance(resource_permissions, dict):
+        # e.g. the user email stored by the login modules
+        continue
+      index._add_entry(action, None, None)
+      for resource_type, permission in resource_permissions.iteritems():
+        flags = 0
+        contexts = permission.get("contexts")
+        resources = permission.get("resources")
+        if contexts is not None:
+          flags |= _HAS_CONTEXTS
+          if None in contexts:
+            flags |= _ALL_CONTEXTS
+          contexts = _id_array(c for c in contexts if c is not None)
+        if resources is not None:
+          flags |= _HAS_RESOURCES
+          resources = _id_array(resources)
+        index._add_entry(action, resource_type,
+                         _Entry(flags, contexts, resources))
+        conditions = permission.get("conditions")
+        if conditions:
+          index._conditions.setdefault(action, {})[resource_type] = [
+              [context_id, context_conditions]
+              for context_id, context_conditions in conditions.iteritems()
+          ]
+    index.source = permissions
+    return index
+
+  def to_permissions(self):
+    """Convert the index back to a permissions dict.
+
+    The returned dict becomes the source of the index.
+    """
+    permissions = {action: {} for action in self._actions}
+    for (action, resource_type), entry in self._entries.iteritems():
+      permission = permissions[action].setdefault(resource_type, {})
+      if entry.flags & _HAS_CONTEXTS:
+        permission["contexts"] = list(entry.contexts)
+        if entry.flags & _ALL_CONTEXTS:
+          permission["contexts"].insert(0, None)
+      if entry.flags & _HAS_RESOURCES:
+        permission["resources"] = list(entry.resources)
+    for action, type_conditions in self._conditions.iteritems():
+      for resource_type, conditions in type_conditions.iteritems():
+        permissions[action].setdefault(resource_type, {})["conditions"] = {
+            context_id: list(context_conditions)
+            for context_id, context_conditions in conditions
+        }
+    self.source = permissions
+    return permissions
+
+  def merge(self, other):
+    """Get a new index with the permissions of both indexes."""
+    merged = PermissionIndex()
+    merged._actions = self._actions | other._actions
+    for key in set(self._entries) | set(other._entries):
+      first = self._entries.get(key) or _Entry()
+      second = other._entries.get(key) or _Entry()
+      merged._entries[key] = _Entry(
+          first.flags | second.flags,
+          _id_array(first.contexts + second.contexts),
+          _id_array(first.resources + second.resources),
+      )
+    for index in (self, other):
+      for action, type_conditions in index._conditions.iteritems():
+        for resource_type, conditions in type_conditions.iteritems():
+          merged._conditions.setdefault(action, {}).setdefault(
+              resource_type, []).extend(conditions)
+    return merged
+
+  def has_action(self, action, resource_type):
+    return (action, resource_type) in self._entries
+
+  def has_context(self, action, resource_type, context_id):
+    """Check if the action is allowed in a context or in all contexts."""
+    entry = self._get_entry(action, resource_type)
+    if entry is None:
+      return False
+    if context_id is None:
+      return bool(entry.flags & _ALL_CONTEXTS)
+    return _contains(entry.contexts, context_id)
+
+  def has_all_contexts(self, action, resource_type):
+    entry = self._get_entry(action, resource_type)
+    return entry is not None and bool(entry.flags & _ALL_CONTEXTS)
+
+  def has_resource(self, action, resource_type, resource_id):
+    entry = self._get_entry(action, resource_type)
+    return entry is not None and _contains(entry.resources, resource_id)
+
+  def contexts(self, action, resource_type):
+    """Get list of contexts, with None if the action is allowed everywhere."""
+    entry = self._get_entry(action, resource_type)
+    if entry is None:
+      return []
+    contexts = list(entry.contexts)
+    if entry.flags & _ALL_CONTEXTS:
+      contexts.insert(0, None)
+    return contexts
+
+  def resources(self, action, resource_type):
+    entry = self._get_entry(action, resource_type)
+    return list(entry.resources) if entry is not None else []
+
+  def dumps(self):
+    """Serialize the index to a binary string."""
+    names = sorted(
+        self._actions | {type_ for _, type_ in self._entries})
+    name_ids = {name: i for i, name in enumerate(names)}
+    actions_with_types = {action for action, _ in self._entries}
+    chunks = [_HEADER.pack(
+        FORMAT_VERSION, len(names),
+        len(self._entries) + len(self._actions - actions_with_types))]
+    for name in names:
+      encoded = name.encode("utf-8")
+      chunks.append(_NAME.pack(len(encoded)))
+      chunks.append(encoded)
+    for action in self._actions - actions_with_types:
+      chunks.append(_ENTRY.pack(name_ids[action], _NO_TYPE, 0, 0, 0))
+    for (action, resource_type), entry in sorted(self._entries.iteritems()):
+      chunks.append(_ENTRY.pack(
+          name_ids[action], name_ids[resource_type], entry.flags,
+          len(entry.contexts), len(entry.resources)))
+      chunks.append(_array_to_bytes(entry.contexts))
+      chunks.append(_array_to_bytes(entry.resources))
+    conditions = json.dumps(self._conditions) if self._conditions else ""
+    chunks.append(_CONDITIONS.pack(len(conditions)))
+    chunks.append(conditions)
+    return "".join(chunks)
+
+  @classmethod
+  def loads(cls, data):
+    """Deserialize an index from a binary string.
+
+    Raises:
+      ValueError if the data is not in the current format.
+    """
+    version, names_count, entries_count = _HEADER.unpack_from(data, 0)
+    if version != FORMAT_VERSION:
+      raise ValueError("Unsupported permission index version {}".format(
+          version))
+    offset = _HEADER.size
+    names = []
+    for _ in range(names_count):
+      length, = _NAME.unpack_from(data, offset)
+      offset += _NAME.size
+      names.append(intern(data[offset:offset + length]))
+      offset += length
+    index = cls()
+    for _ in range(entries_count):
+      action_id, type_id, flags, contexts_count, resources_count = \
+          _ENTRY.unpack_from(data, offset)
+      offset += _ENTRY.size
+      if type_id == _NO_TYPE:
+        index._add_entry(names[action_id], None, None)
+        continue
+      contexts, offset = _array_from_bytes(data, offset, contexts_count)
+      resources, offset = _array_from_bytes(data, offset, resources_count)
+      index._add_entry(names[action_id], names[type_id],
+                       _Entry(flags, contexts, resources))
+    length, = _CONDITIONS.unpack_from(data, offset)
+    offset += _CONDITIONS.size
+    if length:
+      index._conditions = json.loads(data[offset:offset + length])
+    return index
@@ -6,6 +6,7 @@ from flask import g
 from flask.ext.login import current_user
 from .user_permissions import UserPermissions
 from ggrc.app import db
+from ggrc.rbac.permission_index import PermissionIndex
 from ggrc.rbac.permissions import permissions_for as find_permissions
 from ggrc.rbac.permissions import is_allowed_create
 from ggrc.models import get_model
@@ -188,34 +189,30 @@ class DefaultUserPermissions(UserPermissions):
 
   def _permission_match(self, permission, permissions):
     """Check if the user has the given permission"""
-
-    if None in \
-        permissions\
-            .get(permission.action, {})\
-            .get(permission.resource_type, {})\
-            .get('contexts', []):
-      return True
-    return \
-        permission.resource_id in permissions\
-        .get(permission.action, {})\
-        .get(permission.resource_type, {})\
-        .get('resources', [])\
-        or permission.context_id in \
-        permissions\
-        .get(permission.action, {})\
-        .get(permission.resource_type, {})\
-        .get('contexts', [])\
-        or permission.context_id in \
-        permissions\
-        .get(permission.action, {})\
-        .get(self.ADMIN_PERMISSION.resource_type, {})\
-        .get('contexts', [])
+    index = self._permission_index(permissions)
+    action, resource_type = permission.action, permission.resource_type
+    return (
+        index.has_all_contexts(action, resource_type) or
+        index.has_resource(action, resource_type, permission.resource_id) or
+        index.has_context(action, resource_type, permission.context_id) or
+        index.has_context(action, self.ADMIN_PERMISSION.resource_type,
+                          permission.context_id)
+    )
 
   @staticmethod
   def _permissions():
     """Returns request permission from the global scope"""
     return getattr(g, '_request_permissions', {})
 
+  @staticmethod
+  def _permission_index(permissions):
+    """Get index of the permissions dict, built at most once per request."""
+    index = getattr(g, '_request_permission_index', None)
+    if index is None or index.source is not permissions:
+      index = PermissionIndex.from_permissions(permissions)
+      setattr(g, '_request_permission_index', index)
+    return index
+
   def _is_allowed(self, permission):
     permissions = self._permissions()
     if permission.resource_type != '/admin' \
@@ -251,39 +248,26 @@ class DefaultUserPermissions(UserPermissions):
       if not conditions:
         return True
       return self._check_conditions(instance, action, conditions)
-    if (not permissions.get(action) or
-       not permissions[action].get(instance._inflector.model_singular)):
+    resource_type = instance._inflector.model_singular
+    index = self._permission_index(permissions)
+    if not index.has_action(action, resource_type):
       return False
-    resources = self._permissions()\
-        .setdefault(action, {})\
-        .setdefault(instance._inflector.model_singular, {})\
-        .setdefault('resources', [])
-    contexts = self._permissions()\
-        .setdefault(action, {})\
-        .setdefault(instance._inflector.model_singular, {})\
-        .setdefault('contexts', [])
     # We can't use instance.context_id, because it requires the
     # object <-> context mapping to be created,
     # which isn't the case when creating objects
     context_id = None
     if hasattr(instance, 'context') and hasattr(instance.context, 'id'):
       context_id = instance.context.id
-    if instance.id in resources:
+    if index.has_resource(action, resource_type, instance.id):
       return True
-    no_context_conditions = self._permissions()\
-        .setdefault(action, {})\
-        .setdefault(instance._inflector.model_singular, {})\
-        .setdefault('conditions', {})\
-        .setdefault(None, [])
-
-    context_conditions = self._permissions()\
-        .setdefault(action, {})\
-        .setdefault(instance._inflector.model_singular, {})\
-        .setdefault('conditions', {})\
-        .setdefault(context_id, [])
-    conditions = no_context_conditions + context_conditions
+    type_conditions = permissions[action][resource_type].get(
+        'conditions', {})
+    conditions = (type_conditions.get(None, []) +
+                  type_conditions.get(context_id, []))
     # Check any conditions applied per resource
-    if (None in contexts or context_id in contexts) and not conditions:
+    if (index.has_all_contexts(action, resource_type) or
+            index.has_context(action, resource_type, context_id)) \
+            and not conditions:
       return True
     return self._check_conditions(instance, action, conditions)
 
@@ -339,13 +323,10 @@ class DefaultUserPermissions(UserPermissions):
     #   superclasses
     resource_types = get_contributing_resource_types(resource_type)
 
+    index = self._permission_index(permissions)
     ret = []
     for resource_type in resource_types:
-      ret.extend(
-          permissions
-          .get(action, {})
-          .get(resource_type, {})
-          .get('resources', []))
+      ret.extend(index.resources(action, resource_type))
     return ret
 
   def _get_contexts_for(self, action, resource_type):
@@ -360,20 +341,19 @@ class DefaultUserPermissions(UserPermissions):
     #   superclasses
     resource_types = get_contributing_resource_types(resource_type)
 
+    index = self._permission_index(permissions)
     ret = []
     for resource_type in resource_types:
-      ret.extend(permissions.get(action, {})
-                            .get(resource_type, {})
-                            .get('contexts', []))
+      if index.has_all_contexts(action, resource_type):
+        return None
+      ret.extend(index.contexts(action, resource_type))
 
     # Extend with the list of all contexts for which the user is an ADMIN
-    admin_list = list(
-        permissions.get(self.ADMIN_PERMISSION.action, {})
-        .get(self.ADMIN_PERMISSION.resource_type, {})
-        .get('contexts', ()))
-    ret.extend(admin_list)
-    if None in ret:
+    if index.has_all_contexts(self.ADMIN_PERMISSION.action,
+                              self.ADMIN_PERMISSION.resource_type):
       return None
+    ret.extend(index.contexts(self.ADMIN_PERMISSION.action,
+                              self.ADMIN_PERMISSION.resource_type))
     return ret
 
   def create_contexts_for(self, resource_type):
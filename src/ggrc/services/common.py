@@ -12,7 +12,7 @@ import itertools
 import json
 import time
 from logging import getLogger
-from collections import defaultdict
+from collections import defaultdict, namedtuple, OrderedDict
 from exceptions import TypeError
 from wsgiref.handlers import format_date_time
 from urllib import urlencode
@@ -34,13 +34,13 @@ from ggrc.fulltext import get_indexer
 from ggrc.login import get_current_user_id, get_current_user
 from ggrc.models.cache import Cache
 from ggrc.models.event import Event
-from ggrc.models.revision import Revision
 from ggrc.models.exceptions import ValidationError, translate_message
 from ggrc.rbac import permissions, context_query_filter
 from ggrc.services.attribute_query import AttributeQueryBuilder
 from ggrc.services import signals
 from ggrc.models.background_task import BackgroundTask, create_task
 from ggrc.query import utils as query_utils
+from ggrc.utils.revision_writer import RevisionWriter
 from ggrc import settings
 
 
@@ -50,11 +50,35 @@ logger = getLogger(__name__)
 
 CACHE_EXPIRY_COLLECTION = 60
 
+# Cached user permissions are split into the part that comes from role
+# assignments and the part that comes from the access control list.
+PERMISSIONS_KEY = "permissions:{}"
+ACL_PERMISSIONS_KEY = "permissions:acl:{}"
+PERMISSION_CACHE_TIMEOUT = 3600  # 60 minutes
+
+# Totals of queries cached by the query API are stored under the value of
+# this key, which changes on every commit.
+QUERY_TOTALS_GENERATION_KEY = "query_totals:generation"
+
+# Changes of these objects can affect permissions of any user
+SHARED_PERMISSION_TYPES = frozenset([
+    "AccessControlRole",
+    "Context",
+    "ContextImplication",
+    "Relationship",
+    "RelationshipAttr",
+    "Role",
+    "Workflow",
+])
+
 
 def _get_cache_manager():
-  from ggrc.cache import CacheManager, MemCache
+  from ggrc.cache import CacheManager, MemCache, TieredCache
   cache_manager = CacheManager()
-  cache_manager.initialize(MemCache())
+  if getattr(settings, "LOCAL_CACHE_SIZE", 0) > 0:
+    cache_manager.initialize(TieredCache())
+  else:
+    cache_manager.initialize(MemCache())
   return cache_manager
 
 
@@ -172,8 +196,12 @@ def update_memcache_before_commit(context, modified_objects, expiry_time):
     return
 
   context.cache_manager = _get_cache_manager()
+  context.cache_manager.permission_keys = None
 
   if modified_objects is not None:
+    context.cache_manager.permission_keys = get_permission_cache_keys(
+        itertools.chain(modified_objects.new, modified_objects.dirty,
+                        modified_objects.deleted))
     if len(modified_objects.new) > 0:
       memcache_mark_for_deletion(context, modified_objects.new.items())
 
@@ -225,26 +253,22 @@ def update_memcache_after_commit(context):
       related_objs.append((obj_list[0], None))
   memcache_mark_for_deletion(context, related_objs)
 
-  # TODO(dan): check for duplicates in marked_for_delete
-  if len(cache_manager.marked_for_delete) > 0:
-    delete_result = cache_manager.bulk_delete(
-        cache_manager.marked_for_delete, 0)
+  # collection entries and their status entries are removed in one call
+  marked_for_delete = list(OrderedDict.fromkeys(
+      str(key) for key in cache_manager.marked_for_delete))
+  delete_keys = marked_for_delete + [
+      'DeleteOp:' + key for key in marked_for_delete
+  ]
+  if delete_keys:
+    delete_result = cache_manager.bulk_delete(delete_keys, 0)
     # TODO(dan): handling failure including network errors,
     #            currently we log errors
     if delete_result is not True:
       logger.error("CACHE: Failed to remove collection from cache")
 
-  status_entries = []
-  for key in cache_manager.marked_for_delete:
-    status_entries.append('DeleteOp:' + str(key))
-  if len(status_entries) > 0:
-    delete_result = cache_manager.bulk_delete(status_entries, 0)
-    # TODO(dan): handling failure including network errors,
-    #            currently we log errors
-    if delete_result is not True:
-      logger.error("CACHE: Failed to remove status entries from cache")
-
-  clear_permission_cache()
+  cache_manager.bulk_set(
+      {QUERY_TOTALS_GENERATION_KEY: int(time.time() * 1000)}, 0)
+  clear_permission_cache(getattr(cache_manager, "permission_keys", None))
   cache_manager.clear_cache()
 
 
@@ -306,13 +330,26 @@ def update_snapshot_index(session, cache):
   reindex_snapshots(reindex_snapshots_ids)
 
 
-def _revision_generator(user_id, action, objects):
+RevisionEntry = namedtuple("RevisionEntry", ["obj", "action", "content"])
+
+
+def _revision_generator(action, objects, contents=None):
   for obj in objects:
-    yield Revision(obj, user_id, action, obj.log_json())
+    if isinstance(obj, Event):
+      # events flushed by earlier log_event calls have no revisions
+      continue
+    content = contents.get(obj) if contents is not None else None
+    yield RevisionEntry(obj, action, content)
 
 
-def _get_log_revisions(current_user_id, obj=None, force_obj=False):
-  """Generate and return revisions for all cached objects."""
+def _get_log_revisions(obj=None, force_obj=False):
+  """Get objects of all revisions that should be written for cached objects.
+
+  Returns:
+    list of RevisionEntry tuples. The content is the log_json of deleted
+    objects recorded before they were flushed, and None for other objects
+    whose log_json changes by the flush.
+  """
   revisions = []
   cache = get_cache()
   if not cache:
@@ -336,21 +373,16 @@ def _get_log_revisions(current_user_id, obj=None, force_obj=False):
               documentable not in delete_objects):
          modified_objects.add(documentable)
 
-  revisions.extend(_revision_generator(
-      current_user_id, "created", cache.new
-  ))
-  revisions.extend(_revision_generator(
-      current_user_id, "modified", modified_objects
-  ))
+  revisions.extend(_revision_generator("created", cache.new))
+  revisions.extend(_revision_generator("modified", modified_objects))
   if force_obj and obj is not None and obj not in cache.dirty:
     # If the ``obj`` has been updated, but only its custom attributes have
     # been changed, then this object will not be added into
     # ``cache.dirty set``. So that its revision will not be created.
     # The ``force_obj`` flag solves the issue, but in a bit dirty way.
-    revision = Revision(obj, current_user_id, 'modified', obj.log_json())
-    revisions.append(revision)
+    revisions.append(RevisionEntry(obj, "modified", None))
   revisions.extend(_revision_generator(
-      current_user_id, "deleted", cache.deleted
+      "deleted", cache.deleted, cache.deleted
   ))
   return revisions
 
@@ -359,6 +391,9 @@ def log_event(session, obj=None, current_user_id=None, flush=True,
               force_obj=False):
   """Logs an event on object `obj`.
 
+  Revisions of the event are written in bulk with RevisionWriter and their
+  ids are stored in the revision_ids attribute of the event.
+
   Args:
     session: Current SQLAlchemy session (db.session)
     obj: object on which some operation took place
@@ -373,7 +408,7 @@ def log_event(session, obj=None, current_user_id=None, flush=True,
     session.flush()
   if current_user_id is None:
     current_user_id = get_current_user_id()
-  revisions = _get_log_revisions(current_user_id, obj=obj, force_obj=force_obj)
+  revisions = _get_log_revisions(obj=obj, force_obj=force_obj)
   if obj is None:
     resource_id = 0
     resource_type = None
@@ -391,20 +426,77 @@ def log_event(session, obj=None, current_user_id=None, flush=True,
         resource_id=resource_id,
         resource_type=resource_type,
         context_id=context_id)
-    event.revisions = revisions
     session.add(event)
+    session.flush()
+    writer = RevisionWriter(event.id, current_user_id)
+    for revision in revisions:
+      writer.add(*revision)
+    event.revision_ids = writer.get_ids()
   return event
 
 
-def clear_permission_cache():
+def _changed_person_ids(obj):
+  """Get current and previous person_id of a role assignment or ACL entry."""
+  history = sqlalchemy.inspect(obj).attrs.person_id.history
+  return {person_id for person_id in itertools.chain(
+      history.added, history.unchanged, history.deleted)
+      if person_id is not None}
+
+
+def get_permission_cache_keys(objects):
+  """Get cached permissions that are invalidated by changes of objects.
+
+  Role assignments invalidate only the permissions of their person and ACL
+  entries only the ACL part of them.
+
+  Args:
+    objects: new, modified or deleted objects
+
+  Returns:
+    set of permission cache keys or None if all cached permissions must be
+    removed.
+  """
+  keys = set()
+  for obj in objects:
+    type_ = obj.__class__.__name__
+    if type_ in SHARED_PERMISSION_TYPES:
+      return None
+    if type_ == "UserRole":
+      keys.update(PERMISSIONS_KEY.format(person_id)
+                  for person_id in _changed_person_ids(obj))
+    elif type_ == "AccessControlList":
+      keys.update(ACL_PERMISSIONS_KEY.format(person_id)
+                  for person_id in _changed_person_ids(obj))
+    elif type_ == "Person" and obj.id is not None:
+      keys.add(PERMISSIONS_KEY.format(obj.id))
+  return keys
+
+
+def clear_permission_cache(keys=None):
+  """Remove cached permissions.
+
+  Args:
+    keys: permission cache keys to remove, all cached permissions are
+          removed if keys is None.
+  """
   if not getattr(settings, 'MEMCACHE_MECHANISM', False):
     return
-  cache = _get_cache_manager().cache_object.memcache_client
-  cached_keys_set = cache.get('permissions:list') or set()
-  cached_keys_set.add('permissions:list')
-  # We delete all the cached user permissions as well as
-  # the permissions:list value itself
-  cache.delete_multi(cached_keys_set)
+  if keys is not None and not keys:
+    return
+  cache_manager = _get_cache_manager()
+  cached_keys_set = (cache_manager.bulk_get(['permissions:list']) or {})\
+      .get('permissions:list') or set()
+  if keys is None:
+    cached_keys_set.add('permissions:list')
+    # We delete all the cached user permissions as well as
+    # the permissions:list value itself
+    cache_manager.bulk_delete(list(cached_keys_set), 0)
+    return
+  # Keys that are not in permissions:list any more are not stored by
+  # requests that computed them before this change
+  cache_manager.bulk_set({'permissions:list': cached_keys_set - set(keys)},
+                         PERMISSION_CACHE_TIMEOUT)
+  cache_manager.bulk_delete(list(keys), 0)
 
 
 class ModelView(View):
@@ -1067,33 +1159,38 @@ class Resource(ModelView):
             collection, self.collection_last_modified(), cache_op=cache_op)
 
   def get_resources_from_cache(self, matches):
-    """Get resources from cache for specified matches"""
+    """Get resources from cache for specified matches with a single call"""
     resources = {}
     # Disable caching for background tasks
     # Setting background task status circumvents our memcache
     # invalidation logic so we have to disabling memcache.
     if self.model.__name__ == 'BackgroundTask':
       return resources
-    # Skip right to memcache
-    memcache_client = self.request.cache_manager.cache_object.memcache_client
-    for match in matches:
-      key = get_cache_key(None, id=match[0], type=match[1])
-      val = memcache_client.get(key) or {}
-      if "selfLink" in val:
-        resources[match] = val
+    keys = OrderedDict(
+        (get_cache_key(None, id=match[0], type=match[1]), match)
+        for match in matches
+    )
+    if not keys:
+      return resources
+    cached = self.request.cache_manager.bulk_get(keys.keys()) or {}
+    for key, val in cached.iteritems():
+      if val and "selfLink" in val:
+        resources[keys[key]] = val
     return resources
 
   def add_resources_to_cache(self, match_obj_pairs):
     """Add resources to cache if they are not blocked by DeleteOp entries"""
-    # Skip right to memcache
-    memcache_client = self.request.cache_manager.cache_object.memcache_client
-    for match, obj in match_obj_pairs.items():
-      memcache_client.add(get_cache_key(None, id=match[0], type=match[1]), obj)
+    entries = {
+        get_cache_key(None, id=match[0], type=match[1]): obj
+        for match, obj in match_obj_pairs.items()
+    }
+    if entries:
+      self.request.cache_manager.bulk_add(entries)
 
   def invalidate_cache_to(self, obj):
     """Invalidate api cache for sent object."""
-    memcache_client = self.request.cache_manager.cache_object.memcache_client
-    memcache_client.delete(get_cache_key(None, id=obj.id, type=obj.type))
+    self.request.cache_manager.bulk_delete(
+        [get_cache_key(None, id=obj.id, type=obj.type)], 0)
 
   def json_create(self, obj, src):
     ggrc.builder.json.create(obj, src)
@@ -1596,25 +1693,41 @@ class ExtendedResource(Resource):
     )
 
 
-def filter_resource(resource, depth=0, user_permissions=None):  # noqa
+def filter_resource(resource, depth=0, user_permissions=None):
   """
   Returns:
      The subset of resources which are readable based on user_permissions
   """
-
+  # pylint: disable=unused-argument
   if user_permissions is None:
     user_permissions = permissions.permissions_for(get_current_user())
+  return ResourceReadFilter(user_permissions).filter(resource)
+
 
-  if isinstance(resource, (list, tuple)):
-    filtered = []
-    for sub_resource in resource:
-      filtered_sub_resource = filter_resource(
-          sub_resource, depth=depth + 1, user_permissions=user_permissions)
-      if filtered_sub_resource is not None:
-        filtered.append(filtered_sub_resource)
-    return filtered
-  elif isinstance(resource, dict) and 'type' in resource:
-    # First check current level
+class ResourceReadFilter(object):
+  """Filter published resources by read permissions in bulk.
+
+  Typed objects in the resource tree are collected level by level, the read
+  permission of every distinct type and context is resolved once, with
+  revisioned objects loaded in bulk for Creator users, and unreadable objects
+  are pruned from the tree in a final pass. Objects are checked one by one
+  only for resource specific grants. Sub-resources of unreadable objects are
+  not checked.
+  """
+  REVISION_CHUNK_SIZE = 1000
+
+  def __init__(self, user_permissions):
+    self.user_permissions = user_permissions
+    self.is_creator = _is_creator()
+    self.decisions = {}
+    self._keys = {}
+    self._revisions = defaultdict(set)
+    self._read_contexts = {}
+    self._type_permissions = {}
+
+  @staticmethod
+  def _get_context_id(resource):
+    """Get context id of a published object."""
     context_id = False
     if 'context' in resource:
       if resource['context'] is None:
@@ -1624,60 +1737,151 @@ def filter_resource(resource, depth=0, user_permissions=None):  # noqa
     elif 'context_id' in resource:
       context_id = resource['context_id']
     assert context_id is not False, "No context found for object"
-
-    # In order to avoid loading full instances and using is_allowed_read_for,
-    # we are making a special test for the Creator here. Creator can only
-    # see relationship objects where he has read access on both source and
-    # destination. This is defined in Creator.py:220 file, but is_allowed_read
-    # can not check conditions without the full instance
-    if resource['type'] == "Relationship" and _is_creator():
-      # Make a check for relationship objects that are a special case
-      can_read = True
-      for name in ('source', 'destination'):
-        inst = resource[name]
-        if not inst:
-          # If object was deleted but relationship still exists
-          continue
-        contexts = permissions.read_contexts_for(inst['type'])
-        if contexts is None:
-          # read_contexts_for returns None if the user has access to all the
-          # objects of this type. If the user doesn't have access to any object
-          # an empty list ([]) will be returned
-          continue
-        resources = permissions.read_resources_for(inst['type']) or []
-        if inst['context_id'] in contexts or inst['id'] in resources:
-          continue
-        can_read = False
-      if not can_read:
-        return None
-    elif resource['type'] == "Revision" and _is_creator():
-      # Make a check for revision objects that are a special case
-      if not hasattr(ggrc.models.all_models, resource['resource_type']):
-        # there are no permissions for old objects
-        return None
-      res_model = getattr(ggrc.models.all_models, resource['resource_type'])
-      instance = res_model.query.get(resource['resource_id'])
-      if instance is None or\
-         not user_permissions.is_allowed_read_for(instance):
-        return None
-    else:
-      if not user_permissions.is_allowed_read(resource['type'],
-                                              resource['id'], context_id):
-        return None
-    # Then, filter any typed keys
+    return context_id
+
+  def _get_key(self, resource):
+    """Get key of the read decision for a published object."""
+    # objects of the resource tree are alive while it is filtered, so their
+    # ids are unique
+    key = self._keys.get(id(resource))
+    if key is None:
+      key = self._keys[id(resource)] = self._build_key(resource)
+    return key
+
+  def _build_key(self, resource):
+    """Build key of the read decision for a published object."""
+    if self.is_creator and resource['type'] == "Revision":
+      return ("revision", resource['resource_type'], resource['resource_id'])
+    if self.is_creator and resource['type'] == "Relationship":
+      # In order to avoid loading full instances and using
+      # is_allowed_read_for, we are making a special test for the Creator
+      # here. Creator can only see relationship objects where he has read
+      # access on both source and destination. This is defined in
+      # Creator.py:220 file, but is_allowed_read can not check conditions
+      # without the full instance
+      return ("relationship",) + tuple(
+          (inst['type'], inst['id'], inst.get('context_id'))
+          if inst else None
+          for inst in (resource['source'], resource['destination']))
+    return ("read", resource['type'], resource['id'],
+            self._get_context_id(resource))
+
+  def _iter_typed(self, resource):
+    """Iterate over typed sub-resources, in which objects are filtered."""
     for key, value in resource.items():
-      if key == 'context':
-        # Explicitly allow `context` objects to pass through
-        pass
+      # Explicitly allow `context` objects to pass through
+      if key != 'context' and isinstance(value, dict) and 'type' in value:
+        yield key, value
+
+  def _iter_objects(self, resource):
+    """Iterate over objects in a possibly nested list of objects."""
+    if isinstance(resource, (list, tuple)):
+      for sub_resource in resource:
+        for obj in self._iter_objects(sub_resource):
+          yield obj
+    elif isinstance(resource, dict) and 'type' in resource:
+      yield resource
+    else:
+      assert False, "Non-object passed to filter_resource"
+
+  def filter(self, resource):
+    """Get the subset of resource that is readable."""
+    objects = list(self._iter_objects(resource))
+    while objects:
+      with benchmark("filter_resource > collect"):
+        self.collect(objects)
+      with benchmark("filter_resource > resolve"):
+        self.resolve()
+      objects = [value for obj in objects
+                 if self.decisions[self._get_key(obj)]
+                 for _, value in self._iter_typed(obj)]
+    with benchmark("filter_resource > prune"):
+      return self.prune(resource)
+
+  def collect(self, objects):
+    """Collect read checks of objects."""
+    for obj in objects:
+      key = self._get_key(obj)
+      if key not in self.decisions:
+        self.decisions[key] = None
+        if key[0] == "revision":
+          self._revisions[key[1]].add(key[2])
+
+  def _can_read_stub(self, stub):
+    """Check if a Creator can read the source or destination of a
+    relationship."""
+    if not stub:
+      # If object was deleted but relationship still exists
+      return True
+    type_, id_, context_id = stub
+    if type_ not in self._read_contexts:
+      contexts = permissions.read_contexts_for(type_)
+      if contexts is None:
+        # read_contexts_for returns None if the user has access to all the
+        # objects of this type. If the user doesn't have access to any object
+        # an empty list ([]) will be returned
+        self._read_contexts[type_] = None
       else:
-        # Apply filtering to sub-resources
-        if isinstance(value, dict) and 'type' in value:
-          resource[key] = filter_resource(
-              value, depth=depth + 1, user_permissions=user_permissions)
-
+        self._read_contexts[type_] = (
+            set(contexts), set(permissions.read_resources_for(type_) or []))
+    if self._read_contexts[type_] is None:
+      return True
+    contexts, resources = self._read_contexts[type_]
+    return context_id in contexts or id_ in resources
+
+  def _resolve_revisions(self):
+    """Check read permissions of revisioned objects loaded in bulk."""
+    for type_, ids in self._revisions.iteritems():
+      res_model = getattr(ggrc.models.all_models, type_, None)
+      if res_model is None:
+        # there are no permissions for old objects
+        continue
+      ids = sorted(ids)
+      for start in range(0, len(ids), self.REVISION_CHUNK_SIZE):
+        chunk = ids[start:start + self.REVISION_CHUNK_SIZE]
+        for instance in res_model.query.filter(res_model.id.in_(chunk)):
+          self.decisions[("revision", type_, instance.id)] = \
+              self.user_permissions.is_allowed_read_for(instance)
+    self._revisions.clear()
+
+  def resolve(self):
+    """Resolve all collected read checks."""
+    self._resolve_revisions()
+    for key, decision in self.decisions.items():
+      if decision is not None:
+        continue
+      if key[0] == "revision":
+        # revisions of deleted or unknown objects
+        self.decisions[key] = False
+      elif key[0] == "relationship":
+        self.decisions[key] = all(self._can_read_stub(stub)
+                                  for stub in key[1:])
+      else:
+        self.decisions[key] = self._can_read(*key[1:])
+
+  def _can_read(self, type_, id_, context_id):
+    """Check read permission of an object once per type and context."""
+    key = (type_, context_id)
+    if key not in self._type_permissions:
+      self._type_permissions[key] = self.user_permissions.is_allowed_read(
+          type_, None, context_id)
+    return (self._type_permissions[key] or
+            self.user_permissions.is_allowed_read(type_, id_, context_id))
+
+  def prune(self, resource):
+    """Remove unreadable objects from the resource tree."""
+    if isinstance(resource, (list, tuple)):
+      filtered = []
+      for sub_resource in resource:
+        filtered_sub_resource = self.prune(sub_resource)
+        if filtered_sub_resource is not None:
+          filtered.append(filtered_sub_resource)
+      return filtered
+    if not self.decisions[self._get_key(resource)]:
+      return None
+    for key, value in list(self._iter_typed(resource)):
+      resource[key] = self.prune(value)
     return resource
-  else:
-    assert False, "Non-object passed to filter_resource"
 
 
 def _is_creator():
@@ -1709,6 +1913,6 @@ def etag(last_modified, info=''):
 
 def send_event_job(event):
   """Create bacground job for handling new revisions."""
-  revision_ids = [revision.id for revision in event.revisions]
+  revision_ids = event.revision_ids
   from ggrc import views
   views.start_compute_attributes(revision_ids)
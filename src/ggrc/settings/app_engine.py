@@ -11,3 +11,6 @@ SQLALCHEMY_RECORD_QUERIES = False
 MEMCACHE_MECHANISM = True
 CALENDAR_MECHANISM = False
 BACKGROUND_COLLECTION_POST_SLEEP = 2.5  # seconds
+REINDEX_WORKERS = 0
+DIGEST_RENDER_WORKERS = 0
+HTML_CLEANER_WORKERS = 0
@@ -17,6 +17,7 @@ AUTOBUILD_ASSETS = False
 ENABLE_JASMINE = False
 DEBUG_ASSETS = False
 FULLTEXT_INDEXER = None
+FULLTEXT_TOKENIZER = None
 USER_PERMISSIONS_PROVIDER = None
 EXTENSIONS = []
 exports = []
@@ -70,6 +71,11 @@ SECRET_KEY = os.environ.get('GGRC_SECRET_KEY', 'Replace-with-something-secret')
 
 MEMCACHE_MECHANISM = True
 
+# Maximum number of entries and time to live in seconds of the in-process
+# cache tier in front of memcache. The local tier is disabled with size 0.
+LOCAL_CACHE_SIZE = int(os.environ.get("GGRC_LOCAL_CACHE_SIZE", "0"))
+LOCAL_CACHE_TTL = int(os.environ.get("GGRC_LOCAL_CACHE_TTL", "60"))
+
 # AppEngine Email
 APPENGINE_EMAIL = os.environ.get('APPENGINE_EMAIL', '')
 
@@ -93,6 +99,65 @@ USE_APP_ENGINE_ASSETS_SUBDOMAIN = False
 
 BACKGROUND_COLLECTION_POST_SLEEP = 0
 
+# Number of worker processes used by the global reindex background task.
+# Zero runs the reindex in the task process, which is required on AppEngine.
+REINDEX_WORKERS = int(os.environ.get("GGRC_REINDEX_WORKERS", "0"))
+
+# Create automappings of relationships posted through the API in a
+# background task when there are more than AutomapperGenerator.COUNT_LIMIT
+# of them, instead of not creating them at all.
+AUTOMAPPING_DEFER_LIMIT_EXCEEDED = False
+
+# Number of rows written with a single INSERT when snapshots, their
+# relationships and revisions are created.
+SNAPSHOT_INSERT_BATCH_SIZE = int(
+    os.environ.get("GGRC_SNAPSHOT_INSERT_BATCH_SIZE", "1000"))
+
+# Number of rows written with a single INSERT when cycles of recurring
+# workflows are generated by the nightly cron job.
+CYCLE_INSERT_BATCH_SIZE = int(
+    os.environ.get("GGRC_CYCLE_INSERT_BATCH_SIZE", "1000"))
+
+# Number of revisions serialized and written with a single INSERT when an
+# event is logged.
+REVISION_WRITE_BATCH_SIZE = int(
+    os.environ.get("GGRC_REVISION_WRITE_BATCH_SIZE", "1000"))
+
+# zlib level of values of CompressedType columns, 0 stores them without
+# compression. Values written with any level stay readable.
+COMPRESSED_TYPE_LEVEL = int(os.environ.get("GGRC_COMPRESSED_TYPE_LEVEL", "6"))
+
+# Number of csv import rows whose objects are flushed together. A failing
+# batch is split until the failing rows are found.
+IMPORT_FLUSH_BATCH_SIZE = int(
+    os.environ.get("GGRC_IMPORT_FLUSH_BATCH_SIZE", "100"))
+
+# Number of values with markup whose sanitized html is kept in memory of the
+# process, and number of processes sanitizing html of imported values, 0
+# sanitizes them in the importing process.
+HTML_CLEANER_CACHE_SIZE = int(
+    os.environ.get("GGRC_HTML_CLEANER_CACHE_SIZE", "10000"))
+HTML_CLEANER_WORKERS = int(os.environ.get("GGRC_HTML_CLEANER_WORKERS", "0"))
+
+# Number of processes rendering daily digest emails, 0 renders them in the
+# process running the cron job.
+DIGEST_RENDER_WORKERS = int(os.environ.get("GGRC_DIGEST_RENDER_WORKERS", "0"))
+
+# Number of daily digest emails sent before progress is committed, so that an
+# interrupted run does not send them again.
+DIGEST_MAIL_BATCH_SIZE = int(
+    os.environ.get("GGRC_DIGEST_MAIL_BATCH_SIZE", "100"))
+
+# Import path of the class sending notification emails, defaults to
+# ggrc.notifications.mail.AppEngineMailBackend.
+MAIL_BACKEND = os.environ.get("GGRC_MAIL_BACKEND")
+
+# Read similar objects from the materialized similarity_index table instead
+# of computing them on every request. Run /admin/rebuild_similarity_index
+# after enabling, the index is not maintained while it is disabled.
+SIMILARITY_INDEX_ENABLED = os.environ.get(
+    "GGRC_SIMILARITY_INDEX_ENABLED", "false").lower() == "true"
+
 
 LOGGING_HANDLER = {
     "class": "logging.StreamHandler",
@@ -122,6 +187,12 @@ LOGGING_LOGGERS = {
 
 DEBUG_BENCHMARK = os.environ.get("GGRC_BENCHMARK")
 
+# Record benchmarks, SQL statements and serialization time of every request
+# and keep the last PROFILER_BUFFER_SIZE profiles for /admin/profiles.
+PROFILER_ENABLED = os.environ.get(
+    "GGRC_PROFILER_ENABLED", "false").lower() == "true"
+PROFILER_BUFFER_SIZE = int(os.environ.get("GGRC_PROFILER_BUFFER_SIZE", "100"))
+
 # GGRCQ integration
 GGRC_Q_INTEGRATION_URL = os.environ.get('GGRC_Q_INTEGRATION_URL', '')
 
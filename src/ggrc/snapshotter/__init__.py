@@ -15,6 +15,7 @@ from sqlalchemy.sql.expression import bindparam
 
 from ggrc import db
 from ggrc import models
+from ggrc import settings
 from ggrc.login import get_current_user_id
 from ggrc.utils import benchmark
 
@@ -29,7 +30,7 @@ from ggrc.snapshotter.helpers import create_snapshot_revision_dict
 from ggrc.snapshotter.helpers import get_relationships
 from ggrc.snapshotter.helpers import get_revisions
 from ggrc.snapshotter.helpers import get_snapshots
-from ggrc.snapshotter.indexer import reindex_pairs
+from ggrc.snapshotter.indexer import reindex_snapshots
 
 from ggrc.snapshotter.rules import get_rules
 
@@ -47,6 +48,7 @@ class SnapshotGenerator(object):
     self.snapshots = dict()
     self.context_cache = dict()
     self.dry_run = dry_run
+    self.batch_size = getattr(settings, "SNAPSHOT_INSERT_BATCH_SIZE", 1000)
 
   def add_parent(self, obj):
     """Add parent object and automatically scan neighborhood for snapshottable
@@ -142,9 +144,8 @@ class SnapshotGenerator(object):
     _, for_update = self.analyze()
     result = self._update(for_update=for_update, event=event,
                           revisions=revisions, _filter=_filter)
-    updated = result.response
     if not self.dry_run:
-      reindex_pairs(updated)
+      reindex_snapshots(result.data.get("snapshot_ids"))
       self._copy_snapshot_relationships()
     return result
 
@@ -180,22 +181,9 @@ class SnapshotGenerator(object):
           for_update = {elem for elem in for_update if _filter(elem)}
 
       with benchmark("Snapshot._update.get existing snapshots"):
-        existing_snapshots = db.session.query(
-            models.Snapshot.id,
-            models.Snapshot.revision_id,
-            models.Snapshot.parent_type,
-            models.Snapshot.parent_id,
-            models.Snapshot.child_type,
-            models.Snapshot.child_id,
-        ).filter(tuple_(
-            models.Snapshot.parent_type, models.Snapshot.parent_id,
-            models.Snapshot.child_type, models.Snapshot.child_id
-        ).in_({pair.to_4tuple() for pair in for_update}))
-
-        for esnap in existing_snapshots:
-          sid, rev_id, pair_tuple = esnap[0], esnap[1], esnap[2:]
-          pair = Pair.from_4tuple(pair_tuple)
-          snapshot_cache[pair] = (sid, rev_id)
+        for esnap in get_snapshots(for_update):
+          pair = Pair.from_4tuple(esnap, 4, 5, 6, 7)
+          snapshot_cache[pair] = (esnap.id, esnap.revision_id)
 
       with benchmark("Snapshot._update.retrieve latest revisions"):
         revision_id_cache = get_revisions(
@@ -240,6 +228,7 @@ class SnapshotGenerator(object):
 
       with benchmark("Snapshot._update.retrieve inserted snapshots"):
         snapshots = get_snapshots(modified_snapshot_keys)
+        response_data["snapshot_ids"] = {snapshot.id for snapshot in snapshots}
 
       with benchmark("Snapshot._update.create snapshots revision payload"):
         for snapshot in snapshots:
@@ -291,21 +280,20 @@ class SnapshotGenerator(object):
     """
     for_create, for_update = self.analyze()
     create, update = None, None
-    created, updated = set(), set()
+    to_reindex = set()
 
     if for_update:
       update = self._update(
           for_update=for_update, event=event, revisions=revisions,
           _filter=_filter)
-      updated = update.response
+      to_reindex.update(update.data.get("snapshot_ids", ()))
     if for_create:
       create = self._create(for_create=for_create, event=event,
                             revisions=revisions, _filter=_filter)
-      created = create.response
+      to_reindex.update(create.data.get("snapshot_ids", ()))
 
-    to_reindex = updated | created
     if not self.dry_run:
-      reindex_pairs(to_reindex)
+      reindex_snapshots(to_reindex)
       self._copy_snapshot_relationships()
     return OperationResponse("upsert", True, {
         "create": create,
@@ -317,6 +305,9 @@ class SnapshotGenerator(object):
   def _execute(self, operation, data):
     """Execute bulk operation on data if not in dry mode
 
+    Rows are sent in batches of batch_size. The MySQL driver turns each
+    batch of an insert into a single multi-row INSERT statement.
+
     Args:
       operation: sqlalchemy operation
       data: a list of dictionaries with keys representing column names and
@@ -326,7 +317,8 @@ class SnapshotGenerator(object):
     """
     if data and not self.dry_run:
       engine = db.engine
-      engine.execute(operation, data)
+      for start in range(0, len(data), self.batch_size):
+        engine.execute(operation, data[start:start + self.batch_size])
       db.session.commit()
 
   def create(self, event, revisions, _filter=None):
@@ -336,9 +328,8 @@ class SnapshotGenerator(object):
     result = self._create(
         for_create=for_create, event=event,
         revisions=revisions, _filter=_filter)
-    created = result.response
     if not self.dry_run:
-      reindex_pairs(created)
+      reindex_snapshots(result.data.get("snapshot_ids"))
       self._copy_snapshot_relationships()
     return result
 
@@ -400,6 +391,7 @@ class SnapshotGenerator(object):
 
       with benchmark("Snapshot._create.retrieve inserted snapshots"):
         snapshots = get_snapshots(for_create)
+        response_data["snapshot_ids"] = {snapshot.id for snapshot in snapshots}
 
       with benchmark("Snapshot._create.create parent object -> snapshot rels"):
         for snapshot in snapshots:
@@ -6,16 +6,56 @@
 import collections
 from logging import getLogger
 
-from sqlalchemy.sql.expression import tuple_
+from sqlalchemy import func
 
 from ggrc import db
 from ggrc import models
 from ggrc.snapshotter.datastructures import Stub
-from ggrc.snapshotter.datastructures import Pair
 from ggrc.utils import benchmark
 
 logger = getLogger(__name__)  # pylint: disable=invalid-name
 
+# maximum number of values in a single IN clause
+QUERY_CHUNK_SIZE = 1000
+
+
+def get_latest_revisions(children, filters=None):
+  """Retrieve latest revision ids of objects
+
+  Latest revisions are resolved in the database with one grouped query per
+  chunk of object ids of the same type, instead of loading the whole revision
+  history of all objects.
+
+  Args:
+    children: iterable of Stubs
+    filters: predicates the revisions have to match
+  Returns:
+    dict({child: revision_id, ...})
+  """
+  with benchmark("snapshotter.helpers.get_latest_revisions"):
+    ids_by_type = collections.defaultdict(set)
+    for child in children:
+      ids_by_type[child.type].add(child.id)
+
+    latest = dict()
+    for type_, ids in ids_by_type.iteritems():
+      ids = sorted(ids)
+      for start in range(0, len(ids), QUERY_CHUNK_SIZE):
+        query = db.session.query(
+            models.Revision.resource_id,
+            func.max(models.Revision.id),
+        ).filter(
+            models.Revision.resource_type == type_,
+            models.Revision.resource_id.in_(
+                ids[start:start + QUERY_CHUNK_SIZE]),
+        )
+        for _filter in filters or []:
+          query = query.filter(_filter)
+        query = query.group_by(models.Revision.resource_id)
+        for resid, revid in query:
+          latest[Stub(type_, resid)] = revid
+    return latest
+
 
 def get_revisions(pairs, revisions, filters=None):
   """Retrieve revision ids for pairs
@@ -30,89 +70,115 @@ def get_revisions(pairs, revisions, filters=None):
   """
   with benchmark("snapshotter.helpers.get_revisions"):
     revision_id_cache = dict()
+    if not pairs:
+      return revision_id_cache
 
-    if pairs:
-      with benchmark("get_revisions.create caches"):
-        child_stubs = {pair.child for pair in pairs}
-
-        with benchmark("get_revisions.create child -> parents cache"):
-          parents_cache = collections.defaultdict(set)
-          for parent, child in pairs:
-            parents_cache[child].add(parent)
+    specified = {pair for pair in pairs if pair in revisions}
+    latest = get_latest_revisions(
+        {pair.child for pair in pairs if pair not in specified}, filters)
 
-      with benchmark("get_revisions.retrieve revisions"):
+    with benchmark("get_revisions.validate specified revisions"):
+      history = set()
+      revision_ids = sorted({revisions[pair] for pair in specified})
+      for start in range(0, len(revision_ids), QUERY_CHUNK_SIZE):
         query = db.session.query(
             models.Revision.id,
             models.Revision.resource_type,
-            models.Revision.resource_id).filter(
-            tuple_(
-                models.Revision.resource_type,
-                models.Revision.resource_id).in_(child_stubs)
-        ).order_by(models.Revision.id.desc())
-        if filters:
-          for _filter in filters:
-            query = query.filter(_filter)
-
-      with benchmark("get_revisions.create revision_id cache"):
-        for revid, restype, resid in query:
-          child = Stub(restype, resid)
-          for parent in parents_cache[child]:
-            key = Pair(parent, child)
-            if key in revisions:
-              if revid == revisions[key]:
-                revision_id_cache[key] = revid
-              else:
-                logger.warning(
-                    "Specified revision for object %s but couldn't find the"
-                    "revision '%s' in object history", key, revisions[key])
-            else:
-              if key not in revision_id_cache:
-                revision_id_cache[key] = revid
+            models.Revision.resource_id,
+        ).filter(models.Revision.id.in_(
+            revision_ids[start:start + QUERY_CHUNK_SIZE]))
+        for _filter in filters or []:
+          query = query.filter(_filter)
+        history.update((revid, Stub(restype, resid))
+                       for revid, restype, resid in query)
+
+    for pair in pairs:
+      if pair in specified:
+        if (revisions[pair], pair.child) in history:
+          revision_id_cache[pair] = revisions[pair]
+        else:
+          logger.warning(
+              "Specified revision for object %s but couldn't find the"
+              "revision '%s' in object history", pair, revisions[pair])
+      elif pair.child in latest:
+        revision_id_cache[pair] = latest[pair.child]
     return revision_id_cache
 
 
+def _chunk_by_key(rows):
+  """Group the last values of rows by the other values in sorted chunks.
+
+  Args:
+    rows: iterable of tuples
+  Returns:
+    list of (key, values) tuples with at most QUERY_CHUNK_SIZE values each.
+  """
+  values_by_key = collections.defaultdict(set)
+  for row in rows:
+    values_by_key[row[:-1]].add(row[-1])
+  chunks = []
+  for key, values in sorted(values_by_key.iteritems()):
+    values = sorted(values)
+    for start in range(0, len(values), QUERY_CHUNK_SIZE):
+      chunks.append((key, values[start:start + QUERY_CHUNK_SIZE]))
+  return chunks
+
+
 def get_relationships(relationships):
   """Retrieve relationships
 
+  Relationships are queried for every first object and type of the second
+  objects with the ids of the second objects in chunks, in both directions.
+
   Args:
-    relationships:
+    relationships: set of (source_type, source_id,
+                           destination_type, destination_id) tuples, the
+                   relationships are matched in both directions
   """
   with benchmark("snapshotter.helpers.get_relationships"):
-    if relationships:
-      relationship_columns = db.session.query(
-          models.Relationship.id,
-          models.Relationship.modified_by_id,
-          models.Relationship.created_at,
-          models.Relationship.updated_at,
-          models.Relationship.source_type,
-          models.Relationship.source_id,
-          models.Relationship.destination_type,
-          models.Relationship.destination_id,
-          models.Relationship.context_id,
-      )
-
-      return relationship_columns.filter(
-          tuple_(
-              models.Relationship.source_type,
-              models.Relationship.source_id,
-              models.Relationship.destination_type,
-              models.Relationship.destination_id,
-          ).in_(relationships)
-      ).union(
-          relationship_columns.filter(
-              tuple_(
-                  models.Relationship.destination_type,
-                  models.Relationship.destination_id,
-                  models.Relationship.source_type,
-                  models.Relationship.source_id
-              ).in_(relationships)
-          )
-      )
-    else:
-      return set()
+    if not relationships:
+      return []
+    relationship = models.Relationship
+    relationship_columns = db.session.query(
+        relationship.id,
+        relationship.modified_by_id,
+        relationship.created_at,
+        relationship.updated_at,
+        relationship.source_type,
+        relationship.source_id,
+        relationship.destination_type,
+        relationship.destination_id,
+        relationship.context_id,
+    )
+    result = collections.OrderedDict()
+    for (first_type, first_id, second_type), second_ids in _chunk_by_key(
+        relationships):
+      query = relationship_columns.filter(
+          relationship.source_type == first_type,
+          relationship.source_id == first_id,
+          relationship.destination_type == second_type,
+          relationship.destination_id.in_(second_ids),
+      ).union_all(relationship_columns.filter(
+          relationship.destination_type == first_type,
+          relationship.destination_id == first_id,
+          relationship.source_type == second_type,
+          relationship.source_id.in_(second_ids),
+      ))
+      for rel in query:
+        result[rel.id] = rel
+    return result.values()
 
 
 def get_snapshots(objects=None, ids=None):
+  """Retrieve snapshot columns
+
+  Snapshots of objects are queried for every parent and child type with the
+  child ids in chunks.
+
+  Args:
+    objects: iterable of (parent, child) pairs
+    ids: iterable of snapshot ids
+  """
   with benchmark("snapshotter.helpers.get_snapshots"):
     if objects and ids:
       raise Exception(
@@ -130,14 +196,18 @@ def get_snapshots(objects=None, ids=None):
         models.Snapshot.modified_by_id,
     )
     if objects:
-      return columns.filter(
-          tuple_(
-              models.Snapshot.parent_type,
-              models.Snapshot.parent_id,
-              models.Snapshot.child_type,
-              models.Snapshot.child_id
-          ).in_({(parent.type, parent.id, child.type, child.id)
-                 for parent, child in objects}))
+      snapshots = []
+      pairs = {(parent.type, parent.id, child.type, child.id)
+               for parent, child in objects}
+      for (parent_type, parent_id, child_type), child_ids in _chunk_by_key(
+          pairs):
+        snapshots.extend(columns.filter(
+            models.Snapshot.parent_type == parent_type,
+            models.Snapshot.parent_id == parent_id,
+            models.Snapshot.child_type == child_type,
+            models.Snapshot.child_id.in_(child_ids),
+        ))
+      return snapshots
     if ids:
       return columns.filter(
           models.Snapshot.id.in_(ids))
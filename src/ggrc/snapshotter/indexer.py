@@ -13,13 +13,10 @@ from sqlalchemy import orm
 from ggrc import db
 from ggrc import models
 from ggrc.models import all_models
-from ggrc.fulltext.mysql import MysqlRecordProperty as Record
 from ggrc.fulltext import get_indexer
 from ggrc.models.reflection import AttributeInfo
-from ggrc.utils import generate_query_chunks
 
 from ggrc.snapshotter.rules import Types
-from ggrc.snapshotter.datastructures import Pair
 from ggrc.fulltext.attributes import FullTextAttr
 
 
@@ -54,6 +51,8 @@ TAG_TMPL = u"{parent_type}-{parent_id}-{child_type}"
 PARENT_PROPERTY_TMPL = u"{parent_type}-{parent_id}"
 CHILD_PROPERTY_TMPL = u"{child_type}-{child_id}"
 
+REINDEX_CHUNK_SIZE = 1000
+
 
 def _get_custom_attribute_dict():
   """Get fulltext indexable properties for all snapshottable objects
@@ -109,33 +108,14 @@ def get_searchable_attributes(attributes, cads, content):
   return searchable_values
 
 
-def reindex():
-  """Reindex all snapshots."""
-  columns = db.session.query(
-      models.Snapshot.parent_type,
-      models.Snapshot.parent_id,
-      models.Snapshot.child_type,
-      models.Snapshot.child_id,
-  )
-  for query_chunk in generate_query_chunks(columns):
-    pairs = {Pair.from_4tuple(p) for p in query_chunk}
-    reindex_pairs(pairs)
-    db.session.commit()
-
-
 def reindex_snapshots(snapshot_ids):
   """Reindex selected snapshots"""
   if not snapshot_ids:
     return
-  columns = db.session.query(
-      models.Snapshot.parent_type,
-      models.Snapshot.parent_id,
-      models.Snapshot.child_type,
-      models.Snapshot.child_id,
-  ).filter(models.Snapshot.id.in_(snapshot_ids))
-  for query_chunk in generate_query_chunks(columns):
-    pairs = {Pair.from_4tuple(p) for p in query_chunk}
-    reindex_pairs(pairs)
+  snapshot_ids = sorted(snapshot_ids)
+  for start in range(0, len(snapshot_ids), REINDEX_CHUNK_SIZE):
+    _reindex(models.Snapshot.id.in_(
+        snapshot_ids[start:start + REINDEX_CHUNK_SIZE]))
     db.session.commit()
 
 
@@ -145,10 +125,9 @@ def delete_records(snapshot_ids):
     snapshot_ids: An iterable with snapshot IDs whose full text records should
         be deleted.
   """
-  db.session.query(Record).filter(
-      Record.type == "Snapshot",
-      Record.key.in_(snapshot_ids)
-  ).delete(synchronize_session=False)
+  if snapshot_ids:
+    for query in get_indexer().get_delete_queries("Snapshot", snapshot_ids):
+      db.session.execute(query)
   db.session.commit()
 
 
@@ -159,7 +138,8 @@ def insert_records(payload):
     payload: List of dictionaries that represent records entries.
   """
   engine = db.engine
-  engine.execute(Record.__table__.insert(), payload)
+  for statement, rows in get_indexer().get_insert_payloads(payload):
+    engine.execute(statement, rows)
   db.session.commit()
 
 
@@ -303,16 +283,21 @@ def reindex_pairs(pairs):
   """
   if not pairs:
     return
+  _reindex(tuple_(
+      models.Snapshot.parent_type,
+      models.Snapshot.parent_id,
+      models.Snapshot.child_type,
+      models.Snapshot.child_id,
+  ).in_(
+      {pair.to_4tuple() for pair in pairs}
+  ))
+
+
+def _reindex(snapshot_filter):
+  """Reindex snapshots matching snapshot_filter."""
   snapshots = dict()
   snapshot_query = models.Snapshot.query.filter(
-      tuple_(
-          models.Snapshot.parent_type,
-          models.Snapshot.parent_id,
-          models.Snapshot.child_type,
-          models.Snapshot.child_id,
-      ).in_(
-          {pair.to_4tuple() for pair in pairs}
-      )
+      snapshot_filter
   ).options(
       orm.subqueryload("revision").load_only(
           "id",
@@ -11,6 +11,7 @@ import sqlalchemy
 from flask import request
 from ggrc.settings import CUSTOM_URL_ROOT
 from ggrc.utils import benchmarks
+from ggrc.utils import profiler
 
 
 logger = logging.getLogger()
@@ -45,7 +46,8 @@ class GrcEncoder(json.JSONEncoder):
 
 
 def as_json(obj, **kwargs):
-  return json.dumps(obj, cls=GrcEncoder, **kwargs)
+  with profiler.serialization():
+    return json.dumps(obj, cls=GrcEncoder, **kwargs)
 
 
 def service_for(obj):
@@ -261,6 +263,29 @@ def generate_query_chunks(query, chunk_size=1000):
     yield query.order_by("id").limit(chunk_size).offset(offset)
 
 
+def generate_id_chunks(query, id_column, chunk_size=1000, after_id=0):
+  """Make a generator of id lists from `query` using keyset pagination.
+
+  Unlike `generate_query_chunks` every chunk is fetched with an indexed
+  `id > last_id` condition instead of an offset, so deep chunks are as cheap
+  as the first one and the iteration can be resumed from any id.
+
+  Args:
+    query: query that returns object ids in its first column.
+    id_column: id column used for filtering and ordering.
+    chunk_size: maximum number of ids in a chunk.
+    after_id: only ids greater than this will be returned.
+  """
+  while True:
+    ids = [row[0] for row in query.filter(
+        id_column > after_id
+    ).order_by(id_column).limit(chunk_size)]
+    if not ids:
+      return
+    yield ids
+    after_id = ids[-1]
+
+
 def create_stub(object_, context_id=None):
   """Create stub from model attribute
 
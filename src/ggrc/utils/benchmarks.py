@@ -20,6 +20,7 @@ import time
 from collections import defaultdict
 
 from ggrc import settings
+from ggrc.utils import profiler
 
 
 logger = logging.getLogger(__name__)
@@ -40,10 +41,12 @@ class BenchmarkContextManager(object):
     self.start = 0
 
   def __enter__(self):
+    profiler.enter(self.message)
     self.start = time.time()
 
   def __exit__(self, exc_type, exc_value, exc_trace):
     end = time.time()
+    profiler.leave()
     logger.debug("%.4f %s", end - self.start, self.message)
 
 
@@ -118,6 +121,7 @@ class DebugBenchmark(object):
     if DebugBenchmark._depth == 0:
       self._reset_stats()
     DebugBenchmark._depth += 1
+    profiler.enter(self.message)
     self.start = time.time()
 
   def __exit__(self, exc_type, exc_value, exc_trace):
@@ -127,6 +131,7 @@ class DebugBenchmark(object):
     the outer most benchmark, the summary of all calls will be printed.
     """
     duration = time.time() - self.start
+    profiler.leave()
     DebugBenchmark._depth -= 1
     self.update_stats(duration)
     if not self.quiet and self._summary in {"all", "last"}:
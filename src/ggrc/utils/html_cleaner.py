@@ -1,12 +1,23 @@
 # Copyright (C) 2017 Google Inc.
 # Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
 
-"""Provides an HTML cleaner function with sqalchemy compatible API"""
+"""Provides an HTML cleaner function with sqalchemy compatible API
 
+Values without markup, entities and characters that bleach changes are
+returned as they are. Other values are cleaned once and memoized in an LRU
+cache keyed by the hash of their content.
+"""
+
+import hashlib
+import multiprocessing
+import re
 from HTMLParser import HTMLParser
 
 import bleach
 
+from ggrc import settings
+from ggrc.cache.lrucache import LRUCache
+
 
 # Set up custom tags/attributes for bleach
 BLEACH_TAGS = [
@@ -28,6 +39,88 @@ for tag in BLEACH_TAGS:
   BLEACH_ATTRS[tag] = ATTRS
 
 
+# Values without these characters are not changed by the cleaner. Bleach
+# normalizes carriage returns and removes or replaces null characters and lone
+# surrogates.
+UNSAFE_CHARACTERS = re.compile(u"[<&\r\x00\ud800-\udfff]")
+
+_cache = LRUCache(  # pylint: disable=invalid-name
+    max_size=getattr(settings, "HTML_CLEANER_CACHE_SIZE", 10000), ttl=0)
+
+
+def _clean(value):
+  """Run bleach and unescape until they reach a fix point."""
+  parser = HTMLParser()
+  while True:
+    lastvalue = value
+    value = parser.unescape(
+        bleach.clean(value, BLEACH_TAGS, BLEACH_ATTRS, strip=True)
+    )
+    if value == lastvalue:
+      break
+  return value
+
+
+def _content_hash(value):
+  return hashlib.sha1(value.encode("utf-8")).hexdigest()
+
+
+def clean(value):
+  """Clean unsafe HTML tags out of a string.
+
+  Args:
+    value: html (string) to be cleaned
+  Returns:
+    Html (unicode) without unsafe tags.
+  """
+  value = unicode(value)
+  if not UNSAFE_CHARACTERS.search(value):
+    return value
+  key = _content_hash(value)
+  cleaned = _cache.get(key)
+  if cleaned is None:
+    cleaned = _clean(value)
+    _cache.set(key, cleaned)
+  return cleaned
+
+
+def clean_all(values, workers=None):
+  """Clean values in worker processes and cache the results.
+
+  Values set afterwards on sanitized attributes are then taken from the
+  cache. At most HTML_CLEANER_CACHE_SIZE values are cleaned, the rest are
+  cleaned when they are set.
+
+  Args:
+    values: strings that will be set on sanitized attributes.
+    workers: number of worker processes, HTML_CLEANER_WORKERS by default.
+  """
+  if workers is None:
+    workers = getattr(settings, "HTML_CLEANER_WORKERS", 0)
+  pending = {}
+  for value in values:
+    if not isinstance(value, basestring):
+      continue
+    value = unicode(value)
+    if UNSAFE_CHARACTERS.search(value):
+      pending.setdefault(_content_hash(value), value)
+  keys = [key for key in pending if _cache.get(key) is None]
+  keys = keys[:_cache.max_size]
+  if workers < 1 or len(keys) < 2:
+    return
+  # workers only run bleach, they do not use database connections of this
+  # process
+  pool = multiprocessing.Pool(min(workers, len(keys)))
+  try:
+    cleaned = pool.map(_clean, [pending[key] for key in keys],
+                       chunksize=max(len(keys) // (workers * 4), 1))
+  finally:
+    pool.close()
+    pool.join()
+  for key, value in zip(keys, cleaned):
+    _cache.set(key, value)
+
+
 def cleaner(dummy, value, *_):
   """Cleans out unsafe HTML tags.
 
@@ -45,14 +138,4 @@ def cleaner(dummy, value, *_):
   if not isinstance(value, basestring):
     # no point in sanitizing non-strings
     return value
-
-  parser = HTMLParser()
-  value = unicode(value)
-  while True:
-    lastvalue = value
-    value = parser.unescape(
-        bleach.clean(value, BLEACH_TAGS, BLEACH_ATTRS, strip=True)
-    )
-    if value == lastvalue:
-      break
-  return value
+  return clean(value)
@@ -0,0 +1,257 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Request profiler.
+
+With PROFILER_ENABLED every request is recorded in a Profile:
+
+  * the tree of benchmark context managers entered during the request,
+  * the number and the time of SQL statements, with statements executed more
+    than once, which usually point to N+1 queries,
+  * the time spent serializing the response to JSON.
+
+Profiles of the last PROFILER_BUFFER_SIZE requests are kept in memory of the
+process and can be viewed or dumped as JSON through /admin/profiles.
+
+Benchmarks, SQL hooks and serialization only look up the profile of the
+current thread, so they cost next to nothing while profiling is disabled.
+"""
+
+import collections
+import datetime
+import itertools
+import threading
+import time
+
+import sqlalchemy
+
+from ggrc import settings
+
+
+# Number of slowest and duplicate statements in a profile summary
+TOP_STATEMENTS = 20
+
+_local = threading.local()  # pylint: disable=invalid-name
+
+
+def get_current():
+  """Get the profile of the request handled by the current thread."""
+  return getattr(_local, "profile", None)
+
+
+def set_current(profile):
+  _local.profile = profile
+
+
+def enter(message):
+  profile = get_current()
+  if profile is not None:
+    profile.enter(message)
+
+
+def leave():
+  profile = get_current()
+  if profile is not None:
+    profile.exit()
+
+
+class Profile(object):
+  """Timings of a single request."""
+  # pylint: disable=too-many-instance-attributes
+
+  _ids = itertools.count(1)
+
+  def __init__(self, method, path):
+    self.id = next(self._ids)  # pylint: disable=invalid-name
+    self.method = method
+    self.path = path
+    self.status = None
+    self.started_at = datetime.datetime.utcnow()
+    self.root = self._make_node("{} {}".format(method, path))
+    self._stack = [self.root]
+    self.statements = collections.defaultdict(lambda: [0, 0.0])
+    self.serialization_time = 0.0
+
+  @staticmethod
+  def _make_node(message):
+    return {
+        "message": message,
+        "start": time.time(),
+        "duration": None,
+        "children": [],
+    }
+
+  def enter(self, message):
+    """Start a nested benchmark node."""
+    node = self._make_node(message)
+    self._stack[-1]["children"].append(node)
+    self._stack.append(node)
+
+  def exit(self):
+    """Stop the innermost benchmark node."""
+    if len(self._stack) > 1:
+      node = self._stack.pop()
+      node["duration"] = time.time() - node["start"]
+
+  def finish(self, status=None):
+    """Stop all open nodes and the request itself."""
+    while len(self._stack) > 1:
+      self.exit()
+    self.root["duration"] = time.time() - self.root["start"]
+    self.status = status
+
+  def add_statement(self, statement, duration):
+    stats = self.statements[statement]
+    stats[0] += 1
+    stats[1] += duration
+
+  def add_serialization(self, duration):
+    self.serialization_time += duration
+
+  @staticmethod
+  def _statement_list(items):
+    return [{"statement": statement, "count": count, "time": duration}
+            for statement, (count, duration) in items]
+
+  def _tree(self, node):
+    return {
+        "message": node["message"],
+        "offset": node["start"] - self.root["start"],
+        "duration": node["duration"],
+        "children": [self._tree(child) for child in node["children"]],
+    }
+
+  def to_dict(self, full=False):
+    """Get the JSON representation of the profile.
+
+    Args:
+      full: include the benchmark tree and all statements instead of the
+        slowest and duplicate ones.
+    """
+    items = self.statements.items()
+    duplicates = sorted((item for item in items if item[1][0] > 1),
+                        key=lambda item: item[1][0], reverse=True)
+    slowest = sorted(items, key=lambda item: item[1][1], reverse=True)
+    result = {
+        "id": self.id,
+        "method": self.method,
+        "path": self.path,
+        "status": self.status,
+        "started_at": self.started_at.isoformat(),
+        "duration": self.root["duration"],
+        "serialization_time": self.serialization_time,
+        "sql": {
+            "count": sum(count for count, _ in self.statements.itervalues()),
+            "unique": len(self.statements),
+            "time": sum(duration for _, duration
+                        in self.statements.itervalues()),
+            "duplicates": self._statement_list(duplicates[:TOP_STATEMENTS]),
+            "slowest": self._statement_list(slowest[:TOP_STATEMENTS]),
+        },
+    }
+    if full:
+      result["sql"]["statements"] = self._statement_list(slowest)
+      result["tree"] = self._tree(self.root)
+    return result
+
+
+class ProfileBuffer(object):
+  """Thread safe ring buffer with profiles of the last requests."""
+
+  def __init__(self, size):
+    self._profiles = collections.deque(maxlen=size)
+    self._lock = threading.Lock()
+
+  def append(self, profile):
+    with self._lock:
+      self._profiles.append(profile)
+
+  def get_all(self):
+    """Get buffered profiles, the newest first."""
+    with self._lock:
+      return list(reversed(self._profiles))
+
+  def get(self, id_):
+    for profile in self.get_all():
+      if profile.id == id_:
+        return profile
+    return None
+
+  def clear(self):
+    with self._lock:
+      self._profiles.clear()
+
+
+class ProfilerMiddleware(object):
+  """WSGI middleware recording a profile of every request."""
+
+  SKIP_PREFIXES = ("/static/", "/admin/profiles")
+
+  def __init__(self, wsgi_app, profiles):
+    self.wsgi_app = wsgi_app
+    self.profiles = profiles
+
+  def __call__(self, environ, start_response):
+    path = environ.get("PATH_INFO", "")
+    if path.startswith(self.SKIP_PREFIXES):
+      return self.wsgi_app(environ, start_response)
+
+    profile = Profile(environ.get("REQUEST_METHOD"), path)
+    statuses = []
+
+    def profiled_start_response(status, headers, exc_info=None):
+      statuses.append(status)
+      return start_response(status, headers, exc_info)
+
+    set_current(profile)
+    try:
+      return self.wsgi_app(environ, profiled_start_response)
+    finally:
+      set_current(None)
+      profile.finish(statuses[-1] if statuses else None)
+      self.profiles.append(profile)
+
+
+class serialization(object):  # pylint: disable=invalid-name
+  """Context manager adding its duration to the serialization time."""
+  # pylint: disable=too-few-public-methods
+
+  def __init__(self):
+    self.profile = get_current()
+    self.start = 0
+
+  def __enter__(self):
+    self.start = time.time()
+
+  def __exit__(self, exc_type, exc_value, exc_trace):
+    if self.profile is not None:
+      self.profile.add_serialization(time.time() - self.start)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context,
+                           executemany):
+  # pylint: disable=unused-argument,too-many-arguments
+  if get_current() is not None:
+    conn.info.setdefault("profiler_start", []).append(time.time())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context,
+                          executemany):
+  # pylint: disable=unused-argument,too-many-arguments
+  profile = get_current()
+  starts = conn.info.get("profiler_start")
+  if profile is not None and starts:
+    profile.add_statement(statement, time.time() - starts.pop())
+
+
+profiles = ProfileBuffer(  # pylint: disable=invalid-name
+    getattr(settings, "PROFILER_BUFFER_SIZE", 100))
+
+
+def init_app(app):
+  """Record profiles of all requests handled by app in profiles."""
+  sqlalchemy.event.listen(sqlalchemy.engine.Engine, "before_cursor_execute",
+                          _before_cursor_execute)
+  sqlalchemy.event.listen(sqlalchemy.engine.Engine, "after_cursor_execute",
+                          _after_cursor_execute)
+  app.wsgi_app = ProfilerMiddleware(app.wsgi_app, profiles)
@@ -0,0 +1,89 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Bulk writer of revisions.
+
+Revisions of an event are not added to the session as ORM objects. Their
+content is serialized once and they are inserted with multi-row INSERT
+statements in batches of REVISION_WRITE_BATCH_SIZE, so memory used by a
+bulk import or a cycle start does not grow with the number of revisions.
+"""
+
+from ggrc import db
+from ggrc import settings
+from ggrc.models.revision import Revision
+from ggrc.models.types import JsonCodec
+from ggrc.models.types import LongJsonType
+
+
+def serialize_content(content):
+  """Serialize revision content the same way as LongJsonType."""
+  return JsonCodec(LongJsonType.MAX_TEXT_LENGTH).encode(content)
+
+
+class RevisionWriter(object):
+  """Insert revisions of a single event in batches.
+
+  Usage:
+
+    writer = RevisionWriter(event.id, user_id)
+    for obj in objects:
+      writer.add(obj, "modified")
+    revision_ids = writer.get_ids()
+  """
+
+  def __init__(self, event_id, user_id, batch_size=None):
+    self.event_id = event_id
+    self.user_id = user_id
+    self.batch_size = batch_size or getattr(
+        settings, "REVISION_WRITE_BATCH_SIZE", 1000)
+    self.count = 0
+    self._rows = []
+
+  def _make_row(self, obj, action, content):
+    return {
+        "resource_id": obj.id,
+        "resource_type": obj.__class__.__name__,
+        "resource_slug": getattr(obj, "slug", None),
+        "event_id": self.event_id,
+        "action": action,
+        "content": serialize_content(Revision.populate_content(content)),
+        "modified_by_id": self.user_id,
+        "source_type": getattr(obj, "source_type", None),
+        "source_id": getattr(obj, "source_id", None),
+        "destination_type": getattr(obj, "destination_type", None),
+        "destination_id": getattr(obj, "destination_id", None),
+    }
+
+  def add(self, obj, action, content=None):
+    """Add a revision of obj.
+
+    Args:
+      obj: revisioned object.
+      action: "created", "modified" or "deleted".
+      content: log_json of obj if it is already known, obj.log_json() is
+        used otherwise.
+    """
+    if content is None:
+      content = obj.log_json()
+    self._rows.append(self._make_row(obj, action, content))
+    if len(self._rows) >= self.batch_size:
+      self.flush()
+
+  def flush(self):
+    """Insert added revisions that have not been written yet."""
+    if not self._rows:
+      return
+    db.session.execute(Revision.__table__.insert(), self._rows)
+    self.count += len(self._rows)
+    self._rows = []
+
+  def get_ids(self):
+    """Write all added revisions and get their ids in insert order."""
+    self.flush()
+    if not self.count:
+      return []
+    table = Revision.__table__
+    return [id_ for id_, in db.session.query(table.c.id).filter(
+        table.c.event_id == self.event_id
+    ).order_by(table.c.id)]
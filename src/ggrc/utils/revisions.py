@@ -3,102 +3,217 @@
 
 """Utility class for handling revisions."""
 
+import hashlib
+import json
 from logging import getLogger
 
 from sqlalchemy.sql import select
+from sqlalchemy import bindparam
 from sqlalchemy import func
 from sqlalchemy import literal
 
 from ggrc import db
+from ggrc.utils import as_json
 from ggrc.utils import benchmark
+from ggrc.utils import generate_id_chunks
 from ggrc.login import get_current_user_id
 from ggrc.models import all_models
 from ggrc.snapshotter.rules import Types
 
 logger = getLogger(__name__)  # pylint: disable=invalid-name
 
+CHUNK_SIZE = 1000
 
-def _get_revisions_by_type(type_):
-  """Get latest revisions for all existing objects
+
+def content_hash(content):
+  """Get hash of revision content that does not depend on key order.
+
+  Args:
+    content: revision content as loaded from the database, or log_json of an
+      object.
+  """
+  normalized = json.loads(as_json(content))
+  return hashlib.sha1(
+      json.dumps(normalized, sort_keys=True, separators=(",", ":"))
+  ).hexdigest()
+
+
+def _get_latest_revisions(type_, resource_ids):
+  """Get latest revisions for a chunk of objects
 
   Args:
     type_ (str): the resource_type of revisions to fetch.
+    resource_ids: ids of objects.
 
   Returns:
     dict with object_id as key and revision_id of the latest revision as value.
   """
-
-  revisions = db.session.execute(
-      """
-      SELECT * FROM (
-          SELECT id, resource_id
-          FROM revisions
-          WHERE resource_type = :type
-          ORDER BY resource_id, id DESC
-      ) AS revs
-      GROUP BY resource_id
-      """,
-      [{"type": type_}]
+  if not resource_ids:
+    return {}
+  revisions_table = all_models.Revision.__table__
+  rows = db.session.execute(
+      select([
+          revisions_table.c.resource_id,
+          func.max(revisions_table.c.id),
+      ]).where(
+          revisions_table.c.resource_type == type_,
+      ).where(
+          revisions_table.c.resource_id.in_(resource_ids),
+      ).group_by(
+          revisions_table.c.resource_id,
+      )
   )
+  return dict(rows.fetchall())
 
-  return {row.resource_id: row.id for row in revisions}
 
+def get_latest_revision_ids(type_, chunk_size=CHUNK_SIZE):
+  """Get ids of latest revisions of all objects of a type in chunks.
 
-def _fix_type_revisions(event, type_, obj_rev_map):
-  """Update revision content for all rows of a given model type."""
-  model = getattr(all_models, type_, None)
-  revisions_table = all_models.Revision.__table__
-  if not model:
-    logger.warning("Failed to update revisions for invalid model: %s", type_)
-    return
-
-  if not hasattr(model, "log_json"):
-    logger.warning("Model '%s' has no log_json method, revision generation "
-                   "skipped", type_)
-    return
+  Args:
+    type_ (str): the resource_type of revisions to fetch.
+    chunk_size: number of objects whose latest revisions are fetched at once.
 
-  chunk = 1000
-  all_objects = model.eager_query().order_by(model.id)
-  all_objects_count = model.query.count()
-
-  for i in range(all_objects_count // chunk + 1):
-    objects_chunk = all_objects.limit(chunk).offset(i * chunk)
-    chunk_with_revisions = [
-        obj for obj in objects_chunk if obj.id in obj_rev_map]
-    chunk_without_revisions = [
-        obj for obj in objects_chunk if obj.id not in obj_rev_map]
-
-    # 1. Update the object's latest revision using the value of the up to date
-    # log_json function
-    _update_existing_revisions(
-        chunk_with_revisions, revisions_table, obj_rev_map)
-
-    # 2. For each unlogged object log a "created"/"modified" revision with
-    # content equal to obj.log_json()
-    _recover_create_revisions(revisions_table, event,
-                              type_, chunk_without_revisions)
-
-  # 3. For each lost object log a "deleted" revision with content identical
-  # to the last logged revision.
-  _recover_delete_revisions(
-      # Every revision present in obj_rev_map has no object in the DB
-      revisions_table, event, list(obj_rev_map.values()))
+  Yields:
+    lists of revision ids, one list per chunk of object ids.
+  """
+  revisions_table = all_models.Revision.__table__
+  resource_ids = db.session.query(
+      revisions_table.c.resource_id
+  ).filter(
+      revisions_table.c.resource_type == type_
+  ).distinct()
+  for ids in generate_id_chunks(resource_ids, revisions_table.c.resource_id,
+                                chunk_size=chunk_size):
+    yield _get_latest_revisions(type_, ids).values()
+
+
+def _get_revision_columns(revision_ids, *columns):
+  """Get columns of revisions by revision id."""
+  if not revision_ids:
+    return {}
+  revisions_table = all_models.Revision.__table__
+  rows = db.session.execute(
+      select([revisions_table.c.id] +
+             [revisions_table.c[name] for name in columns]).where(
+          revisions_table.c.id.in_(revision_ids)))
+  return {row[0]: row[1:] for row in rows}
+
+
+def get_revisioned_types():
+  """Get names of models that have revisions and a log_json method."""
+  type_names = db.session.query(all_models.Revision.resource_type).distinct()
+  return sorted(
+      type_ for type_, in type_names
+      if hasattr(getattr(all_models, type_, None), "log_json")
+  )
 
-  db.session.commit()
 
+class RevisionRefreshJob(object):
+  """Memory bounded refresh of latest revision content.
 
-def _update_existing_revisions(objects, revisions_table, obj_rev_map):
-  """Update existing revisions with the result of log_json and remove
-     the obj.id from obj_rev_map.
+  Every type is walked in keyset paginated chunks of object ids. For each
+  chunk the latest revisions are compared with log_json of the objects by
+  content hash and only differing revisions are written. Objects without
+  revisions get a "created" or "modified" revision and revisions of objects
+  that no longer exist get a "deleted" revision. Changes are committed after
+  every chunk.
   """
-  for obj in objects:
-    rev_id = obj_rev_map.pop(obj.id)
-    # Update revisions_table.content to the latest object's json
-    db.session.execute(
-        revisions_table.update()
-        .where(revisions_table.c.id == rev_id)
-        .values(content=obj.log_json())
-    )
+
+  def __init__(self, event, chunk_size=CHUNK_SIZE):
+    self.event = event
+    self.chunk_size = chunk_size
+    self.stats = {}
+
+  def _type_stats(self, type_):
+    return self.stats.setdefault(type_, {
+        "scanned": 0,
+        "updated": 0,
+        "created": 0,
+        "deleted": 0,
+    })
+
+  def run(self, types):
+    """Refresh revisions of the given types.
+
+    Returns:
+      dict with the number of scanned objects and of written revisions for
+      every type.
+    """
+    revisions_table = all_models.Revision.__table__
+    for type_ in types:
+      model = getattr(all_models, type_, None)
+      if not model:
+        logger.warning("Failed to update revisions for invalid model: %s",
+                       type_)
+        continue
+      if not hasattr(model, "log_json"):
+        logger.warning("Model '%s' has no log_json method, revision "
+                       "generation skipped", type_)
+        continue
+      logger.info("Updating revisions for: %s", type_)
+      with benchmark("Refresh revisions for %s" % type_):
+        for ids in generate_id_chunks(db.session.query(model.id), model.id,
+                                      chunk_size=self.chunk_size):
+          self._fix_objects(model, ids)
+          db.session.commit()
+        resource_ids = db.session.query(
+            revisions_table.c.resource_id
+        ).filter(
+            revisions_table.c.resource_type == type_
+        ).distinct()
+        for ids in generate_id_chunks(resource_ids,
+                                      revisions_table.c.resource_id,
+                                      chunk_size=self.chunk_size):
+          self._fix_deleted(model, ids)
+          db.session.commit()
+    return self.stats
+
+  def _fix_objects(self, model, ids):
+    """Fix latest revisions of a chunk of existing objects."""
+    type_ = model.__name__
+    stats = self._type_stats(type_)
+    revisions_table = all_models.Revision.__table__
+    objects = model.eager_query().filter(model.id.in_(ids)).all()
+    obj_rev_map = _get_latest_revisions(type_, ids)
+    stored = _get_revision_columns(obj_rev_map.values(), "content")
+
+    changed = []
+    chunk_without_revisions = []
+    for obj in objects:
+      rev_id = obj_rev_map.get(obj.id)
+      if rev_id is None:
+        chunk_without_revisions.append(obj)
+        continue
+      content = obj.log_json()
+      stored_content, = stored.get(rev_id, (None,))
+      if content_hash(stored_content) != content_hash(content):
+        changed.append({"_id": rev_id, "_content": content})
+
+    stats["scanned"] += len(objects)
+    if changed:
+      db.session.execute(
+          revisions_table.update().where(
+              revisions_table.c.id == bindparam("_id")
+          ).values(content=bindparam("_content")),
+          changed,
+      )
+      stats["updated"] += len(changed)
+    stats["created"] += len(chunk_without_revisions)
+    _recover_create_revisions(revisions_table, self.event, type_,
+                              chunk_without_revisions)
+
+  def _fix_deleted(self, model, resource_ids):
+    """Log deleted revisions for objects in a chunk that no longer exist."""
+    existing = {id_ for id_, in db.session.query(model.id).filter(
+        model.id.in_(resource_ids))}
+    missing = [id_ for id_ in resource_ids if id_ not in existing]
+    obj_rev_map = _get_latest_revisions(model.__name__, missing)
+    actions = _get_revision_columns(obj_rev_map.values(), "action")
+    not_deleted = [rev_id for rev_id, (action,) in actions.iteritems()
+                   if action != "deleted"]
+    self._type_stats(model.__name__)["deleted"] += len(not_deleted)
+    _recover_delete_revisions(all_models.Revision.__table__, self.event,
+                              not_deleted)
 
 
 def _recover_delete_revisions(revisions_table, event,
@@ -170,36 +285,47 @@ def _recover_create_revisions(revisions_table, event, object_type,
 
 
 def set_resource_slugs():
+  """Set resource_slug of revisions from their content, in chunks."""
   with benchmark("set revision resource_slug content"):
     revisions_table = all_models.Revision.__table__
-    rows = db.session.execute(select([
-        revisions_table.c.id,
-        revisions_table.c.content,
-    ]).where(
+    query = db.session.query(revisions_table.c.id).filter(
         revisions_table.c.resource_type.in_(Types.all)
-    ).where(
+    ).filter(
         revisions_table.c.resource_slug.is_(None)
-    ))
-    for row in rows:
-      if row.content.get("slug"):
+    )
+    for ids in generate_id_chunks(query, revisions_table.c.id):
+      slugs = [
+          {"_id": rev_id, "_slug": content.get("slug")}
+          for rev_id, (content,) in _get_revision_columns(
+              ids, "content").iteritems()
+          if content.get("slug")
+      ]
+      if slugs:
         db.session.execute(
-            revisions_table.update()
-            .where(revisions_table.c.id == row.id)
-            .values(resource_slug=row.content.get("slug"))
+            revisions_table.update().where(
+                revisions_table.c.id == bindparam("_id")
+            ).values(resource_slug=bindparam("_slug")),
+            slugs,
         )
-    db.session.commit()
+      db.session.commit()
+
 
+def do_refresh_revisions(types=None):
+  """Update last revisions of models with fixed data.
 
-def do_refresh_revisions():
-  """Update last revisions of models with fixed data."""
+  Args:
+    types: names of models whose revisions are refreshed, all models with
+      revisions if None.
+  Returns:
+    dict with the number of scanned objects and of written revisions for
+    every type.
+  """
   set_resource_slugs()
   event = all_models.Event(action="BULK")
   db.session.add(event)
   db.session.flush([event])
-
-  # TODO: Improve performance/memory consumption so that we can run
-  # _fix_type_revisions for all objects and not just the objects that are
-  # snapshottable
-  for type_ in sorted(Types.all | {"Assessment"}):
-    logger.info("Updating revisions for: %s", type_)
-    _fix_type_revisions(event, type_, _get_revisions_by_type(type_))
+  if types is None:
+    types = get_revisioned_types()
+  stats = RevisionRefreshJob(event).run(types)
+  db.session.commit()
+  return stats
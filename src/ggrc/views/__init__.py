@@ -15,7 +15,9 @@ from flask import g
 from flask import render_template
 from flask import url_for
 from flask import request
+from werkzeug.exceptions import BadRequest
 from werkzeug.exceptions import Forbidden
+from werkzeug.exceptions import NotFound
 
 from ggrc import models
 from ggrc import settings
@@ -23,12 +25,15 @@ from ggrc.app import app
 from ggrc.app import db
 from ggrc.builder.json import publish
 from ggrc.builder.json import publish_representation
+from ggrc.cache import MemCache
+from ggrc.cache import TieredCache
 from ggrc.converters import get_importables, get_exportables
 from ggrc.extensions import get_extension_modules
-from ggrc.fulltext import get_indexer, mixin
+from ggrc.fulltext.reindex import ReindexJob
 from ggrc.login import get_current_user
 from ggrc.login import login_required
 from ggrc.models import all_models
+from ggrc.models import similarity_index
 from ggrc.models.background_task import create_task
 from ggrc.models.background_task import make_task_response
 from ggrc.models.background_task import queued_task
@@ -38,14 +43,13 @@ from ggrc.services.common import as_json
 from ggrc.services.common import inclusion_filter
 from ggrc.query import views as query_views
 from ggrc.snapshotter import rules
-from ggrc.snapshotter.indexer import reindex as reindex_snapshots
 from ggrc.views import converters
 from ggrc.views import cron
 from ggrc.views import filters
 from ggrc.views import notifications
 from ggrc.views.registry import object_view
 from ggrc.utils import benchmark
-from ggrc.utils import generate_query_chunks
+from ggrc.utils import profiler
 from ggrc.utils import revisions
 
 logger = logging.getLogger(__name__)  # pylint: disable=invalid-name
@@ -56,32 +60,78 @@ logger = logging.getLogger(__name__)  # pylint: disable=invalid-name
 @queued_task
 def refresh_revisions(_):
   """Web hook to update revision content."""
-  revisions.do_refresh_revisions()
-  return app.make_response(("success", 200, [("Content-Type", "text/html")]))
+  stats = revisions.do_refresh_revisions()
+  return app.make_response((json.dumps(stats), 200,
+                            [("Content-Type", "application/json")]))
 
 
 @app.route("/_background_tasks/reindex", methods=["POST"])
 @queued_task
-def reindex(_):
+def reindex(task):
   """Web hook to update the full text search index."""
-  do_reindex()
-  return app.make_response(("success", 200, [("Content-Type", "text/html")]))
+  progress = do_reindex(task)
+  return app.make_response((json.dumps(progress), 200,
+                            [("Content-Type", "application/json")]))
 
 
 @app.route("/_background_tasks/compute_attributes", methods=["POST"])
 @queued_task
 def compute_attributes(args):
-  """Web hook to update the full text search index."""
+  """Web hook to compute values of computed attributes.
+
+  Revisions of the task are added to the change queue and the whole queue is
+  processed, so tasks started for the same objects are computed once.
+  """
   with benchmark("Run compute_attributes background task"):
     from ggrc.data_platform import computed_attributes
     if str(args.parameters["revision_ids"]) == "all_latest":
-      revision_ids = "all_latest"
+      stats = computed_attributes.compute_attributes("all_latest")
     else:
-      revision_ids = [id_ for id_ in args.parameters["revision_ids"]]
-    computed_attributes.compute_attributes(revision_ids)
+      computed_attributes.queue_revisions(
+          [id_ for id_ in args.parameters["revision_ids"]])
+      stats = computed_attributes.compute_queued_attributes()
+    return app.make_response((json.dumps(stats), 200,
+                              [("Content-Type", "application/json")]))
+
+
+@app.route("/_background_tasks/rebuild_similarity_index", methods=["POST"])
+@queued_task
+def rebuild_similarity_index(_):
+  """Web hook to compute the similarity index again."""
+  stats = similarity_index.rebuild()
+  return app.make_response((json.dumps(stats), 200,
+                            [("Content-Type", "application/json")]))
+
+
+@app.route("/_background_tasks/generate_automappings", methods=["POST"])
+@queued_task
+def generate_automappings(task):
+  """Web hook to create automappings that exceeded the request limit."""
+  from ggrc.automapper import AutomapperGenerator
+  from ggrc.services.common import log_event
+  with benchmark("Run generate_automappings background task"):
+    relationship = models.Relationship.query.get(
+        task.parameters["relationship_id"])
+    if relationship is not None:
+      AutomapperGenerator(use_count_limit=False).generate_automappings(
+          relationship)
+      log_event(db.session)
+      db.session.commit()
     return app.make_response(("success", 200, [("Content-Type", "text/html")]))
 
 
+def start_generate_automappings(relationship_id):
+  """Start a background task for automappings of a relationship."""
+  task = create_task(
+      name="generate_automappings",
+      url=url_for(generate_automappings.__name__),
+      parameters={"relationship_id": relationship_id},
+      method=u"POST",
+      queued_callback=generate_automappings
+  )
+  task.start()
+
+
 def start_compute_attributes(revision_ids):
   """Start a background task for computed attributes."""
   task = create_task(
@@ -94,35 +144,19 @@ def start_compute_attributes(revision_ids):
   task.start()
 
 
-def do_reindex():
-  """Update the full text search index."""
+def do_reindex(task=None):
+  """Update the full text search index.
 
-  indexer = get_indexer()
-  indexed_models = {
-      m.__name__: m for m in all_models.all_models
-      if issubclass(m, mixin.Indexed) and m.REQUIRED_GLOBAL_REINDEX
-  }
-  people_query = db.session.query(all_models.Person.id,
-                                  all_models.Person.name,
-                                  all_models.Person.email)
-  indexer.cache["people_map"] = {p.id: (p.name, p.email) for p in people_query}
-  indexer.cache["ac_role_map"] = dict(db.session.query(
-      all_models.AccessControlRole.id,
-      all_models.AccessControlRole.name,
-  ))
-  for model_name in sorted(indexed_models.keys()):
-    logger.info("Updating index for: %s", model_name)
-    with benchmark("Create records for %s" % model_name):
-      model = indexed_models[model_name]
-      for query_chunk in generate_query_chunks(db.session.query(model.id)):
-        model.bulk_record_update_for([i.id for i in query_chunk])
-        db.session.commit()
-
-  logger.info("Updating index for: %s", "Snapshot")
-  with benchmark("Create records for %s" % "Snapshot"):
-    reindex_snapshots()
-  indexer.invalidate_cache()
-  start_compute_attributes("all_latest")
+  Args:
+    task: BackgroundTask that holds the reindex checkpoints. If the task
+      has been interrupted before, the reindex continues from its checkpoints.
+  Returns:
+    dict with reindex progress report.
+  """
+  from ggrc.data_platform import computed_attributes
+  progress = ReindexJob(task).run()
+  computed_attributes.index_stored_values()
+  return progress
 
 
 def get_permissions_json():
@@ -340,9 +374,19 @@ def admin_reindex():
   """
   if not permissions.is_allowed_read("/admin", None, 1):
     raise Forbidden()
+  parameters = {}
+  resume_task_id = request.values.get("resume_task_id")
+  if resume_task_id:
+    resume_task = models.BackgroundTask.query.get(resume_task_id)
+    if resume_task is None or not resume_task.name.startswith("reindex"):
+      raise BadRequest("Invalid reindex task id")
+    parameters = dict(resume_task.parameters or {})
+  elif request.values.get("since"):
+    parameters["since"] = request.values["since"]
   task_queue = create_task(
       name="reindex",
       url=url_for(reindex.__name__),
+      parameters=parameters,
       queued_callback=reindex
   )
   return task_queue.make_response(
@@ -377,6 +421,91 @@ def send_event_job():
     return app.make_response(("success", 200, [("Content-Type", "text/html")]))
 
 
+@app.route("/admin/rebuild_similarity_index", methods=["POST"])
+@login_required
+def admin_rebuild_similarity_index():
+  """Calls a webhook that computes the similarity index again."""
+  if not permissions.is_allowed_read("/admin", None, 1):
+    raise Forbidden()
+  task_queue = create_task("rebuild_similarity_index", url_for(
+      rebuild_similarity_index.__name__), rebuild_similarity_index)
+  return task_queue.make_response(
+      app.make_response(("scheduled %s" % task_queue.name, 200,
+                         [('Content-Type', 'text/html')])))
+
+
+@app.route("/admin/check_similarity_index", methods=["GET"])
+@login_required
+def admin_check_similarity_index():
+  """Compare the similarity index with similarity computed on the fly.
+
+  The objects are given in the "ids" parameter as a comma separated list,
+  otherwise the last "limit" (100 by default) objects are checked.
+
+  Returns:
+    json with differences by model name and object id.
+  """
+  if not permissions.is_allowed_read("/admin", None, 1):
+    raise Forbidden()
+  try:
+    ids = [int(id_) for id_ in request.args.get("ids", "").split(",") if id_]
+    limit = int(request.args.get("limit", 100))
+  except ValueError:
+    raise BadRequest("ids and limit must be integers")
+  result = {}
+  for model in similarity_index.get_indexed_models():
+    model_ids = ids or [row.id for row in db.session.query(model.id).order_by(
+        model.id.desc()).limit(limit)]
+    result[model.__name__] = similarity_index.check(model, model_ids)
+  return app.make_response((json.dumps(result), 200,
+                            [("Content-Type", "application/json")]))
+
+
+@app.route("/admin/cache_stats", methods=["GET"])
+@login_required
+def admin_cache_stats():
+  """Get hit, miss and eviction statistics of the cache tiers."""
+  if not permissions.is_allowed_read("/admin", None, 1):
+    raise Forbidden()
+  stats = {"memcache": MemCache.stats.get(), "local": None}
+  if TieredCache.local is not None:
+    stats["local"] = TieredCache.local.get_stats()
+  return app.make_response((json.dumps(stats), 200,
+                            [("Content-Type", "application/json")]))
+
+
+@app.route("/admin/profiles", methods=["GET"])
+@login_required
+def admin_profiles():
+  """Get profiles of the last requests recorded by the request profiler.
+
+  Profiles are listed as summaries, the newest first. With the "id" parameter
+  only that profile is returned with its benchmark tree and all statements,
+  with "dump" all profiles are returned in full as a JSON file.
+  """
+  if not permissions.is_allowed_read("/admin", None, 1):
+    raise Forbidden()
+  if not getattr(settings, "PROFILER_ENABLED", False):
+    raise BadRequest("Request profiler is not enabled")
+  headers = [("Content-Type", "application/json")]
+  if request.args.get("id"):
+    try:
+      profile = profiler.profiles.get(int(request.args["id"]))
+    except ValueError:
+      raise BadRequest("id must be an integer")
+    if profile is None:
+      raise NotFound()
+    result = profile.to_dict(full=True)
+  elif request.args.get("dump"):
+    result = [profile.to_dict(full=True)
+              for profile in profiler.profiles.get_all()]
+    headers.append(("Content-Disposition",
+                    "attachment; filename=profiles.json"))
+  else:
+    result = [profile.to_dict() for profile in profiler.profiles.get_all()]
+  return app.make_response((json.dumps(result), 200, headers))
+
+
 @app.route("/admin")
 @login_required
 def admin():
@@ -7,6 +7,8 @@ This module handles all view related function to import and export pages
 including the import/export api endponts.
 """
 
+import itertools
+import tempfile
 from logging import getLogger
 
 import httplib2
@@ -19,6 +21,7 @@ from flask import current_app
 from flask import request
 from flask import json
 from flask import render_template
+from flask import stream_with_context
 from werkzeug.exceptions import (
     BadRequest, NotFound, InternalServerError, Unauthorized
 )
@@ -28,7 +31,7 @@ from ggrc_gdrive_integration import get_credentials
 from ggrc_gdrive_integration import verify_credentials
 from ggrc.app import app
 from ggrc.converters.base import Converter
-from ggrc.converters.import_helper import generate_csv_string
+from ggrc.converters.import_helper import generate_csv_lines
 from ggrc.converters.import_helper import read_csv_file
 from ggrc.query.exceptions import BadQueryException
 from ggrc.query.builder import QueryHelper
@@ -39,6 +42,14 @@ from ggrc.utils import benchmark
 # pylint: disable=invalid-name
 logger = getLogger(__name__)
 
+# exports bigger than this are spooled to disk before a gdrive upload
+EXPORT_SPOOL_SIZE = 16 * 1024 * 1024
+GDRIVE_UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+
+# written at the end of a streamed export that failed after it was started
+EXPORT_ERROR_MARKER = ("\r\nExport failed due to internal server error. "
+                       "This file is incomplete.\r\n")
+
 
 def check_required_headers(required_headers):
   """Check required headers to the current request"""
@@ -64,8 +75,11 @@ def parse_export_request():
   return request.json
 
 
-def create_gdrive_file(csv_string, filename):
-  """Post text/csv data to a gdrive file"""
+def create_gdrive_file(csv_lines, filename):
+  """Post text/csv data to a gdrive file
+
+  The csv data is spooled to a temporary file and uploaded in chunks.
+  """
   credentials = get_credentials()
   http_auth = credentials.authorize(httplib2.Http())
   drive_service = discovery.build('drive', 'v3', http=http_auth)
@@ -74,12 +88,31 @@ def create_gdrive_file(csv_string, filename):
       'name': filename,
       'mimeType': 'application/vnd.google-apps.spreadsheet'
   }
-  media = http.MediaInMemoryUpload(csv_string,
+  with tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_SIZE) as csv_file:
+    for line in csv_lines:
+      csv_file.write(line)
+    csv_file.seek(0)
+    media = http.MediaIoBaseUpload(csv_file,
                                    mimetype='text/csv',
+                                   chunksize=GDRIVE_UPLOAD_CHUNK_SIZE,
                                    resumable=True)
-  return drive_service.files().create(body=file_metadata,
-                                      media_body=media,
-                                      fields='id, name, parents').execute()
+    return drive_service.files().create(body=file_metadata,
+                                        media_body=media,
+                                        fields='id, name, parents').execute()
+
+
+def log_stream_errors(lines):
+  """Log errors raised after a streamed response has been started.
+
+  The response status has already been sent at that point, so the error is
+  marked at the end of the incomplete file instead.
+  """
+  try:
+    for line in lines:
+      yield line
+  except Exception as e:  # pylint: disable=broad-except
+    logger.exception("Export failed: {}".format(e.message))
+    yield EXPORT_ERROR_MARKER
 
 
 def handle_export_request():
@@ -91,16 +124,16 @@ def handle_export_request():
       export_to = data.get("export_to")
       query_helper = QueryHelper(objects)
       ids_by_type = query_helper.get_ids()
-    with benchmark("Generate CSV array"):
+    with benchmark("Prepare CSV stream"):
       converter = Converter(ids_by_type=ids_by_type)
-      csv_data = converter.to_array()
-    with benchmark("Generate CSV string"):
-      csv_string = generate_csv_string(csv_data)
+      csv_lines = generate_csv_lines(converter.to_stream())
+      # errors in the headers and the first rows still get an error response
+      csv_lines = itertools.chain([next(csv_lines, "")], csv_lines)
     with benchmark("Make response."):
       object_names = "_".join(converter.get_object_names())
       filename = "{}.csv".format(object_names)
       if export_to == "gdrive":
-        gfile = create_gdrive_file(csv_string, filename)
+        gfile = create_gdrive_file(csv_lines, filename)
         headers = [('Content-Type', 'application/json'), ]
         return current_app.make_response((json.dumps(gfile), 200, headers))
       if export_to == "csv":
@@ -109,7 +142,9 @@ def handle_export_request():
             ("Content-Disposition",
              "attachment; filename='{}'".format(filename)),
         ]
-        return current_app.make_response((csv_string, 200, headers))
+        return current_app.response_class(
+            stream_with_context(log_stream_errors(csv_lines)),
+            200, headers)
   except BadQueryException as exception:
     raise BadRequest(exception.message)
   except HttpError as e:
@@ -5,6 +5,7 @@
 
 import datetime
 import itertools
+import struct
 
 import sqlalchemy.orm
 from sqlalchemy import and_
@@ -23,8 +24,12 @@ from ggrc.models import all_models
 from ggrc.models.audit import Audit
 from ggrc.models.program import Program
 from ggrc.rbac import permissions as rbac_permissions
+from ggrc.rbac.permission_index import PermissionIndex
 from ggrc.rbac.permissions_provider import DefaultUserPermissions
 from ggrc.services.common import _get_cache_manager
+from ggrc.services.common import ACL_PERMISSIONS_KEY
+from ggrc.services.common import PERMISSION_CACHE_TIMEOUT
+from ggrc.services.common import PERMISSIONS_KEY
 from ggrc.services import signals
 from ggrc.services.registry import service
 from ggrc.utils import benchmark
@@ -47,9 +52,6 @@ blueprint = Blueprint(
     static_url_path='/static/ggrc_basic_permissions',
 )
 
-PERMISSION_CACHE_TIMEOUT = 3600  # 60 minutes
-
-
 def get_public_config(_):
   """Expose additional permissions-dependent config to client.
     Specifically here, expose GGRC_BOOTSTRAP_ADMIN values to ADMIN users.
@@ -280,11 +282,17 @@ class BasicUserPermissions(DefaultUserPermissions):
   def __init__(self, user):
     self.user = user
     with benchmark('BasicUserPermissions > load permissions for user'):
-      self.permissions = load_permissions_for(user)
+      self.index = load_permission_index_for(user)
+      self.permissions = self.index.to_permissions()
 
   def _permissions(self):
     return self.permissions
 
+  def _permission_index(self, permissions):
+    if self.index.source is not permissions:
+      self.index = PermissionIndex.from_permissions(permissions)
+    return self.index
+
 
 class UserPermissions(DefaultUserPermissions):
   """User permissions cached in the global session object"""
@@ -318,7 +326,9 @@ class UserPermissions(DefaultUserPermissions):
       self._request_permissions = {}
     else:
       with benchmark('load_permissions'):
-        self._request_permissions = load_permissions_for(user)
+        index = load_permission_index_for(user)
+        self._request_permissions = index.to_permissions()
+        setattr(g, '_request_permission_index', index)
 
 
 def collect_permissions(src_permissions, context_id, permissions):
@@ -350,35 +360,44 @@ def collect_permissions(src_permissions, context_id, permissions):
             })
 
 
-def query_memcache(key):
+def query_memcache(keys):
   """Check if cached permissions are available
 
   Args:
-      key (string): key of the stored permissions
+      keys (list(string)): keys of the stored permissions
   Returns:
-      cache (memcache_client): memcache client or None if caching
-                               is not available
-      permissions_cache (dict): dict with all permissions or None if there
-                                was a cache miss
+      cache (CacheManager): cache manager or None if caching
+                            is not available
+      permissions_cache (dict): dict with serialized permission indexes of
+                                the keys that were found in the cache
   """
   if not getattr(settings, 'MEMCACHE_MECHANISM', False):
-    return None, None
+    return None, {}
+
+  cache = _get_cache_manager()
+  # Permissions in the in-process cache tier are valid without checking
+  # permissions:list, since clearing the permissions also invalidates the
+  # local tier.
+  permissions_cache = cache.bulk_get_local(keys)
+  missing = [key for key in keys if not permissions_cache.get(key)]
+  if not missing:
+    return cache, permissions_cache
 
-  cache = _get_cache_manager().cache_object.memcache_client
-  cached_keys_set = cache.get('permissions:list') or set()
-  if key not in cached_keys_set:
+  cached = cache.bulk_get(missing + ['permissions:list']) or {}
+  cached_keys_set = cached.get('permissions:list') or set()
+  if not cached_keys_set.issuperset(missing):
     # We set the permissions:list variable so that we are able to batch
     # remove all permissions related keys from memcache
-    cached_keys_set.add(key)
-    cache.set('permissions:list', cached_keys_set, PERMISSION_CACHE_TIMEOUT)
-    return cache, None
-
-  permissions_cache = cache.get(key)
-  if permissions_cache:
-    # If the key is both in permissions:list and in memcache itself
-    # it is safe to return the cached permissions
-    return cache, permissions_cache
-  return cache, None
+    cached_keys_set.update(missing)
+    cache.bulk_set({'permissions:list': cached_keys_set},
+                   PERMISSION_CACHE_TIMEOUT)
+
+  for key in missing:
+    if key in cached_keys_set and cached.get(key):
+      # If the key is both in permissions:list and in memcache itself
+      # it is safe to return the cached permissions
+      permissions_cache[key] = cached[key]
+  return cache, permissions_cache
 
 
 def load_default_permissions(permissions):
@@ -716,54 +735,39 @@ def load_backlog_workflows(permissions):
             .append(wf_context_id)
 
 
-def store_results_into_memcache(permissions, cache, key):
-  """Load personal context for user
+def store_results_into_memcache(results, cache):
+  """Store serialized permission indexes into memcache
 
   Args:
-      permissions (dict): dict where the permissions will be stored
+      results (dict): serialized permission indexes by their keys
       cache (cache_manager): Cache manager that should be used for storing
                              permissions
-      key (string): key of under which permissions should be stored
   Returns:
       None
   """
-  if cache is None:
+  if cache is None or not results:
     return
 
-  cached_keys_set = cache.get('permissions:list') or set()
-  if key in cached_keys_set:
-    # We only add the permissions to the cache if the
-    # key still exists in the permissions:list after
-    # the query has executed.
-    cache.set(key, permissions, PERMISSION_CACHE_TIMEOUT)
+  cached_keys_set = (cache.bulk_get(['permissions:list']) or {})\
+      .get('permissions:list') or set()
+  # We only add the permissions to the cache if the
+  # key still exists in the permissions:list after
+  # the query has executed.
+  valid_results = {key: value for key, value in results.iteritems()
+                   if key in cached_keys_set}
+  if valid_results:
+    cache.bulk_set(valid_results, PERMISSION_CACHE_TIMEOUT)
 
 
-def load_permissions_for(user):
-  """Permissions is dictionary that can be exported to json to share with
-  clients. Structure is:
-  ..
+def load_role_permissions(user):
+  """Load permissions that do not come from the access control list.
 
-    permissions[action][resource_type][contexts]
-                                      [conditions][context][context_conditions]
-
-  'action' is one of 'create', 'read', 'update', 'delete'.
-  'resource_type' is the name of a valid GGRC resource type.
-  'contexts' is a list of context_id where the action is allowed.
-  'conditions' is a dictionary of 'context_conditions' indexed by 'context'
-    where 'context' is a context_id.
-  'context_conditions' is a list of dictionaries with 'condition' and 'terms'
-    keys.
-  'condition' is the string name of a conditional operator, such as 'contains'.
-  'terms' are the arguments to the 'condition'.
+  Args:
+      user (Person): Person object
+  Returns:
+      permissions (dict): permissions dict described in load_permissions_for
   """
   permissions = {}
-  key = 'permissions:{}'.format(user.id)
-
-  with benchmark("load_permissions > query memcache"):
-    cache, result = query_memcache(key)
-    if result:
-      return result
-
   with benchmark("load_permissions > load default permissions"):
     load_default_permissions(permissions)
 
@@ -790,16 +794,75 @@ def load_permissions_for(user):
   with benchmark("load_permissions > load personal context"):
     load_personal_context(user, permissions)
 
-  with benchmark("load_permissions > load access control list"):
-    load_access_control_list(user, permissions)
-
   with benchmark("load_permissions > load backlog workflows"):
     load_backlog_workflows(permissions)
+  return permissions
+
+
+def _load_cached_index(cached, key):
+  """Get cached permission index or None if it is missing or outdated."""
+  data = cached.get(key)
+  if not data:
+    return None
+  try:
+    return PermissionIndex.loads(data)
+  except (ValueError, TypeError, struct.error):
+    return None
+
+
+def load_permission_index_for(user):
+  """Load PermissionIndex with all permissions of the user.
+
+  The permissions from roles and from the access control list are cached
+  separately, so that changes of ACL entries or of role assignments only
+  reload the part they affect.
+  """
+  role_key = PERMISSIONS_KEY.format(user.id)
+  acl_key = ACL_PERMISSIONS_KEY.format(user.id)
+
+  with benchmark("load_permissions > query memcache"):
+    cache, cached = query_memcache([role_key, acl_key])
+
+  results = {}
+  role_index = _load_cached_index(cached, role_key)
+  if role_index is None:
+    role_index = PermissionIndex.from_permissions(
+        load_role_permissions(user))
+    results[role_key] = role_index.dumps()
+
+  acl_index = _load_cached_index(cached, acl_key)
+  if acl_index is None:
+    acl_permissions = {}
+    with benchmark("load_permissions > load access control list"):
+      load_access_control_list(user, acl_permissions)
+    acl_index = PermissionIndex.from_permissions(acl_permissions)
+    results[acl_key] = acl_index.dumps()
 
   with benchmark("load_permissions > store results into memcache"):
-    store_results_into_memcache(permissions, cache, key)
+    store_results_into_memcache(results, cache)
 
-  return permissions
+  return role_index.merge(acl_index)
+
+
+def load_permissions_for(user):
+  """Permissions is dictionary that can be exported to json to share with
+  clients. Structure is:
+  ..
+
+    permissions[action][resource_type][contexts]
+                                      [conditions][context][context_conditions]
+
+  'action' is one of 'create', 'read', 'update', 'delete'.
+  'resource_type' is the name of a valid GGRC resource type.
+  'contexts' is a list of context_id where the action is allowed.
+  'conditions' is a dictionary of 'context_conditions' indexed by 'context'
+    where 'context' is a context_id.
+  'context_conditions' is a list of dictionaries with 'condition' and 'terms'
+    keys.
+  'condition' is the string name of a conditional operator, such as 'contains'.
+  'terms' are the arguments to the 'condition'.
+  """
+  return load_permission_index_for(user).to_permissions()
 
 
 def backlog_workflows():
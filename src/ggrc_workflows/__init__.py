@@ -13,14 +13,15 @@ from ggrc.models import all_models
 from ggrc.models.relationship import Relationship
 from ggrc.rbac.permissions import is_allowed_update
 from ggrc.services import signals
-from ggrc.services.common import log_event
 from ggrc.services.registry import service
 from ggrc_workflows import models, notification
+from ggrc_workflows import cycle_generator
 from ggrc_workflows.models import relationship_helper
 from ggrc_workflows.models import WORKFLOW_OBJECT_TYPES
 from ggrc_workflows.converters import IMPORTABLE, EXPORTABLE
 from ggrc_workflows.converters.handlers import COLUMN_HANDLERS
 from ggrc_workflows.services.common import Signals
+from ggrc_workflows.services import workday_calendar
 from ggrc_workflows.roles import (
     WorkflowOwner, WorkflowMember, BasicWorkflowReader, WorkflowBasicReader,
     WorkflowEditor
@@ -449,8 +450,8 @@ def start_end_date_validator(tgt):
   if tgt.start_date > tgt.end_date:
       raise ValueError('End date can not be behind Start date')
 
-  if max(tgt.start_date.isoweekday(),
-         tgt.end_date.isoweekday()) > all_models.Workflow.WORK_WEEK_LEN:
+  if (workday_calendar.CALENDAR.is_weekend(tgt.start_date) or
+          workday_calendar.CALENDAR.is_weekend(tgt.end_date)):
     workflow = tgt.task_group.workflow
     if workflow.unit == workflow.DAY_UNIT:
       raise ValueError("Daily tasks cannot be started or stopped on weekend")
@@ -870,21 +871,12 @@ def init_extra_views(app):
 
 
 def start_recurring_cycles():
-  today = date.today()
-  workflows = models.Workflow.query.filter(
-      models.Workflow.next_cycle_start_date <= today,
-      models.Workflow.recurrences == True  # noqa
-  )
-  for workflow in workflows:
-    # Follow same steps as in model_posted.connect_via(models.Cycle)
-    while workflow.next_cycle_start_date <= date.today():
-      cycle = build_cycle(workflow)
-      db.session.add(cycle)
-      notification.handle_cycle_created(cycle, False)
-      notification.handle_workflow_modify(None, workflow)
-    db.session.add(workflow)
-  log_event(db.session)
-  db.session.commit()
+  """Generate cycles of all due recurring workflows.
+
+  Cycles are generated in bulk and committed per workflow, see
+  ggrc_workflows.cycle_generator.
+  """
+  return cycle_generator.generate_recurring_cycles()
 
 
 class WorkflowRoleContributions(RoleContributions):
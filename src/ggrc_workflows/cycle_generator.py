@@ -0,0 +1,486 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Set based generation of recurring workflow cycles.
+
+Cycles of all due recurring workflows are computed in memory as plain rows
+and written with multi-row INSERT statements instead of building Cycle,
+CycleTaskGroup, CycleTaskGroupObjectTask and Relationship instances through
+the ORM. Revisions, notifications and full text records of the new objects
+are written in bulk as well.
+
+Every workflow is generated and committed in its own transaction, so a
+failure in one workflow does not roll back the cycles of the other ones.
+
+New rows get a unique placeholder slug, which is used to read back their
+ids after the insert. The placeholders are then replaced with the usual
+"<PREFIX>-<id>" slugs.
+"""
+
+import collections
+import datetime
+from logging import getLogger
+from uuid import uuid1
+
+from dateutil import relativedelta
+from sqlalchemy import bindparam
+from sqlalchemy import orm
+
+from ggrc import db
+from ggrc import settings
+from ggrc.models import all_models
+from ggrc.utils import benchmark
+from ggrc.utils.revision_writer import RevisionWriter
+from ggrc_workflows import models
+from ggrc_workflows.notification import pusher
+from ggrc_workflows.notification.notification_handler import (
+    get_notif_name_by_wf,
+    handle_workflow_modify,
+)
+from ggrc_workflows.services.common import Signals
+
+logger = getLogger(__name__)  # pylint: disable=invalid-name
+
+CHUNK_SIZE = 1000
+
+
+def _as_date(value):
+  if isinstance(value, datetime.datetime):
+    return value.date()
+  return value
+
+
+def _date_range(rows):
+  """Get the earliest start_date and the latest end_date of rows."""
+  start_dates = [row["start_date"] for row in rows
+                 if row["start_date"] is not None]
+  end_dates = [row["end_date"] for row in rows
+               if row["end_date"] is not None]
+  return (min(start_dates) if start_dates else None,
+          max(end_dates) if end_dates else None)
+
+
+def _chunks(items, size):
+  for start in range(0, len(items), size):
+    yield items[start:start + size]
+
+
+class CyclePlan(object):
+  """Rows of a single cycle computed in memory.
+
+  Attributes:
+    cycle: row of the cycle.
+    groups: rows of cycle task groups.
+    tasks: list of (group index, row, object stubs) tuples of cycle tasks,
+      where object stubs are (type, id) tuples of objects mapped to the task.
+  """
+  # pylint: disable=too-few-public-methods
+
+  def __init__(self, cycle):
+    self.cycle = cycle
+    self.groups = []
+    self.tasks = []
+
+
+class CycleGenerator(object):
+  """Generate cycles of recurring workflows in bulk.
+
+  Attributes:
+    stats: number of processed workflows and of created rows, and ids of
+      workflows that failed.
+  """
+
+  def __init__(self, today=None, batch_size=None):
+    self.today = today or datetime.date.today()
+    self.batch_size = batch_size or getattr(
+        settings, "CYCLE_INSERT_BATCH_SIZE", 1000)
+    self._notification_types = {}
+    self.stats = {
+        "workflows": 0,
+        "cycles": 0,
+        "cycle_task_groups": 0,
+        "cycle_tasks": 0,
+        "relationships": 0,
+        "notifications": 0,
+        "failed": [],
+    }
+
+  def _due_workflow_ids(self):
+    return [id_ for id_, in db.session.query(models.Workflow.id).filter(
+        models.Workflow.next_cycle_start_date <= self.today,
+        models.Workflow.recurrences == True  # noqa
+    ).order_by(models.Workflow.id)]
+
+  @staticmethod
+  def _load_workflow(workflow_id):
+    """Load a workflow with everything needed to plan its cycles."""
+    return models.Workflow.query.filter(
+        models.Workflow.id == workflow_id
+    ).options(
+        orm.undefer_group("Workflow"),
+        orm.joinedload("task_groups").joinedload("task_group_tasks"),
+        orm.joinedload("task_groups").joinedload("task_group_objects"),
+        orm.joinedload("context").joinedload("user_roles").joinedload("role"),
+    ).one()
+
+  def run(self):
+    """Generate cycles of all due recurring workflows.
+
+    Returns:
+      stats of the run.
+    """
+    for workflow_id in self._due_workflow_ids():
+      try:
+        with benchmark("Generate cycles for workflow {}".format(workflow_id)):
+          self.generate(self._load_workflow(workflow_id))
+          db.session.commit()
+        self.stats["workflows"] += 1
+      except Exception:  # pylint: disable=broad-except
+        db.session.rollback()
+        logger.exception("Failed to generate cycles for workflow %s",
+                         workflow_id)
+        self.stats["failed"].append(workflow_id)
+    return self.stats
+
+  def generate(self, workflow):
+    """Generate all due cycles of a workflow without committing them."""
+    user_id = self._get_owner_id(workflow)
+    plans = []
+    while workflow.next_cycle_start_date <= self.today:
+      plans.append(self._plan_cycle(workflow, user_id))
+      workflow.repeat_multiplier += 1
+      workflow.next_cycle_start_date = workflow.calc_next_adjusted_date(
+          workflow.min_task_start_date)
+    if not plans:
+      return
+    created = self._write(plans)
+    self._write_notifications(workflow, plans, created)
+    handle_workflow_modify(None, workflow)
+    db.session.flush()
+    cycles = models.Cycle.query.filter(
+        models.Cycle.id.in_(created[models.Cycle])).all()
+    for cycle in cycles:
+      Signals.workflow_cycle_start.send(
+          models.Cycle,
+          obj=cycle,
+          new_status=cycle.status,
+          old_status=None
+      )
+    self._write_revisions(workflow, user_id, created)
+    for model in (models.Cycle, models.CycleTaskGroup,
+                  models.CycleTaskGroupObjectTask):
+      model.bulk_record_update_for(created[model])
+
+  @staticmethod
+  def _get_owner_id(workflow):
+    """Get id of the workflow owner, who is the creator of cron cycles."""
+    if workflow.context is None:
+      return None
+    for user_role in workflow.context.user_roles:
+      if user_role.role.name == "WorkflowOwner":
+        return user_role.person_id
+    return None
+
+  @staticmethod
+  def _plan_cycle(workflow, user_id):
+    """Compute rows of the next cycle of a workflow.
+
+    This is the set based counterpart of build_cycle and update_cycle_dates.
+    """
+    context_id = workflow.context_id
+    plan = CyclePlan({
+        "workflow_id": workflow.id,
+        "is_current": True,
+        "context_id": context_id,
+        "title": workflow.title,
+        "description": workflow.description,
+        "is_verification_needed": workflow.is_verification_needed,
+        "status": models.Cycle.ASSIGNED,
+        "modified_by_id": user_id,
+    })
+    for task_group in workflow.task_groups:
+      group_index = len(plan.groups)
+      plan.groups.append({
+          "context_id": context_id,
+          "task_group_id": task_group.id,
+          "title": task_group.title,
+          "description": task_group.description,
+          "modified_by_id": user_id,
+          "contact_id": task_group.contact_id,
+          "status": models.CycleTaskGroup.ASSIGNED,
+          "sort_index": task_group.sort_index,
+      })
+      objects = [(tgo.object_type, tgo.object_id)
+                 for tgo in task_group.task_group_objects]
+      for task_group_task in task_group.task_group_tasks:
+        if not workflow.is_old_workflow:
+          plan.tasks.append((group_index, CycleGenerator._task_row(
+              workflow, task_group_task, user_id), objects))
+          continue
+        # old workflows get a separate cycle task for every object
+        for object_ in objects or [None]:
+          plan.tasks.append((group_index, CycleGenerator._task_row(
+              workflow, task_group_task, user_id),
+              [object_] if object_ else []))
+    CycleGenerator._set_dates(workflow, plan)
+    return plan
+
+  @staticmethod
+  def _task_row(workflow, task_group_task, user_id):
+    """Get the row of a cycle task, as _create_cycle_task would build it."""
+    if task_group_task.object_approval:
+      description = models.CycleTaskGroupObjectTask.default_description
+    else:
+      description = task_group_task.description
+    return {
+        "context_id": workflow.context_id,
+        "task_group_task_id": task_group_task.id,
+        "title": task_group_task.title,
+        "description": description,
+        "sort_index": task_group_task.sort_index,
+        "start_date": _as_date(
+            workflow.calc_next_adjusted_date(task_group_task.start_date)),
+        "end_date": _as_date(
+            workflow.calc_next_adjusted_date(task_group_task.end_date)),
+        "contact_id": task_group_task.contact_id,
+        "status": models.CycleTaskGroupObjectTask.ASSIGNED,
+        "modified_by_id": user_id,
+        "task_type": task_group_task.task_type,
+        "response_options": task_group_task.response_options,
+    }
+
+  @staticmethod
+  def _set_dates(workflow, plan):
+    """Aggregate task dates to cycle task groups and to the cycle.
+
+    New cycle tasks and groups are never done, so every one of them counts
+    for the next due dates.
+    """
+    cycle = plan.cycle
+    cycle["start_date"] = cycle["end_date"] = cycle["next_due_date"] = None
+    for group in plan.groups:
+      group["start_date"] = group["end_date"] = group["next_due_date"] = None
+    if workflow.kind == "Backlog":
+      return
+    if not plan.tasks:
+      cycle["is_current"] = False
+      return
+    group_tasks = collections.defaultdict(list)
+    for group_index, task, _ in plan.tasks:
+      group_tasks[group_index].append(task)
+    for group_index, group in enumerate(plan.groups):
+      tasks = group_tasks[group_index]
+      group["start_date"], group["end_date"] = _date_range(tasks)
+      end_dates = [task["end_date"] for task in tasks
+                   if task["end_date"] is not None]
+      group["next_due_date"] = min(end_dates) if end_dates else None
+    cycle["start_date"], cycle["end_date"] = _date_range(plan.groups)
+    due_dates = [group["next_due_date"] for group in plan.groups
+                 if group["next_due_date"] is not None]
+    cycle["next_due_date"] = min(due_dates) if due_dates else None
+
+  def _write(self, plans):
+    """Insert rows of all planned cycles.
+
+    Returns:
+      dict with ids of the created objects for every model, in the order of
+      their rows in the plans.
+    """
+    cycle_ids = self._insert(models.Cycle, [plan.cycle for plan in plans])
+    group_rows = []
+    for plan, cycle_id in zip(plans, cycle_ids):
+      for group in plan.groups:
+        group["cycle_id"] = cycle_id
+        group_rows.append(group)
+    group_ids = iter(self._insert(models.CycleTaskGroup, group_rows))
+
+    task_rows = []
+    task_objects = []
+    for plan, cycle_id in zip(plans, cycle_ids):
+      plan_group_ids = [next(group_ids) for _ in plan.groups]
+      for group_index, task, objects in plan.tasks:
+        task["cycle_id"] = cycle_id
+        task["cycle_task_group_id"] = plan_group_ids[group_index]
+        task_rows.append(task)
+        task_objects.append(objects)
+    task_ids = self._insert(models.CycleTaskGroupObjectTask, task_rows)
+
+    relationship_rows = [
+        {
+            "source_type": models.CycleTaskGroupObjectTask.__name__,
+            "source_id": task_id,
+            "destination_type": object_type,
+            "destination_id": object_id,
+            "context_id": task["context_id"],
+            "modified_by_id": task["modified_by_id"],
+        }
+        for task_id, task, objects in zip(task_ids, task_rows, task_objects)
+        for object_type, object_id in objects
+    ]
+    self._execute(all_models.Relationship.__table__.insert(),
+                  relationship_rows)
+    relationship_ids = []
+    if relationship_rows:
+      relationship = all_models.Relationship
+      task_type = models.CycleTaskGroupObjectTask.__name__
+      for ids in _chunks(task_ids, CHUNK_SIZE):
+        relationship_ids.extend(id_ for id_, in db.session.query(
+            relationship.id
+        ).filter(
+            relationship.source_type == task_type,
+            relationship.source_id.in_(ids),
+        ))
+
+    self.stats["cycles"] += len(cycle_ids)
+    self.stats["cycle_task_groups"] += len(group_rows)
+    self.stats["cycle_tasks"] += len(task_ids)
+    self.stats["relationships"] += len(relationship_rows)
+    return {
+        models.Cycle: cycle_ids,
+        models.CycleTaskGroup: [row["id"] for row in group_rows],
+        models.CycleTaskGroupObjectTask: task_ids,
+        all_models.Relationship: relationship_ids,
+    }
+
+  def _execute(self, operation, rows):
+    """Execute a bulk operation in batches of batch_size rows."""
+    for batch in _chunks(rows, self.batch_size):
+      db.session.execute(operation, batch)
+
+  def _insert(self, model, rows):
+    """Insert rows of a slugged model and get their ids.
+
+    Returns:
+      list of ids of the inserted rows, in the order of rows. The ids are
+      also set on the rows.
+    """
+    if not rows:
+      return []
+    table = model.__table__
+    for row in rows:
+      row["slug"] = str(uuid1())
+    self._execute(table.insert(), rows)
+    ids_by_slug = {}
+    for slugs in _chunks([row["slug"] for row in rows], CHUNK_SIZE):
+      ids_by_slug.update(db.session.query(
+          table.c.slug, table.c.id
+      ).filter(
+          table.c.slug.in_(slugs)
+      ))
+    ids = []
+    for row in rows:
+      row["id"] = ids_by_slug[row["slug"]]
+      ids.append(row["id"])
+    self._set_slugs(model, ids)
+    return ids
+
+  def _set_slugs(self, model, ids):
+    """Replace placeholder slugs with generated ones.
+
+    A slug that is already taken is incremented by 1000 until it is unique,
+    the same way as in Slugged.generate_slug_for.
+    """
+    table = model.__table__
+    prefix = model.get_slug_prefix()
+    slugs = {id_: u"{}-{}".format(prefix, id_) for id_ in ids}
+    taken = set()
+    for chunk in _chunks(slugs.values(), CHUNK_SIZE):
+      taken.update(slug for slug, in db.session.query(table.c.slug).filter(
+          table.c.slug.in_(chunk)))
+    for id_ in ids:
+      number = id_
+      while slugs[id_] in taken:
+        number += 1000
+        slugs[id_] = u"{}-{}".format(prefix, number)
+        if db.session.query(table.c.id).filter(
+                table.c.slug == slugs[id_]).first():
+          taken.add(slugs[id_])
+      taken.add(slugs[id_])
+    self._execute(
+        table.update().where(
+            table.c.id == bindparam("_id")
+        ).values(slug=bindparam("_slug")),
+        [{"_id": id_, "_slug": slug} for id_, slug in slugs.iteritems()],
+    )
+
+  def _get_notification_type(self, name):
+    if name not in self._notification_types:
+      self._notification_types[name] = pusher.get_notification_type(name)
+    return self._notification_types[name]
+
+  def _notification_row(self, object_type, object_id, name, send_on):
+    """Get a notification row if it should still be sent.
+
+    Mirrors the dates of handle_cycle_created for objects that have no
+    notifications yet.
+    """
+    notif_type = self._get_notification_type(name)
+    if notif_type is None or send_on is None:
+      return None
+    repeating = name in pusher.REPEATABLE_NOTIFICATIONS
+    send_on -= relativedelta.relativedelta(days=notif_type.advance_notice)
+    if repeating:
+      send_on = max(send_on, self.today)
+    if send_on < self.today:
+      return None
+    return {
+        "object_type": object_type,
+        "object_id": object_id,
+        "notification_type_id": notif_type.id,
+        "send_on": send_on,
+        "repeating": repeating,
+    }
+
+  def _write_notifications(self, workflow, plans, created):
+    """Insert notifications of new cycles and their tasks."""
+    task_names = [get_notif_name_by_wf(workflow), "cycle_created",
+                  "cycle_task_overdue", "cycle_task_due_today"]
+    rows = []
+    task_ids = iter(created[models.CycleTaskGroupObjectTask])
+    for plan, cycle_id in zip(plans, created[models.Cycle]):
+      rows.append(self._notification_row(
+          models.Cycle.__name__, cycle_id, "cycle_created", self.today))
+      plan_task_ids = [next(task_ids) for _ in plan.tasks]
+      if not plan.cycle["is_current"]:
+        continue
+      for name in task_names:
+        for task_id, (_, task, _) in zip(plan_task_ids, plan.tasks):
+          if name == "cycle_created":
+            send_on = self.today
+          else:
+            send_on = task["end_date"]
+          rows.append(self._notification_row(
+              models.CycleTaskGroupObjectTask.__name__, task_id, name,
+              send_on))
+    rows = [row for row in rows if row is not None]
+    self._execute(all_models.Notification.__table__.insert(), rows)
+    self.stats["notifications"] += len(rows)
+
+  def _write_revisions(self, workflow, user_id, created):
+    """Insert revisions of the workflow and of all created objects."""
+    event = all_models.Event(
+        modified_by_id=user_id,
+        action="BULK",
+        resource_id=0,
+        resource_type=None,
+        context_id=0,
+    )
+    db.session.add(event)
+    db.session.flush()
+    writer = RevisionWriter(event.id, user_id)
+    writer.add(workflow, "modified")
+    for model in (models.Cycle, models.CycleTaskGroup,
+                  models.CycleTaskGroupObjectTask, all_models.Relationship):
+      for ids in _chunks(created[model], CHUNK_SIZE):
+        for obj in model.eager_query().filter(model.id.in_(ids)):
+          writer.add(obj, "created")
+    writer.flush()
+
+
+def generate_recurring_cycles(today=None):
+  """Generate cycles of all recurring workflows that are due.
+
+  Returns:
+    stats of the generation, see CycleGenerator.
+  """
+  return CycleGenerator(today=today).run()
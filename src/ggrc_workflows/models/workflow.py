@@ -26,7 +26,7 @@ from ggrc.models.context import HasOwnContext
 from ggrc.models.deferred import deferred
 from ggrc_workflows.models import cycle
 from ggrc_workflows.models import cycle_task_group
-from ggrc_workflows.services import google_holidays
+from ggrc_workflows.services import workday_calendar
 
 
 class Workflow(mixins.CustomAttributable, HasOwnContext, mixins.Timeboxed,
@@ -143,14 +143,11 @@ class Workflow(mixins.CustomAttributable, HasOwnContext, mixins.Timeboxed,
       min_date = min(task.start_date, min_date or task.start_date)
     return min_date
 
-  WORK_WEEK_LEN = 5
+  WORK_WEEK_LEN = workday_calendar.WORK_WEEK_LEN
 
   @classmethod
   def first_work_day(cls, day):
-    holidays = google_holidays.GoogleHolidays()
-    while day.isoweekday() > cls.WORK_WEEK_LEN or day in holidays:
-      day -= relativedelta.relativedelta(days=1)
-    return day
+    return workday_calendar.CALENDAR.previous_work_day(day)
 
   def calc_next_adjusted_date(self, setup_date):
     """Calculates adjusted date which are expected in next cycle.
@@ -173,12 +170,8 @@ class Workflow(mixins.CustomAttributable, HasOwnContext, mixins.Timeboxed,
       raise ValueError("Invalid Workflow unit")
     repeater = self.repeat_every * self.repeat_multiplier
     if self.unit == self.DAY_UNIT:
-      weeks = repeater / self.WORK_WEEK_LEN
-      days = repeater % self.WORK_WEEK_LEN
-      # append weekends if it's needed
-      days += ((setup_date.isoweekday() + days) > self.WORK_WEEK_LEN) * 2
-      return setup_date + relativedelta.relativedelta(
-          setup_date, weeks=weeks, days=days)
+      # daily workflows skip weekends, but not holidays
+      return workday_calendar.CALENDAR.add_weekdays(setup_date, repeater)
     else:
       calc_date = setup_date + relativedelta.relativedelta(
           setup_date,
@@ -0,0 +1,158 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Working day calendar used in workflow date arithmetic.
+
+For every year the calendar precomputes a bitmap of weekends and holidays
+and, for every day of the year, the ordinals of the nearest working days
+before and after it and the number of working days before it. Lookups of the
+previous or next working day are then plain array reads, and adding working
+days is an index into the working days of a year, walking over years instead
+of days only when the result falls into another year.
+
+Years are computed lazily on first use and kept for the life of the process.
+The shared CALENDAR instance uses GoogleHolidays.
+"""
+
+import array
+from datetime import date
+
+from ggrc_workflows.services import google_holidays
+
+WORK_WEEK_LEN = 5
+
+# day flags
+_WEEKEND = 1
+_HOLIDAY = 2
+
+
+class _Year(object):
+  """Precomputed working days of a single year.
+
+  Attributes:
+    first: ordinal of January 1st.
+    flags: bytearray of day flags by day of year.
+    work_days: ordinals of working days in the year.
+    previous: ordinal of the last working day on or before each day, or 0 if
+      there is none in the year.
+    next: ordinal of the first working day on or after each day, or 0 if
+      there is none in the year.
+    rank: number of working days of the year before each day.
+  """
+  # pylint: disable=too-few-public-methods
+  __slots__ = ("first", "flags", "work_days", "previous", "next", "rank")
+
+  def __init__(self, year, holidays):
+    self.first = date(year, 1, 1).toordinal()
+    length = date(year + 1, 1, 1).toordinal() - self.first
+    self.flags = bytearray(length)
+    self.work_days = array.array("i")
+    self.previous = array.array("i", [0] * length)
+    self.next = array.array("i", [0] * length)
+    self.rank = array.array("i", [0] * length)
+    for offset in range(length):
+      day = date.fromordinal(self.first + offset)
+      if day.isoweekday() > WORK_WEEK_LEN:
+        self.flags[offset] |= _WEEKEND
+      if day in holidays:
+        self.flags[offset] |= _HOLIDAY
+      self.rank[offset] = len(self.work_days)
+      if not self.flags[offset]:
+        self.work_days.append(self.first + offset)
+    last = 0
+    for offset in range(length):
+      if not self.flags[offset]:
+        last = self.first + offset
+      self.previous[offset] = last
+    last = 0
+    for offset in reversed(range(length)):
+      if not self.flags[offset]:
+        last = self.first + offset
+      self.next[offset] = last
+
+
+class WorkdayCalendar(object):
+  """Weekends and holidays with constant time working day lookups."""
+
+  def __init__(self, holidays=None):
+    self._holidays = (holidays if holidays is not None
+                      else google_holidays.GoogleHolidays())
+    self._years = {}
+
+  def _year(self, year):
+    data = self._years.get(year)
+    if data is None:
+      data = self._years[year] = _Year(year, self._holidays)
+    return data
+
+  def _locate(self, day):
+    data = self._year(day.year)
+    return data, day.toordinal() - data.first
+
+  def is_weekend(self, day):
+    data, offset = self._locate(day)
+    return bool(data.flags[offset] & _WEEKEND)
+
+  def is_holiday(self, day):
+    data, offset = self._locate(day)
+    return bool(data.flags[offset] & _HOLIDAY)
+
+  def is_work_day(self, day):
+    data, offset = self._locate(day)
+    return not data.flags[offset]
+
+  def previous_work_day(self, day):
+    """Get day if it is a working day, otherwise the last one before it."""
+    data, offset = self._locate(day)
+    while not data.previous[offset]:
+      data = self._year(day.year - 1)
+      day = date(day.year - 1, 12, 31)
+      offset = len(data.flags) - 1
+    return date.fromordinal(data.previous[offset])
+
+  def next_work_day(self, day):
+    """Get day if it is a working day, otherwise the first one after it."""
+    data, offset = self._locate(day)
+    while not data.next[offset]:
+      data = self._year(day.year + 1)
+      day = date(day.year + 1, 1, 1)
+      offset = 0
+    return date.fromordinal(data.next[offset])
+
+  def add_work_days(self, day, count):
+    """Get the working day count working days after or before day.
+
+    A day that is not a working day is first moved to the next working day
+    when adding and to the previous one when subtracting.
+    """
+    if count < 0:
+      return self._subtract_work_days(day, -count)
+    data, offset = self._locate(self.next_work_day(day))
+    position = data.rank[offset] + count
+    year = date.fromordinal(data.first).year
+    while position >= len(data.work_days):
+      position -= len(data.work_days)
+      year += 1
+      data = self._year(year)
+    return date.fromordinal(data.work_days[position])
+
+  def _subtract_work_days(self, day, count):
+    data, offset = self._locate(self.previous_work_day(day))
+    position = data.rank[offset] - count
+    year = date.fromordinal(data.first).year
+    while position < 0:
+      year -= 1
+      data = self._year(year)
+      position += len(data.work_days)
+    return date.fromordinal(data.work_days[position])
+
+  @staticmethod
+  def add_weekdays(day, count):
+    """Add count days to a weekday, skipping weekends but not holidays."""
+    weeks, days = divmod(count, WORK_WEEK_LEN)
+    # append weekends if it's needed
+    days += ((day.isoweekday() + days) > WORK_WEEK_LEN) * 2
+    return date.fromordinal(day.toordinal() + weeks * 7 + days)
+
+
+CALENDAR = WorkdayCalendar()
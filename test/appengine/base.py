@@ -6,6 +6,7 @@
 import functools
 
 from ggrc import settings
+from ggrc.cache import TieredCache
 
 from google.appengine.api import memcache
 from google.appengine.ext import testbed
@@ -26,6 +27,8 @@ def with_memcache(cls):
       self.testbed.activate()
     self.testbed.init_memcache_stub()
     self.memcache_client = memcache.Client()
+    # in-process cache entries must not outlive the memcache stub
+    TieredCache.local = None
     try:
       self.saved_memcache_mechanism = settings.MEMCACHE_MECHANISM
       self.setup_memcache_mechanism = True
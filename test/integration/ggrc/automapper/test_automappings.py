@@ -6,6 +6,8 @@
 import itertools
 from contextlib import contextmanager
 
+import mock
+
 import ggrc
 from ggrc import automapper
 from ggrc import models
@@ -190,6 +192,24 @@ class TestAutomappings(TestCase):
           implied=[],
       )
 
+  @mock.patch("ggrc.settings.AUTOMAPPING_DEFER_LIMIT_EXCEEDED", True)
+  def test_automapping_limit_deferred(self):
+    """Test mappings over the limit are created by a background task"""
+    with automapping_count_limit(-1):
+      regulation = self.create_object(models.Regulation, {
+          'title': make_name('Test Regulation')
+      })
+      section = self.create_object(models.Section, {
+          'title': make_name('Test section'),
+      })
+      objective = self.create_object(models.Objective, {
+          'title': make_name('Objective')
+      })
+      self.assert_mapping_implication(
+          to_create=[(regulation, section), (objective, section)],
+          implied=[(regulation, objective)],
+      )
+
   def test_mapping_to_objective(self):
     """Test mapping to objective"""
     regulation = self.create_object(models.Regulation, {
@@ -0,0 +1,118 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""
+ Micro-benchmark publishing of objects with compiled publishers
+
+ For every model the script creates synthetic objects, loads them with the
+ eager query of the model like the collection API does, and publishes them
+ repeatedly with the compiled publisher of the builder and with the old
+ reflection based publish_attr path. It prints the time per object of both.
+ The synthetic objects are removed afterwards.
+
+ Usage (from the test directory, with the database of the settings module):
+
+   python -m integration.ggrc.builder.benchmark_publish [count [rounds]]
+
+ count defaults to 200 objects per model and rounds to 5.
+"""
+
+import sys
+import time
+
+import flask_login
+
+from ggrc.app import app
+from ggrc import db
+from ggrc.builder.json import get_json_builder
+from ggrc.login.common import find_or_create_user_by_email
+
+from integration.ggrc.models import factories
+
+
+BENCHMARK_PREFIX = "BENCHMARK-PUBLISH-"
+DEFAULT_COUNT = 200
+DEFAULT_ROUNDS = 5
+FACTORIES = [
+    factories.ProgramFactory,
+    factories.ControlFactory,
+    factories.ObjectiveFactory,
+    factories.MarketFactory,
+    factories.IssueFactory,
+    factories.RegulationFactory,
+    factories.SystemFactory,
+]
+
+
+def fill(factory, count):
+  """Create synthetic objects and return their ids."""
+  with factories.single_commit():
+    objs = [factory(slug="{}{}".format(BENCHMARK_PREFIX, index))
+            for index in xrange(count)]
+  return [obj.id for obj in objs]
+
+
+def clean(model):
+  for obj in model.query.filter(model.slug.startswith(BENCHMARK_PREFIX)):
+    db.session.delete(obj)
+  db.session.commit()
+
+
+def publish_compiled(builder, obj, inclusions):
+  json_obj = {}
+  builder.publish_attrs(obj, json_obj, inclusions, None, None)
+  return json_obj
+
+
+def publish_reflected(builder, obj, inclusions):
+  json_obj = {}
+  inclusions = tuple(set(
+      (attr,) for attr in builder._include_links).union(set(inclusions)))
+  # pylint: disable=protected-access
+  builder._publish_attrs_for(obj, builder._publish_attrs, json_obj,
+                             inclusions, None, None)
+  return json_obj
+
+
+def run(model, ids, rounds, publisher):
+  """Publish the objects and return the best time per object."""
+  objs = model.eager_query().filter(model.id.in_(ids)).all()
+  builder = get_json_builder(model)
+  # load lazy attributes before timing
+  for obj in objs:
+    publisher(builder, obj, ())
+  best = None
+  for _ in xrange(rounds):
+    start = time.time()
+    for obj in objs:
+      publisher(builder, obj, ())
+    duration = time.time() - start
+    best = duration if best is None else min(best, duration)
+  db.session.rollback()
+  return best / len(objs)
+
+
+def main():
+  """Run the benchmark."""
+  count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_COUNT
+  rounds = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_ROUNDS
+  with app.test_request_context():
+    user = find_or_create_user_by_email("user@example.com", "Example User")
+    flask_login.login_user(user)
+    print "{:>20} {:>14} {:>14} {:>8}".format(
+        "model", "compiled", "reflected", "speedup")
+    for factory in FACTORIES:
+      model = factory._meta.model  # pylint: disable=protected-access
+      try:
+        ids = fill(factory, count)
+        compiled = run(model, ids, rounds, publish_compiled)
+        reflected = run(model, ids, rounds, publish_reflected)
+        print "{:>20} {:>12.1f}us {:>12.1f}us {:>7.2f}x".format(
+            model.__name__, compiled * 1e6, reflected * 1e6,
+            reflected / compiled)
+      finally:
+        clean(model)
+
+
+if __name__ == "__main__":
+  main()
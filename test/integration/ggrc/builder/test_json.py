@@ -5,9 +5,13 @@ from mock import MagicMock
 
 import ggrc.builder
 import ggrc.models
+from ggrc.builder.json import clear_builders
+from ggrc.builder.json import get_json_builder
 from ggrc.builder.json import publish
+from ggrc.builder.json import publish_representation
 from ggrc.services.common import Resource
 from integration.ggrc import TestCase
+from integration.ggrc.models import factories
 
 
 class TestBuilder(TestCase):
@@ -107,3 +111,59 @@ class TestBuilder(TestCase):
     self.assertDictContainsSubset(
         {'prop_b': 'prop_b', 'mixin': 'mixin_b'},
         json_obj)
+
+  def test_publisher_cache(self):
+    """Publishers are compiled once per set of inclusions."""
+    self.mock_service('MockCachedModel')
+    model = self.mock_model(
+        'MockCachedModel',
+        foo='bar',
+        id=1,
+        _publish_attrs=['foo'],
+    )
+    builder = get_json_builder(model)
+    publisher = builder.get_publisher((('foo',),))
+    self.assertIs(builder.get_publisher((('foo',),)), publisher)
+    self.assertIsNot(builder.get_publisher(()), publisher)
+
+    clear_builders()
+    self.assertIsNot(get_json_builder(model), builder)
+
+
+class TestCompiledPublisher(TestCase):
+  """Compiled publishers give the same results as publish_attr."""
+
+  @staticmethod
+  def _publish_reflected(obj, inclusions=(), attribute_whitelist=None):
+    builder = get_json_builder(obj)
+    json_obj = {}
+    inclusions = tuple(set(
+        (attr,) for attr in builder._include_links).union(set(inclusions)))
+    builder._publish_attrs_for(obj, builder._publish_attrs, json_obj,
+                               inclusions, None, attribute_whitelist)
+    return publish_representation(json_obj)
+
+  @staticmethod
+  def _publish_compiled(obj, inclusions=(), attribute_whitelist=None):
+    json_obj = {}
+    get_json_builder(obj).publish_attrs(obj, json_obj, inclusions, None,
+                                        attribute_whitelist)
+    return publish_representation(json_obj)
+
+  def test_same_representation(self):
+    """Stubs, links and columns are published as before."""
+    with factories.single_commit():
+      program = factories.ProgramFactory()
+      audit = factories.AuditFactory(program=program)
+      assessment = factories.AssessmentFactory(audit=audit)
+      control = factories.ControlFactory()
+      factories.RelationshipFactory(source=program, destination=control)
+    for obj in (program, audit, assessment, control):
+      for inclusions in ((), (("related_sources",),)):
+        self.assertEqual(self._publish_compiled(obj, inclusions),
+                         self._publish_reflected(obj, inclusions))
+    whitelist = ("id", "title", "audit")
+    self.assertEqual(self._publish_compiled(assessment, (), whitelist),
+                     self._publish_reflected(assessment, (), whitelist))
+    self.assertEqual(set(self._publish_compiled(assessment, (), whitelist)),
+                     set(whitelist))
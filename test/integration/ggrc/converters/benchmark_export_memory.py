@@ -0,0 +1,106 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""
+ Benchmark peak memory of csv exports against the number of exported rows
+
+ The script creates synthetic controls, exports increasing numbers of them
+ with the streamed export and with the fully built csv array, and prints the
+ peak RSS of each export. Every export runs in its own process, because peak
+ RSS of a process never decreases. The synthetic controls are removed
+ afterwards.
+
+ Usage (from the test directory, with the database of the settings module):
+
+   python -m integration.ggrc.converters.benchmark_export_memory [rows ...]
+
+ rows default to 1000 5000 20000.
+"""
+
+import resource
+import subprocess
+import sys
+import time
+
+import flask_login
+
+from ggrc.app import app
+from ggrc import db
+from ggrc.converters import import_helper
+from ggrc.converters.base import Converter
+from ggrc.login.common import find_or_create_user_by_email
+from ggrc.models import all_models
+
+from integration.ggrc.models import factories
+
+
+BENCHMARK_PREFIX = "BENCHMARK-EXPORT-"
+MODULE = "integration.ggrc.converters.benchmark_export_memory"
+DEFAULT_ROWS = [1000, 5000, 20000]
+
+
+def benchmark_query():
+  return all_models.Control.query.filter(
+      all_models.Control.slug.startswith(BENCHMARK_PREFIX))
+
+
+def fill_controls(count):
+  """Create synthetic controls up to count."""
+  existing = benchmark_query().count()
+  for index in xrange(existing, count):
+    factories.ControlFactory(slug="{}{}".format(BENCHMARK_PREFIX, index),
+                             directive=None)
+
+
+def clean_controls():
+  benchmark_query().delete(synchronize_session=False)
+  db.session.commit()
+
+
+def export(count, mode):
+  """Export count controls and return the csv size and peak RSS in KB."""
+  ids = [id_ for id_, in benchmark_query().order_by(
+      all_models.Control.id).limit(count).values(all_models.Control.id)]
+  ids_by_type = [{"object_name": "Control", "ids": ids, "fields": "all"}]
+  with app.test_request_context():
+    flask_login.login_user(
+        find_or_create_user_by_email("user@example.com", "Example User"))
+    converter = Converter(ids_by_type=ids_by_type)
+    if mode == "stream":
+      size = sum(len(chunk) for chunk in
+                 import_helper.generate_csv_lines(converter.to_stream()))
+    else:
+      csv_data = import_helper.equalize_array(converter.to_array())
+      size = len("".join(import_helper.generate_csv_lines(csv_data)))
+  return size, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def run_single(count, mode):
+  start = time.time()
+  size, peak_rss = export(count, mode)
+  print "{:>8} {:>7} {:>12} {:>10.2f}s {:>12}".format(
+      count, mode, size, time.time() - start, peak_rss)
+
+
+def main():
+  """Run the benchmark."""
+  if len(sys.argv) == 4 and sys.argv[1] == "--single":
+    run_single(int(sys.argv[2]), sys.argv[3])
+    return
+  counts = [int(arg) for arg in sys.argv[1:]] or DEFAULT_ROWS
+  with app.app_context():
+    fill_controls(max(counts))
+  print "{:>8} {:>7} {:>12} {:>11} {:>12}".format(
+      "rows", "mode", "csv bytes", "time", "peak RSS KB")
+  try:
+    for count in counts:
+      for mode in ("stream", "array"):
+        subprocess.check_call([sys.executable, "-m", MODULE, "--single",
+                               str(count), mode])
+  finally:
+    with app.app_context():
+      clean_controls()
+
+
+if __name__ == "__main__":
+  main()
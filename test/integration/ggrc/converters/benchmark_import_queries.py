@@ -0,0 +1,112 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""
+ Benchmark the number of SQL queries of csv imports against the import size
+
+ The script imports increasing numbers of synthetic facilities with a primary
+ contact and mappings to existing markets, first creating them and then
+ importing the same rows again to update them, and prints the number of
+ queries and the time of both imports. The synthetic objects are removed
+ afterwards.
+
+ Usage (from the test directory, with the database of the settings module):
+
+   python -m integration.ggrc.converters.benchmark_import_queries [rows ...]
+
+ rows default to 100 1000 5000.
+"""
+
+import sys
+import time
+
+import flask_login
+
+from ggrc.app import app
+from ggrc import db
+from ggrc.converters.base import Converter
+from ggrc.login.common import find_or_create_user_by_email
+from ggrc.models import all_models
+from ggrc.utils import QueryCounter
+
+from integration.ggrc.models import factories
+
+
+BENCHMARK_PREFIX = "BENCHMARK-IMPORT-"
+DEFAULT_ROWS = [100, 1000, 5000]
+MARKETS = 50
+MAPPINGS_PER_ROW = 3
+EMAIL = "user@example.com"
+
+
+def fill_markets():
+  """Create markets the imported facilities are mapped to."""
+  with factories.single_commit():
+    markets = [factories.MarketFactory(
+        slug="{}MARKET-{}".format(BENCHMARK_PREFIX, index))
+        for index in xrange(MARKETS)]
+  return [market.slug for market in markets]
+
+
+def make_csv_data(count, market_slugs):
+  """Make csv rows of a facility block."""
+  csv_data = [
+      ["Object type"],
+      ["Facility", "Code*", "Title*", "Primary Contact", "map:market"],
+  ]
+  for index in xrange(count):
+    mapped = [market_slugs[(index + offset) % len(market_slugs)]
+              for offset in xrange(MAPPINGS_PER_ROW)]
+    csv_data.append([
+        "",
+        "{}FACILITY-{}".format(BENCHMARK_PREFIX, index),
+        "{}facility {}".format(BENCHMARK_PREFIX, index),
+        EMAIL,
+        "\n".join(mapped),
+    ])
+  return csv_data
+
+
+def clean():
+  """Remove synthetic objects and their relationships."""
+  for model in (all_models.Facility, all_models.Market):
+    for obj in model.query.filter(model.slug.startswith(BENCHMARK_PREFIX)):
+      db.session.delete(obj)
+  db.session.commit()
+
+
+def run(csv_data):
+  """Import csv data and return the number of queries and the time."""
+  start = time.time()
+  with QueryCounter() as counter:
+    converter = Converter(csv_data=[list(row) for row in csv_data],
+                          dry_run=False)
+    converter.import_csv()
+  db.session.rollback()
+  return counter.get, time.time() - start
+
+
+def main():
+  """Run the benchmark."""
+  counts = [int(arg) for arg in sys.argv[1:]] or DEFAULT_ROWS
+  with app.test_request_context():
+    user = find_or_create_user_by_email(EMAIL, "Example User")
+    flask_login.login_user(user)
+    print "{:>8} {:>8} {:>10} {:>10} {:>11}".format(
+        "rows", "import", "queries", "per row", "time")
+    try:
+      market_slugs = fill_markets()
+      for count in counts:
+        csv_data = make_csv_data(count, market_slugs)
+        for label in ("create", "update"):
+          queries, duration = run(csv_data)
+          print "{:>8} {:>8} {:>10} {:>10.1f} {:>10.2f}s".format(
+              count, label, queries, float(queries) / count, duration)
+        clean()
+        market_slugs = fill_markets()
+    finally:
+      clean()
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,129 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""
+ Benchmark csv import throughput against the flush batch size
+
+ The script creates synthetic controls, assessments and cycle tasks, exports
+ them, changes their titles and imports the exported rows back, once with
+ every row flushed on its own and once with each of the given flush batch
+ sizes, and prints the imported rows per second. The synthetic objects are
+ removed afterwards.
+
+ Usage (from the test directory, with the database of the settings module):
+
+   python -m integration.ggrc.converters.benchmark_import_throughput \
+       [rows [batch size ...]]
+
+ rows default to 500, batch sizes to 100.
+"""
+
+import sys
+import time
+
+import flask_login
+import mock
+
+from ggrc.app import app
+from ggrc import db
+from ggrc import settings
+from ggrc.converters.base import Converter
+from ggrc.login.common import find_or_create_user_by_email
+from ggrc.models import all_models
+
+from integration.ggrc.models import factories
+from integration.ggrc_workflows.models import factories as wf_factories
+
+
+BENCHMARK_PREFIX = "BENCHMARK-THROUGHPUT-"
+DEFAULT_ROWS = 500
+DEFAULT_BATCH_SIZES = [100]
+EMAIL = "user@example.com"
+
+
+def fill_objects(count):
+  """Create synthetic objects and return their ids by model name."""
+  with factories.single_commit():
+    audit = factories.AuditFactory(slug=BENCHMARK_PREFIX + "AUDIT")
+    cycle = wf_factories.CycleFactory()
+    controls = [factories.ControlFactory(
+        slug="{}CONTROL-{}".format(BENCHMARK_PREFIX, index), directive=None)
+        for index in xrange(count)]
+    assessments = [factories.AssessmentFactory(
+        slug="{}ASSESSMENT-{}".format(BENCHMARK_PREFIX, index), audit=audit)
+        for index in xrange(count)]
+    cycle_task_group = wf_factories.CycleTaskGroupFactory(cycle=cycle)
+    task_group_task = wf_factories.TaskGroupTaskFactory()
+    tasks = [wf_factories.CycleTaskFactory(
+        slug="{}TASK-{}".format(BENCHMARK_PREFIX, index), cycle=cycle,
+        cycle_task_group=cycle_task_group, task_group_task=task_group_task)
+        for index in xrange(count)]
+  return {
+      "Control": [obj.id for obj in controls],
+      "Assessment": [obj.id for obj in assessments],
+      "CycleTaskGroupObjectTask": [obj.id for obj in tasks],
+  }
+
+
+def export(object_name, ids):
+  ids_by_type = [{"object_name": object_name, "ids": ids, "fields": "all"}]
+  return Converter(ids_by_type=ids_by_type).to_array()
+
+
+def change_titles(csv_data, suffix):
+  """Append suffix to titles of exported rows."""
+  header = csv_data[1]
+  title = next(index for index, name in enumerate(header)
+               if name.rstrip("*") == "Title")
+  for row in csv_data[2:]:
+    if len(row) > title:
+      row[title] = u"{} {}".format(row[title], suffix)
+
+
+def run(csv_data, batch_size):
+  """Import csv data and return the number of imported rows per second."""
+  start = time.time()
+  with mock.patch.object(settings, "IMPORT_FLUSH_BATCH_SIZE", batch_size):
+    converter = Converter(csv_data=[list(row) for row in csv_data],
+                          dry_run=False)
+    converter.import_csv()
+  duration = time.time() - start
+  rows = sum(block["updated"] + block["created"]
+             for block in converter.get_info())
+  return rows, duration
+
+
+def clean():
+  """Remove synthetic objects."""
+  for model in (all_models.Control, all_models.Assessment,
+                all_models.CycleTaskGroupObjectTask, all_models.Audit):
+    for obj in model.query.filter(model.slug.startswith(BENCHMARK_PREFIX)):
+      db.session.delete(obj)
+  db.session.commit()
+
+
+def main():
+  """Run the benchmark."""
+  count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ROWS
+  batch_sizes = [int(arg) for arg in sys.argv[2:]] or DEFAULT_BATCH_SIZES
+  with app.test_request_context():
+    user = find_or_create_user_by_email(EMAIL, "Example User")
+    flask_login.login_user(user)
+    print "{:>26} {:>6} {:>8} {:>10} {:>10}".format(
+        "model", "batch", "rows", "time", "rows/s")
+    try:
+      ids_by_name = fill_objects(count)
+      for object_name, ids in sorted(ids_by_name.items()):
+        for batch_size in [1] + batch_sizes:
+          csv_data = export(object_name, ids)
+          change_titles(csv_data, "batch {}".format(batch_size))
+          rows, duration = run(csv_data, batch_size)
+          print "{:>26} {:>6} {:>8} {:>9.2f}s {:>10.1f}".format(
+              object_name, batch_size, rows, duration, rows / duration)
+    finally:
+      db.session.rollback()
+      clean()
+
+
+if __name__ == "__main__":
+  main()
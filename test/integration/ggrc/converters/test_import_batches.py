@@ -0,0 +1,66 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for flushing imported rows in batches."""
+
+import os
+import tempfile
+
+import mock
+
+from ggrc import db
+from ggrc import models
+from ggrc import settings
+from ggrc.converters.base_row import RowConverter
+
+from integration.ggrc import TestCase
+from integration.ggrc.models import factories
+
+
+class TestImportBatches(TestCase):
+  """Tests for rows failing to flush in a batch."""
+
+  def setUp(self):
+    super(TestImportBatches, self).setUp()
+    self.client.get("/login")
+
+  def _import_rows(self, rows):
+    """Import a single control block with the given code and title rows."""
+    with tempfile.NamedTemporaryFile(dir=self.CSV_DIR, suffix=".csv") as tmp:
+      tmp.write("Object type,\n")
+      tmp.write("Control,Code*,Title*,Admin*\n")
+      for slug, title in rows:
+        tmp.write(",{},{},user@example.com\n".format(slug, title))
+      tmp.flush()
+      return self._import_file(os.path.basename(tmp.name))
+
+  @mock.patch.object(settings, "IMPORT_FLUSH_BATCH_SIZE", 4, create=True)
+  def test_failing_row(self):
+    """Rows flushed with a failing row get revisions."""
+    existing_slug = factories.ControlFactory().slug
+    insert_object = RowConverter.insert_object
+
+    def failing_insert(row_converter):
+      """Add a control with a duplicate code for the bad row."""
+      insert_object(row_converter)
+      if row_converter.obj.slug == "CONTROL-BAD":
+        db.session.add(models.Control(title="duplicate", slug=existing_slug))
+
+    rows = [("CONTROL-{}".format(index), "Control {}".format(index))
+            for index in range(6)]
+    rows.insert(2, ("CONTROL-BAD", "Control bad"))
+    with mock.patch.object(RowConverter, "insert_object", failing_insert):
+      response = self._import_rows(rows)
+
+    self.assertEqual(response[0]["created"], 6)
+    self.assertEqual(len(response[0]["row_errors"]), 1)
+    self.assertIsNone(
+        models.Control.query.filter_by(slug="CONTROL-BAD").first())
+    controls = models.Control.query.filter(
+        models.Control.slug.in_([slug for slug, _ in rows])).all()
+    self.assertEqual(len(controls), 6)
+    for control in controls:
+      revisions = models.Revision.query.filter_by(
+          resource_type="Control", resource_id=control.id).all()
+      self.assertEqual([revision.action for revision in revisions],
+                       ["created"])
@@ -30,8 +30,12 @@ import datetime
 import freezegun
 import itertools
 
+from ggrc import db
 from ggrc import models
 from ggrc.converters import errors
+from ggrc.data_platform import computed_attributes
+from ggrc.data_platform.attribute_changes import AttributeChanges
+from ggrc.fulltext.mysql import MysqlRecordProperty
 from integration.ggrc import TestCase
 from integration.ggrc.api_helper import Api
 from integration.ggrc import generator
@@ -156,6 +160,81 @@ class TestLastAssessmentDate(TestCase):
       else:
         self.assertEqual(snapshot.last_assessment_date, None)
 
+  def test_unmapped_assessment(self):
+    """Test last assessment date after unmapping a finished assessment."""
+    finish_date = datetime.datetime(2017, 2, 20, 13, 40, 0)
+    with freezegun.freeze_time(finish_date):
+      asmt = models.Assessment.query.filter_by(title="Assessment_0").first()
+      self.api.put(asmt, {"status": "Completed"})
+
+    control = models.Control.query.filter_by(title="Control_1").one()
+    self.assertEqual(control.last_assessment_date, finish_date)
+    snapshot = models.Snapshot.query.filter_by(
+        child_type="Control", child_id=control.id,
+        parent_id=asmt.audit_id).one()
+    relationship = models.Relationship.find_related(asmt, snapshot)
+    self.api.delete(relationship)
+
+    control = models.Control.query.filter_by(title="Control_1").one()
+    self.assertEqual(control.last_assessment_date, None)
+
+  def test_queued_changes_coalesced(self):
+    """Test repeated changes of an object are computed once."""
+    finish_date = datetime.datetime(2017, 2, 20, 13, 40, 0)
+    with freezegun.freeze_time(finish_date):
+      asmt = models.Assessment.query.filter_by(title="Assessment_0").first()
+      self.api.put(asmt, {"status": "Completed"})
+      asmt = models.Assessment.query.filter_by(title="Assessment_0").first()
+      self.api.put(asmt, {"title": "Assessment_0 renamed"})
+    revision_ids = [
+        revision.id for revision in models.Revision.query.filter_by(
+            resource_type="Assessment", resource_id=asmt.id)
+    ]
+    self.assertGreater(len(revision_ids), 1)
+
+    computed_attributes.queue_revisions(revision_ids)
+    computed_attributes.queue_revisions(revision_ids)
+    self.assertEqual(AttributeChanges.query.count(), 1)
+    self.assertEqual(AttributeChanges.query.one().revision_id,
+                     max(revision_ids))
+
+    stats = computed_attributes.compute_queued_attributes()
+    self.assertEqual(stats["revisions"], 1)
+    # Control_1, Objective_0 and their snapshots in Audit_0 and Audit_1
+    self.assertEqual(stats["objects"], 6)
+    self.assertEqual(AttributeChanges.query.count(), 0)
+
+  def test_compute_all_latest(self):
+    """Test values of all objects are computed from latest revisions."""
+    finish_date = datetime.datetime(2017, 2, 20, 13, 40, 0)
+    with freezegun.freeze_time(finish_date):
+      asmt = models.Assessment.query.filter_by(title="Assessment_0").first()
+      self.api.put(asmt, {"status": "Completed"})
+    models.Attributes.query.delete()
+    db.session.commit()
+
+    stats = computed_attributes.compute_attributes("all_latest", chunk_size=1)
+    self.assertEqual(stats["revisions"], 2)
+    control = models.Control.query.filter_by(title="Control_1").one()
+    self.assertEqual(control.last_assessment_date, finish_date)
+
+  def test_index_stored_values(self):
+    """Test stored values of snapshots are indexed again after reindex."""
+    finish_date = datetime.datetime(2017, 2, 20, 13, 40, 0)
+    with freezegun.freeze_time(finish_date):
+      asmt = models.Assessment.query.filter_by(title="Assessment_0").first()
+      self.api.put(asmt, {"status": "Completed"})
+    query = MysqlRecordProperty.query.filter_by(
+        type="Snapshot", property="last_assessment_date")
+    expected = {(row.key, row.content) for row in query if row.content}
+    self.assertTrue(expected)
+    query.delete()
+    db.session.commit()
+
+    computed_attributes.index_stored_values()
+    indexed = {(row.key, row.content) for row in query}
+    self.assertTrue(expected.issubset(indexed))
+
   def test_snapshot_lad_on_new_audits(self):
     """Test snapshot last assessment date for new audits."""
 
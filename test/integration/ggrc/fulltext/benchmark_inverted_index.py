@@ -0,0 +1,110 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""
+ Benchmark full text search through the inverted index against LIKE search
+
+ The script fills fulltext_record_properties and fulltext_record_terms with
+ synthetic records of the "BenchmarkRecord" type, runs the search filter of
+ both indexers for a few terms and prints the average time of each query.
+ The synthetic rows are removed afterwards.
+
+ Usage (from the test directory, with the database of the settings module):
+
+   python -m integration.ggrc.fulltext.benchmark_inverted_index [rows]
+
+ rows defaults to 1000000.
+"""
+
+import random
+import sys
+import time
+
+from ggrc.app import app
+from ggrc import db
+from ggrc.fulltext import inverted
+from ggrc.fulltext import mysql
+
+
+BENCHMARK_TYPE = "BenchmarkRecord"
+CHUNK_SIZE = 10000
+ITERATIONS = 5
+SEARCH_TERMS = [u"control", u"acces", u"quarterly review", u"zzzunique"]
+WORDS = [
+    u"access", u"account", u"audit", u"backup", u"change", u"control",
+    u"data", u"encryption", u"firewall", u"incident", u"inventory", u"key",
+    u"logging", u"monitoring", u"network", u"password", u"policy",
+    u"quarterly", u"recovery", u"review", u"risk", u"security", u"server",
+    u"vendor",
+]
+
+
+def generate_rows(count):
+  """Generate synthetic record rows with random titles."""
+  for key in xrange(count):
+    content = u" ".join(random.choice(WORDS) for _ in range(6))
+    if key == count // 2:
+      content += u" zzzunique"
+    yield {
+        "key": key,
+        "type": BENCHMARK_TYPE,
+        "context_id": None,
+        "tags": u"",
+        "property": u"title",
+        "subproperty": u"",
+        "content": content,
+    }
+
+
+def fill_tables(indexer, count):
+  """Insert synthetic rows with index postings."""
+  chunk = []
+  for row in generate_rows(count):
+    chunk.append(row)
+    if len(chunk) == CHUNK_SIZE:
+      for statement, rows in indexer.get_insert_payloads(chunk):
+        db.engine.execute(statement, rows)
+      chunk = []
+  for statement, rows in indexer.get_insert_payloads(chunk):
+    db.engine.execute(statement, rows)
+
+
+def clean_tables(indexer):
+  indexer.delete_records_by_type(BENCHMARK_TYPE)
+
+
+def time_search(indexer, terms):
+  """Return average time of fetching matching keys for terms."""
+  query = db.session.query(indexer.record_type.key).filter(
+      indexer.record_type.type == BENCHMARK_TYPE,
+      indexer._get_filter_query(terms),  # pylint: disable=protected-access
+  )
+  start = time.time()
+  for _ in range(ITERATIONS):
+    count = len(query.all())
+  return (time.time() - start) / ITERATIONS, count
+
+
+def main():
+  """Run the benchmark."""
+  count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+  like_indexer = mysql.MysqlIndexer(None)
+  inverted_indexer = inverted.InvertedIndexer(None)
+  with app.app_context():
+    clean_tables(inverted_indexer)
+    start = time.time()
+    fill_tables(inverted_indexer, count)
+    print "Inserted {} rows in {:.2f}s".format(count, time.time() - start)
+    try:
+      for terms in SEARCH_TERMS:
+        like_time, like_count = time_search(like_indexer, terms)
+        inverted_time, inverted_count = time_search(inverted_indexer, terms)
+        print (u"{:<20} like: {:8.4f}s ({} rows)  inverted: {:8.4f}s "
+               u"({} rows)".format(terms, like_time, like_count,
+                                   inverted_time, inverted_count))
+    finally:
+      clean_tables(inverted_indexer)
+
+
+if __name__ == "__main__":
+  main()
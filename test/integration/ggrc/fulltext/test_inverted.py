@@ -0,0 +1,70 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Integration tests for the inverted index full text engine."""
+
+import ddt
+
+from ggrc import db
+from ggrc.fulltext import inverted
+from ggrc.models import all_models
+
+from integration.ggrc import TestCase
+from integration.ggrc.models import factories
+
+
+@ddt.ddt
+class TestInvertedIndexer(TestCase):
+  """Tests for inverted index postings and search filter."""
+
+  def setUp(self):
+    super(TestInvertedIndexer, self).setUp()
+    self.indexer = inverted.InvertedIndexer(None)
+    self.control = factories.ControlFactory(title=u"Quarterly access review")
+    self.control_id = self.control.id
+    self.index([self.control_id])
+
+  def index(self, ids):
+    """Index controls through the inverted indexer."""
+    for query in self.indexer.get_delete_queries("Control", ids):
+      db.session.execute(query)
+    values = all_models.Control.get_insert_values_for(ids)
+    for statement, rows in self.indexer.get_insert_payloads(values):
+      db.session.execute(statement.values(rows))
+    db.session.commit()
+
+  def search(self, terms):
+    return {
+        key for key, in db.session.query(self.indexer.record_type.key).filter(
+            self.indexer.record_type.type == "Control",
+            self.indexer._get_filter_query(terms),
+        )
+    }
+
+  def test_postings_created(self):
+    """Trigrams of title words are stored as postings."""
+    terms = {
+        term for term, in db.session.query(inverted.MysqlRecordTerm.term)
+        .filter(inverted.MysqlRecordTerm.key == self.control_id,
+                inverted.MysqlRecordTerm.property == "title")
+    }
+    self.assertTrue({u"qua", u"rly", u"acc", u"iew"} <= terms)
+    self.assertNotIn(u"qu", terms)
+
+  @ddt.data(u"quarterly", u"Acces", u"access review", u"arter", u"a")
+  def test_search_match(self, terms):
+    """Records are found by words, parts of words and short terms."""
+    self.assertEqual(self.search(terms), {self.control_id})
+
+  @ddt.data(u"review access", u"quarterlyx", u"audit")
+  def test_search_no_match(self, terms):
+    """Records that don't contain the searched text are not found."""
+    self.assertEqual(self.search(terms), set())
+
+  def test_postings_deleted(self):
+    """Postings are removed with the object records."""
+    self.indexer.delete_records_by_ids("Control", [self.control_id])
+    self.assertEqual(
+        inverted.MysqlRecordTerm.query.filter_by(key=self.control_id).count(),
+        0,
+    )
@@ -0,0 +1,75 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for the resumable global reindex job."""
+
+import datetime
+
+from ggrc import db
+from ggrc.fulltext import reindex
+from ggrc.fulltext.mysql import MysqlRecordProperty
+from ggrc.models import all_models
+
+from integration.ggrc import TestCase
+from integration.ggrc.models import factories
+
+
+class TestReindexJob(TestCase):
+  """Tests for checkpoints and incremental mode of ReindexJob."""
+
+  def setUp(self):
+    super(TestReindexJob, self).setUp()
+    with factories.single_commit():
+      self.control_ids = [factories.ControlFactory().id for _ in range(3)]
+    MysqlRecordProperty.query.delete()
+    db.session.commit()
+
+  @staticmethod
+  def make_task(parameters):
+    task = all_models.BackgroundTask(name="reindex_test")
+    task.parameters = parameters
+    db.session.add(task)
+    db.session.commit()
+    return task
+
+  @staticmethod
+  def indexed_control_ids():
+    return {
+        key for key, in db.session.query(MysqlRecordProperty.key).filter(
+            MysqlRecordProperty.type == "Control"
+        ).distinct()
+    }
+
+  def test_resume_from_checkpoint(self):
+    """Reindex continues after the stored checkpoint."""
+    names = reindex.get_indexed_model_names()
+    task = self.make_task({
+        "checkpoints": {"Control": self.control_ids[0]},
+        "finished": [name for name in names if name != "Control"],
+    })
+    progress = reindex.ReindexJob(task, workers=0, chunk_size=1).run()
+
+    self.assertEqual(self.indexed_control_ids(), set(self.control_ids[1:]))
+    self.assertEqual(progress["models"]["Control"]["rows"], 2)
+    task = all_models.BackgroundTask.query.get(task.id)
+    self.assertEqual(task.parameters["checkpoints"]["Control"],
+                     self.control_ids[-1])
+    self.assertIn("Control", task.parameters["finished"])
+
+  def test_finished_models_skipped(self):
+    """Models marked as finished are not reindexed again."""
+    task = self.make_task({"finished": reindex.get_indexed_model_names()})
+    progress = reindex.ReindexJob(task, workers=0).run()
+    self.assertEqual(progress["models"], {})
+    self.assertEqual(self.indexed_control_ids(), set())
+
+  def test_since(self):
+    """Incremental mode only reindexes recently updated objects."""
+    old_date = datetime.datetime(2000, 1, 1)
+    db.session.query(all_models.Control).filter(
+        all_models.Control.id == self.control_ids[0]
+    ).update({"updated_at": old_date}, synchronize_session=False)
+    db.session.commit()
+    task = self.make_task({"since": "2010-01-01"})
+    reindex.ReindexJob(task, workers=0).run()
+    self.assertEqual(self.indexed_control_ids(), set(self.control_ids[1:]))
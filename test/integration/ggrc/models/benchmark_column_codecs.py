@@ -0,0 +1,89 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""
+ Benchmark size and decode time of column codecs on revision payloads
+
+ The script reads raw content of the latest revisions in the database and
+ stores it with each codec: as json text, the way revision content is
+ stored, as plain pickles, the way CompressedType values were stored
+ before codecs, and with the pickle codecs of CompressedType at several zlib
+ levels. It prints the total size and the time to encode and decode all
+ payloads for every codec.
+
+ Usage (from the test directory, with the database of the settings module):
+
+   python -m integration.ggrc.models.benchmark_column_codecs [revisions]
+
+ revisions default to 5000.
+"""
+
+import pickle
+import sys
+import time
+
+import sqlalchemy as sa
+
+from ggrc.app import app  # noqa - this is needed for imports to work
+from ggrc import db
+from ggrc.models import all_models
+from ggrc.models import types
+
+
+DEFAULT_REVISIONS = 5000
+LEVELS = [0, 1, 6, 9]
+
+
+def load_payloads(count):
+  """Get raw json content of the latest revisions."""
+  table = all_models.Revision.__table__
+  content = sa.type_coerce(table.c.content, sa.Text)
+  query = sa.select([content]).order_by(table.c.id.desc()).limit(count)
+  return [row[0] for row in db.session.execute(query)]
+
+
+def get_codecs():
+  """Get encode and decode functions of all measured codecs by name."""
+  json_codec = types.JsonCodec(types.LongJsonType.MAX_TEXT_LENGTH)
+  codecs = [
+      ("json", json_codec.encode, json_codec.decode),
+      ("legacy pickle", pickle.dumps, pickle.loads),
+  ]
+  for level in LEVELS:
+    codecs.append(("pickle level {}".format(level),
+                   types.get_pickle_codec(level).encode,
+                   types.decode_pickle))
+  return codecs
+
+
+def measure(values, encode, decode):
+  """Get total encoded size and encode and decode times of values."""
+  start = time.time()
+  encoded = [encode(value) for value in values]
+  encode_time = time.time() - start
+  start = time.time()
+  for data in encoded:
+    decode(data)
+  decode_time = time.time() - start
+  size = sum(len(data.encode("utf-8") if isinstance(data, unicode) else data)
+             for data in encoded)
+  return size, encode_time, decode_time
+
+
+def main():
+  """Run the benchmark."""
+  count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_REVISIONS
+  json_codec = types.JsonCodec(types.LongJsonType.MAX_TEXT_LENGTH)
+  with app.app_context():
+    values = [json_codec.decode(payload) for payload in load_payloads(count)]
+  print "{} revision payloads".format(len(values))
+  print "{:>16} {:>12} {:>10} {:>10}".format(
+      "codec", "size KB", "encode", "decode")
+  for name, encode, decode in get_codecs():
+    size, encode_time, decode_time = measure(values, encode, decode)
+    print "{:>16} {:>12} {:>9.3f}s {:>9.3f}s".format(
+        name, size / 1024, encode_time, decode_time)
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,87 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""
+ Benchmark the html cleaner on descriptions stored in the database
+
+ The script loads descriptions of objects with sanitized descriptions and
+ cleans all of them with bleach only, the way every value was cleaned
+ before, with the cleaner with an empty cache, with the same cleaner again,
+ and after cleaning them in worker processes. It prints the time of every
+ run and the share of values that need bleach at all.
+
+ Usage (from the test directory, with the database of the settings module):
+
+   python -m integration.ggrc.models.benchmark_html_cleaner \
+       [descriptions [workers]]
+
+ descriptions default to 10000, workers to 4.
+"""
+
+import sys
+import time
+
+import mock
+
+from ggrc.app import app
+from ggrc import db
+from ggrc.cache.lrucache import LRUCache
+from ggrc.models import all_models
+from ggrc.models.reflection import AttributeInfo
+from ggrc.utils import html_cleaner
+
+
+DEFAULT_DESCRIPTIONS = 10000
+DEFAULT_WORKERS = 4
+
+
+def load_descriptions(count):
+  """Get non empty descriptions of objects with sanitized descriptions."""
+  descriptions = []
+  for model in all_models.all_models:
+    if "description" not in AttributeInfo.gather_attrs(model,
+                                                       "_sanitize_html"):
+      continue
+    query = db.session.query(model.description).filter(
+        model.description != "").limit(count - len(descriptions))
+    descriptions.extend(description for description, in query)
+    if len(descriptions) >= count:
+      break
+  return descriptions
+
+
+def timed(func, values):
+  start = time.time()
+  for value in values:
+    func(value)
+  return time.time() - start
+
+
+def main():
+  """Run the benchmark."""
+  count = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_DESCRIPTIONS
+  workers = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_WORKERS
+  with app.app_context():
+    values = load_descriptions(count)
+  unsafe = sum(1 for value in values
+               if html_cleaner.UNSAFE_CHARACTERS.search(value))
+  print "{} descriptions, {} need bleach".format(len(values), unsafe)
+  cache = LRUCache(max_size=len(values) or 1, ttl=0)
+  # pylint: disable=protected-access
+  with mock.patch.object(html_cleaner, "_cache", cache):
+    print "{:>24} {:>9.3f}s".format(
+        "bleach only", timed(html_cleaner._clean, values))
+    print "{:>24} {:>9.3f}s".format(
+        "cleaner, cold cache", timed(html_cleaner.clean, values))
+    print "{:>24} {:>9.3f}s".format(
+        "cleaner, warm cache", timed(html_cleaner.clean, values))
+    cache.clear()
+    start = time.time()
+    html_cleaner.clean_all(values, workers=workers)
+    duration = time.time() - start + timed(html_cleaner.clean, values)
+    print "{:>24} {:>9.3f}s".format(
+        "{} workers".format(workers), duration)
+
+
+if __name__ == "__main__":
+  main()
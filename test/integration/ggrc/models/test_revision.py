@@ -5,6 +5,8 @@
 
 import ggrc.models
 import integration.ggrc.generator
+from ggrc import db
+from ggrc.utils import revisions as revision_utils
 from integration.ggrc import TestCase
 
 from integration.ggrc.models import factories
@@ -125,3 +127,36 @@ class TestRevisions(TestCase):
     self.assertIsNotNone(revision)
     self.assertEqual(revision.content["title"], process.title)
     self.assertEqual(revision.content["description"], process.description)
+
+  def test_refresh_revisions(self):
+    """Test that revision refresh only writes differing revisions."""
+    control = factories.ControlFactory(directive=None)
+    deleted_control = factories.ControlFactory(directive=None)
+    revision = _get_revisions(control)[0]
+    content = dict(revision.content, title="stale title")
+    db.session.execute(
+        ggrc.models.Revision.__table__.update().where(
+            ggrc.models.Revision.id == revision.id
+        ).values(content=content)
+    )
+    db.session.delete(deleted_control)
+    db.session.commit()
+    controls_count = ggrc.models.Control.query.count()
+
+    stats = revision_utils.do_refresh_revisions(["Control"])
+    self.assertEqual(stats["Control"], {
+        "scanned": controls_count,
+        "updated": 1,
+        "created": 0,
+        "deleted": 1,
+    })
+    revision = ggrc.models.Revision.query.get(revision.id)
+    self.assertEqual(revision.content["title"], control.title)
+
+    stats = revision_utils.do_refresh_revisions(["Control"])
+    self.assertEqual(stats["Control"], {
+        "scanned": controls_count,
+        "updated": 0,
+        "created": 0,
+        "deleted": 0,
+    })
@@ -0,0 +1,113 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Integration tests for the materialized similarity index."""
+
+import json
+
+from mock import patch
+
+from ggrc import db
+from ggrc.models import all_models
+from ggrc.models import similarity_index
+
+from integration.ggrc import TestCase
+from integration.ggrc.models import factories
+
+
+@patch("ggrc.settings.SIMILARITY_INDEX_ENABLED", True, create=True)
+class TestSimilarityIndex(TestCase):
+  """Tests for keeping the similarity index up to date."""
+
+  def setUp(self):
+    super(TestSimilarityIndex, self).setUp()
+    self.client.get("/login")
+    control = factories.ControlFactory()
+    revision = all_models.Revision.query.filter_by(
+        resource_type=control.type).one()
+    with factories.single_commit():
+      audit = factories.AuditFactory()
+      snapshot = factories.SnapshotFactory(
+          parent=audit,
+          child_id=control.id,
+          child_type=control.type,
+          revision_id=revision.id,
+      )
+      self.assessments = [
+          factories.AssessmentFactory(audit=audit, assessment_type="Control")
+          for _ in range(3)
+      ]
+      for assessment in self.assessments:
+        factories.RelationshipFactory(source=snapshot, destination=assessment)
+    self.ids = [assessment.id for assessment in self.assessments]
+
+  def get_stored(self):
+    return similarity_index.get_stored_weights(all_models.Assessment,
+                                               self.ids)
+
+  def query_similar(self, id_):
+    """Get ids of similar Assessments through the Query API."""
+    response = self.client.post(
+        "/query",
+        data=json.dumps([{
+            "object_name": "Assessment",
+            "type": "ids",
+            "filters": {"expression": {
+                "op": {"name": "similar"},
+                "object_name": "Assessment",
+                "ids": [id_],
+            }},
+            "order_by": [{"name": "__similarity__"}],
+        }]),
+        headers={"Content-Type": "application/json"},
+    )
+    self.assert200(response)
+    return response.json[0]["Assessment"]["ids"]
+
+  def test_index_on_mapping(self):
+    """Mapped objects are added to the index in both directions."""
+    first, second, third = self.ids
+    self.assertEqual(self.get_stored(), {
+        first: {second: 1, third: 1},
+        second: {first: 1, third: 1},
+        third: {first: 1, second: 1},
+    })
+    self.assertEqual(sorted(self.query_similar(first)), [second, third])
+    self.assertEqual(similarity_index.check(all_models.Assessment, self.ids),
+                     {})
+
+  def test_index_on_unmapping(self):
+    """Unmapped objects are removed from the index."""
+    first, second, third = self.ids
+    relationship = all_models.Relationship.query.filter_by(
+        destination_type="Assessment", destination_id=third).one()
+    db.session.delete(relationship)
+    db.session.commit()
+    self.assertEqual(self.get_stored(), {
+        first: {second: 1},
+        second: {first: 1},
+        third: {},
+    })
+    self.assertEqual(self.query_similar(first), [second])
+
+  def test_index_on_assessment_type(self):
+    """Objects with a different assessment type are not similar."""
+    first, second, third = self.ids
+    assessment = all_models.Assessment.query.get(third)
+    assessment.assessment_type = "Objective"
+    db.session.commit()
+    self.assertEqual(self.get_stored(), {
+        first: {second: 1},
+        second: {first: 1},
+        third: {},
+    })
+
+  def test_rebuild(self):
+    """Rebuilt index matches similarity computed on the fly."""
+    db.session.execute(similarity_index.SimilarityIndex.__table__.delete())
+    db.session.commit()
+    self.assertEqual(
+        len(similarity_index.check(all_models.Assessment, self.ids)), 3)
+    similarity_index.rebuild()
+    self.assertEqual(similarity_index.check(all_models.Assessment, self.ids),
+                     {})
@@ -0,0 +1,91 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""
+ Benchmark writing revisions of an event against the number of objects
+
+ The script adds increasing numbers of synthetic controls to the session and
+ writes their revisions with log_event, which inserts them in bulk, and with
+ one ORM Revision per object added to the event, the way they were written
+ before. It prints the time and the peak RSS of both. Every run is made in
+ its own process, because peak RSS of a process never decreases, and is
+ rolled back.
+
+ Usage (from the test directory, with the database of the settings module):
+
+   python -m integration.ggrc.services.benchmark_log_event [objects ...]
+
+ objects default to 1000 10000 50000.
+"""
+
+import resource
+import subprocess
+import sys
+import time
+
+import flask_login
+
+from ggrc.app import app
+from ggrc import db
+from ggrc.login.common import find_or_create_user_by_email
+from ggrc.models import all_models
+from ggrc.services import common
+
+
+MODULE = "integration.ggrc.services.benchmark_log_event"
+DEFAULT_COUNTS = [1000, 10000, 50000]
+
+
+def add_controls(count):
+  for index in xrange(count):
+    db.session.add(all_models.Control(
+        title="benchmark log event {}".format(index)))
+  db.session.flush()
+
+
+def orm_log_event(user_id):
+  """Write revisions of cached objects as ORM objects."""
+  cache = common.get_cache()
+  event = all_models.Event(modified_by_id=user_id, action="BULK",
+                           resource_id=0, resource_type=None, context_id=0)
+  event.revisions = [
+      all_models.Revision(obj, user_id, "created", obj.log_json())
+      for obj in cache.new]
+  db.session.add(event)
+  db.session.flush()
+
+
+def run_single(count, mode):
+  """Log an event of count new controls and print time and peak RSS."""
+  with app.test_request_context():
+    user = find_or_create_user_by_email("user@example.com", "Example User")
+    flask_login.login_user(user)
+    add_controls(count)
+    start = time.time()
+    if mode == "bulk":
+      common.log_event(db.session, None, user.id)
+    else:
+      orm_log_event(user.id)
+    duration = time.time() - start
+    db.session.rollback()
+  max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+  print "{:>8} {:>6} {:>10.2f}s {:>12}".format(count, mode, duration, max_rss)
+
+
+def main():
+  """Run the benchmark."""
+  if len(sys.argv) == 4 and sys.argv[1] == "--single":
+    run_single(int(sys.argv[2]), sys.argv[3])
+    return
+  counts = [int(arg) for arg in sys.argv[1:]] or DEFAULT_COUNTS
+  print "{:>8} {:>6} {:>11} {:>12}".format(
+      "objects", "mode", "time", "peak RSS KB")
+  sys.stdout.flush()
+  for count in counts:
+    for mode in ("orm", "bulk"):
+      subprocess.check_call([sys.executable, "-m", MODULE, "--single",
+                             str(count), mode])
+
+
+if __name__ == "__main__":
+  main()
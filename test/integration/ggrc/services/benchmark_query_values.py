@@ -0,0 +1,117 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""
+ Benchmark /query "values" results with and without field projection
+
+ The script creates synthetic markets with an ACL entry and a custom
+ attribute value each, queries increasing numbers of them for a tree view
+ like list of fields with the projected and with the full publish path, and
+ prints the time and the size of the JSON of both. The synthetic objects are
+ removed afterwards.
+
+ Usage (from the test directory, with the database of the settings module):
+
+   python -m integration.ggrc.services.benchmark_query_values [rows ...]
+
+ rows default to 500 2000 5000.
+"""
+
+import sys
+import time
+
+import flask_login
+import mock
+
+from ggrc.app import app
+from ggrc import db
+from ggrc.login.common import find_or_create_user_by_email
+from ggrc.models import all_models
+from ggrc.query.default_handler import DefaultHandler
+from ggrc.utils import as_json
+
+from integration.ggrc.models import factories
+
+
+BENCHMARK_PREFIX = "BENCHMARK-QUERY-"
+DEFAULT_ROWS = [500, 2000, 5000]
+FIELDS = ["id", "type", "title", "slug", "status", "updated_at", "selfLink",
+          "viewLink", "access_control_list", "custom_attribute_values"]
+
+
+def benchmark_query():
+  return all_models.Market.query.filter(
+      all_models.Market.slug.startswith(BENCHMARK_PREFIX))
+
+
+def fill_markets(count, person):
+  """Create synthetic markets with ACL and CA values up to count."""
+  role = factories.AccessControlRoleFactory(object_type="Market")
+  cad = factories.CustomAttributeDefinitionFactory(
+      definition_type="market", title="benchmark ca")
+  existing = benchmark_query().count()
+  with factories.single_commit():
+    for index in xrange(existing, count):
+      market = factories.MarketFactory(
+          slug="{}{}".format(BENCHMARK_PREFIX, index))
+      factories.AccessControlListFactory(
+          object=market, ac_role_id=role.id, person=person)
+      factories.CustomAttributeValueFactory(
+          custom_attribute=cad, attributable=market,
+          attribute_value="value {}".format(index))
+  return role, cad
+
+
+def clean_markets(role, cad):
+  ids = [id_ for id_, in benchmark_query().values(all_models.Market.id)]
+  for obj in all_models.Market.query.filter(all_models.Market.id.in_(ids)):
+    db.session.delete(obj)
+  db.session.delete(role)
+  db.session.delete(cad)
+  db.session.commit()
+
+
+def run(count, projected):
+  """Query count markets and return the time and the size of the JSON."""
+  query = [{
+      "object_name": "Market",
+      "type": "values",
+      "fields": FIELDS,
+      "limit": [0, count],
+      "filters": {"expression": {
+          "left": "code", "op": {"name": "~"}, "right": BENCHMARK_PREFIX,
+      }},
+  }]
+  start = time.time()
+  if projected:
+    results = DefaultHandler(query).get_results()
+  else:
+    with mock.patch.object(DefaultHandler, "_get_projection",
+                           return_value=None):
+      results = DefaultHandler(query).get_results()
+  size = len(as_json(results[0]["values"]))
+  db.session.rollback()
+  return time.time() - start, size
+
+
+def main():
+  """Run the benchmark."""
+  counts = [int(arg) for arg in sys.argv[1:]] or DEFAULT_ROWS
+  with app.test_request_context():
+    user = find_or_create_user_by_email("user@example.com", "Example User")
+    flask_login.login_user(user)
+    role, cad = fill_markets(max(counts), user)
+    print "{:>8} {:>10} {:>11} {:>12}".format(
+        "rows", "path", "time", "json bytes")
+    try:
+      for count in counts:
+        for projected in (True, False):
+          duration, size = run(count, projected)
+          print "{:>8} {:>10} {:>10.2f}s {:>12}".format(
+              count, "projected" if projected else "full", duration, size)
+    finally:
+      clean_markets(role, cad)
+
+
+if __name__ == "__main__":
+  main()
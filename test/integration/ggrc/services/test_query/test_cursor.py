@@ -0,0 +1,65 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for cursor pagination in /query api."""
+
+from integration.ggrc import TestCase
+from integration.ggrc.query_helper import WithQueryApi
+from integration.ggrc.models import factories
+
+
+class TestCursorPagination(TestCase, WithQueryApi):
+  """Pages selected by cursors are the same as pages selected by limit."""
+
+  def setUp(self):
+    super(TestCursorPagination, self).setUp()
+    self.client.get("/login")
+    with factories.single_commit():
+      for index in range(7):
+        # duplicate titles check that id breaks the ties
+        factories.MarketFactory(title="market {}".format(index // 2),
+                                description=None if index % 3 else "d")
+
+  def _query(self, order_by, **kwargs):
+    query = self._make_query_dict(
+        "Market", expression=["title", "~", "market"], type_="ids",
+        order_by=order_by)
+    query.update(kwargs)
+    return self._get_first_result_set(query, "Market")
+
+  def _pages(self, order_by, size, **kwargs):
+    """Get ids of all pages and results of the first page."""
+    first = result = self._query(order_by, cursor={"size": size}, **kwargs)
+    ids = list(result["ids"])
+    while result["next_cursor"]:
+      result = self._query(
+          order_by, cursor={"size": size, "after": result["next_cursor"]},
+          **kwargs)
+      ids.extend(result["ids"])
+    return ids, first
+
+  def test_cursor_pages(self):
+    """All objects are returned once and in order."""
+    for order_by in ([{"name": "title", "desc": True}],
+                     [{"name": "description"}, {"name": "title"}],
+                     [{"name": "description", "desc": True}],
+                     None):
+      expected = self._query(order_by)
+      ids, first = self._pages(order_by, 3)
+      self.assertEqual(ids, expected["ids"])
+      self.assertEqual(first["total"], 7)
+
+  def test_total_modes(self):
+    """Totals can be cached or skipped."""
+    order_by = [{"name": "title"}]
+    _, first = self._pages(order_by, 5, total_mode="cached")
+    self.assertEqual(first["total"], 7)
+    _, first = self._pages(order_by, 5, total_mode="cached")
+    self.assertEqual(first["total"], 7)
+    _, first = self._pages(order_by, 5, total_mode="none")
+    self.assertIsNone(first["total"])
+
+  def test_invalid_cursor(self):
+    query = self._make_query_dict("Market", type_="ids")
+    query["cursor"] = {"size": 2, "after": "invalid"}
+    self.assert400(self._post(query))
@@ -0,0 +1,78 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for selecting only the requested fields in /query "values"."""
+
+import mock
+
+from ggrc.models import all_models
+from ggrc.query.default_handler import DefaultHandler
+
+from integration.ggrc import TestCase
+from integration.ggrc.query_helper import WithQueryApi
+from integration.ggrc.models import factories
+
+
+class TestValuesProjection(TestCase, WithQueryApi):
+  """Projected values are the same as values of published objects."""
+
+  FIELDS = ["id", "type", "title", "slug", "updated_at", "selfLink",
+            "viewLink", "access_control_list", "custom_attribute_values",
+            "no_such_field"]
+
+  def setUp(self):
+    super(TestValuesProjection, self).setUp()
+    self.client.get("/login")
+    with factories.single_commit():
+      person = factories.PersonFactory()
+      role = factories.AccessControlRoleFactory(object_type="Market")
+      cad = factories.CustomAttributeDefinitionFactory(
+          definition_type="market", title="projected")
+      for index in range(3):
+        market = factories.MarketFactory(title="market {}".format(index))
+        factories.AccessControlListFactory(
+            object=market, ac_role_id=role.id, person=person)
+        factories.CustomAttributeValueFactory(
+            custom_attribute=cad, attributable=market,
+            attribute_value="value {}".format(index))
+
+  def _query_values(self, fields):
+    query = self._make_query_dict(
+        "Market", expression=["title", "~", "market"],
+        order_by=[{"name": "title", "desc": True}])
+    query["fields"] = fields
+    return self._get_first_result_set(query, "Market")
+
+  def test_projected_values(self):
+    """Projected fields match fields of the published objects."""
+    with mock.patch.object(DefaultHandler, "_get_projection",
+                           return_value=None):
+      expected = self._query_values(self.FIELDS)
+    with mock.patch.object(DefaultHandler, "_get_objects") as get_objects:
+      result = self._query_values(self.FIELDS)
+      self.assertFalse(get_objects.called)
+    self.assertEqual(result["count"], 3)
+    self.assertEqual([value["title"] for value in result["values"]],
+                     ["market 2", "market 1", "market 0"])
+    self.assertEqual(result, expected)
+
+  def test_computed_fields(self):
+    """Computed properties are published from the full objects."""
+    with mock.patch.object(DefaultHandler, "_get_projected_values") as get:
+      result = self._query_values(["title", "preconditions_failed"])
+      self.assertFalse(get.called)
+    self.assertEqual(len(result["values"]), 3)
+
+  def test_projection(self):
+    """Only columns, links and projected relationships are pushed down."""
+    # pylint: disable=protected-access
+    projection = DefaultHandler._get_projection(
+        all_models.Market, ["title", "selfLink", "access_control_list"])
+    self.assertIs(projection["title"], all_models.Market.title)
+    self.assertEqual(
+        projection["access_control_list"],
+        DefaultHandler.PROJECTED_RELATIONSHIPS["access_control_list"])
+    self.assertIsNone(DefaultHandler._get_projection(
+        all_models.Market, ["title", "modified_by"]))
+    self.assertIsNone(DefaultHandler._get_projection(
+        all_models.Directive, ["title"]))
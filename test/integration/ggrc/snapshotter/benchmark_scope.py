@@ -0,0 +1,86 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""
+ Benchmark snapshot creation against the size of the audit scope
+
+ For every scope size the script creates a program with that many mapped
+ controls and their revisions, creates an audit in it and prints the time
+ spent in creating the audit snapshots. Objects created by the script are not
+ removed, so it should be run against a throwaway database.
+
+ Usage (from the test directory, with the database of the settings module):
+
+   python -m integration.ggrc.snapshotter.benchmark_scope [sizes ...]
+
+ sizes default to 1000 5000 20000.
+"""
+
+import sys
+import time
+
+import flask_login
+
+from ggrc.app import app
+from ggrc import db
+from ggrc import settings
+from ggrc.login.common import find_or_create_user_by_email
+from ggrc.models import all_models
+from ggrc.snapshotter import create_snapshots
+
+from integration.ggrc.models import factories
+
+
+DEFAULT_SIZES = [1000, 5000, 20000]
+CHUNK_SIZE = 1000
+
+
+def create_scope(size, user):
+  """Create a program with size mapped controls and their revisions."""
+  program = factories.ProgramFactory()
+  for start in range(0, size, CHUNK_SIZE):
+    controls = [
+        all_models.Control(title="benchmark control {}".format(i),
+                           slug="BENCHMARK-{}-{}".format(program.id, i))
+        for i in range(start, min(size, start + CHUNK_SIZE))
+    ]
+    db.session.add_all(controls)
+    db.session.flush()
+    db.session.add_all(all_models.Relationship(source=program,
+                                               destination=control)
+                       for control in controls)
+    db.session.add_all(all_models.Revision(control, user.id, "created",
+                                           control.log_json())
+                       for control in controls)
+    db.session.commit()
+  return program
+
+
+def run(size, user):
+  """Create an audit with a scope of size objects and time its snapshots."""
+  program = create_scope(size, user)
+  audit = factories.AuditFactory(program=program)
+  event = all_models.Event(action="POST", resource_id=audit.id,
+                           resource_type=audit.type)
+  db.session.add(event)
+  db.session.commit()
+  start = time.time()
+  result = create_snapshots(audit, event)
+  print "{:>8} {:>10.2f}s {:>10}".format(
+      size, time.time() - start, len(result.data["snapshot_ids"]))
+
+
+def main():
+  """Run the benchmark."""
+  sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+  with app.test_request_context():
+    user = find_or_create_user_by_email("user@example.com", "Example User")
+    flask_login.login_user(user)
+    print "insert batch size: {}".format(settings.SNAPSHOT_INSERT_BATCH_SIZE)
+    print "{:>8} {:>11} {:>10}".format("scope", "time", "snapshots")
+    for size in sizes:
+      run(size, user)
+
+
+if __name__ == "__main__":
+  main()
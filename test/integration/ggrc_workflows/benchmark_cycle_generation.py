@@ -0,0 +1,94 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""
+ Benchmark generation of recurring cycles against the number of task objects
+
+ For every size the script creates a weekly workflow with a task group of
+ TASKS tasks and size mapped controls, makes its next cycle due and prints
+ the time spent in start_recurring_cycles together with the number of
+ created rows. Objects created by the script are not removed, so it should
+ be run against a throwaway database.
+
+ Usage (from the test directory, with the database of the settings module):
+
+   python -m integration.ggrc_workflows.benchmark_cycle_generation [sizes ...]
+
+ sizes default to 100 500 2000.
+"""
+
+import datetime
+import sys
+import time
+
+from ggrc.app import app
+from ggrc import db
+from ggrc import settings
+from ggrc.models import all_models
+from ggrc_workflows import start_recurring_cycles
+from ggrc_workflows import models
+
+from integration.ggrc_workflows.models import factories as wf_factories
+
+
+DEFAULT_SIZES = [100, 500, 2000]
+TASKS = 10
+
+
+def create_workflow(size):
+  """Create a due weekly workflow with size objects mapped to its tasks."""
+  today = datetime.date.today()
+  workflow = wf_factories.WorkflowFactory(
+      unit=models.Workflow.WEEK_UNIT,
+      repeat_every=1,
+      recurrences=True,
+      status=models.Workflow.ACTIVE,
+      next_cycle_start_date=today,
+  )
+  task_group = wf_factories.TaskGroupFactory(workflow=workflow)
+  for _ in range(TASKS):
+    wf_factories.TaskGroupTaskFactory(task_group=task_group,
+                                      start_date=today, end_date=today)
+  controls = [all_models.Control(title="benchmark control {}".format(i),
+                                 slug="BENCHMARK-WF-{}-{}".format(
+                                     workflow.id, i))
+              for i in range(size)]
+  db.session.add_all(controls)
+  db.session.flush()
+  db.session.add_all(models.TaskGroupObject(task_group=task_group,
+                                            object_id=control.id,
+                                            object_type=control.type)
+                     for control in controls)
+  db.session.commit()
+  # make only the benchmark workflow due
+  models.Workflow.query.filter(
+      models.Workflow.id != workflow.id,
+      models.Workflow.next_cycle_start_date <= today,
+  ).update({"next_cycle_start_date": today + datetime.timedelta(days=1)},
+           synchronize_session=False)
+  db.session.commit()
+
+
+def run(size):
+  """Generate the cycle of a workflow with size objects and time it."""
+  create_workflow(size)
+  start = time.time()
+  stats = start_recurring_cycles()
+  print "{:>8} {:>10.2f}s {:>8} {:>14} {:>14}".format(
+      size, time.time() - start, stats["cycle_tasks"],
+      stats["relationships"], stats["notifications"])
+
+
+def main():
+  """Run the benchmark."""
+  sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+  with app.app_context():
+    print "insert batch size: {}".format(settings.CYCLE_INSERT_BATCH_SIZE)
+    print "{:>8} {:>11} {:>8} {:>14} {:>14}".format(
+        "objects", "time", "tasks", "relationships", "notifications")
+    for size in sizes:
+      run(size)
+
+
+if __name__ == "__main__":
+  main()
@@ -0,0 +1,120 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Unit tests for the automapping closure computation."""
+
+from unittest import TestCase
+
+import mock
+
+from ggrc import automapper
+from ggrc.automapper import AutomapperGenerator
+from ggrc.automapper import Stub
+
+
+PROGRAM = Stub("Program", 1)
+REGULATION = Stub("Regulation", 1)
+SECTION = Stub("Section", 1)
+OBJECTIVE = Stub("Objective", 1)
+CONTROL1 = Stub("Control", 1)
+CONTROL2 = Stub("Control", 2)
+
+EXISTING = [
+    (PROGRAM, REGULATION),
+    (REGULATION, SECTION),
+    (REGULATION, CONTROL1),
+    (REGULATION, CONTROL2),
+    (SECTION, OBJECTIVE),
+]
+
+
+class TestAutomapperGenerator(TestCase):
+  """Tests for the level by level closure of automappings."""
+
+  def setUp(self):
+    self.relationship = mock.Mock(
+        source_type=PROGRAM.type, source_id=PROGRAM.id,
+        destination_type=REGULATION.type, destination_id=REGULATION.id,
+        context=None,
+    )
+    self.generator = AutomapperGenerator()
+    self.queried = []
+    patchers = [
+        mock.patch.object(AutomapperGenerator, "_populate_cache_chunk",
+                          autospec=True, side_effect=self.populate_chunk),
+        mock.patch.object(AutomapperGenerator, "_flush"),
+        mock.patch.object(automapper, "is_allowed_update", return_value=True),
+    ]
+    for patcher in patchers:
+      patcher.start()
+      self.addCleanup(patcher.stop)
+
+  def populate_chunk(self, generator, stubs):
+    """Load neighborhoods from EXISTING instead of the database."""
+    self.queried.append(set(stubs))
+    for stub in stubs:
+      generator.cache[stub] = set()
+    for src, dst in EXISTING:
+      if src in stubs:
+        generator.cache[src].add(dst)
+      if dst in stubs:
+        generator.cache[dst].add(src)
+
+  def test_closure(self):
+    """Implied mappings are created with one query per level."""
+    self.assertTrue(
+        self.generator.generate_automappings(self.relationship))
+    self.assertEqual(
+        {frozenset(edge) for edge in self.generator.auto_mappings},
+        {frozenset((PROGRAM, SECTION)), frozenset((PROGRAM, CONTROL1)),
+         frozenset((PROGRAM, CONTROL2))},
+    )
+    self.assertEqual(self.queried, [
+        {PROGRAM, REGULATION},
+        {SECTION, CONTROL1, CONTROL2},
+    ])
+
+  def test_permissions(self):
+    """Object permissions are only checked if type permissions are denied."""
+    def is_allowed_update(type_, id_, _):
+      return type_ != "Control" or id_ == 2
+
+    with mock.patch.object(automapper, "is_allowed_update",
+                           side_effect=is_allowed_update) as allowed:
+      self.generator.generate_automappings(self.relationship)
+    self.assertEqual(
+        {frozenset(edge) for edge in self.generator.auto_mappings},
+        {frozenset((PROGRAM, SECTION)), frozenset((PROGRAM, CONTROL2))},
+    )
+    type_checks = [args for args, _ in allowed.call_args_list
+                   if args[1] is None]
+    self.assertEqual(sorted(type_checks), [
+        ("Control", None, None),
+        ("Program", None, None),
+        ("Section", None, None),
+    ])
+
+  def test_limit(self):
+    """Closures over the limit are not stored."""
+    with mock.patch.object(AutomapperGenerator, "COUNT_LIMIT", 1):
+      self.assertFalse(
+          self.generator.generate_automappings(self.relationship))
+    self.assertTrue(self.relationship._json_extras[
+        "automapping_limit_exceeded"])
+    self.assertNotIn("automapping_deferred", self.relationship._json_extras)
+    # pylint: disable=protected-access
+    AutomapperGenerator._flush.assert_not_called()
+
+  @mock.patch("ggrc.settings.AUTOMAPPING_DEFER_LIMIT_EXCEEDED", True,
+              create=True)
+  def test_deferred(self):
+    """Closures over the limit are marked for a background task."""
+    with mock.patch.object(AutomapperGenerator, "COUNT_LIMIT", 1):
+      self.generator.generate_automappings(self.relationship)
+    self.assertTrue(self.relationship._json_extras["automapping_deferred"])
+    self.assertTrue(self.relationship._automapping_deferred)
+
+    generator = AutomapperGenerator(use_count_limit=False)
+    with mock.patch.object(AutomapperGenerator, "COUNT_LIMIT", 1):
+      self.assertTrue(generator.generate_automappings(self.relationship))
+    self.assertEqual(len(generator.auto_mappings), 3)
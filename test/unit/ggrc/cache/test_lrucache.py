@@ -0,0 +1,66 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for the in-process LRU cache."""
+
+from unittest import TestCase
+
+from ggrc.cache import LRUCache
+
+
+class FakeClock(object):
+  # pylint: disable=too-few-public-methods
+
+  def __init__(self):
+    self.now = 1000.0
+
+  def __call__(self):
+    return self.now
+
+
+class TestLRUCache(TestCase):
+  """Tests for size and TTL bounds and statistics of LRUCache."""
+
+  def setUp(self):
+    self.clock = FakeClock()
+    self.cache = LRUCache(max_size=2, ttl=10, clock=self.clock)
+
+  def test_eviction(self):
+    """Least recently used entries are evicted first."""
+    self.cache.set("a", 1)
+    self.cache.set("b", 2)
+    self.assertEqual(self.cache.get("a"), 1)
+    self.cache.set("c", 3)
+    self.assertIsNone(self.cache.get("b"))
+    self.assertEqual(self.cache.get("a"), 1)
+    self.assertEqual(self.cache.get("c"), 3)
+    self.assertEqual(len(self.cache), 2)
+    self.assertEqual(self.cache.get_stats()["evictions"], 1)
+
+  def test_ttl(self):
+    """Expired entries are misses."""
+    self.cache.set("a", 1)
+    self.clock.now += 11
+    self.assertIsNone(self.cache.get("a"))
+    self.assertEqual(len(self.cache), 0)
+    self.assertEqual(self.cache.get_stats()["expired"], 1)
+
+  def test_stats(self):
+    """Hit rate is computed from hits and misses."""
+    self.assertIsNone(self.cache.get_stats()["hit_rate"])
+    self.cache.set("a", 1)
+    self.cache.get("a")
+    self.cache.get("a")
+    self.cache.get("b")
+    stats = self.cache.get_stats()
+    self.assertEqual((stats["hits"], stats["misses"]), (2, 1))
+    self.assertEqual(stats["hit_rate"], 0.6667)
+    self.assertEqual((stats["size"], stats["max_size"]), (1, 2))
+    self.cache.reset_stats()
+    self.assertEqual(self.cache.get_stats()["hits"], 0)
+
+  def test_disabled(self):
+    """Cache with no size does not store anything."""
+    cache = LRUCache(max_size=0)
+    cache.set("a", 1)
+    self.assertIsNone(cache.get("a"))
@@ -0,0 +1,150 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for batched memcache operations and cache statistics."""
+
+from unittest import TestCase
+
+import mock
+
+from ggrc import models
+from ggrc.cache import CacheManager, MemCache
+from ggrc.services import common
+
+from appengine import base
+
+
+def make_cache_manager():
+  cache_manager = CacheManager()
+  cache_manager.initialize(MemCache())
+  return cache_manager
+
+
+@base.with_memcache
+class TestMemCacheMulti(TestCase):
+  """Tests for multi key operations of MemCache and CacheManager."""
+
+  def setUp(self):
+    MemCache.stats.reset()
+    self.cache_manager = make_cache_manager()
+
+  def test_bulk_operations(self):
+    """Bulk operations read and write all keys in the cache."""
+    self.cache_manager.bulk_add({"collection:controls:1": {"id": 1},
+                                 "collection:controls:2": {"id": 2}})
+    self.cache_manager.bulk_set({"collection:controls:2": {"id": 22}})
+    self.assertEqual(
+        self.cache_manager.bulk_get(["collection:controls:1",
+                                     "collection:controls:2",
+                                     "collection:controls:3"]),
+        {"collection:controls:1": {"id": 1},
+         "collection:controls:2": {"id": 22}},
+    )
+    self.assertTrue(self.cache_manager.bulk_delete(
+        ["collection:controls:1", "collection:controls:2"]))
+    self.assertEqual(
+        self.cache_manager.bulk_get(["collection:controls:1"]), {})
+
+  def test_stats(self):
+    """Hits and misses are counted per resource type."""
+    self.cache_manager.bulk_add({"collection:controls:1": {"id": 1},
+                                 "collection:issues:1": {"id": 1}})
+    self.cache_manager.bulk_get(["collection:controls:1",
+                                 "collection:controls:2",
+                                 "collection:issues:1",
+                                 "DeleteOp:collection:issues:1"])
+
+    controls = MemCache.stats.get("controls")
+    self.assertEqual((controls["hits"], controls["misses"]), (1, 1))
+    self.assertEqual((controls["sets"], controls["calls"]), (1, 2))
+    self.assertGreaterEqual(controls["seconds"], 0)
+    issues = MemCache.stats.get("issues")
+    self.assertEqual((issues["hits"], issues["misses"]), (1, 0))
+    self.assertEqual(MemCache.stats.get("_other")["misses"], 1)
+    self.assertEqual(MemCache.stats.get("programs")["calls"], 0)
+
+  def test_get_collection(self):
+    """Collection get fetches all ids with a single call."""
+    cache = self.cache_manager.cache_object
+    cache.add_multi({"collection:controls:1": {"id": 1, "title": "a"},
+                     "collection:controls:2": {"id": 2, "title": "b"}})
+    with mock.patch.object(cache.memcache_client, "get_multi",
+                           wraps=cache.memcache_client.get_multi) as get:
+      data = self.cache_manager.get_collection(
+          "collection", "controls", {"ids": [1, 2], "attrs": ["title"]})
+      missing = self.cache_manager.get_collection(
+          "collection", "controls", {"ids": [1, 3], "attrs": None})
+    self.assertEqual(data, {1: {"title": "a"}, 2: {"title": "b"}})
+    self.assertIsNone(missing)
+    self.assertEqual(get.call_count, 2)
+
+
+class FakeResource(object):
+  """Resource service with just the attributes used by cache methods."""
+  # pylint: disable=too-few-public-methods
+
+  get_resources_from_cache = common.Resource.__dict__[
+      "get_resources_from_cache"]
+  add_resources_to_cache = common.Resource.__dict__["add_resources_to_cache"]
+
+  def __init__(self, model_name):
+    self.model = type(model_name, (object,), {})
+    self.request = mock.Mock(cache_manager=make_cache_manager())
+
+
+@base.with_memcache
+class TestResourceCache(TestCase):
+  """Tests for collection GET cache reads and commit invalidation."""
+
+  @classmethod
+  def setUpClass(cls):
+    # register model inflections used for building cache keys
+    models.init_models(None)
+
+  def setUp(self):
+    self.resource = FakeResource("Control")
+    self.client = self.resource.request.cache_manager.cache_object\
+        .memcache_client
+
+  def test_resources_round_trip(self):
+    """Resources are added and read back with one call each."""
+    matches = [(i, "Control", None) for i in range(1, 4)]
+    with mock.patch.object(self.client, "add_multi",
+                           wraps=self.client.add_multi) as add:
+      self.resource.add_resources_to_cache({
+          matches[0]: {"id": 1, "selfLink": "/api/controls/1"},
+          matches[1]: {"id": 2},
+      })
+    self.assertEqual(add.call_count, 1)
+
+    with mock.patch.object(self.client, "get_multi",
+                           wraps=self.client.get_multi) as get:
+      resources = self.resource.get_resources_from_cache(matches)
+    self.assertEqual(get.call_count, 1)
+    # entries without selfLink are not complete resources
+    self.assertEqual(resources, {
+        matches[0]: {"id": 1, "selfLink": "/api/controls/1"},
+    })
+
+  def test_update_after_commit(self):
+    """Duplicate keys are removed from the cache with one call."""
+    self.client.set_multi({"collection:controls:1": {"id": 1},
+                           "DeleteOp:collection:controls:1": {}})
+    context = mock.Mock(cache_manager=self.resource.request.cache_manager)
+    context.cache_manager.marked_for_delete = [
+        "collection:controls:1",
+        "collection:controls:1",
+        "collection:controls:2",
+    ]
+    with mock.patch.object(common, "g", referenced_objects={}), \
+        mock.patch.object(common, "clear_permission_cache"), \
+        mock.patch.object(self.client, "delete_multi",
+                          wraps=self.client.delete_multi) as delete:
+      common.update_memcache_after_commit(context)
+    delete.assert_called_once_with([
+        "collection:controls:1",
+        "collection:controls:2",
+        "DeleteOp:collection:controls:1",
+        "DeleteOp:collection:controls:2",
+    ], 0)
+    self.assertEqual(self.client.get_multi(["collection:controls:1"]), {})
@@ -0,0 +1,100 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for the in-process cache tier in front of memcache."""
+
+from unittest import TestCase
+
+import mock
+
+from ggrc.cache import LRUCache, TieredCache
+from ggrc.cache import tieredcache
+
+from appengine import base
+
+
+@base.with_memcache
+class TestTieredCache(TestCase):
+  """Tests for local hits and generation based invalidation."""
+
+  def setUp(self):
+    TieredCache.local = LRUCache(max_size=10, ttl=60)
+    self.cache = TieredCache()
+    self.other_instance_cache = TieredCache()
+
+  def tearDown(self):
+    TieredCache.local = None
+
+  def count_memcache_gets(self, keys, cache=None):
+    cache = cache or self.cache
+    with mock.patch.object(cache.memcache_client, "get_multi",
+                           wraps=cache.memcache_client.get_multi) as get:
+      result = cache.get_multi(keys)
+    return result, get.call_count
+
+  def test_local_hits(self):
+    """Entries read once are served from the local tier."""
+    self.memcache_client.set("collection:controls:1", {"id": 1})
+    result, calls = self.count_memcache_gets(["collection:controls:1"])
+    self.assertEqual((result, calls), ({"collection:controls:1": {"id": 1}},
+                                       1))
+    result, calls = self.count_memcache_gets(["collection:controls:1"])
+    self.assertEqual((result, calls), ({"collection:controls:1": {"id": 1}},
+                                       0))
+    stats = self.cache.get_stats()["local"]
+    self.assertEqual((stats["hits"], stats["size"]), (1, 1))
+
+  def test_local_copies(self):
+    """Changing a returned value does not change the cached one."""
+    self.cache.set_multi({"collection:controls:1": {"id": 1}})
+    self.cache.get_multi(["collection:controls:1"])["collection:controls:1"][
+        "id"] = 2
+    self.assertEqual(self.cache.get_local_multi(["collection:controls:1"]),
+                     {"collection:controls:1": {"id": 1}})
+
+  def test_excluded_keys(self):
+    """Keys updated without invalidation are always read from memcache."""
+    self.cache.set_multi({"permissions:list": {"permissions:1"}})
+    self.memcache_client.set("permissions:list", {"permissions:2"})
+    result, calls = self.count_memcache_gets(["permissions:list"])
+    self.assertEqual((result, calls),
+                     ({"permissions:list": {"permissions:2"}}, 1))
+
+  def test_invalidation(self):
+    """Removing entries on one instance invalidates the local tiers."""
+    self.cache.set_multi({"collection:controls:1": {"id": 1},
+                          "collection:controls:2": {"id": 2}})
+    # a separate process that has the old entries in its local tier
+    other_local = LRUCache()
+    with mock.patch.object(TieredCache, "local", other_local):
+      self.other_instance_cache.get_multi(["collection:controls:2"])
+    self.cache.remove_multi(["collection:controls:1"])
+    self.memcache_client.set("collection:controls:2", {"id": 22})
+    with mock.patch.object(TieredCache, "local", other_local):
+      result, calls = self.count_memcache_gets(
+          ["collection:controls:1", "collection:controls:2"],
+          cache=self.other_instance_cache)
+    self.assertEqual((result, calls),
+                     ({"collection:controls:2": {"id": 22}}, 1))
+
+  def test_update_invalidation(self):
+    """Updating entries on one instance invalidates the local tiers."""
+    self.cache.set_multi({"collection:controls:1": {"id": 1}})
+    other_local = LRUCache()
+    with mock.patch.object(TieredCache, "local", other_local):
+      self.other_instance_cache.get_multi(["collection:controls:1"])
+    self.cache.update_multi({"collection:controls:1": {"id": 11}})
+    self.memcache_client.set("collection:controls:1", {"id": 11})
+    with mock.patch.object(TieredCache, "local", other_local):
+      result, calls = self.count_memcache_gets(
+          ["collection:controls:1"], cache=self.other_instance_cache)
+    self.assertEqual((result, calls),
+                     ({"collection:controls:1": {"id": 11}}, 1))
+
+  def test_evicted_generation(self):
+    """A generation evicted from memcache restarts from a new value."""
+    generation = self.cache.get_generation()
+    self.memcache_client.delete(tieredcache.GENERATION_KEY)
+    with mock.patch.object(tieredcache.time, "time",
+                           return_value=generation / 1000.0 + 1):
+      self.assertNotEqual(self.cache.get_generation(), generation)
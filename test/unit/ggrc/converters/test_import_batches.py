@@ -0,0 +1,116 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Unit tests for flushing imported rows in batches."""
+
+import unittest
+
+import ddt
+import mock
+from sqlalchemy import exc
+
+from ggrc import app  # noqa - this is neede for imports to work
+from ggrc.converters.base_block import BlockConverter
+from ggrc.models.cache import Cache
+
+
+class FakeRow(object):
+  """Row converter that records inserts."""
+
+  def __init__(self, index, session):
+    self.index = index
+    self.session = session
+    self.ignore = False
+    self.errors = []
+    self.setup_count = 0
+    self.signal_count = 0
+
+  def setup_object(self):
+    self.setup_count += 1
+
+  def send_pre_commit_signals(self):
+    self.signal_count += 1
+
+  def insert_object(self):
+    self.session.pending.append(self)
+
+  def add_error(self, template):
+    self.errors.append(template)
+    self.ignore = True
+
+
+class FakeSession(object):
+  """Session that fails to flush batches with bad rows."""
+
+  def __init__(self, bad_rows, cache):
+    self.bad_rows = bad_rows
+    self.cache = cache
+    self.pending = []
+    self.flushed = []
+    self.flush_count = 0
+
+  def begin_nested(self):
+    self.pending = []
+    return mock.MagicMock()
+
+  def flush(self):
+    self.flush_count += 1
+    self.cache.new.update((row, {}) for row in self.pending)
+    if any(row.index in self.bad_rows for row in self.pending):
+      # rolling back a savepoint clears the modified objects cache
+      self.cache.clear()
+      raise exc.SQLAlchemyError("bad row")
+    self.flushed.extend(row.index for row in self.pending)
+
+
+@ddt.ddt
+class TestImportBatches(unittest.TestCase):
+  """Tests for finding failing rows of a batch."""
+
+  def setUp(self):
+    self.cache = Cache()
+    patcher = mock.patch("ggrc.converters.base_block.get_cache",
+                         return_value=self.cache)
+    patcher.start()
+    self.addCleanup(patcher.stop)
+
+  def _insert(self, count, bad_rows):
+    session = FakeSession(bad_rows, self.cache)
+    rows = [FakeRow(index, session) for index in range(count)]
+    block = BlockConverter.__new__(BlockConverter)
+    with mock.patch("ggrc.converters.base_block.db") as db:
+      db.session = session
+      # pylint: disable=protected-access
+      block._insert_batch(rows)
+    return session, rows
+
+  def test_single_flush(self):
+    """Rows without errors are flushed once."""
+    session, rows = self._insert(8, set())
+    self.assertEqual(session.flush_count, 1)
+    self.assertEqual(session.flushed, range(8))
+    self.assertEqual([row.setup_count for row in rows], [0] * 8)
+    self.assertEqual([row.signal_count for row in rows], [1] * 8)
+
+  @ddt.data({3}, {0, 7}, {2, 3, 4}, set(range(8)))
+  def test_failing_rows(self, bad_rows):
+    """Only failing rows get an error, other rows are flushed."""
+    session, rows = self._insert(8, bad_rows)
+    self.assertEqual({row.index for row in rows if row.errors}, bad_rows)
+    self.assertEqual(sorted(session.flushed),
+                     [index for index in range(8) if index not in bad_rows])
+    self.assertTrue(all(row.setup_count for row in rows))
+    self.assertTrue(all(row.signal_count > 1 for row in rows))
+    self.assertEqual({row.index for row in self.cache.new},
+                     set(range(8)) - bad_rows)
+
+  def test_ignored_rows(self):
+    """Ignored rows are not inserted."""
+    session = FakeSession(set(), self.cache)
+    rows = [FakeRow(index, session) for index in range(3)]
+    rows[1].ignore = True
+    block = BlockConverter.__new__(BlockConverter)
+    with mock.patch("ggrc.converters.base_block.db") as db:
+      db.session = session
+      block._insert_batch(rows)  # pylint: disable=protected-access
+    self.assertEqual(session.flushed, [0, 2])
@@ -0,0 +1,128 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Unit tests for prefetching objects of import blocks."""
+
+from collections import defaultdict
+from collections import OrderedDict
+import unittest
+
+import mock
+
+from ggrc import app  # noqa - this is neede for imports to work
+from ggrc.converters.base_block import BlockConverter
+from ggrc.converters.handlers import handlers
+from ggrc.models import all_models
+from ggrc.utils import structures
+
+
+class TestPrefetch(unittest.TestCase):
+  """Tests for resolving block column values with set based queries."""
+
+  def setUp(self):
+    self.block = BlockConverter.__new__(BlockConverter)
+    # pylint: disable=protected-access
+    self.block._prefetched = {}
+    self.block._relationships_cache = None
+    self.block._cache_relationships = False
+    self.block.object_class = all_models.Control
+    self.block.converter = mock.MagicMock()
+    self.block.converter.new_objects = defaultdict(
+        structures.CaseInsensitiveDict)
+    self.block.headers = OrderedDict([
+        ("slug", {"handler": handlers.SlugColumnHandler}),
+        ("title", {"handler": handlers.TextColumnHandler}),
+        ("contact", {"handler": handlers.UserColumnHandler}),
+        ("__mapping__:market", {"handler": handlers.MappingColumnHandler,
+                                "attr_name": "market"}),
+    ])
+    self.block.rows = [
+        [u"CONTROL-1", u"title", u"User1@example.com", u"MARKET-1\nMarket-2"],
+        [u"control-2 ", u"title", u"", u"market-1"],
+    ]
+
+  def test_prefetch_values(self):
+    """Values are collected from the columns that refer to a model."""
+    # pylint: disable=protected-access
+    get_values = self.block._get_prefetch_values
+    self.assertEqual(get_values(all_models.Control, "slug"),
+                     {"control-1", "control-2"})
+    self.assertEqual(get_values(all_models.Person, "email"),
+                     {"user1@example.com"})
+    self.assertEqual(get_values(all_models.Market, "slug"),
+                     {"market-1", "market-2"})
+
+  def _mock_model(self, name):
+    """Get a model stub that doesn't configure the mappers."""
+    model = mock.MagicMock(spec=getattr(all_models, name))
+    model.__name__ = name
+    patcher = mock.patch("ggrc.converters.base_block.get_exportables",
+                         return_value={name.lower(): model})
+    patcher.start()
+    self.addCleanup(patcher.stop)
+    return model
+
+  def test_find_object(self):
+    """Prefetched values are not queried again."""
+    model = self._mock_model("Market")
+    query = model.query
+    market = mock.MagicMock(slug="MARKET-1")
+    query.filter.return_value = [market]
+    find = self.block.find_object
+    self.assertIs(find(model, "slug", "market-1"), market)
+    self.assertIsNone(find(model, "slug", "MARKET-2"))
+    self.assertEqual(query.filter.call_count, 1)
+    self.assertFalse(query.filter_by.called)
+
+    query.filter_by.return_value.first.return_value = None
+    self.assertIsNone(find(model, "slug", "market-3"))
+    query.filter_by.assert_called_once_with(slug="market-3")
+
+  def test_find_new_object(self):
+    """Objects created during the import are queried."""
+    model = self._mock_model("Market")
+    query = model.query
+    query.filter.return_value = []
+    new_market = mock.MagicMock()
+    self.block.converter.new_objects[model]["market-2"] = new_market
+    query.filter_by.return_value.first.return_value = new_market
+    self.assertIs(self.block.find_object(model, "slug", "market-2"),
+                  new_market)
+    query.filter_by.assert_called_once_with(slug="market-2")
+
+  @staticmethod
+  def _relationship(source, destination):
+    return mock.MagicMock(
+        source_type=source.type, source_id=source.id,
+        destination_type=destination.type, destination_id=destination.id)
+
+  @mock.patch("ggrc.converters.base_block.object_session")
+  @mock.patch("ggrc.converters.base_block.db")
+  @mock.patch("ggrc.converters.base_block.event")
+  def test_relationships_cache(self, event, db, object_session):
+    """Only relationships of the current session update the cache."""
+    session = db.session.return_value
+    control = mock.MagicMock(type="Control", id=1)
+    market = mock.MagicMock(type="Market", id=2)
+    other_rel = self._relationship(control, market)
+    rel = self._relationship(control, market)
+    object_session.side_effect = lambda obj: (
+        session if obj is rel else mock.MagicMock())
+    with mock.patch.object(self.block, "_create_relationships_cache",
+                           side_effect=lambda: {}) as create:
+      with self.block.relationships_cache():
+        listeners = {call[0][1]: call[0][2]
+                     for call in event.listen.call_args_list}
+        listeners["after_insert"](None, None, other_rel)
+        self.assertIsNone(self.block.find_relationship(control, market))
+        listeners["after_insert"](None, None, rel)
+        self.assertIs(self.block.find_relationship(control, market), rel)
+        listeners["after_rollback"](session)
+        self.assertIsNone(self.block.find_relationship(control, market))
+        self.assertEqual(create.call_count, 2)
+        listeners["load"](other_rel, mock.MagicMock(session=session))
+        self.assertIs(self.block.find_relationship(control, market),
+                      other_rel)
+    # pylint: disable=protected-access
+    self.assertIsNone(self.block._relationships_cache)
+    self.assertEqual(event.remove.call_count, 4)
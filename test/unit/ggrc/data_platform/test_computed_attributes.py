@@ -0,0 +1,93 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Unit tests for grouping revisions of computed attributes."""
+
+import unittest
+
+import ddt
+from mock import MagicMock
+from mock import patch
+
+from ggrc import app  # noqa - this is neede for imports to work
+from ggrc.data_platform import computed_attributes
+
+
+def _revision(resource_type, resource_id, action="modified", source=None,
+              destination=None, content=None):
+  """Make a revision stub."""
+  source_type, source_id = source or (None, None)
+  destination_type, destination_id = destination or (None, None)
+  return MagicMock(
+      resource_type=resource_type,
+      resource_id=resource_id,
+      action=action,
+      source_type=source_type,
+      source_id=source_id,
+      destination_type=destination_type,
+      destination_id=destination_id,
+      content=content or {},
+  )
+
+
+@ddt.ddt
+class TestGroupRevisions(unittest.TestCase):
+  """Tests for resolving revisions to groups of affected objects."""
+
+  def setUp(self):
+    self.attr = MagicMock()
+    self.attr.attribute_definition.attribute_type.aggregate_function = (
+        "Assessment finished_date max")
+    self.attr.object_template.name = "Control"
+
+  def _group(self, revision):
+    groups = computed_attributes.group_revisions([self.attr], [revision])
+    return {key: value for key, value in groups[self.attr].iteritems()
+            if value}
+
+  @ddt.data(
+      (_revision("Assessment", 1), {"aggregate_objects": {("Assessment", 1)}}),
+      (_revision("Assessment", 1, action="deleted"),
+       {"aggregate_deleted": {("Assessment", 1)}}),
+      (_revision("Control", 2), {"computed_objects": {("Control", 2)}}),
+      (_revision("Snapshot", 3, content={"child_type": "Control"}),
+       {"destination_snapshots": {("Snapshot", 3)}}),
+      (_revision("Snapshot", 3, content={"child_type": "Objective"}), {}),
+      (_revision("Relationship", 4, source=("Assessment", 1),
+                 destination=("Control", 2)),
+       {"related_objects": {("Control", 2)}}),
+      (_revision("Relationship", 4, action="deleted",
+                 source=("Control", 2), destination=("Assessment", 1)),
+       {"related_objects": {("Control", 2)}}),
+      (_revision("Relationship", 5, source=("Snapshot", 3),
+                 destination=("Assessment", 1)),
+       {"related_snapshots": {("Snapshot", 3)}}),
+      (_revision("Relationship", 6, source=("Assessment", 1),
+                 destination=("Assessment", 7)), {}),
+      (_revision("Relationship", 6, source=("Control", 2),
+                 destination=("Control", 8)), {}),
+      (_revision("Issue", 9), {}),
+  )
+  @ddt.unpack
+  def test_group_revisions(self, revision, expected):
+    self.assertEqual(self._group(revision), expected)
+
+
+class TestComputeAllLatest(unittest.TestCase):
+  """Tests for computing values from latest revisions of all objects."""
+
+  @patch.object(computed_attributes, "_compute_chunk", return_value=1)
+  @patch.object(computed_attributes.revision_utils, "get_latest_revision_ids",
+                return_value=iter([[1, 2], [3]]))
+  @patch.object(computed_attributes, "get_computed_attributes")
+  def test_all_latest(self, get_attributes, get_latest, compute_chunk):
+    """Latest revisions of every aggregate type are computed in chunks."""
+    attr = MagicMock()
+    attr.attribute_definition.attribute_type.aggregate_function = (
+        "Assessment finished_date max")
+    get_attributes.return_value = [attr, attr]
+    stats = computed_attributes.compute_attributes("all_latest", chunk_size=2)
+    get_latest.assert_called_once_with("Assessment")
+    self.assertEqual([call[0][0] for call in compute_chunk.call_args_list],
+                     [[1, 2], [3]])
+    self.assertEqual(stats, {"revisions": 3, "objects": 2})
@@ -0,0 +1,49 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+"""Unit tests for the global reindex job."""
+
+import unittest
+
+import mock
+
+from ggrc import app  # noqa - this is neede for imports to work
+from ggrc.fulltext import reindex
+
+
+class FakePool(object):
+  """Pool that runs tasks when their results are taken."""
+
+  def __init__(self):
+    self.waiting = []
+    self.max_waiting = 0
+
+  def apply_async(self, func, args):
+    result = mock.MagicMock()
+    result.get.side_effect = lambda: self.run(result, func, args)
+    self.waiting.append(result)
+    self.max_waiting = max(self.max_waiting, len(self.waiting))
+    return result
+
+  def run(self, result, func, args):
+    self.waiting.remove(result)
+    return func(*args)
+
+
+class TestReindexJob(unittest.TestCase):
+  """Tests for reindexing chunks in worker processes."""
+
+  def test_parallel_chunks(self):
+    """Chunks are read while workers run and checkpointed in order."""
+    job = reindex.ReindexJob(workers=2)
+    chunks = [[1, 2], [3, 4], [5, 6], [7, 8], [9, 10], [11]]
+    pool = FakePool()
+    with mock.patch.object(job, "_id_chunks", return_value=iter(chunks)), \
+        mock.patch.object(job, "_checkpoint") as checkpoint, \
+        mock.patch.object(reindex, "_reindex_chunk_worker",
+                          side_effect=lambda args: ("Control", args[1][-1],
+                                                    len(args[1]))):
+      # pylint: disable=protected-access
+      job._reindex_parallel("Control", pool)
+    self.assertEqual([call[0][2:] for call in checkpoint.call_args_list],
+                     [(2, 2), (4, 2), (6, 2), (8, 2), (10, 2), (11, 1)])
+    self.assertEqual(pool.max_waiting, 4)
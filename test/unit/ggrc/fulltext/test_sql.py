@@ -0,0 +1,94 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+"""Unit tests for diff based full text record updates."""
+
+import unittest
+
+import sqlalchemy as sa
+from mock import patch
+from sqlalchemy.ext.declarative import declarative_base
+
+from ggrc.fulltext.sql import SqlIndexer
+
+
+Base = declarative_base()  # pylint: disable=invalid-name
+
+
+class Record(Base):  # pylint: disable=too-few-public-methods
+  """Record table with the same columns as the full text record table."""
+  __tablename__ = "records"
+  key = sa.Column(sa.Integer, primary_key=True)
+  type = sa.Column(sa.String, primary_key=True)
+  property = sa.Column(sa.String, primary_key=True)
+  subproperty = sa.Column(sa.String, primary_key=True)
+  context_id = sa.Column(sa.Integer)
+  tags = sa.Column(sa.String)
+  content = sa.Column(sa.Text)
+
+
+class DiffIndexer(SqlIndexer):
+  record_type = Record
+
+
+def row(key, prop, content, subproperty=u""):
+  return {"key": key, "type": "Control", "property": prop,
+          "subproperty": subproperty, "context_id": None, "tags": u"",
+          "content": content}
+
+
+class TestDiffPayloads(unittest.TestCase):
+  """Tests for computing the difference of stored and new records."""
+
+  def setUp(self):
+    self.indexer = DiffIndexer(None)
+    existing = {
+        (1, u"title", u""): (None, u"", u"old title"),
+        (1, u"notes", u""): (None, u"", u"notes"),
+        (1, u"owner", u"email"): (None, u"", u"a@example.com"),
+    }
+    patcher = patch.object(DiffIndexer, "get_existing_rows",
+                           return_value=existing)
+    patcher.start()
+    self.addCleanup(patcher.stop)
+
+  def test_diff_rows(self):
+    """Rows are split into inserted, updated, deleted and unchanged."""
+    new_rows = [
+        row(1, u"title", u"new title"),
+        row(1, u"notes", u"notes"),
+        row(1, u"slug", u"CONTROL-1"),
+    ]
+    inserted, updated, deleted, unchanged = self.indexer.diff_rows(
+        "Control", [1], new_rows)
+    self.assertEqual(inserted, [new_rows[2]])
+    self.assertEqual(updated, [new_rows[0]])
+    self.assertEqual(deleted, [(1, u"owner", u"email")])
+    self.assertEqual(unchanged, 1)
+
+  def test_unchanged_payloads(self):
+    """Nothing is written if records haven't changed."""
+    payloads, stats = self.indexer.get_diff_payloads("Control", [1], [
+        row(1, u"title", u"old title"),
+        row(1, u"notes", u"notes"),
+        row(1, u"owner", u"a@example.com", u"email"),
+    ])
+    self.assertEqual(payloads, [])
+    self.assertEqual(stats, {"inserted": 0, "updated": 0, "deleted": 0,
+                             "unchanged": 3})
+
+  def test_changed_payloads(self):
+    """Changed rows produce one statement per operation."""
+    new_rows = [row(1, u"title", u"new title"), row(1, u"slug", u"C-1")]
+    payloads, stats = self.indexer.get_diff_payloads("Control", [1],
+                                                     new_rows)
+    self.assertEqual(
+        [type(statement).__name__ for statement, _ in payloads],
+        ["Delete", "Update", "Insert"],
+    )
+    self.assertEqual(payloads[1][1], [{
+        "_key": 1, "_property": u"title", "_subproperty": u"",
+        "context_id": None, "tags": u"", "content": u"new title",
+    }])
+    self.assertEqual(payloads[2][1], [new_rows[1]])
+    self.assertEqual(stats, {"inserted": 1, "updated": 1, "deleted": 2,
+                             "unchanged": 0})
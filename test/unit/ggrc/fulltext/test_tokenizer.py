@@ -0,0 +1,83 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+"""Unit tests for full text index tokenizers."""
+
+import unittest
+
+from ddt import data, ddt, unpack
+
+from ggrc.fulltext import tokenizer
+
+
+@ddt
+class TestPrefixTokenizer(unittest.TestCase):
+  """Test cases for word prefix tokenizer."""
+
+  def setUp(self):
+    self.tokenizer = tokenizer.PrefixTokenizer()
+
+  def test_index_terms(self):
+    """Every word prefix is indexed in lower case."""
+    self.assertEqual(
+        self.tokenizer.index_terms(u"Big  Control!"),
+        {u"bi", u"big", u"co", u"con", u"cont", u"contr", u"contro",
+         u"control"},
+    )
+
+  @data(None, u"", u"!? -")
+  def test_empty_content(self, content):
+    """Content without words has no terms."""
+    self.assertEqual(self.tokenizer.index_terms(content), set())
+    self.assertIsNone(self.tokenizer.query_terms(content))
+
+  @data(
+      (u"Contr", {u"contr"}),
+      (u"big-control", {u"big", u"control"}),
+      (u"x" * 100, {u"x" * 64}),
+  )
+  @unpack
+  def test_query_terms(self, text, expected):
+    """Search words are looked up as whole terms."""
+    self.assertEqual(self.tokenizer.query_terms(text), expected)
+
+  def test_short_query_word(self):
+    """Words shorter than minimal term length can't use the index."""
+    self.assertIsNone(self.tokenizer.query_terms(u"a control"))
+
+  def test_query_terms_are_indexed(self):
+    """Query terms for a prefix of the content are all indexed."""
+    content = u"Internal access control for {}".format(u"y" * 80)
+    indexed = self.tokenizer.index_terms(content)
+    for text in (u"inter", u"access contr", u"y" * 70):
+      self.assertTrue(self.tokenizer.query_terms(text) <= indexed)
+
+
+@ddt
+class TestNgramTokenizer(unittest.TestCase):
+  """Test cases for n-gram tokenizer."""
+
+  def setUp(self):
+    self.tokenizer = tokenizer.NgramTokenizer()
+
+  def test_index_terms(self):
+    """Word trigrams are indexed."""
+    self.assertEqual(
+        self.tokenizer.index_terms(u"Audit of"),
+        {u"aud", u"udi", u"dit"},
+    )
+
+  def test_infix_match(self):
+    """Words are found inside longer indexed words."""
+    indexed = self.tokenizer.index_terms(u"Controls")
+    self.assertTrue(self.tokenizer.query_terms(u"trol") <= indexed)
+    self.assertFalse(self.tokenizer.query_terms(u"trolx") <= indexed)
+
+  @data(u"ol", u"ol trol", u"a control")
+  def test_short_query_word(self, text):
+    """Words shorter than ngram size are not resolved as prefixes."""
+    indexed = self.tokenizer.index_terms(u"Control")
+    query_terms = self.tokenizer.query_terms(text)
+    self.assertTrue(query_terms is None or query_terms <= indexed)
+
+  def test_only_short_query_words(self):
+    self.assertIsNone(self.tokenizer.query_terms(u"ol of"))
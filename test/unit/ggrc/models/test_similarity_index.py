@@ -0,0 +1,65 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Unit tests for the similarity index helpers."""
+
+import unittest
+
+from mock import MagicMock
+from mock import patch
+
+from ggrc import app  # noqa - this is neede for imports to work
+from ggrc.models import all_models
+from ggrc.models import similarity_index
+from ggrc.models.hooks import similarity_index as hooks
+
+
+class TestSimilarityIndex(unittest.TestCase):
+  """Tests for building and marking similarity index rows."""
+
+  def test_index_rows_mirrored(self):
+    """Weights are stored in both directions."""
+    rows = similarity_index.get_index_rows(
+        all_models.Assessment, {1: {2: 3, 4: 1}, 2: {1: 3}})
+    self.assertEqual(
+        [(row["object_id"], row["similar_id"], row["weight"]) for row in rows],
+        [(1, 2, 3), (1, 4, 1), (2, 1, 3), (4, 1, 1)],
+    )
+    self.assertEqual({row["object_type"] for row in rows}, {"Assessment"})
+
+  def test_index_rows_not_mirrored(self):
+    rows = similarity_index.get_index_rows(
+        all_models.Assessment, {1: {2: 3}}, mirror=False)
+    self.assertEqual(
+        [(row["object_id"], row["similar_id"]) for row in rows], [(1, 2)])
+
+  @patch("ggrc.models.similarity_index.db")
+  def test_mark_changed(self, db):
+    """Only objects of indexed types are marked."""
+    session = db.session.return_value
+    session.info = {}
+    with patch("ggrc.settings.SIMILARITY_INDEX_ENABLED", True, create=True):
+      similarity_index.mark_changed([("Assessment", 1), ("Snapshot", 2)])
+      similarity_index.mark_changed([("Assessment", 3)])
+    self.assertEqual(session.info[similarity_index.CHANGED_KEY],
+                     {("Assessment", 1), ("Assessment", 3)})
+    similarity_index.clear_changed(session)
+    self.assertEqual(session.info, {})
+
+  @patch("ggrc.models.similarity_index.db")
+  def test_mark_changed_disabled(self, db):
+    session = db.session.return_value
+    session.info = {}
+    with patch("ggrc.settings.SIMILARITY_INDEX_ENABLED", False, create=True):
+      similarity_index.mark_changed([("Assessment", 1)])
+    self.assertEqual(session.info, {})
+
+  def test_rollback(self):
+    """Marked objects are kept after a rollback of a savepoint only."""
+    session = MagicMock(info={similarity_index.CHANGED_KEY: {("Audit", 1)}})
+    session.transaction.nested = True
+    hooks._clear_changed(session)  # pylint: disable=protected-access
+    self.assertIn(similarity_index.CHANGED_KEY, session.info)
+    session.transaction.nested = False
+    hooks._clear_changed(session)  # pylint: disable=protected-access
+    self.assertEqual(session.info, {})
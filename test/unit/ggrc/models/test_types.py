@@ -0,0 +1,80 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Unit tests for custom column types and their codecs."""
+
+import pickle
+import unittest
+
+import ddt
+import mock
+
+from ggrc import app  # noqa - this is neede for imports to work
+from ggrc.models import exceptions
+from ggrc.models import types
+
+
+VALUE = {
+    "content": u"Imported \u2713 " * 100,
+    "status_code": 200,
+    "headers": [("Content-Type", "text/html")],
+}
+
+
+@ddt.ddt
+class TestCompressedType(unittest.TestCase):
+  """Tests for versioned values of CompressedType."""
+
+  def setUp(self):
+    self.column_type = types.CompressedType()
+
+  @ddt.data(0, 1, 6, 9)
+  def test_round_trip(self, level):
+    """Values written with any level are read back."""
+    with mock.patch.object(types.settings, "COMPRESSED_TYPE_LEVEL", level,
+                           create=True):
+      data = self.column_type.process_bind_param(VALUE, None)
+    self.assertEqual(self.column_type.process_result_value(data, None), VALUE)
+
+  def test_compressed(self):
+    data = self.column_type.process_bind_param(VALUE, None)
+    self.assertEqual(data[:1], types.ZlibPickleCodec.version)
+    self.assertLess(len(data), len(pickle.dumps(VALUE)) / 10)
+
+  @ddt.data(VALUE, None, [1, 2], "text")
+  def test_legacy_rows(self, value):
+    """Plain pickles stored without a version byte stay readable."""
+    self.assertEqual(
+        self.column_type.process_result_value(pickle.dumps(value), None),
+        value)
+
+  def test_too_long(self):
+    with mock.patch.object(types.CompressedType, "MAX_BINARY_LENGTH", 10):
+      with self.assertRaises(exceptions.ValidationError):
+        self.column_type.process_bind_param(VALUE, None)
+
+
+class TestJsonType(unittest.TestCase):
+  """Tests for Json column types."""
+
+  def test_round_trip(self):
+    column_type = types.LongJsonType()
+    data = column_type.process_bind_param(VALUE, None)
+    self.assertIsInstance(data, basestring)
+    self.assertEqual(column_type.process_result_value(data, None), {
+        "content": VALUE["content"],
+        "status_code": 200,
+        "headers": [["Content-Type", "text/html"]],
+    })
+    self.assertIsNone(column_type.process_result_value(None, None))
+
+  def test_strings(self):
+    """Strings are stored as they are."""
+    self.assertEqual(types.JsonType().process_bind_param(u"[1]", None), u"[1]")
+
+  def test_too_long(self):
+    """Values longer than the limit are not stored."""
+    length = len(types.JsonCodec(10 ** 6).encode(VALUE).encode("utf-8"))
+    with self.assertRaises(exceptions.ValidationError):
+      types.JsonCodec(length - 1).encode(VALUE)
+    self.assertTrue(types.JsonCodec(length).encode(VALUE))
@@ -0,0 +1,92 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Unit tests for the daily digest pipeline."""
+
+from datetime import date
+import unittest
+
+from mock import patch
+
+from ggrc import app  # noqa - this is neede for imports to work
+from ggrc.notifications import digest
+from ggrc.notifications.mail import LocalMailBackend
+from ggrc.notifications.mail import MailBatchError
+from ggrc.notifications.mail import MailMessage
+
+
+class FailingMailBackend(LocalMailBackend):
+  """Mail backend that fails after sending a number of messages."""
+
+  def __init__(self, limit):
+    super(FailingMailBackend, self).__init__(None)
+    self.limit = limit
+
+  def send_batch(self, messages):
+    for message in messages:
+      if len(self.outbox) == self.limit:
+        raise MailBatchError(messages[:messages.index(message)],
+                             Exception("quota"))
+      self.outbox.append(message)
+    return list(messages)
+
+
+class TestDigestPipeline(unittest.TestCase):
+  """Tests for sending daily digests in batches."""
+
+  def setUp(self):
+    self.messages = [
+        MailMessage("user{}@example.com".format(i), "subject",
+                    "body {}".format(i))
+        for i in range(5)
+    ]
+    patcher = patch.object(digest.DigestPipeline, "_record",
+                           autospec=True, side_effect=self._record)
+    patcher.start()
+    self.addCleanup(patcher.stop)
+    self.recorded = {}
+
+  def _record(self, pipeline, messages):
+    for message in messages:
+      self.recorded[message.to] = digest.content_hash(message)
+    pipeline.sent.extend(message.to for message in messages)
+
+  def _pipeline(self, backend):
+    return digest.DigestPipeline(today=date(2017, 10, 18),
+                                 backend=backend, workers=0,
+                                 batch_size=2)
+
+  def _send(self, pipeline):
+    with patch.object(digest.DigestPipeline, "_get_sent_hashes",
+                      return_value=dict(self.recorded)):
+      pipeline.send(self.messages)
+
+  def test_send_in_batches(self):
+    """All messages are sent and recorded."""
+    backend = LocalMailBackend(None)
+    pipeline = self._pipeline(backend)
+    self._send(pipeline)
+    self.assertEqual(backend.outbox, self.messages)
+    self.assertEqual(pipeline.sent, [m.to for m in self.messages])
+    self.assertEqual(pipeline.skipped, [])
+
+  def test_resume_after_failure(self):
+    """Messages sent before a failure are not sent again."""
+    failing = FailingMailBackend(3)
+    with self.assertRaises(MailBatchError):
+      self._send(self._pipeline(failing))
+    self.assertEqual(sorted(self.recorded),
+                     [m.to for m in self.messages[:3]])
+
+    backend = LocalMailBackend(None)
+    pipeline = self._pipeline(backend)
+    self._send(pipeline)
+    self.assertEqual(backend.outbox, self.messages[3:])
+    self.assertEqual(pipeline.skipped, [m.to for m in self.messages[:3]])
+
+  def test_changed_digest_is_sent(self):
+    """A digest with different content than the recorded one is sent."""
+    self.recorded[self.messages[0].to] = "0" * 40
+    backend = LocalMailBackend(None)
+    self._send(self._pipeline(backend))
+    self.assertEqual(backend.outbox, self.messages)
@@ -14,16 +14,21 @@ class TestNotificationsInit(unittest.TestCase):
 
   @patch("ggrc.notifications.common.deleted_task_rels_cache")
   @patch("ggrc.notifications.common.cycle_tasks_cache")
-  @patch("ggrc.notifications.common.get_filter_data")
-  def test_get_notification_data(self, get_filter_data, *cache_mocks):
+  @patch("ggrc.notifications.common.should_receive")
+  @patch("ggrc.notifications.common.prefetch_people")
+  @patch("ggrc.notifications.common.Services.call_service")
+  def test_get_notification_data(self, call_service, prefetch_people,
+                                 should_receive, *cache_mocks):
     """ Test that data does not contain empty emails """
     for cache_func in cache_mocks:
       cache_func.return_value = {}
 
-    get_filter_data.return_value = {
-        "email@example.com": {},
-        "": {},
+    call_service.return_value = {
+        "email@example.com": {"user": {"id": 1}},
+        "": {"user": {"id": 2}},
     }
+    should_receive.return_value = True
     notification_data = common.get_notification_data([1, 2])
     self.assertIn("email@example.com", notification_data)
     self.assertNotIn("", notification_data)
+    prefetch_people.assert_called_once_with({1, 2}, {})
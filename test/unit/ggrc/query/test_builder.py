@@ -1,10 +1,15 @@
 # Copyright (C) 2017 Google Inc.
 # Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
 
+import datetime
 import unittest
+
 import mock
+import sqlalchemy as sa
 
+from ggrc import app  # noqa - this is neede for imports to work
 from ggrc.query import builder
+from ggrc.query.exceptions import BadQueryException
 
 
 class TestQueryHelper(unittest.TestCase):
@@ -60,3 +65,43 @@ class TestQueryHelper(unittest.TestCase):
 
     for expected_result, expression in expressions:
       self.assertEqual(expected_result, helper._expression_keys(expression))
+
+
+class TestKeysetPagination(unittest.TestCase):
+  """Tests for cursors and keyset conditions."""
+
+  def setUp(self):
+    table = sa.sql.table("t", sa.sql.column("a"), sa.sql.column("b"),
+                         sa.sql.column("id"))
+    self.orders = [(table.c.a, False), (table.c.b, True), (table.c.id, False)]
+
+  @staticmethod
+  def compile(condition):
+    compiled = condition.compile(compile_kwargs={"literal_binds": True})
+    return str(compiled)
+
+  def test_cursor(self):
+    """Cursors keep sort values and reject invalid input."""
+    values = [u"title", None, 3, u"2017-01-02 03:04:05"]
+    self.assertEqual(builder.decode_cursor(builder.encode_cursor(values)),
+                     values)
+    self.assertEqual(
+        builder.decode_cursor(builder.encode_cursor(
+            [datetime.datetime(2017, 1, 2, 3, 4, 5)])),
+        [u"2017-01-02 03:04:05"])
+    for cursor in ["not a cursor", builder.encode_cursor({"a": 1})]:
+      with self.assertRaises(BadQueryException):
+        builder.decode_cursor(cursor)
+
+  def test_keyset_condition(self):
+    """Rows after the cursor are compared column by column."""
+    self.assertEqual(
+        self.compile(builder.keyset_condition(self.orders, [1, 2, 5])),
+        "t.a > 1 OR t.a = 1 AND (t.b < 2 OR t.b IS NULL) OR "
+        "t.a = 1 AND t.b = 2 AND t.id > 5")
+    self.assertEqual(
+        self.compile(builder.keyset_condition(self.orders, [None, None, 5])),
+        "t.a IS NOT NULL OR "
+        "t.a IS NULL AND t.b IS NULL AND t.id > 5")
+    with self.assertRaises(BadQueryException):
+      builder.keyset_condition(self.orders, [1, 5])
@@ -0,0 +1,129 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Unit tests for PermissionIndex."""
+
+import itertools
+import unittest
+
+import mock
+
+from ggrc import app  # noqa - this is neede for imports to work
+from ggrc.rbac import permission_index
+from ggrc.rbac import permissions_provider
+from ggrc.rbac.permission_index import PermissionIndex
+
+
+PERMISSIONS = {
+    "read": {
+        "Control": {"contexts": [5, 3, 5], "resources": [10, 2]},
+        "Program": {"contexts": [None, 7]},
+        "__GGRC_ALL__": {"contexts": [8]},
+    },
+    "update": {
+        "Control": {
+            "contexts": [],
+            "conditions": {
+                None: [{"condition": "forbid",
+                        "terms": {"blacklist": ["Audit"]}}],
+                3: [{"condition": "contains",
+                     "terms": {"list_property": "owners",
+                               "value": "$current_user"}}],
+            },
+        },
+    },
+    "__GGRC_ADMIN__": {},
+    "__user": "user@example.com",
+}
+
+
+class TestPermissionIndex(unittest.TestCase):
+  """Tests for building, checking and serializing permission indexes."""
+
+  def setUp(self):
+    self.index = PermissionIndex.from_permissions(PERMISSIONS)
+
+  def test_membership(self):
+    """Contexts and resources are found with and without all contexts."""
+    self.assertTrue(self.index.has_context("read", "Control", 3))
+    self.assertFalse(self.index.has_context("read", "Control", 4))
+    self.assertFalse(self.index.has_context("read", "Control", None))
+    self.assertTrue(self.index.has_context("read", "Program", None))
+    self.assertTrue(self.index.has_all_contexts("read", "Program"))
+    self.assertFalse(self.index.has_all_contexts("read", "Control"))
+    self.assertTrue(self.index.has_resource("read", "Control", 10))
+    self.assertFalse(self.index.has_resource("read", "Control", 11))
+    self.assertFalse(self.index.has_resource("delete", "Control", 10))
+    self.assertTrue(self.index.has_action("update", "Control"))
+    self.assertFalse(self.index.has_action("__GGRC_ADMIN__", "Control"))
+    self.assertEqual(self.index.contexts("read", "Program"), [None, 7])
+    self.assertEqual(self.index.contexts("read", "Control"), [3, 5])
+    self.assertEqual(self.index.resources("read", "Control"), [2, 10])
+
+  def test_round_trip(self):
+    """Binary serialization keeps all permissions."""
+    data = self.index.dumps()
+    self.assertIsInstance(data, str)
+    loaded = PermissionIndex.loads(data)
+    self.assertEqual(loaded.dumps(), data)
+    permissions = loaded.to_permissions()
+    self.assertEqual(permissions, self.index.to_permissions())
+    self.assertEqual(permissions["read"]["Control"],
+                     {"contexts": [3, 5], "resources": [2, 10]})
+    self.assertEqual(permissions["update"]["Control"]["contexts"], [])
+    self.assertEqual(
+        permissions["update"]["Control"]["conditions"],
+        PERMISSIONS["update"]["Control"]["conditions"])
+    self.assertEqual(permissions["__GGRC_ADMIN__"], {})
+    self.assertNotIn("__user", permissions)
+
+  def test_unsupported_version(self):
+    data = self.index.dumps()
+    with mock.patch.object(permission_index, "FORMAT_VERSION", 2):
+      with self.assertRaises(ValueError):
+        PermissionIndex.loads(data)
+
+  def test_merge(self):
+    """Merged index has contexts and resources of both indexes."""
+    other = PermissionIndex.from_permissions({
+        "read": {"Control": {"resources": [3, 10]}},
+        "delete": {"Control": {"resources": [3]}},
+    })
+    merged = self.index.merge(other)
+    self.assertEqual(merged.resources("read", "Control"), [2, 3, 10])
+    self.assertEqual(merged.contexts("read", "Control"), [3, 5])
+    self.assertTrue(merged.has_resource("delete", "Control", 3))
+    self.assertEqual(
+        merged.to_permissions()["update"]["Control"]["conditions"],
+        PERMISSIONS["update"]["Control"]["conditions"])
+
+
+class TestPermissionMatch(unittest.TestCase):
+  """Indexed permission checks give the same answers as dict lookups."""
+
+  @staticmethod
+  def dict_match(permission, permissions):
+    """Permission check on the permissions dict."""
+    def get(resource_type, key):
+      return permissions.get(permission.action, {})\
+          .get(resource_type, {}).get(key, [])
+    return (None in get(permission.resource_type, "contexts") or
+            permission.resource_id in get(permission.resource_type,
+                                          "resources") or
+            permission.context_id in get(permission.resource_type,
+                                         "contexts") or
+            permission.context_id in get("__GGRC_ALL__", "contexts"))
+
+  def test_permission_match(self):
+    # pylint: disable=protected-access
+    provider = permissions_provider.DefaultUserPermissions()
+    with app.app.test_request_context():
+      for action, resource_type, resource_id, context_id in itertools.product(
+          ["read", "update", "delete"], ["Control", "Program", "Audit"],
+          [None, 2, 3, 10], [None, 3, 7, 8]):
+        permission = permissions_provider.Permission(
+            action, resource_type, resource_id, context_id)
+        self.assertEqual(
+            provider._permission_match(permission, PERMISSIONS),
+            self.dict_match(permission, PERMISSIONS),
+            permission)
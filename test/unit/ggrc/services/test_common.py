@@ -58,14 +58,14 @@ class TestGetRevisionsList(TestCase):
     with mock.patch.object(common, "get_cache") as mock_get_cache:
       cache_mock = mock_get_cache.return_value
       cache_mock.new = new
-      cache_mock.deleted = deleted
+      cache_mock.deleted = {obj: obj.log_json() for obj in deleted}
       cache_mock.dirty = dirty
       yield cache_mock
       mock_get_cache.assert_called_once_with()
 
   def get_log_revisions(self, obj=None):
     # pylint: disable=protected-access
-    return common._get_log_revisions(self.FAKE_USER_ID, obj, bool(obj))
+    return common._get_log_revisions(obj, bool(obj))
 
   # pylint: disable=too-many-arguments
   @staticmethod
@@ -130,6 +130,24 @@ class TestGetRevisionsList(TestCase):
           expected_results,
           [r.action for r in self.get_log_revisions(dirty[0])])
 
+  def test_cached_content(self):
+    """Only log_json of deleted objects is reused from the cache."""
+    new = self.populate_object_list(1)
+    deleted = self.populate_object_list(1)
+    dirty = self.populate_object_list(1)
+    with self.mock_get_cache(new, deleted, dirty):
+      self.assertEqual(
+          [(r.obj, r.action, r.content) for r in self.get_log_revisions()],
+          [(new[0], "created", None),
+           (dirty[0], "modified", None),
+           (deleted[0], "deleted", "{}")])
+
+  def test_skip_events(self):
+    """Flushed events don't get revisions."""
+    new = self.populate_object_list(1) + [mock.MagicMock(spec=models.Event)]
+    with self.mock_get_cache(new, [], []):
+      self.assertEqual([r.obj for r in self.get_log_revisions()], new[:1])
+
 
 class TestFilterResource(TestCase):
   """Tests for common.filter_resource"""
@@ -149,3 +167,94 @@ class TestFilterResource(TestCase):
                                  depth=1,
                                  user_permissions=object())
     self.assertIsNone(res)
+
+  @staticmethod
+  def make_stub(type_, id_, context_id=None):
+    return {"type": type_, "id": id_, "context_id": context_id}
+
+  def make_relationships(self):
+    return [
+        {"type": "Relationship", "id": index, "context": None,
+         "source": self.make_stub("Control", index % 2),
+         "destination": self.make_stub("Program", 1, 5)}
+        for index in range(4)
+    ]
+
+  @mock.patch("ggrc.services.common._is_creator", return_value=False)
+  def test_filter_nested(self, _):
+    """Objects without type grants are checked once and pruned."""
+    user_permissions = mock.Mock()
+    user_permissions.is_allowed_read.side_effect = (
+        lambda type_, id_, _: id_ is not None and
+        (type_, id_) not in {("Relationship", 3), ("Control", 1)})
+    res = common.filter_resource(self.make_relationships(),
+                                 user_permissions=user_permissions)
+    self.assertEqual([r["id"] for r in res], [0, 1, 2])
+    self.assertEqual([r["source"] for r in res], [
+        self.make_stub("Control", 0), None, self.make_stub("Control", 0)])
+    # 3 types and contexts, 4 relationships, 2 controls and a program
+    self.assertEqual(user_permissions.is_allowed_read.call_count, 10)
+
+  @mock.patch("ggrc.services.common._is_creator", return_value=False)
+  def test_filter_type_permissions(self, _):
+    """Read permission is checked once per type and context."""
+    user_permissions = mock.Mock()
+    user_permissions.is_allowed_read.side_effect = (
+        lambda type_, id_, _: type_ != "Control" or id_ == 0)
+    res = common.filter_resource(self.make_relationships(),
+                                 user_permissions=user_permissions)
+    self.assertEqual([r["source"] for r in res], [
+        self.make_stub("Control", 0), None] * 2)
+    self.assertItemsEqual(
+        user_permissions.is_allowed_read.call_args_list, [
+            mock.call("Relationship", None, None),
+            mock.call("Control", None, None),
+            mock.call("Control", 0, None),
+            mock.call("Control", 1, None),
+            mock.call("Program", None, 5),
+        ])
+
+  @mock.patch("ggrc.services.common._is_creator", return_value=True)
+  @mock.patch("ggrc.services.common.permissions")
+  def test_filter_creator_relationships(self, permissions, _):
+    """Creator sees relationships with readable source and destination."""
+    permissions.read_contexts_for.side_effect = (
+        lambda type_: None if type_ == "Program" else [])
+    permissions.read_resources_for.return_value = [0]
+    user_permissions = mock.Mock()
+    user_permissions.is_allowed_read.return_value = True
+    res = common.filter_resource(self.make_relationships(),
+                                 user_permissions=user_permissions)
+    self.assertEqual([r["id"] for r in res], [0, 2])
+    self.assertEqual(permissions.read_contexts_for.call_count, 2)
+
+
+class TestGetPermissionCacheKeys(TestCase):
+  """Tests for common.get_permission_cache_keys"""
+
+  @staticmethod
+  def make_object(type_, **kwargs):
+    return type(type_, (object,), kwargs)()
+
+  @mock.patch("ggrc.services.common._changed_person_ids",
+              side_effect=lambda obj: {obj.person_id})
+  def test_person_changes(self, _):
+    """Role assignments and ACL entries invalidate only their person."""
+    self.assertEqual(
+        common.get_permission_cache_keys([
+            self.make_object("UserRole", person_id=1),
+            self.make_object("AccessControlList", person_id=3),
+            self.make_object("Person", id=4),
+            self.make_object("Control", id=5),
+        ]),
+        {"permissions:1", "permissions:4", "permissions:acl:3"},
+    )
+
+  @mock.patch("ggrc.services.common._changed_person_ids",
+              side_effect=lambda obj: {obj.person_id})
+  def test_shared_changes(self, _):
+    """Changes of contexts or roles invalidate all permissions."""
+    self.assertIsNone(common.get_permission_cache_keys([
+        self.make_object("AccessControlList", person_id=3),
+        self.make_object("Context", id=1),
+    ]))
@@ -0,0 +1,100 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Unit tests for bulk snapshot creation helpers."""
+
+from unittest import TestCase
+
+import mock
+
+from ggrc import app  # noqa - this is neede for imports to work
+from ggrc import snapshotter
+from ggrc.snapshotter import helpers
+from ggrc.snapshotter.datastructures import Pair
+from ggrc.snapshotter.datastructures import Stub
+
+
+AUDIT = Stub("Audit", 1)
+CONTROL1 = Stub("Control", 1)
+CONTROL2 = Stub("Control", 2)
+CONTROL3 = Stub("Control", 3)
+
+
+class TestGetRevisions(TestCase):
+  """Tests for resolving revisions of snapshot pairs."""
+
+  def setUp(self):
+    self.pairs = {Pair(AUDIT, CONTROL1), Pair(AUDIT, CONTROL2),
+                  Pair(AUDIT, CONTROL3)}
+    patcher = mock.patch.object(helpers, "db")
+    self.db = patcher.start()
+    self.addCleanup(patcher.stop)
+    self.history = self.db.session.query.return_value.filter.return_value
+
+  def test_latest(self):
+    """Pairs without a specified revision get the latest one."""
+    self.history.__iter__.return_value = iter([(12, "Control", 2)])
+    latest_revisions = {CONTROL1: 11, CONTROL3: 13}
+    with mock.patch.object(helpers, "get_latest_revisions",
+                           return_value=latest_revisions) as latest:
+      result = helpers.get_revisions(
+          self.pairs, {Pair(AUDIT, CONTROL2): 12})
+    latest.assert_called_once_with({CONTROL1, CONTROL3}, None)
+    self.assertEqual(result, {
+        Pair(AUDIT, CONTROL1): 11,
+        Pair(AUDIT, CONTROL2): 12,
+        Pair(AUDIT, CONTROL3): 13,
+    })
+
+  def test_missing_specified(self):
+    """Specified revisions must belong to the snapshotted object."""
+    self.history.__iter__.return_value = iter([(12, "Control", 1)])
+    with mock.patch.object(helpers, "get_latest_revisions", return_value={}):
+      result = helpers.get_revisions(
+          self.pairs, {Pair(AUDIT, CONTROL2): 12})
+    self.assertEqual(result, {})
+
+
+class TestExecute(TestCase):
+  """Tests for batched writes of the snapshot generator."""
+
+  @mock.patch.object(snapshotter, "db")
+  def test_batches(self, db):
+    """Rows are written in batches of the configured size."""
+    generator = snapshotter.SnapshotGenerator(dry_run=False)
+    generator.batch_size = 2
+    generator._execute("insert", range(5))  # pylint: disable=protected-access
+    self.assertEqual(db.engine.execute.call_args_list, [
+        mock.call("insert", [0, 1]),
+        mock.call("insert", [2, 3]),
+        mock.call("insert", [4]),
+    ])
+    db.session.commit.assert_called_once_with()
+
+
+class TestGetSnapshots(TestCase):
+  """Tests for looking up snapshots of pairs."""
+
+  def test_chunk_by_key(self):
+    """Last values are grouped by the other values in chunks."""
+    rows = {("Audit", 1, "Control", 3), ("Audit", 1, "Control", 1),
+            ("Audit", 1, "Market", 2), ("Audit", 1, "Control", 2)}
+    with mock.patch.object(helpers, "QUERY_CHUNK_SIZE", 2):
+      # pylint: disable=protected-access
+      self.assertEqual(helpers._chunk_by_key(rows), [
+          (("Audit", 1, "Control"), [1, 2]),
+          (("Audit", 1, "Control"), [3]),
+          (("Audit", 1, "Market"), [2]),
+      ])
+
+  @mock.patch.object(helpers, "db")
+  def test_query_per_child_type(self, db):
+    """Snapshots are queried by parent and child type."""
+    columns = db.session.query.return_value
+    columns.filter.return_value = ["snapshot"]
+    snapshots = helpers.get_snapshots([
+        Pair(AUDIT, CONTROL1), Pair(AUDIT, CONTROL2),
+        Pair(AUDIT, Stub("Market", 1)),
+    ])
+    self.assertEqual(snapshots, ["snapshot", "snapshot"])
+    self.assertEqual(columns.filter.call_count, 2)
@@ -0,0 +1,71 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Unit tests for the memoized html cleaner."""
+
+import unittest
+
+import ddt
+import mock
+
+from ggrc import app  # noqa - this is neede for imports to work
+from ggrc.cache.lrucache import LRUCache
+from ggrc.utils import html_cleaner
+
+
+@ddt.ddt
+class TestHtmlCleaner(unittest.TestCase):
+  """Tests for the fast path and the cache of the html cleaner."""
+
+  def setUp(self):
+    patcher = mock.patch.object(html_cleaner, "_cache",
+                                LRUCache(max_size=100, ttl=0))
+    self.cache = patcher.start()
+    self.addCleanup(patcher.stop)
+
+  @ddt.data(
+      u"Plain description\nwith two lines",
+      u"a > b, \"quoted\" and 'single' \u2713",
+      u"Line\r\nbreaks",
+      u"null \x00 character",
+      u"lone \ud800 surrogate",
+      u"Tom &amp; Jerry &lt;3",
+      u"<p>Allowed <b>tags</b></p><script>alert(1)</script>",
+      u"<a href='http://example.com' onclick='x()'>link</a>",
+      "byte string",
+  )
+  def test_same_as_bleach(self, value):
+    """Values are cleaned the same way as with bleach only."""
+    # pylint: disable=protected-access
+    self.assertEqual(html_cleaner.clean(value),
+                     html_cleaner._clean(unicode(value)))
+
+  def test_fast_path(self):
+    """Values without markup are not cleaned with bleach."""
+    with mock.patch.object(html_cleaner, "_clean") as clean:
+      value = u"a > b, plain text"
+      self.assertIs(html_cleaner.cleaner(None, value), value)
+      self.assertFalse(clean.called)
+    self.assertEqual(len(self.cache), 0)
+
+  def test_cache(self):
+    """Cleaned values are taken from the cache."""
+    with mock.patch.object(html_cleaner, "_clean",
+                           side_effect=lambda value: value.upper()) as clean:
+      for _ in range(3):
+        self.assertEqual(html_cleaner.clean(u"<b>x</b>"), u"<B>X</B>")
+    self.assertEqual(clean.call_count, 1)
+
+  def test_clean_all(self):
+    """Values cleaned in worker processes are cached."""
+    values = [u"<b>{}</b><script>x</script>".format(index)
+              for index in range(5)]
+    html_cleaner.clean_all(values + [u"plain", None, 1], workers=2)
+    self.assertEqual(len(self.cache), 5)
+    with mock.patch.object(html_cleaner, "_clean") as clean:
+      self.assertEqual(html_cleaner.clean(values[1]), u"<b>1</b>x")
+      self.assertFalse(clean.called)
+
+  def test_clean_all_without_workers(self):
+    html_cleaner.clean_all([u"<b>1</b>", u"<b>2</b>"], workers=0)
+    self.assertEqual(len(self.cache), 0)
@@ -0,0 +1,103 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Unit tests for the request profiler."""
+
+import unittest
+
+import sqlalchemy
+
+from ggrc import app  # noqa - this is neede for imports to work
+from ggrc.utils import as_json
+from ggrc.utils import benchmarks
+from ggrc.utils import profiler
+
+
+class TestProfiler(unittest.TestCase):
+  """Tests for recording request profiles."""
+
+  def setUp(self):
+    self.profiles = profiler.ProfileBuffer(2)
+
+  def _request(self, path, handler=None):
+    """Run a request through the middleware and return its profile."""
+    def wsgi_app(_, start_response):
+      start_response("200 OK", [])
+      if handler:
+        handler()
+      return ["body"]
+
+    middleware = profiler.ProfilerMiddleware(wsgi_app, self.profiles)
+    result = middleware({"REQUEST_METHOD": "GET", "PATH_INFO": path},
+                        lambda *args: None)
+    self.assertEqual(result, ["body"])
+    self.assertIsNone(profiler.get_current())
+    profiles = self.profiles.get_all()
+    return profiles[0] if profiles else None
+
+  def test_benchmark_tree(self):
+    """Nested benchmarks are recorded as a tree."""
+    def handler():
+      with benchmarks.BenchmarkContextManager("outer"):
+        with benchmarks.BenchmarkContextManager("inner"):
+          pass
+        as_json({"a": range(1000)})
+
+    result = self._request("/api/controls", handler).to_dict(full=True)
+    self.assertEqual(result["status"], "200 OK")
+    self.assertEqual(result["tree"]["message"], "GET /api/controls")
+    outer, = result["tree"]["children"]
+    self.assertEqual(outer["message"], "outer")
+    self.assertEqual([child["message"] for child in outer["children"]],
+                     ["inner"])
+    self.assertGreater(result["serialization_time"], 0)
+
+  def test_duplicate_statements(self):
+    """Statements executed more than once are reported as duplicates."""
+    def handler():
+      profile = profiler.get_current()
+      for _ in range(3):
+        profile.add_statement("SELECT * FROM people WHERE id = %s", 0.1)
+      profile.add_statement("SELECT * FROM controls", 0.5)
+
+    sql = self._request("/api/controls", handler).to_dict()["sql"]
+    self.assertEqual(sql["count"], 4)
+    self.assertEqual(sql["unique"], 2)
+    self.assertEqual(
+        [(item["statement"], item["count"]) for item in sql["duplicates"]],
+        [("SELECT * FROM people WHERE id = %s", 3)])
+    self.assertEqual(sql["slowest"][0]["statement"], "SELECT * FROM controls")
+
+  def test_cursor_hooks(self):
+    """Statements executed by an engine are recorded."""
+    engine = sqlalchemy.create_engine("sqlite://")
+    # pylint: disable=protected-access
+    sqlalchemy.event.listen(engine, "before_cursor_execute",
+                            profiler._before_cursor_execute)
+    sqlalchemy.event.listen(engine, "after_cursor_execute",
+                            profiler._after_cursor_execute)
+
+    def handler():
+      for _ in range(2):
+        engine.execute("SELECT 1").fetchall()
+
+    sql = self._request("/query", handler).to_dict()["sql"]
+    self.assertEqual(sql["count"], 2)
+    self.assertEqual(sql["duplicates"][0]["statement"], "SELECT 1")
+    engine.execute("SELECT 2")
+    self.assertEqual(self.profiles.get_all()[0].to_dict()["sql"]["count"], 2)
+
+  def test_ring_buffer(self):
+    """Only the last profiles are kept."""
+    for path in ("/first", "/second", "/third"):
+      self._request(path)
+    self.assertEqual([profile.path for profile in self.profiles.get_all()],
+                     ["/third", "/second"])
+
+  def test_skipped_paths(self):
+    self.assertIsNone(self._request("/admin/profiles"))
+
+  def test_not_recorded_outside_request(self):
+    """Benchmarks work without a profiled request."""
+    with benchmarks.BenchmarkContextManager("outside"):
+      self.assertIsNone(profiler.get_current())
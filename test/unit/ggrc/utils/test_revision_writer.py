@@ -0,0 +1,84 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Unit tests for the bulk revision writer."""
+
+import json
+import unittest
+
+import mock
+
+from ggrc import app  # noqa - this is neede for imports to work
+from ggrc.models.exceptions import ValidationError
+from ggrc.models.types import LongJsonType
+from ggrc.utils import revision_writer
+
+
+class Control(object):
+  """Revisioned object."""
+  # pylint: disable=too-few-public-methods
+
+  def __init__(self, id_):
+    self.id = id_  # pylint: disable=invalid-name
+    self.slug = "CONTROL-{}".format(id_)
+    self.log_calls = 0
+
+  def log_json(self):
+    self.log_calls += 1
+    return {"id": self.id, "access_control_list": [{"person_id": 3}]}
+
+
+class TestRevisionWriter(unittest.TestCase):
+  """Tests for writing revisions in batches."""
+
+  def setUp(self):
+    patcher = mock.patch.object(revision_writer, "db")
+    self.db = patcher.start()
+    self.addCleanup(patcher.stop)
+    self.writer = revision_writer.RevisionWriter(7, 2, batch_size=2)
+
+  def _inserted(self):
+    return [call[0][1] for call in self.db.session.execute.call_args_list]
+
+  def test_batches(self):
+    """Revisions are inserted in batches of batch_size rows."""
+    objects = [Control(id_) for id_ in range(5)]
+    for obj in objects:
+      self.writer.add(obj, "created")
+    self.assertEqual([len(rows) for rows in self._inserted()], [2, 2])
+    self.writer.get_ids()
+    self.assertEqual([len(rows) for rows in self._inserted()], [2, 2, 1])
+    self.assertEqual(self.writer.count, 5)
+    self.assertEqual([obj.log_calls for obj in objects], [1] * 5)
+
+  def test_row(self):
+    """Content is serialized once with person stubs of ACL entries."""
+    self.writer.add(Control(1), "modified")
+    self.writer.flush()
+    row, = self._inserted()[0]
+    self.assertEqual(row["resource_type"], "Control")
+    self.assertEqual(row["resource_slug"], "CONTROL-1")
+    self.assertEqual(row["event_id"], 7)
+    self.assertEqual(row["modified_by_id"], 2)
+    self.assertIsNone(row["source_type"])
+    self.assertEqual(json.loads(row["content"])["access_control_list"][0],
+                     {"person_id": 3, "person": {
+                         "id": 3, "type": "Person", "href": "/api/people/3"}})
+
+  def test_given_content(self):
+    """Known content is not computed again."""
+    obj = Control(1)
+    self.writer.add(obj, "deleted", {"id": 1})
+    self.writer.flush()
+    self.assertEqual(obj.log_calls, 0)
+    self.assertEqual(self._inserted()[0][0]["content"], '{"id": 1}')
+
+  def test_content_too_long(self):
+    with mock.patch.object(LongJsonType, "MAX_TEXT_LENGTH", 10):
+      with self.assertRaises(ValidationError):
+        self.writer.add(Control(1), "created")
+
+  def test_no_revisions(self):
+    self.assertEqual(self.writer.get_ids(), [])
+    self.assertFalse(self.db.session.execute.called)
+    self.assertFalse(self.db.session.query.called)
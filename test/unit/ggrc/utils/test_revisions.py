@@ -0,0 +1,37 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Tests for revision content hashing."""
+
+import datetime
+import unittest
+
+from ggrc import app  # noqa - this is neede for imports to work
+from ggrc.utils import revisions
+
+
+class TestContentHash(unittest.TestCase):
+  """Tests for content_hash."""
+
+  def test_stored_content(self):
+    """log_json and content loaded from the database hash the same."""
+    log_json = {
+        "id": 1,
+        "title": u"title \xe9",
+        "updated_at": datetime.datetime(2017, 1, 2, 3, 4, 5),
+        "owners": [{"id": 2, "type": "Person"}],
+    }
+    stored = {
+        "owners": [{"type": "Person", "id": 2}],
+        "updated_at": "2017-01-02T03:04:05",
+        "title": u"title \xe9",
+        "id": 1,
+    }
+    self.assertEqual(revisions.content_hash(log_json),
+                     revisions.content_hash(stored))
+
+  def test_changed_content(self):
+    self.assertNotEqual(revisions.content_hash({"title": "a"}),
+                        revisions.content_hash({"title": "b"}))
+    self.assertNotEqual(revisions.content_hash({"title": "a"}),
+                        revisions.content_hash(None))
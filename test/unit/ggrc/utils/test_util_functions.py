@@ -8,8 +8,11 @@
 
 import unittest
 
+import sqlalchemy as sa
 from mock import patch
+from sqlalchemy import orm
 
+from ggrc.utils import generate_id_chunks
 from ggrc.utils import get_url_root
 
 
@@ -45,3 +48,41 @@ class TestGetUrlRoot(unittest.TestCase):
         result = get_url_root()
 
     self.assertEqual(result, "http://www.default-root.com/")
+
+
+class TestGenerateIdChunks(unittest.TestCase):
+  """Test suite for the generate_id_chunks() function."""
+
+  def setUp(self):
+    engine = sa.create_engine("sqlite://")
+    metadata = sa.MetaData()
+    self.table = sa.Table("items", metadata,
+                          sa.Column("id", sa.Integer, primary_key=True))
+    metadata.create_all(engine)
+    engine.execute(self.table.insert(),
+                   [{"id": id_} for id_ in (1, 2, 5, 7, 8, 12, 13)])
+    self.session = orm.sessionmaker(bind=engine)()
+    self.query = self.session.query(self.table.c.id)
+
+  def test_chunks(self):
+    """Ids are returned in ordered chunks of the given size."""
+    self.assertEqual(
+        list(generate_id_chunks(self.query, self.table.c.id, chunk_size=3)),
+        [[1, 2, 5], [7, 8, 12], [13]],
+    )
+
+  def test_after_id(self):
+    """Iteration starts after the given id."""
+    self.assertEqual(
+        list(generate_id_chunks(self.query, self.table.c.id, chunk_size=3,
+                                after_id=7)),
+        [[8, 12, 13]],
+    )
+
+  def test_filtered_query(self):
+    """Filters of the query are kept for all chunks."""
+    query = self.query.filter(self.table.c.id % 2 == 1)
+    self.assertEqual(
+        list(generate_id_chunks(query, self.table.c.id, chunk_size=2)),
+        [[1, 5], [7, 13]],
+    )
@@ -0,0 +1,92 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Unit tests for the working day calendar."""
+
+from datetime import date
+from datetime import timedelta
+import unittest
+
+import ddt
+
+from ggrc import app  # noqa - this is neede for imports to work
+from ggrc_workflows.services import workday_calendar
+
+
+HOLIDAYS = {
+    date(2016, 12, 30),
+    date(2017, 1, 2),
+    date(2017, 7, 3),
+    date(2017, 7, 4),
+}
+
+
+@ddt.ddt
+class TestWorkdayCalendar(unittest.TestCase):
+  """Tests for working day lookups."""
+
+  def setUp(self):
+    self.calendar = workday_calendar.WorkdayCalendar(HOLIDAYS)
+
+  def _is_work_day(self, day):
+    return day.isoweekday() <= 5 and day not in HOLIDAYS
+
+  def _add_work_days(self, day, count):
+    """Reference implementation stepping over single days."""
+    step = timedelta(days=1 if count >= 0 else -1)
+    while not self._is_work_day(day):
+      day += step
+    for _ in range(abs(count)):
+      day += step
+      while not self._is_work_day(day):
+        day += step
+    return day
+
+  @ddt.data(
+      # (expected, day)
+      (date(2017, 7, 7), date(2017, 7, 7)),
+      (date(2017, 7, 7), date(2017, 7, 9)),
+      (date(2017, 6, 30), date(2017, 7, 4)),
+      (date(2016, 12, 29), date(2017, 1, 2)),
+      (date(2016, 12, 29), date(2017, 1, 1)),
+  )
+  @ddt.unpack
+  def test_previous_work_day(self, expected, day):
+    self.assertEqual(self.calendar.previous_work_day(day), expected)
+
+  @ddt.data(
+      # (expected, day)
+      (date(2017, 7, 5), date(2017, 7, 1)),
+      (date(2017, 1, 3), date(2016, 12, 30)),
+      (date(2017, 1, 3), date(2016, 12, 31)),
+      (date(2017, 7, 7), date(2017, 7, 7)),
+  )
+  @ddt.unpack
+  def test_next_work_day(self, expected, day):
+    self.assertEqual(self.calendar.next_work_day(day), expected)
+
+  def test_flags(self):
+    self.assertTrue(self.calendar.is_weekend(date(2017, 7, 1)))
+    self.assertFalse(self.calendar.is_weekend(date(2017, 7, 3)))
+    self.assertTrue(self.calendar.is_holiday(date(2017, 7, 3)))
+    self.assertFalse(self.calendar.is_work_day(date(2017, 7, 3)))
+    self.assertTrue(self.calendar.is_work_day(date(2017, 7, 5)))
+
+  @ddt.data(0, 1, 2, 5, 7, 30, 260, 700, -1, -3, -30, -300)
+  def test_add_work_days(self, count):
+    """Adding working days matches stepping over single days."""
+    for day in (date(2016, 12, 28) + timedelta(days=i) for i in range(10)):
+      self.assertEqual(self.calendar.add_work_days(day, count),
+                       self._add_work_days(day, count))
+
+  @ddt.data(
+      # (expected, day, count)
+      (date(2017, 8, 11), date(2017, 8, 10), 1),
+      (date(2017, 8, 14), date(2017, 8, 10), 2),
+      (date(2017, 8, 21), date(2017, 8, 10), 7),
+      (date(2017, 8, 25), date(2017, 8, 11), 10),
+      (date(2017, 1, 2), date(2016, 12, 30), 1),
+  )
+  @ddt.unpack
+  def test_add_weekdays(self, expected, day, count):
+    self.assertEqual(self.calendar.add_weekdays(day, count), expected)
@@ -0,0 +1,179 @@
+# Copyright (C) 2017 Google Inc.
+# Licensed under http://www.apache.org/licenses/LICENSE-2.0 <see LICENSE file>
+
+"""Unit tests for the in memory part of the bulk cycle generator."""
+
+from datetime import date
+from datetime import timedelta
+import unittest
+
+import mock
+
+from ggrc import app  # noqa - this is neede for imports to work
+from ggrc_workflows import cycle_generator
+
+
+class FakeTaskGroupTask(object):
+  """Task group task with the attributes used to plan cycle tasks."""
+  # pylint: disable=too-few-public-methods,too-many-instance-attributes
+
+  def __init__(self, id_, start_date, end_date):
+    self.id = id_
+    self.start_date = start_date
+    self.end_date = end_date
+    self.title = "task {}".format(id_)
+    self.description = "description {}".format(id_)
+    self.object_approval = False
+    self.sort_index = ""
+    self.contact_id = 1
+    self.task_type = "text"
+    self.response_options = []
+
+
+class FakeTaskGroupObject(object):
+  # pylint: disable=too-few-public-methods
+
+  def __init__(self, object_type, object_id):
+    self.object_type = object_type
+    self.object_id = object_id
+
+
+class FakeTaskGroup(object):
+  # pylint: disable=too-few-public-methods
+
+  def __init__(self, id_, tasks, objects):
+    self.id = id_
+    self.title = "group {}".format(id_)
+    self.description = ""
+    self.contact_id = 1
+    self.sort_index = ""
+    self.task_group_tasks = tasks
+    self.task_group_objects = objects
+
+
+class FakeWorkflow(object):
+  """Workflow whose adjusted dates are shifted by a week per cycle."""
+  # pylint: disable=too-few-public-methods,too-many-instance-attributes
+
+  def __init__(self, task_groups, is_old_workflow=False):
+    self.id = 1
+    self.context_id = 2
+    self.title = "workflow"
+    self.description = ""
+    self.is_verification_needed = True
+    self.is_old_workflow = is_old_workflow
+    self.kind = None
+    self.repeat_multiplier = 0
+    self.task_groups = task_groups
+
+  def calc_next_adjusted_date(self, setup_date):
+    return setup_date + timedelta(weeks=self.repeat_multiplier)
+
+
+class TestCycleGenerator(unittest.TestCase):
+  """Tests for cycle rows and notifications planned in memory."""
+  # pylint: disable=protected-access
+
+  def setUp(self):
+    self.objects = [FakeTaskGroupObject("Control", 1),
+                    FakeTaskGroupObject("Control", 2)]
+    self.task_groups = [
+        FakeTaskGroup(1, [FakeTaskGroupTask(1, date(2017, 1, 2),
+                                            date(2017, 1, 6)),
+                          FakeTaskGroupTask(2, date(2017, 1, 3),
+                                            date(2017, 1, 4))],
+                      self.objects),
+        FakeTaskGroup(2, [FakeTaskGroupTask(3, date(2017, 1, 9),
+                                            date(2017, 1, 13))], []),
+    ]
+
+  def test_plan_cycle(self):
+    """Cycle rows get the dates that update_cycle_dates would set."""
+    workflow = FakeWorkflow(self.task_groups)
+    workflow.repeat_multiplier = 1
+    plan = cycle_generator.CycleGenerator._plan_cycle(workflow, 5)
+    self.assertEqual(len(plan.groups), 2)
+    self.assertEqual([task["task_group_task_id"] for _, task, _ in plan.tasks],
+                     [1, 2, 3])
+    self.assertEqual([len(objects) for _, _, objects in plan.tasks],
+                     [2, 2, 0])
+    self.assertEqual(
+        (plan.groups[0]["start_date"], plan.groups[0]["end_date"],
+         plan.groups[0]["next_due_date"]),
+        (date(2017, 1, 9), date(2017, 1, 13), date(2017, 1, 11)))
+    self.assertEqual(
+        (plan.cycle["start_date"], plan.cycle["end_date"],
+         plan.cycle["next_due_date"]),
+        (date(2017, 1, 9), date(2017, 1, 20), date(2017, 1, 11)))
+    self.assertTrue(plan.cycle["is_current"])
+    self.assertEqual(plan.cycle["modified_by_id"], 5)
+
+  def test_plan_old_style_cycle(self):
+    """Old workflows get a cycle task for every mapped object."""
+    workflow = FakeWorkflow(self.task_groups, is_old_workflow=True)
+    plan = cycle_generator.CycleGenerator._plan_cycle(workflow, 5)
+    self.assertEqual(
+        [(task["task_group_task_id"], objects)
+         for _, task, objects in plan.tasks],
+        [(1, [("Control", 1)]), (1, [("Control", 2)]),
+         (2, [("Control", 1)]), (2, [("Control", 2)]),
+         (3, [])])
+
+  def test_plan_empty_cycle(self):
+    """Cycles without tasks are not current."""
+    workflow = FakeWorkflow([FakeTaskGroup(1, [], self.objects)])
+    plan = cycle_generator.CycleGenerator._plan_cycle(workflow, 5)
+    self.assertFalse(plan.cycle["is_current"])
+    self.assertIsNone(plan.cycle["start_date"])
+
+  def test_notification_row(self):
+    """Notifications are planned only if they are still to be sent."""
+    generator = cycle_generator.CycleGenerator(today=date(2017, 1, 10))
+    types = {
+        "cycle_task_due_today": mock.Mock(id=1, advance_notice=0),
+        "cycle_task_overdue": mock.Mock(id=2, advance_notice=-1),
+        "week_cycle_task_due_in": mock.Mock(id=3, advance_notice=3),
+    }
+    with mock.patch.object(cycle_generator.pusher, "get_notification_type",
+                           side_effect=types.get):
+      row = generator._notification_row(
+          "CycleTaskGroupObjectTask", 7, "week_cycle_task_due_in",
+          date(2017, 1, 12))
+      self.assertIsNone(row)
+      row = generator._notification_row(
+          "CycleTaskGroupObjectTask", 7, "cycle_task_due_today",
+          date(2017, 1, 12))
+      self.assertEqual(row["send_on"], date(2017, 1, 12))
+      self.assertFalse(row["repeating"])
+      row = generator._notification_row(
+          "CycleTaskGroupObjectTask", 7, "cycle_task_overdue",
+          date(2017, 1, 5))
+      self.assertEqual(row["send_on"], date(2017, 1, 10))
+      self.assertTrue(row["repeating"])
+      self.assertIsNone(generator._notification_row(
+          "CycleTaskGroupObjectTask", 7, "unknown", date(2017, 1, 12)))
+
+  def test_revisions(self):
+    """Revisions are written with the shared revision writer."""
+    generator = cycle_generator.CycleGenerator(today=date(2017, 1, 2))
+    models = cycle_generator.models
+    workflow = mock.Mock()
+    created = {models.Cycle: [1], models.CycleTaskGroup: [],
+               models.CycleTaskGroupObjectTask: [],
+               cycle_generator.all_models.Relationship: []}
+    cycle = mock.Mock()
+    with mock.patch.object(cycle_generator, "db"), \
+        mock.patch.object(cycle_generator.all_models, "Event"), \
+        mock.patch.object(models.Cycle, "eager_query") as eager_query, \
+        mock.patch.object(cycle_generator, "RevisionWriter") as writer:
+      eager_query.return_value.filter.return_value = [cycle]
+      generator._write_revisions(workflow, 5, created)
+    writer.return_value.add.assert_has_calls([
+        mock.call(workflow, "modified"), mock.call(cycle, "created")])
+    writer.return_value.flush.assert_called_once_with()
+
+  def test_slug_prefixes(self):
+    """Slug prefixes are resolved from the class."""
+    self.assertEqual(cycle_generator.models.CycleTaskGroup.get_slug_prefix(),
+                     "CYCLEGROUP")
+    self.assertEqual(cycle_generator.models.Cycle.get_slug_prefix(), "CYCLE")